@@ -0,0 +1,111 @@
+# Compares throughput of backup archive compressions on a generated
+# snapshots set (random data interleaved with repeated tuple-like records,
+# so it's compressed about twice, as memtx snapshots usually are).
+# Parallel gzip uses all CPU cores.
+# Run from the repository root:
+#   python -m benchmarks.bench_backup_compression [total_size_mb] [files_count]
+
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import module_utils.helpers as helpers
+import module_utils.backup_archive as backup_archive
+
+sys.modules['ansible.module_utils.helpers'] = helpers
+sys.modules['ansible.module_utils.backup_archive'] = backup_archive
+import module_utils.backup_manifest as backup_manifest  # noqa: E402
+import module_utils.hardlink_backup as hardlink_backup  # noqa: E402
+
+sys.modules['ansible.module_utils.backup_manifest'] = backup_manifest
+sys.modules['ansible.module_utils.hardlink_backup'] = hardlink_backup
+from library.cartridge_backup_instance import backup_pack  # noqa: E402
+
+DEFAULT_TOTAL_SIZE_MB = 2048
+DEFAULT_FILES_COUNT = 8
+CHUNK_SIZE = 1024 * 1024
+
+COMPRESSIONS = [
+    (backup_archive.COMPRESSION_NONE, 9),
+    (backup_archive.COMPRESSION_GZIP, 9),
+    (backup_archive.COMPRESSION_GZIP, 6),
+    (backup_archive.COMPRESSION_GZIP, 1),
+    (backup_archive.COMPRESSION_PARALLEL_GZIP, 6),
+    (backup_archive.COMPRESSION_PARALLEL_GZIP, 1),
+]
+
+
+def write_snapshot(path, size):
+    record = b'\x93\xcd\x01\x00\xa9user-name\xb2tuple-field-value\x00'
+    with open(path, 'wb') as f:
+        for _ in range(size // CHUNK_SIZE):
+            random_part = os.urandom(CHUNK_SIZE // 2)
+            f.write(random_part)
+            f.write((record * (CHUNK_SIZE // 2 // len(record) + 1))[:CHUNK_SIZE // 2])
+
+
+def measure(func):
+    time_start = time.time()
+    res = func()
+    return time.time() - time_start, res
+
+
+def main():
+    total_size = (int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_TOTAL_SIZE_MB) * 1024 * 1024
+    files_count = int(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_FILES_COUNT
+    file_size = total_size // files_count // CHUNK_SIZE * CHUNK_SIZE
+    total_mb = file_size * files_count / 1024.0 / 1024
+
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        memtx_dir = os.path.join(tmp_dir, 'memtx', 'myapp.instance-1')
+        backups_dir = os.path.join(tmp_dir, 'backups')
+        os.makedirs(memtx_dir)
+        os.makedirs(backups_dir)
+
+        for i in range(files_count):
+            write_snapshot(os.path.join(memtx_dir, '%020d.snap' % i), file_size)
+
+        print('snapshots: %d x %d MB, CPU cores: %d' % (
+            files_count, file_size // 1024 // 1024, multiprocessing.cpu_count(),
+        ))
+        print('%-16s %6s %10s %12s %8s %14s' % (
+            'compression', 'level', 'pack, s', 'pack, MB/s', 'ratio', 'unpack, MB/s',
+        ))
+
+        for compression, compression_level in COMPRESSIONS:
+            pack_time, archive_path = measure(lambda: backup_pack(
+                'myapp.instance-1', backups_dir, [memtx_dir], compression, compression_level,
+            ))
+            archive_size = os.path.getsize(archive_path)
+
+            # Files are read without extracting, because paths in archive are relative to `/`
+            def read_archive():
+                with backup_archive.open_archive(archive_path, stream=True) as tar:
+                    for member in tar:
+                        if member.isfile():
+                            f = tar.extractfile(member)
+                            while f.read(CHUNK_SIZE):
+                                pass
+
+            unpack_time, _ = measure(read_archive)
+
+            print('%-16s %6s %10.1f %12.1f %8.2f %14.1f' % (
+                compression,
+                compression_level if compression != backup_archive.COMPRESSION_NONE else '-',
+                pack_time,
+                total_mb / pack_time,
+                total_mb * 1024 * 1024 / archive_size,
+                total_mb / unpack_time,
+            ))
+
+            os.remove(archive_path)
+    finally:
+        shutil.rmtree(tmp_dir)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+# Compares console receive loops on large replies.
+# Requires Tarantool and unit tests dependencies (see deps.sh).
+# Run from the repository root:
+#   python -m benchmarks.bench_console_recv
+
+import time
+
+import module_utils.helpers as helpers
+from unit.instance import Instance
+
+REPLY_SIZES_MB = [1, 10, 50]
+READ_SIZES = [1024, helpers.DEFAULT_CONSOLE_READ_SIZE, 1024 * 1024]
+
+LARGE_REPLY_FUNC_BODY = '''
+return string.rep('x', ...)
+'''
+
+
+class LegacyConsole(helpers.Console):
+    # Receive loop that was used before: each 1024-byte chunk is decoded
+    # and concatenated with the whole data received before
+    def recvall(self):
+        data = ''
+        while True:
+            chunk = self.sock.recv(1024).decode()
+            if chunk == '':
+                raise helpers.CartridgeException(helpers.CartridgeErrorCodes.BROKEN_PIPE, 'Error: broken pipe')
+            data = data + chunk
+            if data.endswith('\n...\n'):
+                break
+        return data
+
+
+def measure(control_console, reply_size):
+    time_start = time.time()
+    res = control_console.eval(LARGE_REPLY_FUNC_BODY, reply_size)
+    elapsed = time.time() - time_start
+
+    assert len(res[0]) == reply_size
+    return elapsed
+
+
+def main():
+    instance = Instance()
+    instance.start()
+
+    print('%-20s %10s %10s' % ('receive loop', 'reply, MB', 'time, s'))
+
+    for size_mb in REPLY_SIZES_MB:
+        reply_size = size_mb * 1024 * 1024
+
+        legacy_console = LegacyConsole(instance.console_sock)
+        print('%-20s %10d %10.3f' % ('legacy', size_mb, measure(legacy_console, reply_size)))
+
+        for read_size in READ_SIZES:
+            control_console = helpers.get_control_console(instance.console_sock, read_size=read_size)
+            print('%-20s %10d %10.3f' % (
+                'buffered (%d)' % read_size, size_mb, measure(control_console, reply_size),
+            ))
+
+    instance.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+# Compares console transports on a large topology.
+# Requires Tarantool and unit tests dependencies (see deps.sh).
+# Run from the repository root:
+#   python -m benchmarks.bench_console_transport [replicasets_count]
+
+import base64
+import sys
+import time
+
+import module_utils.helpers as helpers
+from unit.instance import Instance
+
+REPLICASET_SIZE = 3
+DEFAULT_REPLICASETS_COUNT = 200
+ITERATIONS = 10
+
+ENCODE_BOTH_FUNC_BODY = '''
+local func_body = ...
+local result = { loadstring(func_body)() }
+local hex_json = string.hex(require('json').encode(result))
+local b64_msgpack = require('digest').base64_encode(require('msgpack').encode(result), {nowrap = true})
+return hex_json, b64_msgpack
+'''
+
+
+def timeit(func, iterations=ITERATIONS):
+    time_start = time.time()
+    for _ in range(iterations):
+        func()
+    return (time.time() - time_start) / iterations
+
+
+def main():
+    replicasets_count = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_REPLICASETS_COUNT
+
+    instance = Instance()
+    instance.start()
+
+    for i in range(replicasets_count):
+        instance.add_replicaset(
+            alias='r%d' % i,
+            instances=['r%d-i%d' % (i, j) for j in range(REPLICASET_SIZE)],
+            roles=['vshard-storage'],
+        )
+
+    control_console = helpers.get_control_console(instance.console_sock)
+    hex_json, b64_msgpack = control_console.eval(ENCODE_BOTH_FUNC_BODY, helpers.GET_INSTANCES_FUNC_BODY)
+
+    print('Instances: %d' % (replicasets_count * REPLICASET_SIZE))
+    print('%-10s %12s %14s %14s' % ('transport', 'payload, B', 'decode, ms', 'eval, ms'))
+
+    decode_funcs = {
+        helpers.CONSOLE_TRANSPORT_TEXT: lambda: helpers.decode_hex_json(hex_json),
+        helpers.CONSOLE_TRANSPORT_MSGPACK: lambda: helpers.msgpack_loads(base64.b64decode(b64_msgpack)),
+    }
+    payloads = {
+        helpers.CONSOLE_TRANSPORT_TEXT: hex_json,
+        helpers.CONSOLE_TRANSPORT_MSGPACK: b64_msgpack,
+    }
+
+    for transport in helpers.CONSOLE_TRANSPORTS:
+        console = helpers.get_control_console(instance.console_sock, transport)
+        eval_time = timeit(lambda: console.eval(helpers.GET_INSTANCES_FUNC_BODY))
+        decode_time = timeit(decode_funcs[transport])
+        print('%-10s %12d %14.2f %14.2f' % (
+            transport, len(payloads[transport]), decode_time * 1000, eval_time * 1000,
+        ))
+
+    instance.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,138 @@
+# Measures edit_topology planning on synthetic inventories.
+# Tarantool isn't required: cluster topology is generated as it's
+# returned by `helpers.get_cluster_topology`.
+# Run from the repository root:
+#   python -m benchmarks.bench_edit_topology [instances_count ...]
+
+import sys
+import time
+
+import module_utils.helpers as helpers
+
+sys.modules['ansible.module_utils.helpers'] = helpers
+from library import cartridge_edit_topology as edit_topology  # noqa: E402
+
+DEFAULT_INSTANCES_COUNTS = [50, 500, 5000]
+REPLICASET_SIZE = 5
+ITERATIONS = 3
+
+
+def get_synthetic_topology(instances_count):
+    # Each replicaset has REPLICASET_SIZE instances in inventory:
+    # * replicasets with even index exist in cluster, but the last instance
+    #   isn't joined and should be placed on the top of failover priority;
+    # * replicasets with odd index should be created.
+    # Every tenth instance changes zone.
+    module_hostvars = {}
+    old_instances = {}
+    old_replicasets = {}
+
+    for i in range(instances_count):
+        replicaset_index = i // REPLICASET_SIZE
+        replicaset_alias = 'r%d' % replicaset_index
+        replicaset_instances = [
+            'r%d-i%d' % (replicaset_index, j) for j in range(REPLICASET_SIZE)
+        ]
+        instance_name = 'r%d-i%d' % (replicaset_index, i % REPLICASET_SIZE)
+
+        module_hostvars[instance_name] = {
+            'replicaset_alias': replicaset_alias,
+            'failover_priority': replicaset_instances[-1:] + replicaset_instances[:-1],
+            'zone': 'zone-%d' % int(i % 10 == 0),
+            'config': {'advertise_uri': '%s-uri' % instance_name},
+        }
+
+        old_instances[instance_name] = {
+            'alias': instance_name,
+            'uri': '%s-uri' % instance_name,
+            'uuid': '',
+        }
+
+        replicaset_exists = replicaset_index % 2 == 0
+        if replicaset_exists and instance_name != replicaset_instances[-1]:
+            old_instances[instance_name].update({
+                'uuid': '%s-uuid' % instance_name,
+                'zone': 'zone-0',
+                'disabled': False,
+            })
+
+            if replicaset_alias not in old_replicasets:
+                old_replicasets[replicaset_alias] = {
+                    'alias': replicaset_alias,
+                    'uuid': '%s-uuid' % replicaset_alias,
+                    'instances': [],
+                    'leader_uuid': '%s-uuid' % instance_name,
+                }
+            old_replicasets[replicaset_alias]['instances'].append(instance_name)
+
+    return module_hostvars, old_instances, old_replicasets
+
+
+def plan_topology(module_hostvars, play_hosts, old_instances, old_replicasets):
+    new_instances = edit_topology.get_new_instances(module_hostvars, play_hosts)
+    new_replicasets = edit_topology.get_new_replicasets(module_hostvars, play_hosts)
+
+    all_new_instances = edit_topology.get_all_new_instances(module_hostvars)
+    all_new_replicasets = edit_topology.get_all_new_replicasets(module_hostvars)
+
+    err = edit_topology.check_new_cluster_for_dangerous_changes(
+        all_new_instances, new_instances, old_instances,
+        all_new_replicasets, new_replicasets, old_replicasets,
+        {
+            edit_topology.ADVERTISE_URIS_CHANGE_CHECK_NAME: True,
+            edit_topology.EXTRA_CLUSTER_INSTANCES_CHECK_NAME: True,
+            edit_topology.EXTRA_CLUSTER_REPLICASETS_CHECK_NAME: True,
+            edit_topology.RENAMED_REPLICASETS_CHECK_NAME: True,
+        },
+    )
+    assert err is None, err
+
+    # `enabled_roles` are set by `set_enabled_roles`
+    for replicaset in new_replicasets.values():
+        replicaset['enabled_roles'] = []
+
+    topology_params, err = edit_topology.get_topology_params(
+        new_instances, old_instances,
+        new_replicasets, old_replicasets,
+        allow_missed_instances=False,
+    )
+    assert err is None, err
+
+    return topology_params
+
+
+def measure(instances_count):
+    module_hostvars, old_instances, old_replicasets = get_synthetic_topology(instances_count)
+    play_hosts = list(module_hostvars.keys())
+
+    best_time = None
+    for _ in range(ITERATIONS):
+        time_start = time.time()
+        topology_params = plan_topology(module_hostvars, play_hosts, old_instances, old_replicasets)
+        elapsed = time.time() - time_start
+
+        if best_time is None or elapsed < best_time:
+            best_time = elapsed
+
+    return best_time, topology_params
+
+
+def main():
+    instances_counts = [int(arg) for arg in sys.argv[1:]] or DEFAULT_INSTANCES_COUNTS
+
+    print('%10s %12s %10s %10s' % ('instances', 'replicasets', 'servers', 'time, s'))
+
+    for instances_count in instances_counts:
+        elapsed, topology_params = measure(instances_count)
+        print('%10d %12d %10d %10.3f' % (
+            instances_count,
+            len(topology_params.get('replicasets', [])),
+            len(topology_params.get('servers', [])),
+            elapsed,
+        ))
+
+    del helpers.WARNINGS[:]
+
+
+if __name__ == '__main__':
+    main()
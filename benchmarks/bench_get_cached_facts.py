@@ -0,0 +1,103 @@
+# Compares get_cached_facts filter implementations on synthetic hostvars.
+# Ansible isn't required.
+# Run from the repository root:
+#   python -m benchmarks.bench_get_cached_facts [hosts_count] [fact_names_count]
+
+import sys
+import time
+
+from filter_plugins.filters import get_cached_facts
+
+DEFAULT_HOSTS_COUNT = 5000
+DEFAULT_FACT_NAMES_COUNT = 40
+TARGETS_COUNT = 8
+ITERATIONS = 3
+
+
+class HostVarsVars(object):
+    # Like Ansible HostVarsVars: each access is a Python-level call
+    # (Ansible also templates the value on access)
+    def __init__(self, variables):
+        self._vars = variables
+
+    def __contains__(self, name):
+        return name in self._vars
+
+    def __getitem__(self, name):
+        return self._vars[name]
+
+    def get(self, name, default=None):
+        return self._vars.get(name, default)
+
+
+def legacy_get_cached_facts(hostvars, fact_names_by_target, accum_dict_name='role_facts'):
+    # Filter that was used before: facts are looked up for each target
+    cached_facts = {}
+    for instance_name, instance_vars in hostvars.items():
+        role_vars = instance_vars.get(accum_dict_name, {})
+
+        for target, fact_names in fact_names_by_target.items():
+            cached_facts[target] = cached_facts.get(target, {})
+            cached_facts[target][instance_name] = cached_facts[target].get(instance_name, {})
+
+            for fact_name in fact_names:
+                if fact_name in role_vars:
+                    cached_facts[target][instance_name][fact_name] = role_vars[fact_name]
+                elif fact_name in instance_vars:
+                    cached_facts[target][instance_name][fact_name] = instance_vars[fact_name]
+
+    return cached_facts
+
+
+def get_synthetic_hostvars(hosts_count, fact_names_count):
+    # The first target requires all facts (like `validate_config`),
+    # others require every TARGETS_COUNT-th fact
+    fact_names = ['fact_%d' % i for i in range(fact_names_count)]
+
+    fact_names_by_target = {'target_0': fact_names}
+    for i in range(1, TARGETS_COUNT):
+        fact_names_by_target['target_%d' % i] = fact_names[i::TARGETS_COUNT]
+
+    hostvars = {}
+    for i in range(hosts_count):
+        role_facts = {name: '%s-value' % name for name in fact_names[::2]}
+        variables = {name: '%s-value' % name for name in fact_names[1::4]}
+        variables['role_facts'] = role_facts
+        variables['ansible_host'] = 'host-%d' % (i % 100)
+        hostvars['instance-%d' % i] = HostVarsVars(variables)
+
+    return hostvars, fact_names_by_target
+
+
+def measure(func):
+    best_time = None
+    for _ in range(ITERATIONS):
+        time_start = time.time()
+        res = func()
+        elapsed = time.time() - time_start
+
+        if best_time is None or elapsed < best_time:
+            best_time = elapsed
+
+    return best_time, res
+
+
+def main():
+    hosts_count = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_HOSTS_COUNT
+    fact_names_count = int(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_FACT_NAMES_COUNT
+
+    hostvars, fact_names_by_target = get_synthetic_hostvars(hosts_count, fact_names_count)
+
+    legacy_time, legacy_res = measure(lambda: legacy_get_cached_facts(hostvars, fact_names_by_target))
+    new_time, new_res = measure(lambda: get_cached_facts(hostvars, fact_names_by_target))
+
+    assert new_res == legacy_res
+
+    print('%d hosts x %d fact names, %d targets' % (hosts_count, fact_names_count, TARGETS_COUNT))
+    print('%-10s %10s' % ('filter', 'time, s'))
+    print('%-10s %10.3f' % ('legacy', legacy_time))
+    print('%-10s %10.3f' % ('inverted', new_time))
+
+
+if __name__ == '__main__':
+    main()
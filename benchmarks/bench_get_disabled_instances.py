@@ -0,0 +1,129 @@
+# Compares disabled instances voting on synthetic hostvars.
+# Tarantool isn't required.
+# Run from the repository root:
+#   python -m benchmarks.bench_get_disabled_instances [instances_count ...]
+
+import random
+import sys
+import time
+
+import module_utils.helpers as helpers
+
+sys.modules['ansible.module_utils.helpers'] = helpers
+from module_utils import disabled_instances as get_disabled_instances  # noqa: E402
+
+DEFAULT_INSTANCES_COUNTS = [100, 500, 2000]
+DISABLED_INSTANCES_COUNT = 5
+ITERATIONS = 3
+
+
+def legacy_config_mismatched(module_hostvars, instance_name, other_hosts):
+    current_checksum = get_disabled_instances.get_topology_checksum_from_instance_config(
+        module_hostvars[instance_name]
+    )
+
+    for other_name in other_hosts:
+        other_checksum = get_disabled_instances.get_topology_checksum_from_instance_config(
+            module_hostvars[other_name]
+        )
+        if current_checksum != other_checksum:
+            return True
+
+    return False
+
+
+def legacy_count_cluster_disabled_instances(module_hostvars, play_hosts):
+    # Voting that was used before: each instance checksum is compared
+    # with checksums of all not disabled instances
+    config_mismatch_count = 0
+    healthy_count = 0
+    votes_to_disable = {}
+
+    for instance_name in play_hosts:
+        disabled_instances = get_disabled_instances.get_disabled_instances_from_instance_config(
+            module_hostvars[instance_name]
+        )
+
+        not_disabled_names = list(filter(lambda other_name: other_name not in disabled_instances, play_hosts))
+        if legacy_config_mismatched(module_hostvars, instance_name, not_disabled_names):
+            config_mismatch_count += 1
+            continue
+
+        healthy_count += 1
+        for disabled_instance in disabled_instances:
+            votes_to_disable[disabled_instance] = votes_to_disable.get(disabled_instance, 0) + 1
+
+    return config_mismatch_count, healthy_count, votes_to_disable
+
+
+def get_synthetic_hostvars(instances_count):
+    # Disabled instances have another topology checksum,
+    # some of healthy instances don't know that they are disabled
+    rnd = random.Random(instances_count)
+
+    names = ['instance-%d' % i for i in range(instances_count)]
+    disabled_names = names[:DISABLED_INSTANCES_COUNT]
+
+    module_hostvars = {}
+    for name in names:
+        if name in disabled_names:
+            checksum = 2
+            disabled_instances = []
+        else:
+            checksum = 1
+            disabled_instances = disabled_names if rnd.random() < 0.9 else disabled_names[:-1]
+
+        module_hostvars[name] = {
+            'instance_info': {
+                'disabled_instances': disabled_instances,
+                'topology_checksum': checksum,
+            },
+        }
+
+    return module_hostvars, names
+
+
+def measure(func):
+    best_time = None
+    for _ in range(ITERATIONS):
+        time_start = time.time()
+        func()
+        elapsed = time.time() - time_start
+
+        if best_time is None or elapsed < best_time:
+            best_time = elapsed
+
+    return best_time
+
+
+def main():
+    instances_counts = [int(arg) for arg in sys.argv[1:]] or DEFAULT_INSTANCES_COUNTS
+
+    print('%10s %10s %10s' % ('instances', 'legacy, s', 'grouped, s'))
+
+    for instances_count in instances_counts:
+        module_hostvars, play_hosts = get_synthetic_hostvars(instances_count)
+
+        legacy_time = measure(lambda: legacy_count_cluster_disabled_instances(module_hostvars, play_hosts))
+        grouped_time = measure(lambda: get_disabled_instances.count_cluster_disabled_instances(
+            module_hostvars, play_hosts, ignore_split_brain=True,
+        ))
+
+        # Results should be the same
+        _, healthy_count, votes_to_disable = legacy_count_cluster_disabled_instances(module_hostvars, play_hosts)
+        legacy_disabled_instances = sorted(
+            name for name, score in votes_to_disable.items()
+            if score >= float(healthy_count) / 2
+        )
+        disabled_instances, _ = get_disabled_instances.count_cluster_disabled_instances(
+            module_hostvars, play_hosts, ignore_split_brain=True,
+        )
+        assert disabled_instances == legacy_disabled_instances
+
+        print('%10d %10.3f %10.3f' % (instances_count, legacy_time, grouped_time))
+
+    del helpers.WARNINGS[:]
+
+
+if __name__ == '__main__':
+    main()
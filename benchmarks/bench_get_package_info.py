@@ -0,0 +1,175 @@
+# Compares reading RPM and DEB package headers in Python
+# with running `rpm` and `dpkg` utilities
+# and streaming TGZ inspection with reading all archive member names.
+# Packages are generated, utilities that aren't installed are skipped.
+# Run from the repository root:
+#   python -m benchmarks.bench_get_package_info [payload_size_mb]
+
+import collections
+import os
+import re
+import shutil
+import sys
+import tarfile
+import tempfile
+import time
+
+import module_utils.helpers as helpers
+from unit.packages import write_rpm, write_deb, write_tgz, RPM_SENSE_GREATER, RPM_SENSE_EQUAL
+
+sys.modules['ansible.module_utils.helpers'] = helpers
+from library import cartridge_get_package_info as get_package_info  # noqa: E402
+
+DEFAULT_PAYLOAD_SIZE_MB = 100
+ITERATIONS = 5
+
+
+def is_command_available(cmd):
+    return any(
+        os.access(os.path.join(path, cmd), os.X_OK)
+        for path in os.environ.get('PATH', '').split(os.pathsep)
+    )
+
+
+def get_rpm_info_by_rpm_cmd(package_path):
+    # Package info was got by `rpm` utility before
+    cmd = ['rpm', '-qip', package_path]
+    rc, output = get_package_info.run_command_and_get_output(cmd)
+    if rc != 0:
+        raise Exception("failed to get RPM package info: %s" % output)
+
+    m = re.search(r'Name\s*:\s*([^\n]+)\n', output)
+    if m is None:
+        raise Exception("Failed to find package name in package info: %s" % output)
+
+    package_name = m.groups()[0]
+    # Tarantool dependency
+    tnt_version = None
+
+    cmd = ['rpm', '-qpR', package_path]
+    rc, output = get_package_info.run_command_and_get_output(cmd)
+    if rc != 0:
+        raise Exception("Failed to get RPM deplist: %s" % output)
+
+    m = re.search(r'tarantool >= ([0-9]+.[0-9]+)', output)
+    if m is not None:
+        tnt_version = m.groups()[0]
+
+    return {
+        'name': package_name,
+        'tnt_version': tnt_version,
+    }
+
+
+def get_tgz_info_by_getnames(package_path):
+    # All archive member names were read before
+    tnt_version = None
+
+    with tarfile.open(package_path) as tar:
+        names = tar.getnames()
+        names = list(filter(lambda path: path not in ['.', '..'], names))
+
+        package_name = os.path.commonprefix(names)
+        if package_name == '':
+            raise Exception(
+                "Package should contain one directory with application files. "
+                "Please, use package created by Cartridge CLI"
+            )
+
+        tarantool_binary_path = os.path.join(package_name, 'tarantool')
+        tnt_is_enterprise = tarantool_binary_path in names
+
+        if not tnt_is_enterprise:
+            version_file_path = os.path.join(package_name, 'VERSION')
+            try:
+                member = tar.getmember(version_file_path)
+            except KeyError:
+                raise Exception("Package should contain %s file" % version_file_path)
+
+            tnt_version = get_package_info.read_tgz_tnt_version(tar.extractfile(member))
+
+    return {
+        'name': package_name,
+        'tnt_version': tnt_version,
+    }
+
+
+def measure(func):
+    best_time = None
+    for _ in range(ITERATIONS):
+        time_start = time.time()
+        res = func()
+        elapsed = time.time() - time_start
+
+        if best_time is None or elapsed < best_time:
+            best_time = elapsed
+
+    return best_time, res
+
+
+def main():
+    payload_size_mb = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_PAYLOAD_SIZE_MB
+    payload_size = payload_size_mb * 1024 * 1024
+
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        rpm_path = os.path.join(tmp_dir, 'myapp-1.0.0-0.rpm')
+        write_rpm(rpm_path, 'myapp', requires=[
+            ('tarantool', RPM_SENSE_GREATER | RPM_SENSE_EQUAL, '2.10.4'),
+        ], payload_size=payload_size)
+
+        deb_path = os.path.join(tmp_dir, 'myapp-1.0.0-0.deb')
+        write_deb(deb_path, 'myapp', depends='tarantool (>= 2.10.4)', payload_size=payload_size)
+
+        cases = [
+            ('rpm', rpm_path, 'rpm', get_package_info.get_rpm_info, get_rpm_info_by_rpm_cmd),
+            ('deb', deb_path, 'dpkg', get_package_info.get_deb_info, get_package_info.get_deb_info_by_dpkg_cmd),
+        ]
+
+        print('payload: %d MB' % payload_size_mb)
+        print('%-6s %12s %12s' % ('type', 'python, ms', 'command, ms'))
+
+        for package_type, package_path, cmd, get_info, get_info_by_cmd in cases:
+            python_time, info = measure(lambda: get_info(package_path))
+            assert info == {'name': 'myapp', 'tnt_version': '2.10'}, info
+
+            cmd_time = 'n/a'
+            if is_command_available(cmd):
+                elapsed, cmd_info = measure(lambda: get_info_by_cmd(package_path))
+                assert cmd_info == info, cmd_info
+                cmd_time = '%.3f' % (elapsed * 1000)
+
+            print('%-6s %12.3f %12s' % (package_type, python_time * 1000, cmd_time))
+
+        # Cartridge CLI places `VERSION` and `tarantool` binary before application files
+        enterprise_tgz_path = os.path.join(tmp_dir, 'myapp-1.0.0-0-ee.tar.gz')
+        write_tgz(enterprise_tgz_path, collections.OrderedDict([
+            ('myapp/VERSION', b'TARANTOOL=2.10.4-0-g123\n'),
+            ('myapp/tarantool', b''),
+            ('myapp/data', os.urandom(payload_size)),
+        ]))
+
+        community_tgz_path = os.path.join(tmp_dir, 'myapp-1.0.0-0.tar.gz')
+        write_tgz(community_tgz_path, collections.OrderedDict([
+            ('myapp/VERSION', b'TARANTOOL=2.10.4-0-g123\n'),
+            ('myapp/data', os.urandom(payload_size)),
+        ]))
+
+        print('%-6s %12s %12s' % ('type', 'stream, ms', 'names, ms'))
+
+        for package_type, package_path, tnt_version in [
+            ('tgz-ee', enterprise_tgz_path, None),
+            ('tgz', community_tgz_path, '2.10'),
+        ]:
+            stream_time, info = measure(lambda: get_package_info.get_tgz_info(package_path))
+            assert info == {'name': 'myapp', 'tnt_version': tnt_version}, info
+
+            names_time, _ = measure(lambda: get_tgz_info_by_getnames(package_path))
+
+            print('%-6s %12.3f %12.3f' % (package_type, stream_time * 1000, names_time * 1000))
+    finally:
+        shutil.rmtree(tmp_dir)
+
+
+if __name__ == '__main__':
+    main()
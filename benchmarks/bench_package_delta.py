@@ -0,0 +1,76 @@
+# Measures package delta size and time of making and applying it
+# for synthetic packages with changes of different kinds.
+# Run from the repository root:
+#   python -m benchmarks.bench_package_delta [package_size_mb]
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from module_utils import package_delta
+
+DEFAULT_PACKAGE_SIZE_MB = 100
+
+
+def measure(func):
+    time_start = time.time()
+    res = func()
+    return time.time() - time_start, res
+
+
+def get_cases(basis_data):
+    size = len(basis_data)
+    return [
+        ('same', basis_data),
+        ('patched', basis_data[:size // 2] + os.urandom(4096) + basis_data[size // 2 + 4096:]),
+        ('inserted', basis_data[:size // 3] + os.urandom(100) + basis_data[size // 3:]),
+        ('tail 5%', basis_data[:size * 95 // 100] + os.urandom(size * 5 // 100)),
+        ('unrelated', os.urandom(size)),
+    ]
+
+
+def main():
+    package_size_mb = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_PACKAGE_SIZE_MB
+
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        basis_path = os.path.join(tmp_dir, 'basis')
+        package_path = os.path.join(tmp_dir, 'package')
+        delta_path = os.path.join(tmp_dir, 'delta')
+        result_path = os.path.join(tmp_dir, 'result')
+
+        basis_data = os.urandom(package_size_mb * 1024 * 1024)
+        with open(basis_path, 'wb') as f:
+            f.write(basis_data)
+
+        signatures_time, signatures = measure(lambda: package_delta.get_signatures(basis_path))
+
+        print('package: %d MB, signatures: %.3f s' % (package_size_mb, signatures_time))
+        print('%-10s %12s %10s %10s' % ('case', 'delta, KB', 'make, s', 'apply, s'))
+
+        for case_name, package_data in get_cases(basis_data):
+            with open(package_path, 'wb') as f:
+                f.write(package_data)
+
+            make_time, header = measure(lambda: package_delta.write_delta(package_path, signatures, delta_path))
+            if header is None:
+                # delta isn't efficient, package is copied
+                print('%-10s %12s %10.3f %10s' % (case_name, '-', make_time, '-'))
+                continue
+
+            apply_time, _ = measure(lambda: package_delta.apply_delta(basis_path, delta_path, result_path))
+
+            with open(result_path, 'rb') as f:
+                assert f.read() == package_data
+
+            print('%-10s %12.1f %10.3f %10.3f' % (
+                case_name, os.path.getsize(delta_path) / 1024.0, make_time, apply_time,
+            ))
+    finally:
+        shutil.rmtree(tmp_dir)
+
+
+if __name__ == '__main__':
+    main()
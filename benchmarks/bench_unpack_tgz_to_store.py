@@ -0,0 +1,108 @@
+# Compares unpacking consecutive TGZ versions to separate directories
+# (as `unarchive` does) with unpacking them to the distributions store.
+# Packages are generated, the second version differs from the first one by one file.
+# Run from the repository root:
+#   python -m benchmarks.bench_unpack_tgz_to_store [files_count] [file_size_kb]
+
+import grp
+import os
+import pwd
+import shutil
+import sys
+import tarfile
+import tempfile
+import time
+
+import module_utils.helpers as helpers
+import module_utils.dists_store as dists_store
+from unit.packages import write_tgz
+
+sys.modules['ansible.module_utils.helpers'] = helpers
+sys.modules['ansible.module_utils.dists_store'] = dists_store
+from library.cartridge_unpack_tgz_to_store import unpack_tgz_to_store  # noqa: E402
+
+DEFAULT_FILES_COUNT = 200
+DEFAULT_FILE_SIZE_KB = 256
+VERSIONS_COUNT = 3
+
+
+def legacy_unpack(package_path, dist_dir):
+    # Unpacking with stripping the package directory
+    with tarfile.open(package_path, 'r:gz') as tar:
+        members = []
+        for member in tar.getmembers():
+            member.name = '/'.join(member.name.split('/')[1:])
+            if member.name:
+                members.append(member)
+        tar.extractall(dist_dir, members)
+
+
+def get_disk_usage(*paths):
+    # Hardlinked files are counted once
+    inodes = set()
+    usage = 0
+    for path in paths:
+        for root, _, file_names in os.walk(path):
+            for name in file_names:
+                path_stat = os.lstat(os.path.join(root, name))
+                if path_stat.st_ino not in inodes:
+                    inodes.add(path_stat.st_ino)
+                    usage += path_stat.st_size
+    return usage
+
+
+def measure(func):
+    time_start = time.time()
+    func()
+    return time.time() - time_start
+
+
+def main():
+    files_count = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_FILES_COUNT
+    file_size = (int(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_FILE_SIZE_KB) * 1024
+
+    app_user = pwd.getpwuid(os.getuid()).pw_name
+    app_group = grp.getgrgid(os.getgid()).gr_name
+
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        files = dict(('myapp/file-%d' % i, os.urandom(file_size)) for i in range(files_count))
+
+        packages_paths = []
+        for version in range(VERSIONS_COUNT):
+            files['myapp/init.lua'] = ('return %d' % version).encode('utf-8')
+            package_path = os.path.join(tmp_dir, 'myapp-%d.0.0-0.tar.gz' % version)
+            write_tgz(package_path, files)
+            packages_paths.append(package_path)
+
+        legacy_dir = os.path.join(tmp_dir, 'legacy')
+        store_install_dir = os.path.join(tmp_dir, 'store-install')
+        store_dir = os.path.join(tmp_dir, 'store')
+
+        print('files: %d x %d KB, versions: %d' % (files_count, file_size // 1024, VERSIONS_COUNT))
+        print('%-8s %14s %14s' % ('version', 'unpack, ms', 'store, ms'))
+
+        for version, package_path in enumerate(packages_paths):
+            dist_name = os.path.basename(package_path)[:-len('.tar.gz')]
+
+            legacy_time = measure(lambda: legacy_unpack(package_path, os.path.join(legacy_dir, dist_name)))
+            store_time = measure(lambda: unpack_tgz_to_store({
+                'package_path': package_path,
+                'dist_dir': os.path.join(store_install_dir, dist_name),
+                'store_dir': store_dir,
+                'app_user': app_user,
+                'app_group': app_group,
+            }))
+
+            print('%-8d %14.1f %14.1f' % (version, legacy_time * 1000, store_time * 1000))
+
+        print('disk usage, MB: unpack %.1f, store %.1f' % (
+            get_disk_usage(legacy_dir) / 1024.0 / 1024,
+            get_disk_usage(store_install_dir, store_dir) / 1024.0 / 1024,
+        ))
+    finally:
+        shutil.rmtree(tmp_dir)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,154 @@
+# Compares config types validation on synthetic inventories.
+# Ansible isn't required.
+# Run from the repository root:
+#   python -m benchmarks.bench_validate_config [hosts_count ...]
+
+import sys
+import time
+
+import module_utils.helpers as helpers
+
+sys.modules['ansible.module_utils.helpers'] = helpers
+from module_utils import validate_config  # noqa: E402
+
+DEFAULT_HOSTS_COUNTS = [300, 3000]
+REPLICASET_SIZE = 3
+ITERATIONS = 3
+
+
+def legacy_check_schema(schema, conf, path=''):
+    # Schema interpreter that was used before
+    if conf is None:
+        return None
+    if isinstance(schema, dict):
+        if not isinstance(conf, dict):
+            return '{} must be {}'.format(path, dict)
+        for k in schema:
+            if k in conf:
+                subpath = '{}.{}'.format(path, k)
+                errmsg = legacy_check_schema(schema[k], conf[k], subpath)
+                if errmsg is not None:
+                    return errmsg
+        return None
+    elif isinstance(schema, list):
+        if not isinstance(conf, list):
+            return '{} must be {}'.format(path, list)
+        for i, c in enumerate(conf):
+            subpath = '{}[{}]'.format(path, i)
+            errmsg = legacy_check_schema(schema[0], c, subpath)
+            if errmsg is not None:
+                return errmsg
+        return None
+    elif isinstance(schema, type):
+        if not isinstance(conf, schema):
+            return '{} must be {}'.format(path, schema)
+        return None
+    else:
+        return 'Wrong type'
+
+
+def get_synthetic_hostvars(hosts_count):
+    # Each host has all variables from defaults (like `cached_facts.validate_config`)
+    # and some instance and replicaset params
+    common_vars = {}
+    for name, value_type in validate_config.SCHEMA.items():
+        if value_type is str:
+            common_vars[name] = '%s-value' % name
+        elif value_type is bool:
+            common_vars[name] = False
+        elif value_type is int:
+            common_vars[name] = 10
+        else:
+            common_vars[name] = None
+
+    common_vars.update({
+        'cartridge_app_name': 'myapp',
+        'cartridge_cluster_cookie': 'secret-cookie',
+        'cartridge_auth': {
+            'enabled': True,
+            'users': [{'username': 'user-%d' % i, 'password': 'pass', 'deleted': False} for i in range(5)],
+        },
+        'cartridge_failover_params': {
+            'mode': 'stateful',
+            'state_provider': 'etcd2',
+            'etcd2_params': {'prefix': '/myapp', 'endpoints': ['etcd-%d:2379' % i for i in range(3)]},
+        },
+        'cartridge_app_config': {'section-%d' % i: {'body': {'key': i}} for i in range(10)},
+        'cartridge_scenario': None,
+        'cartridge_custom_steps_dir': None,
+        'cartridge_custom_steps': None,
+        'cartridge_failover': None,
+        'cartridge_failover_promote_params': None,
+        'cartridge_defaults': {'log_level': 5},
+        'cartridge_keep_num_latest_dists': 2,
+        'cartridge_backup_mode': 'archive',
+        'cartridge_backup_compression': 'gzip',
+        'cartridge_backup_compression_level': 9,
+    })
+
+    module_hostvars = {}
+    for i in range(hosts_count):
+        replicaset_index = i // REPLICASET_SIZE
+        instance_vars = dict(common_vars)
+        instance_vars.update({
+            'config': {'advertise_uri': 'host-%d:%d' % (i % 100, 3000 + i), 'memtx_memory': 1024},
+            'replicaset_alias': 'r%d' % replicaset_index,
+            'roles': ['vshard-storage', 'metrics'],
+            'failover_priority': ['r%d-i%d' % (replicaset_index, j) for j in range(REPLICASET_SIZE)],
+            'all_rw': False,
+            'weight': 1,
+            'vshard_group': 'default',
+            'zone': 'zone-%d' % (i % 3),
+            'expelled': False,
+            'restarted': False,
+            'stateboard': False,
+        })
+        module_hostvars['instance-%d' % i] = instance_vars
+
+    return module_hostvars
+
+
+def measure(func):
+    best_time = None
+    for _ in range(ITERATIONS):
+        time_start = time.time()
+        res = func()
+        elapsed = time.time() - time_start
+
+        if best_time is None or elapsed < best_time:
+            best_time = elapsed
+
+    return best_time, res
+
+
+def main():
+    hosts_counts = [int(arg) for arg in sys.argv[1:]] or DEFAULT_HOSTS_COUNTS
+
+    print('%10s %12s %12s %12s' % ('hosts', 'legacy, s', 'compiled, s', 'validate, s'))
+
+    for hosts_count in hosts_counts:
+        module_hostvars = get_synthetic_hostvars(hosts_count)
+        play_hosts = list(module_hostvars.keys())
+
+        legacy_time, legacy_errors = measure(lambda: [
+            legacy_check_schema(validate_config.SCHEMA, module_hostvars[host]) for host in play_hosts
+        ])
+        compiled_time, compiled_errors = measure(lambda: [
+            validate_config.validate_types(module_hostvars[host]) for host in play_hosts
+        ])
+        assert legacy_errors == [None] * hosts_count
+        assert compiled_errors == [[]] * hosts_count
+
+        validate_time, res = measure(lambda: validate_config.validate_config({
+            'play_hosts': play_hosts,
+            'module_hostvars': module_hostvars,
+        }))
+        assert not res.failed, res.msg
+
+        print('%10d %12.3f %12.3f %12.3f' % (hosts_count, legacy_time, compiled_time, validate_time))
+
+    del helpers.WARNINGS[:]
+
+
+if __name__ == '__main__':
+    main()
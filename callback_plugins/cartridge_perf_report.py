@@ -0,0 +1,118 @@
+from __future__ import absolute_import, division, print_function
+
+import os
+
+from ansible.plugins.callback import CallbackBase
+
+__metaclass__ = type
+
+DOCUMENTATION = '''
+    callback: cartridge_perf_report
+    type: aggregate
+    short_description: Prints per-step and per-host evals latency report
+    description:
+      - Merges evals traces returned by cartridge role modules in C(perf) key
+        and prints a report at the end of the play.
+    requirements:
+      - enable callback in configuration (C(callbacks_enabled = cartridge_perf_report))
+      - set C(CARTRIDGE_PERF_TRACE=1) environment variable for role tasks
+'''
+
+TOP_LABELS_NUM = 10
+
+
+def get_step_name(task_path):
+    # Role steps are placed in tasks/steps/<step_name>.yml
+    if not task_path:
+        return 'unknown'
+
+    file_path = task_path.rsplit(':', 1)[0]
+    return os.path.splitext(os.path.basename(file_path))[0]
+
+
+def merge_perf(report, step_name, host, perf):
+    step_report = report['steps'].setdefault(step_name, {})
+    host_report = step_report.setdefault(host, {
+        'evals_count': 0,
+        'evals_time': 0,
+        'request_bytes': 0,
+        'response_bytes': 0,
+        'max_eval_time': 0,
+        'max_eval_label': None,
+    })
+
+    for eval_trace in perf.get('evals', []):
+        host_report['evals_count'] += 1
+        host_report['evals_time'] += eval_trace['time']
+        host_report['request_bytes'] += eval_trace['request_bytes']
+        host_report['response_bytes'] += eval_trace['response_bytes']
+
+        if eval_trace['time'] > host_report['max_eval_time']:
+            host_report['max_eval_time'] = eval_trace['time']
+            host_report['max_eval_label'] = eval_trace['label']
+
+        label_report = report['labels'].setdefault(eval_trace['label'], {'count': 0, 'time': 0})
+        label_report['count'] += 1
+        label_report['time'] += eval_trace['time']
+
+
+def format_report(report):
+    lines = []
+
+    for step_name, step_report in report['steps'].items():
+        lines.append('%s:' % step_name)
+        for host in sorted(step_report):
+            host_report = step_report[host]
+            lines.append('  %s: %d evals, %.3fs, sent %d B, received %d B, slowest %.3fs (%s)' % (
+                host,
+                host_report['evals_count'],
+                host_report['evals_time'],
+                host_report['request_bytes'],
+                host_report['response_bytes'],
+                host_report['max_eval_time'],
+                host_report['max_eval_label'],
+            ))
+
+    labels = sorted(report['labels'].items(), key=lambda item: item[1]['time'], reverse=True)
+    if labels:
+        lines.append('Top evals by total time:')
+    for label, label_report in labels[:TOP_LABELS_NUM]:
+        lines.append('  %s: %d evals, %.3fs' % (label, label_report['count'], label_report['time']))
+
+    return lines
+
+
+class CallbackModule(CallbackBase):
+    CALLBACK_VERSION = 2.0
+    CALLBACK_TYPE = 'aggregate'
+    CALLBACK_NAME = 'cartridge_perf_report'
+    CALLBACK_NEEDS_WHITELIST = True
+    CALLBACK_NEEDS_ENABLED = True
+
+    def __init__(self):
+        super(CallbackModule, self).__init__()
+        self.report = {'steps': {}, 'labels': {}}
+
+    def add_result(self, result):
+        # Loop results are placed in `results` list
+        results = result._result.get('results') or [result._result]
+        for res in results:
+            if not isinstance(res, dict) or res.get('perf') is None:
+                continue
+
+            step_name = get_step_name(result._task.get_path())
+            merge_perf(self.report, step_name, result._host.get_name(), res['perf'])
+
+    def v2_runner_on_ok(self, result):
+        self.add_result(result)
+
+    def v2_runner_on_failed(self, result, ignore_errors=False):
+        self.add_result(result)
+
+    def v2_playbook_on_stats(self, stats):
+        if not self.report['steps']:
+            return
+
+        self._display.banner('CARTRIDGE EVALS REPORT')
+        for line in format_report(self.report):
+            self._display.display(line)
@@ -8,7 +8,7 @@ import yaml
 import module_utils.helpers as helpers
 
 sys.modules['ansible.module_utils.helpers'] = helpers
-import library.cartridge_validate_config as validate_config
+import module_utils.validate_config as validate_config
 import unit.test_validate_config as test_validate_config
 
 
@@ -66,7 +66,7 @@ class TestFacts(unittest.TestCase):
             'backup_files_from_machine',
             # Temp facts
             'cached_facts',
-            'facts_for_machines_res',
+            'prepare_res',
             'single_instances_for_each_machine',
             'instances_from_same_machine',
         ]
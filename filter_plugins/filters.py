@@ -12,28 +12,71 @@ def add_trailing_slash(path):
     return path + os.path.sep
 
 
+def get_targets_by_fact_names(fact_names_by_target):
+    targets_by_fact_names = {}
+    for target, fact_names in fact_names_by_target.items():
+        for fact_name in fact_names:
+            targets_by_fact_names.setdefault(fact_name, []).append(target)
+
+    return targets_by_fact_names
+
+
 def get_cached_facts(hostvars, fact_names_by_target, accum_dict_name='role_facts'):
-    cached_facts = {}
+    # Each fact is looked up once per instance and then is copied
+    # to all targets (accessing hostvars values is expensive in Ansible)
+    targets_by_fact_names = get_targets_by_fact_names(fact_names_by_target)
+
+    cached_facts = {target: {} for target in fact_names_by_target}
     for instance_name, instance_vars in hostvars.items():
         role_vars = instance_vars.get(accum_dict_name, {})
 
-        for target, fact_names in fact_names_by_target.items():
-            cached_facts[target] = cached_facts.get(target, {})
-            cached_facts[target][instance_name] = cached_facts[target].get(instance_name, {})
+        instance_facts_by_target = {}
+        for target in fact_names_by_target:
+            instance_facts_by_target[target] = cached_facts[target][instance_name] = {}
+
+        for fact_name, targets in targets_by_fact_names.items():
+            if fact_name in role_vars:
+                fact_value = role_vars[fact_name]
+            elif fact_name in instance_vars:
+                fact_value = instance_vars[fact_name]
+            else:
+                continue
 
-            for fact_name in fact_names:
-                if fact_name in role_vars:
-                    cached_facts[target][instance_name][fact_name] = role_vars[fact_name]
-                elif fact_name in instance_vars:
-                    cached_facts[target][instance_name][fact_name] = instance_vars[fact_name]
+            for target in targets:
+                instance_facts_by_target[target][fact_name] = fact_value
 
     return cached_facts
 
 
+def merge_fact_targets(fact_names_by_target, targets, merged_target):
+    # Replaces targets with one target that has facts of all of them,
+    # so their facts are passed to one module in one projection
+    merged_fact_names = []
+    res = {}
+    for target, fact_names in fact_names_by_target.items():
+        if target in targets:
+            merged_fact_names.extend(fact_names)
+        else:
+            res[target] = fact_names
+
+    res[merged_target] = sorted(set(merged_fact_names))
+    return res
+
+
+def get_instances_params(instances_vars, param_names):
+    # Collects params of instances for machine-level modules
+    return [
+        {param_name: instance_vars.get(param_name) for param_name in param_names}
+        for instance_vars in instances_vars
+    ]
+
+
 class FilterModule(object):
     def filters(self):
         return {
             'cartridge_path_join': path_join,
             'cartridge_add_trailing_slash': add_trailing_slash,
             'get_cached_facts': get_cached_facts,
+            'cartridge_merge_fact_targets': merge_fact_targets,
+            'cartridge_get_instances_params': get_instances_params,
         }
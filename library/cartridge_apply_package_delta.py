@@ -0,0 +1,21 @@
+#!/usr/bin/env python
+
+from ansible.module_utils.helpers import Helpers as helpers
+from ansible.module_utils import package_delta
+
+argument_spec = {
+    'basis_path': {'required': True, 'type': 'str'},
+    'delta_path': {'required': True, 'type': 'str'},
+    'package_path': {'required': True, 'type': 'str'},
+}
+
+
+def apply_package_delta(params):
+    # New package is rebuilt from the previously delivered package
+    # and the delta made by `cartridge_make_package_delta`
+    package_delta.apply_delta(params['basis_path'], params['delta_path'], params['package_path'])
+    return helpers.ModuleRes(changed=True, fact=params['package_path'])
+
+
+if __name__ == '__main__':
+    helpers.execute_module(argument_spec, apply_package_delta)
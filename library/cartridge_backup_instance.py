@@ -1,8 +1,11 @@
 import os
-import tarfile
+import re
 import time
 
 from ansible.module_utils.helpers import Helpers as helpers
+from ansible.module_utils import backup_archive
+from ansible.module_utils import backup_manifest
+from ansible.module_utils import hardlink_backup
 
 argument_spec = {
     'console_sock': {'required': False, 'type': 'str'},
@@ -14,8 +17,20 @@ argument_spec = {
     'start_only': {'required': False, 'type': 'bool', 'default': False},
     'stop_only': {'required': False, 'type': 'bool', 'default': False},
     'custom_backup_files': {'required': False, 'type': 'list'},
+    'incremental': {'required': False, 'type': 'bool', 'default': False},
+    'compression': {
+        'required': False,
+        'type': 'str',
+        'default': backup_archive.COMPRESSION_GZIP,
+        'choices': backup_archive.COMPRESSIONS,
+    },
+    'compression_level': {'required': False, 'type': 'int', 'default': backup_archive.DEFAULT_COMPRESSION_LEVEL},
+    'backup_mode': {'required': False, 'type': 'str', 'default': 'archive', 'choices': ['archive', 'hardlinks']},
 }
 
+ARCHIVE_TIME_FORMAT = '%Y-%m-%d-%H%M%S'
+BACKUP_MODE_HARDLINKS = 'hardlinks'
+
 
 def backup_start(control_console, params):
     stateboard = params.get('stateboard')
@@ -75,14 +90,46 @@ def backup_start(control_console, params):
     return backup_files, None
 
 
-def backup_pack(instance_id, backups_dir, backup_files):
-    archive_name = "{instance_id}.{time}.tar.gz".format(
+def get_archive_name(instance_id, compression=backup_archive.COMPRESSION_GZIP):
+    return "{instance_id}.{time}{ext}".format(
+        instance_id=instance_id,
+        time=time.strftime(ARCHIVE_TIME_FORMAT),
+        ext=backup_archive.get_archive_ext(compression),
+    )
+
+
+def get_backup_dir_name(instance_id):
+    return "{instance_id}.{time}".format(
         instance_id=instance_id,
-        time=time.strftime("%Y-%m-%d-%H%M%S")
+        time=time.strftime(ARCHIVE_TIME_FORMAT),
     )
+
+
+def get_parent_manifest(instance_id, backups_dir):
+    # The latest archive of the instance is used as a parent,
+    # archive created without manifest can't be a parent
+    archive_rgx = r'^%s\.\d{4}-\d{2}-\d{2}-\d{6}\.tar(\.gz)?$' % re.escape(instance_id)
+    archive_names = sorted(
+        (name for name in os.listdir(backups_dir) if re.match(archive_rgx, name)),
+        reverse=True,
+    )
+    if not archive_names:
+        return None
+
+    return backup_manifest.read_manifest(os.path.join(backups_dir, archive_names[0]))
+
+
+def backup_pack(
+    instance_id,
+    backups_dir,
+    backup_files,
+    compression=backup_archive.COMPRESSION_GZIP,
+    compression_level=backup_archive.DEFAULT_COMPRESSION_LEVEL,
+):
+    archive_name = get_archive_name(instance_id, compression)
     archive_path = os.path.join(backups_dir, archive_name)
 
-    with tarfile.open(archive_path, "w:gz") as tar:
+    with backup_archive.open_archive_for_writing(archive_path, compression, compression_level) as tar:
         for path in backup_files:
             if os.path.exists(path):
                 tar.add(path)
@@ -90,6 +137,61 @@ def backup_pack(instance_id, backups_dir, backup_files):
     return archive_path
 
 
+def backup_pack_incremental(
+    instance_id,
+    backups_dir,
+    backup_files,
+    compression=backup_archive.COMPRESSION_GZIP,
+    compression_level=backup_archive.DEFAULT_COMPRESSION_LEVEL,
+):
+    # Only files that were changed since the parent backup are archived
+    archive_name = get_archive_name(instance_id, compression)
+    archive_path = os.path.join(backups_dir, archive_name)
+    if os.path.exists(archive_path):
+        # It can be a parent of the new backup
+        raise Exception("Backup archive %s already exists" % archive_path)
+
+    parent_manifest = get_parent_manifest(instance_id, backups_dir)
+    manifest = backup_manifest.make_manifest(instance_id, archive_name, backup_files, parent_manifest)
+
+    manifest_member = backup_manifest.get_manifest_member(manifest)
+    with backup_archive.open_archive_for_writing(
+        archive_path, compression, compression_level, head=manifest_member,
+    ) as tar:
+        for path, entry in sorted(manifest['files'].items()):
+            if entry['archive'] == archive_name:
+                backup_manifest.add_file(tar, path, entry)
+
+    # Hashes are known only after files are written
+    backup_archive.rewrite_archive_head(archive_path, compression, backup_manifest.get_manifest_member(manifest))
+
+    return archive_path
+
+
+def backup_link(instance_id, backups_dir, backup_files):
+    # Files are hardlinked (or reflinked) to the backup directory instead of archiving
+    backup_dir = os.path.join(backups_dir, get_backup_dir_name(instance_id))
+    if os.path.exists(backup_dir):
+        raise Exception("Backup directory %s already exists" % backup_dir)
+
+    hardlink_backup.make_backup_dir(backup_dir, backup_files)
+
+    return backup_dir
+
+
+def pack(params, backup_files):
+    instance_id = helpers.get_required_param(params, 'instance_id')
+    backups_dir = helpers.get_required_param(params, 'backups_dir')
+    if params.get('backup_mode') == BACKUP_MODE_HARDLINKS:
+        return backup_link(instance_id, backups_dir, backup_files)
+
+    compression = params.get('compression', backup_archive.COMPRESSION_GZIP)
+    compression_level = params.get('compression_level', backup_archive.DEFAULT_COMPRESSION_LEVEL)
+
+    pack_func = backup_pack_incremental if params.get('incremental') else backup_pack
+    return pack_func(instance_id, backups_dir, backup_files, compression, compression_level)
+
+
 def backup_stop(control_console):
     ok, err = control_console.eval_res_err('''
         return pcall(box.backup.stop)
@@ -105,9 +207,7 @@ def custom_backup(params):
     custom_backup_files = helpers.get_required_param(params, 'custom_backup_files')
 
     # ARCHIVE
-    instance_id = helpers.get_required_param(params, 'instance_id')
-    backups_dir = helpers.get_required_param(params, 'backups_dir')
-    backup_archive_path = backup_pack(instance_id, backups_dir, custom_backup_files)
+    backup_archive_path = pack(params, custom_backup_files)
 
     return helpers.ModuleRes(changed=True, fact={
         'backup_archive_path': backup_archive_path,
@@ -146,9 +246,7 @@ def tnt_backup(params):
         })
 
     # ARCHIVE
-    instance_id = helpers.get_required_param(params, 'instance_id')
-    backups_dir = helpers.get_required_param(params, 'backups_dir')
-    backup_archive_path = backup_pack(instance_id, backups_dir, backup_files)
+    backup_archive_path = pack(params, backup_files)
 
     # STOP
     err = backup_stop(control_console)
@@ -0,0 +1,28 @@
+#!/usr/bin/env python
+
+from ansible.module_utils.helpers import Helpers as helpers
+from ansible.module_utils import package_cache
+
+argument_spec = {
+    'cache_dir': {'required': True, 'type': 'str'},
+    'package_path': {'required': True, 'type': 'str'},
+    'package_name': {'required': True, 'type': 'str'},
+    'checksum': {'required': True, 'type': 'str'},
+    'max_size': {'required': True, 'type': 'int'},
+}
+
+
+def cache_package(params):
+    # Puts delivered package to the cache and returns its path in the cache
+    cache_dir = params['cache_dir']
+
+    path = package_cache.put_package(
+        cache_dir, params['package_path'], params['package_name'], params['checksum'],
+    )
+    removed_paths = package_cache.evict_packages(cache_dir, params['max_size'], keep_path=path)
+
+    return helpers.ModuleRes(changed=True, fact=path, removed_paths=removed_paths)
+
+
+if __name__ == '__main__':
+    helpers.execute_module(argument_spec, cache_package)
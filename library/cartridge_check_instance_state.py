@@ -2,87 +2,169 @@
 
 from ansible.module_utils.helpers import Helpers as helpers
 
+try:
+    from ansible.module_utils.async_console import gather_evals
+except (ImportError, SyntaxError):
+    # asyncio isn't available on Python 2, evals are performed one by one
+    gather_evals = helpers.gather_evals
+
 argument_spec = {
-    'console_sock': {'required': True, 'type': 'str'},
-    'stateboard': {'required': True, 'type': 'bool'},
+    'console_sock': {'required': False, 'type': 'str'},
+    'stateboard': {'required': False, 'type': 'bool', 'default': False},
     'expected_states': {'required': False, 'type': 'list', 'default': ['Unconfigured', 'RolesConfigured']},
     'check_buckets_are_discovered': {'required': False, 'type': 'bool', 'default': True},
+    # Machine-level mode: list of {instance_info, stateboard} dicts
+    # for all instances of the machine that are checked concurrently
+    'instances': {'required': False, 'type': 'list', 'elements': 'dict'},
+    'concurrency': {'required': False, 'type': 'int'},
 }
 
+GET_BOX_STATUS_FUNC = helpers.LuaFunction(name='get_box_status', body='''
+if type(box.cfg) == 'function' or box.cfg.listen == nil then
+    return nil, "box hasn't been configured"
+end
+return true
+''')
 
-def check_stateboard_state(control_console):
-    box_status, err = control_console.eval_res_err('''
-        if type(box.cfg) == 'function' or box.cfg.listen == nil then
-            return nil, "box hasn't been configured"
-        end
+GET_INSTANCE_STATE_FUNC = helpers.LuaFunction(name='get_instance_state', body='''
+return require('cartridge.confapplier').get_state()
+''')
+
+CHECK_BUCKETS_ARE_DISCOVERED_FUNC = helpers.LuaFunction(name='check_buckets_are_discovered', body='''
+local vshard_utils = require('cartridge.vshard-utils')
+local vshard_router = require('cartridge.roles.vshard-router')
+
+local function check_group_buckets(group_name, group_opts)
+    if not group_opts.bootstrapped then
         return true
-    ''')
-    if not box_status:
-        return helpers.ModuleRes(failed=True, msg="Stateboard is not running: %s" % err)
+    end
 
-    return helpers.ModuleRes(changed=False)
+    local router = vshard_router.get(group_name)
+    if router == nil then
+        return true
+    end
 
+    local unknown_buckets = router:info().bucket.unknown
+    if unknown_buckets == 0 then
+        return true
+    end
 
-def check_instance_state(control_console, expected_states, check_buckets_are_discovered):
-    instance_state, err = control_console.eval_res_err('''
-        return require('cartridge.confapplier').get_state()
-    ''')
+    return nil, string.format(
+        "%s out of %s buckets are not discovered in group '%s'",
+        unknown_buckets,
+        group_opts.bucket_count,
+        group_name
+    )
+end
+
+local groups = vshard_utils.get_known_groups()
+for group_name, group_opts in pairs(groups) do
+    local _, err = check_group_buckets(group_name, group_opts)
+    if err ~= nil then
+        return nil, err
+    end
+end
+
+return true
+''')
+
+
+def get_box_status_err(box_status, err):
+    if not box_status:
+        return "Stateboard is not running: %s" % err
+    return None
+
+
+def get_instance_state_err(instance_state, err, expected_states):
     if not instance_state:
-        return helpers.ModuleRes(failed=True, msg="Impossible to get state: %s" % err)
+        return "Impossible to get state: %s" % err
     if instance_state not in expected_states:
-        return helpers.ModuleRes(
-            failed=True,
-            msg="Instance is not in one of states: %s, it's in '%s' state" % (
-                expected_states,
-                instance_state,
-            ),
+        return "Instance is not in one of states: %s, it's in '%s' state" % (
+            expected_states,
+            instance_state,
         )
+    return None
+
+
+def check_stateboard_state(control_console):
+    box_status, err = control_console.eval_res_err(GET_BOX_STATUS_FUNC)
+    errmsg = get_box_status_err(box_status, err)
+    if errmsg is not None:
+        return helpers.ModuleRes(failed=True, msg=errmsg)
+
+    return helpers.ModuleRes(changed=False)
+
+
+def check_instance_state(control_console, expected_states, check_buckets_are_discovered):
+    instance_state, err = control_console.eval_res_err(GET_INSTANCE_STATE_FUNC)
+    errmsg = get_instance_state_err(instance_state, err, expected_states)
+    if errmsg is not None:
+        return helpers.ModuleRes(failed=True, msg=errmsg)
 
     if check_buckets_are_discovered:
-        buckets_ok, err = control_console.eval_res_err('''
-            local vshard_utils = require('cartridge.vshard-utils')
-            local vshard_router = require('cartridge.roles.vshard-router')
-
-            local function check_group_buckets(group_name, group_opts)
-                if not group_opts.bootstrapped then
-                    return true
-                end
-
-                local router = vshard_router.get(group_name)
-                if router == nil then
-                    return true
-                end
-
-                local unknown_buckets = router:info().bucket.unknown
-                if unknown_buckets == 0 then
-                    return true
-                end
-
-                return nil, string.format(
-                    "%s out of %s buckets are not discovered in group '%s'",
-                    unknown_buckets,
-                    group_opts.bucket_count,
-                    group_name
-                )
-            end
-
-            local groups = vshard_utils.get_known_groups()
-            for group_name, group_opts in pairs(groups) do
-                local _, err = check_group_buckets(group_name, group_opts)
-                if err ~= nil then
-                    return nil, err
-                end
-            end
-
-            return true
-        ''')
+        buckets_ok, err = control_console.eval_res_err(CHECK_BUCKETS_ARE_DISCOVERED_FUNC)
         if not buckets_ok:
             return helpers.ModuleRes(failed=True, msg=err)
 
     return helpers.ModuleRes(changed=False)
 
 
+def check_machine_instances_state(instances, expected_states, check_buckets_are_discovered, concurrency):
+    stateboard_socks = [i['instance_info']['console_sock'] for i in instances if i.get('stateboard')]
+    instance_socks = [i['instance_info']['console_sock'] for i in instances if not i.get('stateboard')]
+
+    errors = {}
+
+    def gather(socks, func):
+        results = gather_evals(socks, func, concurrency=concurrency)
+        ok_results = {}
+        for console_sock, result in results.items():
+            if isinstance(result, helpers.CartridgeException):
+                errors[console_sock] = str(result)
+            else:
+                ok_results[console_sock] = result
+        return ok_results
+
+    for console_sock, (box_status, err) in gather(stateboard_socks, GET_BOX_STATUS_FUNC).items():
+        errmsg = get_box_status_err(box_status, err)
+        if errmsg is not None:
+            errors[console_sock] = errmsg
+
+    started_socks = []
+    for console_sock, (instance_state, err) in gather(instance_socks, GET_INSTANCE_STATE_FUNC).items():
+        errmsg = get_instance_state_err(instance_state, err, expected_states)
+        if errmsg is not None:
+            errors[console_sock] = errmsg
+        else:
+            started_socks.append(console_sock)
+
+    if check_buckets_are_discovered:
+        for console_sock, (buckets_ok, err) in gather(started_socks, CHECK_BUCKETS_ARE_DISCOVERED_FUNC).items():
+            if not buckets_ok:
+                errors[console_sock] = err
+
+    if errors:
+        return helpers.ModuleRes(
+            failed=True,
+            msg='; '.join('%s: %s' % (console_sock, errors[console_sock]) for console_sock in sorted(errors)),
+            errors=errors,
+        )
+
+    return helpers.ModuleRes(changed=False)
+
+
 def check_state(params):
+    if params.get('instances') is not None:
+        return check_machine_instances_state(
+            params['instances'],
+            params['expected_states'],
+            params['check_buckets_are_discovered'],
+            params.get('concurrency'),
+        )
+
+    if params.get('console_sock') is None:
+        return helpers.ModuleRes(failed=True, msg="Either 'console_sock' or 'instances' should be specified")
+
     try:
         control_console = helpers.get_control_console(params['console_sock'])
 
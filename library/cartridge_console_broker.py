@@ -0,0 +1,340 @@
+#!/usr/bin/env python
+
+import json
+import os
+import signal
+import socket
+import threading
+import time
+
+from ansible.module_utils.helpers import Helpers as helpers
+
+argument_spec = {
+    'run_dir': {'required': True, 'type': 'str'},
+    'state': {'required': False, 'type': 'str', 'default': 'started', 'choices': ['started', 'stopped']},
+    'idle_timeout': {'required': False, 'type': 'int', 'default': 600},
+}
+
+BROKER_START_TIMEOUT = 5
+BROKER_STOP_TIMEOUT = 5
+BROKER_ACCEPT_TIMEOUT = 1
+
+
+class InstanceConnection:
+    # Warm console connection to one instance.
+    # Commands to the same instance are serialized,
+    # commands to different instances are performed concurrently.
+    def __init__(self, console_sock):
+        self.console_sock = console_sock
+        self.lock = threading.Lock()
+        self.console = None
+        self.sock_stat = None
+
+    def get_sock_stat(self):
+        try:
+            stat = os.stat(self.console_sock)
+        except OSError:
+            return None
+        return stat.st_ino, stat.st_mtime
+
+    def reset(self):
+        if self.console is not None:
+            self.console.close()
+        self.console = None
+        self.sock_stat = None
+
+    def request(self, cmd):
+        with self.lock:
+            # Instance socket is recreated on restart
+            sock_stat = self.get_sock_stat()
+            if self.console is not None and sock_stat != self.sock_stat:
+                self.reset()
+
+            if self.console is None:
+                self.console = helpers.Console(self.console_sock)
+                self.sock_stat = sock_stat
+
+            if cmd is None:
+                return None
+
+            try:
+                return self.console.request(cmd)
+            except (socket.error, helpers.CartridgeException):
+                self.reset()
+                raise
+
+
+class Broker:
+    def __init__(self, broker_sock, idle_timeout):
+        self.broker_sock = broker_sock
+        self.idle_timeout = idle_timeout
+
+        self.lock = threading.Lock()
+        self.connections = {}
+        self.clients_count = 0
+        self.last_activity = time.time()
+        self.shutdown_requested = False
+
+    def get_connection(self, console_sock):
+        with self.lock:
+            if console_sock not in self.connections:
+                self.connections[console_sock] = InstanceConnection(console_sock)
+            return self.connections[console_sock]
+
+    def handle_request(self, request):
+        response = {'id': request.get('id')}
+
+        if request.get('shutdown') is True:
+            with self.lock:
+                self.shutdown_requested = True
+            return response
+
+        try:
+            connection = self.get_connection(request['console_sock'])
+            response['output'] = connection.request(request.get('cmd'))
+        except helpers.CartridgeException as e:
+            response['error'] = str(e)
+            response['code'] = e.code
+        except Exception as e:
+            response['error'] = 'Console broker failed to perform request: %s' % e
+            response['code'] = helpers.CartridgeErrorCodes.CONSOLE_BROKER_ERROR
+
+        return response
+
+    def handle_client(self, client_sock):
+        reader = helpers.SocketReader(client_sock)
+        try:
+            while True:
+                line = reader.read_until(b'\n')
+                if line is None:
+                    break
+
+                with self.lock:
+                    self.last_activity = time.time()
+
+                response = self.handle_request(json.loads(line.decode('utf-8')))
+                client_sock.sendall((json.dumps(response) + '\n').encode())
+        except (socket.error, ValueError):
+            pass
+        finally:
+            client_sock.close()
+            with self.lock:
+                self.clients_count -= 1
+                self.last_activity = time.time()
+
+    def is_idle(self):
+        with self.lock:
+            return self.clients_count == 0 and time.time() - self.last_activity > self.idle_timeout
+
+    def is_stopped(self):
+        with self.lock:
+            if self.shutdown_requested:
+                return True
+        return self.is_idle()
+
+    def serve(self):
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        server.bind(self.broker_sock)
+        os.chmod(self.broker_sock, 0o600)
+        server.listen(128)
+        server.settimeout(BROKER_ACCEPT_TIMEOUT)
+
+        try:
+            while not self.is_stopped():
+                try:
+                    client_sock, _ = server.accept()
+                except socket.timeout:
+                    continue
+
+                client_sock.settimeout(None)
+                with self.lock:
+                    self.clients_count += 1
+
+                thread = threading.Thread(target=self.handle_client, args=(client_sock,))
+                thread.daemon = True
+                thread.start()
+        finally:
+            server.close()
+
+
+def get_broker_files(run_dir):
+    broker_sock = os.path.join(run_dir, helpers.CONSOLE_BROKER_SOCK_NAME)
+    pid_file = os.path.join(run_dir, helpers.CONSOLE_BROKER_PID_FILE_NAME)
+    return broker_sock, pid_file
+
+
+def remove_files(*paths):
+    for path in paths:
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def get_process_start_time(pid):
+    # Returns start time of the process (in clock ticks after boot),
+    # None if process doesn't exist or /proc isn't available
+    try:
+        with open('/proc/%d/stat' % pid) as f:
+            stat = f.read()
+    except IOError:
+        return None
+
+    # Process name is in parentheses and can contain spaces,
+    # start time is the 20th field after it
+    return stat[stat.rindex(')') + 2:].split()[19]
+
+
+def get_broker_pid(pid_file):
+    # PID file contains PID and start time of the broker process,
+    # so the process that got the same PID after broker's death isn't returned
+    if not os.path.exists(pid_file):
+        return None
+
+    with open(pid_file) as f:
+        try:
+            pid, start_time = f.read().split()
+            pid = int(pid)
+        except ValueError:
+            return None
+
+    if get_process_start_time(pid) != start_time:
+        return None
+
+    return pid
+
+
+def request_broker_shutdown(broker_sock):
+    # Asks the broker to stop via its socket, so only the process serving
+    # the socket is stopped. Returns False if broker isn't available
+    if not os.path.exists(broker_sock):
+        return False
+
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(BROKER_STOP_TIMEOUT)
+    try:
+        sock.connect(broker_sock)
+        sock.sendall((json.dumps({'id': 1, 'shutdown': True}) + '\n').encode())
+        response = helpers.SocketReader(sock).read_until(b'\n')
+    except socket.error:
+        return False
+    finally:
+        sock.close()
+
+    return response is not None
+
+
+def is_broker_available(broker_sock):
+    if not os.path.exists(broker_sock):
+        return False
+
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(broker_sock)
+    except socket.error:
+        return False
+    finally:
+        sock.close()
+
+    return True
+
+
+def run_broker(broker_sock, pid_file, idle_timeout):
+    # Runs in the daemonized process
+    def on_sigterm(signum, frame):
+        raise SystemExit(0)
+
+    signal.signal(signal.SIGTERM, on_sigterm)
+
+    pid = os.getpid()
+    with open(pid_file, 'w') as f:
+        f.write('%d %s' % (pid, get_process_start_time(pid)))
+
+    try:
+        Broker(broker_sock, idle_timeout).serve()
+    finally:
+        remove_files(broker_sock, pid_file)
+
+
+def daemonize_broker(broker_sock, pid_file, idle_timeout):
+    # Runs in the forked child, detaches broker from the module process
+    os.setsid()
+    if os.fork() != 0:
+        os._exit(0)
+
+    # Module output is read until all descriptors are closed
+    devnull = os.open(os.devnull, os.O_RDWR)
+    for fd in [0, 1, 2]:
+        os.dup2(devnull, fd)
+    os.close(devnull)
+    os.chdir('/')
+
+    try:
+        run_broker(broker_sock, pid_file, idle_timeout)
+    finally:
+        os._exit(0)
+
+
+def wait_for(check, timeout):
+    time_start = time.time()
+    while True:
+        if check():
+            return True
+        if time.time() - time_start > timeout:
+            return False
+        time.sleep(0.1)
+
+
+def start_broker(run_dir, idle_timeout):
+    if not os.path.isdir(run_dir):
+        # Instances weren't started on this machine yet
+        return helpers.ModuleRes(changed=False)
+
+    broker_sock, pid_file = get_broker_files(run_dir)
+
+    if get_broker_pid(pid_file) is not None and is_broker_available(broker_sock):
+        return helpers.ModuleRes(changed=False)
+
+    remove_files(broker_sock, pid_file)
+
+    first_pid = os.fork()
+    if first_pid == 0:
+        daemonize_broker(broker_sock, pid_file, idle_timeout)
+    os.waitpid(first_pid, 0)
+
+    if not wait_for(lambda: is_broker_available(broker_sock), BROKER_START_TIMEOUT):
+        return helpers.ModuleRes(failed=True, msg='Console broker was not started in %ss' % BROKER_START_TIMEOUT)
+
+    return helpers.ModuleRes()
+
+
+def stop_broker(run_dir):
+    broker_sock, pid_file = get_broker_files(run_dir)
+
+    shutdown_requested = request_broker_shutdown(broker_sock)
+    if not shutdown_requested:
+        # Broker doesn't serve the socket, it's killed only
+        # if PID file points to the same process that wrote it
+        pid = get_broker_pid(pid_file)
+        if pid is None:
+            remove_files(broker_sock, pid_file)
+            return helpers.ModuleRes(changed=False)
+
+        os.kill(pid, signal.SIGTERM)
+
+    if not wait_for(lambda: get_broker_pid(pid_file) is None, BROKER_STOP_TIMEOUT):
+        pid = get_broker_pid(pid_file)
+        if pid is not None:
+            os.kill(pid, signal.SIGKILL)
+
+    remove_files(broker_sock, pid_file)
+    return helpers.ModuleRes()
+
+
+def manage_console_broker(params):
+    if params['state'] == 'stopped':
+        return stop_broker(params['run_dir'])
+
+    return start_broker(params['run_dir'], params['idle_timeout'])
+
+
+if __name__ == '__main__':
+    helpers.execute_module(argument_spec, manage_console_broker)
@@ -1,6 +1,6 @@
 #!/usr/bin/env python
 
-import time
+import uuid
 
 from ansible.module_utils.helpers import Helpers as helpers
 
@@ -22,6 +22,11 @@ EXTRA_CLUSTER_INSTANCES_CHECK_NAME = 'extra_cluster_instances'
 EXTRA_CLUSTER_REPLICASETS_CHECK_NAME = 'extra_cluster_replicasets'
 RENAMED_REPLICASETS_CHECK_NAME = 'renamed_replicasets'
 
+# Topology is configured in 3 calls at most (as many as the replicaset
+# with leader that isn't first needs): temporary failover priority is set,
+# then instances are joined, then failover priority with joined leader is set
+MAX_EDIT_TOPOLOGY_CALLS = 3
+
 EDIT_TOPOLOGY_FUNC_BODY = '''
 %s
 %s
@@ -50,6 +55,47 @@ end
 return ret
 ''' % (helpers.FORMAT_REPLICASET_FUNC, helpers.FORMAT_SERVER_FUNC)
 
+EDIT_TOPOLOGY_FUNC = helpers.LuaFunction(EDIT_TOPOLOGY_FUNC_BODY, name='edit_topology')
+
+GET_ENABLED_ROLES_FUNC = helpers.LuaFunction(name='get_enabled_roles', body='''
+local cartridge_roles = require('cartridge.roles')
+
+local roles_by_aliases = ...
+local enabled_roles_by_aliases = {}
+
+for alias, roles in pairs(roles_by_aliases) do
+    enabled_roles_by_aliases[alias] = cartridge_roles.get_enabled_roles(roles or {})
+end
+
+return enabled_roles_by_aliases
+''')
+
+# Cluster state is polled inside the instance, so waiting
+# takes only one console round trip
+WAIT_FOR_HEALTHY_FUNC = helpers.LuaFunction(name='wait_for_healthy', body='''
+local fiber = require('fiber')
+local cartridge = require('cartridge')
+
+local timeout, delay = ...
+
+local time_start = fiber.clock()
+local deadline = time_start + timeout
+
+while true do
+    local is_healthy = cartridge.is_healthy()
+    if is_healthy or fiber.clock() > deadline then
+        return {
+            is_healthy = is_healthy == true,
+            time = fiber.clock() - time_start,
+        }
+    end
+
+    fiber.sleep(delay)
+end
+''')
+
+WAIT_FOR_HEALTHY_DELAY = 0.1
+
 
 ##########################################
 # Collect information about new topology #
@@ -83,6 +129,7 @@ def get_all_new_instances(module_hostvars):
 
 
 def get_new_instances(module_hostvars, play_hosts):
+    play_hosts = set(play_hosts)
     module_hostvars = {
         instance_name: instance_vars
         for instance_name, instance_vars in module_hostvars.items()
@@ -120,6 +167,7 @@ def get_all_new_replicasets(module_hostvars):
 
 
 def get_new_replicasets(module_hostvars, play_hosts):
+    play_hosts = set(play_hosts)
     module_hostvars = {
         instance_name: instance_vars
         for instance_name, instance_vars in module_hostvars.items()
@@ -134,18 +182,7 @@ def set_enabled_roles(replicasets, control_console):
     if not roles_by_aliases:
         return
 
-    enabled_roles_by_aliases, _ = control_console.eval_res_err('''
-        local cartridge_roles = require('cartridge.roles')
-
-        local roles_by_aliases = ...
-        local enabled_roles_by_aliases = {}
-
-        for alias, roles in pairs(roles_by_aliases) do
-            enabled_roles_by_aliases[alias] = cartridge_roles.get_enabled_roles(roles or {})
-        end
-
-        return enabled_roles_by_aliases
-    ''', roles_by_aliases)
+    enabled_roles_by_aliases, _ = control_console.eval_res_err(GET_ENABLED_ROLES_FUNC, roles_by_aliases)
 
     for alias, enabled_roles in enabled_roles_by_aliases.items():
         replicasets[alias].update({
@@ -198,7 +235,7 @@ def check_for_missed_instances(instances, filtered_instances, fmt, allow_missed_
 
 
 def sort_instances_to_join_by_failover_priority(
-    instances_to_join, new_replicaset, old_instances, allow_missed_instances
+    instances_to_join, new_replicaset, old_instances, topology_index, allow_missed_instances
 ):
     new_failover_priority = new_replicaset.get('failover_priority')
     if not new_failover_priority:
@@ -218,20 +255,22 @@ def sort_instances_to_join_by_failover_priority(
     if err is not None:
         return None, err
 
+    # instances that aren't in failover priority are joined after all listed ones
+    failover_priority_indexes = topology_index['failover_priority_indexes'][new_replicaset['alias']]
     instances_to_join = list(sorted(
         instances_to_join,
-        key=lambda s: new_failover_priority.index(s) if s in new_failover_priority else len(instances_to_join)
+        key=lambda s: failover_priority_indexes.get(s, len(new_failover_priority))
     ))
 
     return instances_to_join, None
 
 
-def get_join_servers(new_replicaset, old_replicaset, old_instances, allow_missed_instances):
-    current_instances = []
-    if old_replicaset is not None:
-        current_instances = old_replicaset.get('instances')
-
-    remaining_instances = set(new_replicaset['instances']) - set(current_instances)
+def get_join_servers(new_replicaset, old_replicaset, old_instances, topology_index, allow_missed_instances):
+    replicasets_by_names = topology_index['replicasets_by_names']
+    remaining_instances = [
+        s for s in new_replicaset['instances']
+        if old_replicaset is None or replicasets_by_names.get(s) != old_replicaset['uuid']
+    ]
     if not remaining_instances:
         return None, None
 
@@ -249,16 +288,16 @@ def get_join_servers(new_replicaset, old_replicaset, old_instances, allow_missed
 
     # When the new replicaset is created, instances can be joined in failover
     # priority order.
-    # When the existing replicaset is edited, failover priority is configured
-    # later when all replicaset instances UUIDs are set (when new instances
-    # are joined, UUID isn't specified).
+    # When the existing replicaset is edited, joined instances are added to
+    # the end of failover priority, and it's changed on the same call
+    # (see add_failover_priority_if_required).
 
     if instances_to_join:
         if old_replicaset is None:
             # we create new replicaset - let's join instances in failover priority
             # to avoid second edit_topology call
             instances_to_join, err = sort_instances_to_join_by_failover_priority(
-                instances_to_join, new_replicaset, old_instances, allow_missed_instances
+                instances_to_join, new_replicaset, old_instances, topology_index, allow_missed_instances
             )
             if err is not None:
                 return None, err
@@ -271,7 +310,70 @@ def get_join_servers(new_replicaset, old_replicaset, old_instances, allow_missed
     return join_servers, None
 
 
-def get_replicaset_params(new_replicaset, old_replicaset, old_instances, allow_missed_instances):
+def get_topology_index(old_instances, old_replicasets, new_replicasets):
+    # Index of topology shared by params builders to avoid scanning
+    # instances and replicasets for each replicaset
+    # (instances by aliases are `old_instances` itself,
+    # cluster replicasets are identified by UUIDs)
+    names_by_uris = {
+        instance.get('uri'): instance_name
+        for instance_name, instance in old_instances.items()
+    }
+
+    replicasets_by_names = {}
+    failover_orders = {}
+    for old_replicaset in old_replicasets.values():
+        for instance_name in old_replicaset['instances']:
+            replicasets_by_names[instance_name] = old_replicaset['uuid']
+        # current failover priority is the order of replicaset instances
+        failover_orders[old_replicaset['uuid']] = [
+            old_instances.get(instance_name, {}).get('uuid') for instance_name in old_replicaset['instances']
+        ]
+
+    # the first occurrence of the instance in failover priority is used
+    failover_priority_indexes = {}
+    for alias, new_replicaset in new_replicasets.items():
+        if new_replicaset.get('failover_priority'):
+            indexes = failover_priority_indexes[alias] = {}
+            for i, instance_name in enumerate(new_replicaset['failover_priority']):
+                indexes.setdefault(instance_name, i)
+
+    return {
+        'names_by_uris': names_by_uris,
+        'replicasets_by_names': replicasets_by_names,
+        'failover_orders': failover_orders,
+        'failover_priority_indexes': failover_priority_indexes,
+    }
+
+
+def get_join_server_uuid(join_server):
+    # UUID is generated by Cartridge on join if it isn't specified.
+    # We generate it ourselves when the joined instance should be
+    # referenced in the same edit_topology call.
+    # It relies on the order of edit_topology processing in Cartridge 2.x
+    # (`cartridge/lua-api/edit-topology.lua`, supported versions are >= 2.0.0, < 3):
+    # replicasets are edited before `servers`, and `join_servers` of the replicaset
+    # are added to the topology before its `failover_priority` is checked and applied.
+    if not join_server.get('uuid'):
+        join_server['uuid'] = str(uuid.uuid4())
+    return join_server['uuid']
+
+
+def get_join_servers_by_names(replicasets_params, topology_index):
+    names_by_uris = topology_index['names_by_uris']
+
+    join_servers_names = []
+    join_servers = {}
+    for replicaset_params in replicasets_params:
+        for join_server in replicaset_params.get('join_servers') or []:
+            instance_name = names_by_uris[join_server['uri']]
+            join_servers_names.append(instance_name)
+            join_servers[instance_name] = join_server
+
+    return join_servers_names, join_servers
+
+
+def get_replicaset_params(new_replicaset, old_replicaset, old_instances, allow_missed_instances, topology_index=None):
     """
     input EditReplicasetInput {
         uuid: String
@@ -285,6 +387,13 @@ def get_replicaset_params(new_replicaset, old_replicaset, old_instances, allow_m
     }
     """
 
+    if topology_index is None:
+        topology_index = get_topology_index(
+            old_instances,
+            {new_replicaset['alias']: old_replicaset} if old_replicaset is not None else {},
+            {new_replicaset['alias']: new_replicaset},
+        )
+
     replicaset_params = {}
 
     if old_replicaset is not None:
@@ -302,7 +411,7 @@ def get_replicaset_params(new_replicaset, old_replicaset, old_instances, allow_m
     )
 
     join_servers, err = get_join_servers(
-        new_replicaset, old_replicaset, old_instances, allow_missed_instances
+        new_replicaset, old_replicaset, old_instances, topology_index, allow_missed_instances
     )
     if err is not None:
         return None, err
@@ -318,7 +427,7 @@ def get_replicaset_params(new_replicaset, old_replicaset, old_instances, allow_m
     return replicaset_params, None
 
 
-def change_failover_priority_if_leader_not_first(replicaset_params, old_replicaset, old_instances):
+def change_failover_priority_if_leader_not_first(replicaset_params, old_replicaset, old_instances, topology_index):
     if any([
         not (replicaset_params or {}).get('uuid'),
         not (replicaset_params or {}).get('join_servers'),
@@ -328,125 +437,111 @@ def change_failover_priority_if_leader_not_first(replicaset_params, old_replicas
         return replicaset_params
 
     leader_uuid = old_replicaset.get('leader_uuid')
-    replicaset_instances = old_replicaset['instances']
-    first_instance_uuid = old_instances[replicaset_instances[0]].get('uuid')
+    failover_order = topology_index['failover_orders'][old_replicaset['uuid']]
 
-    if leader_uuid == first_instance_uuid:
+    if leader_uuid == failover_order[0]:
         return replicaset_params
 
     # We can't join instances if leader not first (https://github.com/tarantool/cartridge/issues/1204)
     del replicaset_params['join_servers']
 
     # Count temp failover priority
-    replicaset_params['failover_priority'] = [
-        old_instances[s]['uuid'] for s in replicaset_instances
+    replicaset_params['failover_priority'] = [leader_uuid] + [
+        instance_uuid for instance_uuid in failover_order if instance_uuid != leader_uuid
     ]
-    replicaset_params['failover_priority'].remove(leader_uuid)
-    replicaset_params['failover_priority'] = [leader_uuid] + replicaset_params['failover_priority']
 
     return replicaset_params
 
 
-def get_replicasets_params(
-    new_replicasets, old_replicasets,
-    old_instances,
-    allow_missed_instances,
+def add_failover_priority_if_required(
+    replicaset_params, new_replicaset, old_replicaset, old_instances, topology_index, allow_missed_instances
 ):
-    replicasets_params = []
-
-    for _, new_replicaset in new_replicasets.items():
-        old_replicaset = old_replicasets.get(new_replicaset['alias'])
+    new_failover_priority = new_replicaset.get('failover_priority')
+    if old_replicaset is None or not new_failover_priority:
+        # new replicaset instances are joined in failover priority order
+        return replicaset_params, None
 
-        replicaset_params, err = get_replicaset_params(
-            new_replicaset, old_replicaset, old_instances, allow_missed_instances
-        )
+    if (replicaset_params or {}).get('failover_priority') is not None:
+        # temporary failover priority is set, required one is set on the next call
+        return replicaset_params, None
 
-        if err is not None:
-            return None, "Failed to get edit topology params for replicaset %s: %s" % (
-                new_replicaset['alias'], err
-            )
+    joined_names, join_servers = get_join_servers_by_names(
+        [replicaset_params] if replicaset_params is not None else [], topology_index,
+    )
 
-        replicaset_params = change_failover_priority_if_leader_not_first(
-            replicaset_params,
-            old_replicaset,
-            old_instances,
-        )
+    # instances joined on the same call can be used in failover priority
+    # since Cartridge processes `join_servers` before `failover_priority`
+    # (see get_join_server_uuid)
+    filtered_new_failover_priority = list(filter(
+        lambda s: s in join_servers or (s in old_instances and old_instances[s].get('uuid')),
+        new_failover_priority
+    ))
 
-        if replicaset_params is not None:
-            replicasets_params.append(replicaset_params)
+    err = check_for_missed_instances(
+        new_failover_priority,
+        filtered_new_failover_priority,
+        "Instances %s from %s failover_priority aren't joined to cluster" % ("%s", new_replicaset['alias']),
+        allow_missed_instances,
+    )
+    if err is not None:
+        return None, err
 
-    return replicasets_params, None
+    if filtered_new_failover_priority and filtered_new_failover_priority[0] in join_servers:
+        # instance becomes a leader only after it's joined,
+        # so failover priority is changed on the next call
+        return replicaset_params, None
 
+    # joined instances are added to the end of failover priority
+    instances_after_call = old_replicaset['instances'] + joined_names
+    if instances_after_call[:len(filtered_new_failover_priority)] == filtered_new_failover_priority:
+        return replicaset_params, None
 
-def get_replicasets_params_to_join_instances(
-    new_replicasets, old_replicasets,
-    old_instances,
-    allow_missed_instances,
-):
-    replicasets_params = []
+    if replicaset_params is None:
+        replicaset_params = {'uuid': old_replicaset['uuid']}
 
-    for alias, cluster_replicaset in old_replicasets.items():
-        if alias not in new_replicasets:
-            continue
-
-        join_servers, err = get_join_servers(
-            new_replicasets[alias], cluster_replicaset,
-            old_instances,
-            allow_missed_instances,
-        )
-        if err is not None:
-            return None, err
-
-        if join_servers:
-            replicasets_params.append({
-                'uuid': cluster_replicaset['uuid'],
-                'join_servers': join_servers,
-            })
+    replicaset_params['failover_priority'] = [
+        get_join_server_uuid(join_servers[s]) if s in join_servers else old_instances[s]['uuid']
+        for s in filtered_new_failover_priority
+    ]
 
-    return replicasets_params, None
+    return replicaset_params, None
 
 
-def get_replicasets_params_for_changing_failover_priority(
+def get_replicasets_params(
     new_replicasets, old_replicasets,
     old_instances,
+    topology_index,
     allow_missed_instances,
 ):
     replicasets_params = []
 
-    for alias, old_replicaset in old_replicasets.items():
-        if alias not in new_replicasets:
-            continue
-
-        new_failover_priority = new_replicasets[alias].get('failover_priority')
-        if new_failover_priority is None:
-            continue
+    for _, new_replicaset in new_replicasets.items():
+        old_replicaset = old_replicasets.get(new_replicaset['alias'])
 
-        if old_replicaset['instances'][:len(new_failover_priority)] == new_failover_priority:
-            continue
+        replicaset_params, err = get_replicaset_params(
+            new_replicaset, old_replicaset, old_instances, allow_missed_instances, topology_index
+        )
 
-        filtered_new_failover_priority = list(filter(
-            lambda s: s in old_instances and old_instances[s].get('uuid'),
-            new_failover_priority
-        ))
+        if err is None:
+            replicaset_params = change_failover_priority_if_leader_not_first(
+                replicaset_params,
+                old_replicaset,
+                old_instances,
+                topology_index,
+            )
 
-        err = check_for_missed_instances(
-            new_failover_priority,
-            filtered_new_failover_priority,
-            "Instances %s from %s failover_priority aren't joined to cluster" % ("%s", alias),
-            allow_missed_instances,
-        )
+            replicaset_params, err = add_failover_priority_if_required(
+                replicaset_params, new_replicaset, old_replicaset, old_instances, topology_index,
+                allow_missed_instances,
+            )
 
         if err is not None:
-            return None, err
-
-        new_failover_priority_uuids = [
-            old_instances[s]['uuid'] for s in filtered_new_failover_priority
-        ]
+            return None, "Failed to get edit topology params for replicaset %s: %s" % (
+                new_replicaset['alias'], err
+            )
 
-        replicasets_params.append({
-            'uuid': old_replicaset['uuid'],
-            'failover_priority': new_failover_priority_uuids,
-        })
+        if replicaset_params is not None:
+            replicasets_params.append(replicaset_params)
 
     return replicasets_params, None
 
@@ -475,7 +570,7 @@ def add_server_param_if_required(server_params, new_instance, old_instance, para
     server_params[param_name] = new_instance.get(param_name)
 
 
-def get_server_params(instance_name, new_instance, old_instances, allow_missed_instances):
+def get_server_params(instance_name, new_instance, old_instances, allow_missed_instances, join_servers=None):
     if instance_name not in old_instances:
         if new_instance.get('expelled') is True:
             return None, None
@@ -488,13 +583,16 @@ def get_server_params(instance_name, new_instance, old_instances, allow_missed_i
             return None, msg
 
     old_instance = old_instances[instance_name]
+    join_server = (join_servers or {}).get(instance_name)
 
-    if not old_instance.get('uuid'):  # uuid is '' for unjoined instances
+    # uuid is '' for unjoined instances,
+    # but instances joined on the same call can be configured
+    # since Cartridge processes `join_servers` before `servers`
+    # (see get_join_server_uuid)
+    if not old_instance.get('uuid') and join_server is None:
         return None, None
 
-    server_params = {
-        'uuid': old_instance.get('uuid'),
-    }
+    server_params = {}
 
     if new_instance.get('expelled') is True:
         server_params['expelled'] = True
@@ -505,21 +603,24 @@ def get_server_params(instance_name, new_instance, old_instances, allow_missed_i
         for param_name in ['zone', 'uri']:
             add_server_param_if_required(server_params, new_instance, old_instance, param_name)
 
-    if len(server_params) == 1:
-        # there are only `uuid`, all instance parameters are the same as configured
+    if not server_params:
+        # all instance parameters are the same as configured
         return None, None
 
+    server_params['uuid'] = old_instance.get('uuid') or get_join_server_uuid(join_server)
+
     return server_params, None
 
 
 def get_servers_params(
     new_instances, old_instances,
     allow_missed_instances,
+    join_servers=None,
 ):
     servers_params = []
     for instance_name, new_instance in new_instances.items():
         server_params, err = get_server_params(
-            instance_name, new_instance, old_instances, allow_missed_instances
+            instance_name, new_instance, old_instances, allow_missed_instances, join_servers
         )
         if err is not None:
             return None, "Failed to get edit topology params for instance %s: %s" % (instance_name, err)
@@ -578,24 +679,27 @@ def check_new_replicasets_for_dangerous_changes(
     extra_cluster_replicasets = []
     renamed_replicasets = []
 
+    new_replicasets_names_by_instances = {}
+    for new_replicaset_name, new_replicaset in all_new_replicasets.items():
+        instances = frozenset(new_replicaset.get('instances', []))
+        new_replicasets_names_by_instances.setdefault(instances, []).append(new_replicaset_name)
+
     for old_replicaset_name, old_replicaset in old_replicasets.items():
         if old_replicaset_name in all_new_replicasets:
             continue
 
-        renamed = False
+        instances = frozenset(old_replicaset.get('instances', []))
+        new_replicasets_names = new_replicasets_names_by_instances.get(instances)
 
-        for new_replicaset_name, new_replicaset in all_new_replicasets.items():
-            if set(new_replicaset.get('instances', [])) != set(old_replicaset.get('instances', [])):
-                continue
+        if not new_replicasets_names:
+            extra_cluster_replicasets.append(old_replicaset_name)
+            continue
 
-            renamed = True
+        for new_replicaset_name in new_replicasets_names:
             # Ignore renamed replicaset if it isn't in play hosts
             if new_replicaset_name in new_replicasets:
                 renamed_replicasets.append('%s -> %s' % (new_replicaset_name, old_replicaset_name))
 
-        if not renamed:
-            extra_cluster_replicasets.append(old_replicaset_name)
-
     if renamed_replicasets:
         msg = 'looks like that some replicasets has been renamed in UI, you should rename them in inventory: %s'
         msg %= ', '.join(renamed_replicasets)
@@ -649,21 +753,11 @@ def check_new_cluster_for_dangerous_changes(
 
 
 def wait_for_cluster_is_healthy(control_console, timeout):
-    delay = 0.5
-    time_start = time.time()
-
-    while True:
-        is_healthy, _ = control_console.eval_res_err('''
-            return require('cartridge').is_healthy()
-        ''')
-
-        if is_healthy:
-            return True
-
-        if time.time() > time_start + timeout:
-            return False
+    res, err = control_console.eval_res_err(WAIT_FOR_HEALTHY_FUNC, timeout, WAIT_FOR_HEALTHY_DELAY)
+    if err is not None:
+        return None, "Failed to wait for cluster is healthy: %s" % err
 
-        time.sleep(delay)
+    return res, None
 
 
 def update_old_instances_and_replicasets(
@@ -689,63 +783,49 @@ def update_old_instances_and_replicasets(
 
 
 def get_topology_params(
-    get_replicasets_params_func,
-    get_servers_params_func,
     new_instances, old_instances,
     new_replicasets, old_replicasets,
     allow_missed_instances,
 ):
     topology_params = {}
+    topology_index = get_topology_index(old_instances, old_replicasets, new_replicasets)
 
-    if get_replicasets_params_func:
-        replicasets_params, err = get_replicasets_params_func(
-            new_replicasets, old_replicasets,
-            old_instances,
-            allow_missed_instances,
-        )
-        if err is not None:
-            return None, err
+    replicasets_params, err = get_replicasets_params(
+        new_replicasets, old_replicasets,
+        old_instances,
+        topology_index,
+        allow_missed_instances,
+    )
+    if err is not None:
+        return None, err
 
-        if replicasets_params:
-            topology_params['replicasets'] = replicasets_params
+    if replicasets_params:
+        topology_params['replicasets'] = replicasets_params
 
-    if get_servers_params_func:
-        servers_params, err = get_servers_params_func(
-            new_instances, old_instances,
-            allow_missed_instances,
-        )
-        if err is not None:
-            return None, err
+    _, join_servers = get_join_servers_by_names(replicasets_params, topology_index)
+
+    servers_params, err = get_servers_params(
+        new_instances, old_instances,
+        allow_missed_instances,
+        join_servers,
+    )
+    if err is not None:
+        return None, err
 
-        if servers_params:
-            topology_params['servers'] = servers_params
+    if servers_params:
+        topology_params['servers'] = servers_params
 
     return topology_params, None
 
 
 def single_edit_topology_call(
     control_console,
-    get_replicasets_params_func,
-    get_servers_params_func,
+    topology_params,
     new_instances, old_instances,
-    new_replicasets, old_replicasets,
-    allow_missed_instances,
+    old_replicasets,
     healthy_timeout,
 ):
-    topology_params, err = get_topology_params(
-        get_replicasets_params_func,
-        get_servers_params_func,
-        new_instances, old_instances,
-        new_replicasets, old_replicasets,
-        allow_missed_instances,
-    )
-    if err is not None:
-        return None, "Failed to collect edit topology params: %s" % err
-
-    if not topology_params:
-        return False, None
-
-    res, err = control_console.eval_res_err(EDIT_TOPOLOGY_FUNC_BODY, topology_params)
+    res, err = control_console.eval_res_err(EDIT_TOPOLOGY_FUNC, topology_params)
     if err is not None:
         return None, 'Failed to edit topology: %s' % err
 
@@ -758,8 +838,12 @@ def single_edit_topology_call(
     # If everything is Ok - this call doesn't take a long time, but
     # guarantees that next `edit_topology` call wouldn't fail.
     # If cluster isn't healthy then it's good to show error.
-    if not wait_for_cluster_is_healthy(control_console, healthy_timeout):
-        return None, "Cluster isn't healthy after editing topology"
+    wait_res, err = wait_for_cluster_is_healthy(control_console, healthy_timeout)
+    if err is not None:
+        return None, err
+
+    if not wait_res['is_healthy']:
+        return None, "Cluster isn't healthy in %.2fs after editing topology" % wait_res['time']
 
     # Now we need to get updated instances and replicasets
     # configuration to check if we need one more call.
@@ -773,7 +857,16 @@ def single_edit_topology_call(
     if err is not None:
         return None, err
 
-    return True, None
+    return wait_res['time'], None
+
+
+def get_empty_plan():
+    return {
+        'commits': 0,
+        'plan': [],
+        # time spent waiting for cluster is healthy after each call
+        'healthy_wait_times': [],
+    }
 
 
 def edit_topology(params):
@@ -790,8 +883,10 @@ def edit_topology(params):
     new_instances = get_new_instances(module_hostvars, play_hosts)
     new_replicasets = get_new_replicasets(module_hostvars, play_hosts)
 
+    plan = get_empty_plan()
+
     if not new_replicasets and not new_instances:
-        return helpers.ModuleRes(changed=False)
+        return helpers.ModuleRes(changed=False, fact=plan)
 
     all_new_instances = get_all_new_instances(module_hostvars)
     all_new_replicasets = get_all_new_replicasets(module_hostvars)
@@ -803,10 +898,7 @@ def edit_topology(params):
 
     set_enabled_roles(new_replicasets, control_console)
 
-    old_instances = helpers.get_cluster_instances(control_console)
-    old_replicasets = helpers.get_cluster_replicasets(control_console)
-
-    err = helpers.enrich_replicasets_with_leaders(control_console, old_replicasets)
+    old_instances, old_replicasets, err = helpers.get_cluster_topology(control_console)
     if err is not None:
         return helpers.ModuleRes(failed=True, msg=err)
 
@@ -820,68 +912,47 @@ def edit_topology(params):
         )
         if err is not None:
             return helpers.ModuleRes(failed=True, msg=err)
-        return helpers.ModuleRes(changed=False)
-
-    # Configure replicasets and instances:
-    # * Create new replicasets.
-    # * Edit existent replicasets.
-    #   Temporary change failover_priority for replicasets with not first leader
-    #   (https://github.com/tarantool/cartridge/issues/1204)
-    # * Expel instances.
-    # * Configure instances that are already joined.
-    #   New instances aren't configured here since they don't have
-    #   UUIDs before join.
-
-    changed_on_first_call, err = single_edit_topology_call(
-        control_console,
-        get_replicasets_params,
-        get_servers_params,
-        new_instances, old_instances,
-        new_replicasets, old_replicasets,
-        allow_missed_instances,
-        healthy_timeout,
-    )
-    if err is not None:
-        return helpers.ModuleRes(failed=True, msg=err)
+        return helpers.ModuleRes(changed=False, fact=plan)
+
+    # Configure replicasets and instances.
+    # All changes are merged into one call, more calls are required only:
+    # * to join instances to replicaset with not first leader: failover_priority
+    #   is temporary changed on the first call and instances are joined on the
+    #   second one (https://github.com/tarantool/cartridge/issues/1204);
+    # * to make joined instance a leader: failover_priority is changed on the
+    #   call after the join.
+    # Instances joined on the same call get UUIDs generated by the module
+    # to be used in failover_priority and servers params.
+    # As before, topology isn't edited more than MAX_EDIT_TOPOLOGY_CALLS times.
+
+    while plan['commits'] < MAX_EDIT_TOPOLOGY_CALLS:
+        topology_params, err = get_topology_params(
+            new_instances, old_instances,
+            new_replicasets, old_replicasets,
+            allow_missed_instances,
+        )
+        if err is not None:
+            return helpers.ModuleRes(failed=True, msg="Failed to collect edit topology params: %s" % err)
 
-    # Configure replicasets:
-    # * Join new instances to existent replicasets.
-    #   In this case failover_priority isn't changed since
-    #   new instances hasn't UUIDs before join.
+        if not topology_params:
+            break
 
-    changed_on_second_call, err = single_edit_topology_call(
-        control_console,
-        get_replicasets_params_to_join_instances,
-        None,
-        new_instances, old_instances,
-        new_replicasets, old_replicasets,
-        allow_missed_instances,
-        healthy_timeout,
-    )
-    if err is not None:
-        return helpers.ModuleRes(failed=True, msg=err)
+        plan['commits'] += 1
+        plan['plan'].append(topology_params)
 
-    # Configure failover_priority and instances that were joined on previous call:
-    # * Edit failover_priority of replicasets if it's needed.
-    # * Configure instances that weren't configured on first `edit_topology` call.
+        healthy_wait_time, err = single_edit_topology_call(
+            control_console,
+            topology_params,
+            new_instances, old_instances,
+            old_replicasets,
+            healthy_timeout,
+        )
+        if err is not None:
+            return helpers.ModuleRes(failed=True, msg=err, fact=plan)
 
-    changed_on_third_call, err = single_edit_topology_call(
-        control_console,
-        get_replicasets_params_for_changing_failover_priority,
-        get_servers_params,
-        new_instances, old_instances,
-        new_replicasets, old_replicasets,
-        allow_missed_instances,
-        healthy_timeout,
-    )
-    if err is not None:
-        return helpers.ModuleRes(failed=True, msg=err)
+        plan['healthy_wait_times'].append(healthy_wait_time)
 
-    return helpers.ModuleRes(changed=any([
-        changed_on_first_call,
-        changed_on_second_call,
-        changed_on_third_call,
-    ]))
+    return helpers.ModuleRes(changed=plan['commits'] > 0, fact=plan)
 
 
 if __name__ == '__main__':
@@ -34,13 +34,25 @@ def check_leaders_promotion_is_possible(control_console):
     return None
 
 
-def call_failover_promote(control_console, replicaset_leaders, force_inconsistency):
+def call_failover_promote(control_console, replicaset_leaders, force_inconsistency, twophase_options):
+    # Set two-phase commit options, get active leaders before and after promotion in one request
     opts = {
         'force_inconsistency': force_inconsistency,
     }
-    return control_console.eval_res_err('''
-        return require('cartridge').failover_promote(...)
-    ''', replicaset_leaders, opts)
+    results = control_console.eval_batch([
+        (helpers.SET_TWOPHASE_OPTIONS_FUNC, [twophase_options]),
+        (helpers.GET_ACTIVE_LEADERS_FUNC, []),
+        ('''
+            return require('cartridge').failover_promote(...)
+        ''', [replicaset_leaders, opts]),
+        (helpers.GET_ACTIVE_LEADERS_FUNC, []),
+    ])
+
+    active_leaders, _ = results[1]
+    _, err = results[2]
+    new_active_leaders, _ = results[3]
+
+    return active_leaders or {}, new_active_leaders or {}, err
 
 
 def get_replicaset_leaders_by_play_hosts(play_hosts, module_hostvars, cluster_disabled_instances, control_console):
@@ -96,8 +108,7 @@ def get_replicaset_leaders_by_aliases(specified_replicaset_leaders, control_cons
     if not specified_replicaset_leaders:
         return {}, None
 
-    cluster_instances = helpers.get_cluster_instances(control_console)
-    cluster_replicasets = helpers.get_cluster_replicasets(control_console)
+    cluster_instances, cluster_replicasets, _ = helpers.get_cluster_topology(control_console, with_leaders=False)
 
     replicaset_leaders = {}
     for replicaset_alias, leader_alias in specified_replicaset_leaders.items():
@@ -173,12 +184,11 @@ def failover_promote(params):
 
     force_inconsistency = failover_promote_params.get('force_inconsistency')
 
-    # set two-phase commit opts
-    helpers.set_twophase_options_from_params(control_console, params)
+    twophase_options = helpers.get_twophase_options_from_params(params)
 
-    active_leaders, _ = helpers.get_active_leaders(control_console)
-
-    _, err = call_failover_promote(control_console, replicaset_leaders, force_inconsistency)
+    active_leaders, new_active_leaders, err = call_failover_promote(
+        control_console, replicaset_leaders, force_inconsistency, twophase_options
+    )
     if err is not None:
         return helpers.ModuleRes(
             failed=True,
@@ -186,8 +196,6 @@ def failover_promote(params):
             warnings=critical_warnings,
         )
 
-    new_active_leaders, _ = helpers.get_active_leaders(control_console)
-
     if critical_warnings:
         return helpers.ModuleRes(
             failed=True,
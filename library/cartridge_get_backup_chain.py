@@ -0,0 +1,44 @@
+#!/usr/bin/env python
+
+import os
+
+from ansible.module_utils.helpers import Helpers as helpers
+from ansible.module_utils import backup_manifest
+
+argument_spec = {
+    'backup_path': {'required': True, 'type': 'str'},
+}
+
+
+def get_backup_chain(params):
+    # Returns paths of all archives required to restore from the backup,
+    # the backup itself is the first one
+    backup_path = params['backup_path']
+    if not os.path.exists(backup_path):
+        return helpers.ModuleRes(failed=True, msg="Backup '%s' not found" % backup_path)
+
+    if os.path.isdir(backup_path):
+        return helpers.ModuleRes(changed=False, fact=[backup_path])
+
+    manifest = backup_manifest.read_manifest(backup_path)
+    if manifest is None:
+        return helpers.ModuleRes(changed=False, fact=[backup_path])
+
+    chain = [backup_path]
+    for archive_name in sorted(backup_manifest.get_files_by_archives(manifest)):
+        archive_path = os.path.join(os.path.dirname(backup_path), archive_name)
+        if archive_path == backup_path:
+            continue
+
+        if not os.path.exists(archive_path):
+            return helpers.ModuleRes(
+                failed=True,
+                msg="Backup '%s' from the chain of backup '%s' not found" % (archive_path, backup_path),
+            )
+        chain.append(archive_path)
+
+    return helpers.ModuleRes(changed=False, fact=chain)
+
+
+if __name__ == '__main__':
+    helpers.execute_module(argument_spec, get_backup_chain)
@@ -0,0 +1,23 @@
+#!/usr/bin/env python
+
+from ansible.module_utils.helpers import Helpers as helpers
+from ansible.module_utils import package_cache
+
+argument_spec = {
+    'cache_dir': {'required': True, 'type': 'str'},
+    'package_name': {'required': True, 'type': 'str'},
+    'checksum': {'required': True, 'type': 'str'},
+    'size': {'required': True, 'type': 'int'},
+}
+
+
+def get_cached_package(params):
+    # Returns path of the cached package or None
+    path = package_cache.find_package(
+        params['cache_dir'], params['package_name'], params['checksum'], params['size'],
+    )
+    return helpers.ModuleRes(changed=False, fact=path)
+
+
+if __name__ == '__main__':
+    helpers.execute_module(argument_spec, get_cached_package)
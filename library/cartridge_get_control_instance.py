@@ -13,75 +13,81 @@ argument_spec = {
 
 GET_TWOPHASE_COMMIT_VERSION_TIMEOUT = 60
 
+GET_MEMBERSHIP_MEMBERS_FUNC = helpers.LuaFunction(name='get_membership_members', body='''
+return require('membership').members()
+''')
+
+GET_TWOPHASE_COMMIT_VERSIONS_FUNC = helpers.LuaFunction(name='get_twophase_commit_versions', body='''
+local fiber_clock = require('fiber').clock
+local pool = require('cartridge.pool')
+
+local uris, timeout = ...
+
+local deadline = fiber_clock() + timeout
+
+local connections = {}
+for i, uri in ipairs(uris) do
+    local conn, err = pool.connect(uri)
+    if err ~= nil then
+        return nil, tostring(err)
+    end
+
+    table.insert(connections, conn)
+end
+
+local futures = {}
+for _, conn in ipairs(connections) do
+    local future = conn:eval([[
+        local twophase_version = require('cartridge.twophase').VERSION
+        if twophase_version ~= nil then
+            return twophase_version
+        end
 
-def get_membership_members(control_console):
-    members, err = control_console.eval_res_err('''
-        return require('membership').members()
-    ''')
-    if err is not None:
-        return None, "Impossible to get membership members: %s" % err
-    if not members:
-        return None, "No members in membership"
-
-    return members, None
-
+        if rawget(_G, '__cartridge_upload_begin') ~= nil then
+            return 2
+        else
+            return 1
+        end
+    ]], nil, {is_async = true})
 
-def get_twophase_commit_versions(control_console, advertise_uris):
-    versions, err = control_console.eval_res_err('''
-        local fiber_clock = require('fiber').clock
-        local pool = require('cartridge.pool')
+    table.insert(futures, future)
+end
 
-        local uris, timeout = ...
+local versions = {}
 
-        local deadline = fiber_clock() + timeout
+for _, future in ipairs(futures) do
+    local wait_timeout = deadline - fiber_clock()
+    if wait_timeout < 0 then
+        wait_timeout = 0
+    end
 
-        local connections = {}
-        for i, uri in ipairs(uris) do
-            local conn, err = pool.connect(uri)
-            if err ~= nil then
-                return nil, tostring(err)
-            end
+    local result, err = future:wait_result(wait_timeout)
+    if err ~= nil then
+        return nil, tostring(err)
+    end
 
-            table.insert(connections, conn)
-        end
+    local version = result[1]
+    table.insert(versions, version)
+end
 
-        local futures = {}
-        for _, conn in ipairs(connections) do
-            local future = conn:eval([[
-                local twophase_version = require('cartridge.twophase').VERSION
-                if twophase_version ~= nil then
-                    return twophase_version
-                end
-
-                if rawget(_G, '__cartridge_upload_begin') ~= nil then
-                    return 2
-                else
-                    return 1
-                end
-            ]], nil, {is_async = true})
-
-            table.insert(futures, future)
-        end
+return versions
+''')
 
-        local versions = {}
 
-        for _, future in ipairs(futures) do
-            local wait_timeout = deadline - fiber_clock()
-            if wait_timeout < 0 then
-                wait_timeout = 0
-            end
+def get_membership_members(control_console):
+    members, err = control_console.eval_res_err(GET_MEMBERSHIP_MEMBERS_FUNC)
+    if err is not None:
+        return None, "Impossible to get membership members: %s" % err
+    if not members:
+        return None, "No members in membership"
 
-            local result, err = future:wait_result(wait_timeout)
-            if err ~= nil then
-                return nil, tostring(err)
-            end
+    return members, None
 
-            local version = result[1]
-            table.insert(versions, version)
-        end
 
-        return versions
-    ''', advertise_uris, GET_TWOPHASE_COMMIT_VERSION_TIMEOUT)
+def get_twophase_commit_versions(control_console, advertise_uris):
+    versions, err = control_console.eval_res_err(
+        GET_TWOPHASE_COMMIT_VERSIONS_FUNC, advertise_uris, GET_TWOPHASE_COMMIT_VERSION_TIMEOUT
+    )
 
     return versions, err
 
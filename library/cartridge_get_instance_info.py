@@ -114,6 +114,12 @@ def get_instance_info(params):
     instance_info['paths_to_remove_on_expel'].add(instance_info['pid_file'])
     instance_info['files_to_remove_on_cleanup'].add(instance_info['pid_file'])
 
+    # instance state file (see `cartridge_save_instance_state`)
+    instance_info['state_file'] = helpers.get_instance_state_file(
+        instance_vars['cartridge_run_dir'], app_name, instance_name, instance_vars['stateboard']
+    )
+    instance_info['paths_to_remove_on_expel'].add(instance_info['state_file'])
+
     # instance work dir
     instance_info['work_dir'] = helpers.get_instance_dir(
         instance_vars['cartridge_data_dir'], app_name, instance_name, instance_vars['stateboard']
@@ -3,18 +3,32 @@
 import os
 
 from ansible.module_utils.helpers import Helpers as helpers
+from ansible.module_utils import instance_state
+from ansible.module_utils.instance_state import get_new_default_conf
+
+try:
+    from ansible.module_utils.async_console import gather_evals
+except (ImportError, SyntaxError):
+    # asyncio isn't available on Python 2, evals are performed one by one
+    gather_evals = helpers.gather_evals
 
 argument_spec = {
     'check_package_updated': {'required': False, 'type': 'bool', 'default': False},
     'check_config_updated': {'required': False, 'type': 'bool', 'default': False},
+    'check_by_hashes': {'required': False, 'type': 'bool', 'default': False},
 
-    'instance_info': {'required': True, 'type': 'dict'},
+    'instance_info': {'required': False, 'type': 'dict'},
     'app_name': {'required': False, 'type': 'str'},
     'config': {'required': False, 'type': 'dict'},
     'cartridge_defaults': {'required': False, 'type': 'dict'},
     'cluster_cookie': {'required': False, 'type': 'str'},
     'cartridge_not_save_cookie_in_app_config': {'required': False, 'type': 'bool'},
     'stateboard': {'required': False, 'type': 'bool'},
+
+    # Machine-level mode: list of {instance_info, config, stateboard} dicts
+    # for all instances of the machine that are checked concurrently
+    'instances': {'required': False, 'type': 'list', 'elements': 'dict'},
+    'concurrency': {'required': False, 'type': 'int'},
 }
 
 
@@ -33,8 +47,7 @@ def check_needs_restart_to_update_package(params):
     return False, None
 
 
-def read_yaml_file_section(control_console, file_path, section):
-    sections, err = helpers.read_yaml_file(control_console, file_path)
+def get_yaml_file_section(sections, err, file_path, section):
     if err is not None:
         return None, err
 
@@ -44,6 +57,11 @@ def read_yaml_file_section(control_console, file_path, section):
     return sections[section], None
 
 
+def read_yaml_file_section(control_console, file_path, section):
+    sections, err = helpers.read_yaml_file(control_console, file_path)
+    return get_yaml_file_section(sections, err, file_path, section)
+
+
 def check_conf_updated(new_conf, old_conf, ignore_keys):
     # check new conf keys
     for key, value in new_conf.items():
@@ -60,7 +78,7 @@ def check_conf_updated(new_conf, old_conf, ignore_keys):
     return False
 
 
-def check_needs_restart_to_update_config(params, control_console):
+def check_config_params(params):
     required_args = {
         'app_name',
         'config',
@@ -70,20 +88,44 @@ def check_needs_restart_to_update_config(params, control_console):
     }
     for arg in required_args:
         if params.get(arg) is None:
-            return None, "Argument '%s' is required to check for configuration updates" % arg
+            return "Argument '%s' is required to check for configuration updates" % arg
+
+    if not params['cartridge_not_save_cookie_in_app_config'] and params.get('cluster_cookie') is None:
+        return "'cartridge_cluster_cookie' should be set to check for configuration updates " + \
+            "when 'cartridge_not_save_cookie_in_app_config' is false"
+
+    return None
+
+
+def check_dynamic_params_changed(new_instance_conf, new_default_conf, current_cfg, stateboard):
+    for param_name in helpers.DYNAMIC_BOX_CFG_PARAMS:
+        new_value = None
+        if param_name in new_instance_conf:
+            new_value = new_instance_conf[param_name]
+        elif not stateboard and param_name in new_default_conf:
+            new_value = new_default_conf[param_name]
+
+        # This code is ran after attempt to change parameter in runtime
+        # If current parameter wasn't changed to the new value,
+        # it mean that instance should be restarted to apply change
+        if new_value is not None:
+            if current_cfg.get(param_name) != new_value:
+                return True
+
+    return False
+
+
+def check_needs_restart_to_update_config(params, control_console):
+    err = check_config_params(params)
+    if err is not None:
+        return None, err
 
     instance_info = params['instance_info']
     app_name = params['app_name']
     new_instance_conf = params['config']
-    new_default_conf = params['cartridge_defaults']
-    cluster_cookie = params.get('cluster_cookie')
-    cartridge_not_save_cookie_in_app_config = params['cartridge_not_save_cookie_in_app_config']
+    new_default_conf = get_new_default_conf(params)
     stateboard = params['stateboard']
 
-    if not cartridge_not_save_cookie_in_app_config and cluster_cookie is None:
-        return None, "'cartridge_cluster_cookie' should be set to check for configuration updates " + \
-            "when 'cartridge_not_save_cookie_in_app_config' is false"
-
     if not os.path.exists(instance_info['conf_file']):
         return True, None
 
@@ -112,37 +154,259 @@ def check_needs_restart_to_update_config(params, control_console):
         if err is not None:
             return None, "Failed to read current default config: %s" % err
 
-        if not cartridge_not_save_cookie_in_app_config:
-            new_default_conf['cluster_cookie'] = cluster_cookie
         if check_conf_updated(new_default_conf, current_default_conf, helpers.DYNAMIC_BOX_CFG_PARAMS):
             return True, None
 
+    return check_needs_restart_to_update_dynamic_params(params, control_console), None
+
+
+def check_needs_restart_to_update_dynamic_params(params, control_console):
     # if box.cfg wasn't called,
     if not helpers.box_cfg_was_called(control_console):
-        return True, None
+        return True
 
     current_cfg = helpers.get_box_cfg(control_console)
     if current_cfg is None:
-        return True, None
+        return True
 
-    for param_name in helpers.DYNAMIC_BOX_CFG_PARAMS:
-        new_value = None
-        if param_name in new_instance_conf:
-            new_value = new_instance_conf[param_name]
-        elif not stateboard and param_name in new_default_conf:
-            new_value = new_default_conf[param_name]
+    return check_dynamic_params_changed(
+        params['config'], get_new_default_conf(params), current_cfg, params['stateboard'],
+    )
 
-        # This code is ran after attempt to change parameter in runtime
-        # If current parameter wasn't changed to the new value,
-        # it mean that instance should be restarted to apply change
-        if new_value is not None:
-            if current_cfg.get(param_name) != new_value:
-                return True, None
+
+def check_dist_changed_by_state(instance_info, state, dist_hashes):
+    # Code is hashed by content only if its stat hash differs from the saved one
+    # and from the cached one, the saved stat hash is updated if the same code
+    # was unpacked again. `dist_hashes` are shared by instances of the machine
+    # with the same code dir
+    dist_dir = os.path.realpath(instance_info['instance_dist_dir'])
+    if dist_dir not in dist_hashes:
+        dist_hashes[dist_dir] = {'stat': instance_state.get_dist_stat_hash(dist_dir)}
+    hashes = dist_hashes[dist_dir]
+
+    if hashes['stat'] is not None and hashes['stat'] == state.get('dist_stat_hash'):
+        return False
+
+    if 'content' not in hashes:
+        hashes['content'] = instance_state.get_cached_dist_hash(
+            dist_dir, hashes['stat'], instance_state.get_dist_hashes_file(instance_info),
+        )
+    if hashes['content'] != state['dist_hash']:
+        return True
+
+    state['dist_stat_hash'] = hashes['stat']
+    instance_state.update_instance_state(instance_info['state_file'], state)
+    return False
+
+
+def check_needs_restart_by_state(params, state, dist_hashes=None):
+    # Compares hashes saved in the instance state file on start with the current ones
+    # instead of code modification time and configs read via the instance console.
+    # Dynamic params should be checked on the instance anyway
+    # (they can be changed in runtime)
+    if dist_hashes is None:
+        dist_hashes = {}
+
+    if params['check_package_updated']:
+        if check_dist_changed_by_state(params['instance_info'], state, dist_hashes):
+            return True, None
+
+    if params['check_config_updated']:
+        err = check_config_params(params)
+        if err is not None:
+            return None, err
+
+        config_hash = instance_state.get_config_hash(
+            params['config'], get_new_default_conf(params), params['stateboard'],
+        )
+        if config_hash != state['config_hash']:
+            return True, None
 
     return False, None
 
 
+def get_dynamic_config_hash(params):
+    return instance_state.get_dynamic_config_hash(params['config'], get_new_default_conf(params), params['stateboard'])
+
+
+def check_dynamic_params_changed_by_state(params, state):
+    # Dynamic params are checked on the instance only if they differ
+    # from the ones the instance was started with (or last checked)
+    if not params['check_config_updated']:
+        return False
+
+    return get_dynamic_config_hash(params) != state['dynamic_config_hash']
+
+
+def save_dynamic_config_hash(params, state):
+    # Dynamic params were applied in runtime, the instance isn't connected next time
+    state['dynamic_config_hash'] = get_dynamic_config_hash(params)
+    instance_state.update_instance_state(params['instance_info']['state_file'], state)
+
+
+def set_machine_needs_restart(params):
+    # Checks all instances of the machine, config checks are performed
+    # for all instances concurrently. Fact is a dict with flags by instance IDs.
+    needs_restart = {}
+    checked_instances = {}
+    # States of instances which code and static config are the same as on start
+    # (according to state files), only dynamic params should be checked
+    states = {}
+    dist_hashes = {}
+
+    def set_instance_needs_restart(instance_params, value):
+        instance_info = instance_params['instance_info']
+        needs_restart[instance_info['instance_id']] = value
+        checked_instances.pop(instance_info['console_sock'], None)
+
+    def gather(console_socks, func, get_args):
+        results = gather_evals(
+            console_socks,
+            func,
+            {console_sock: get_args(checked_instances[console_sock]) for console_sock in console_socks},
+            params.get('concurrency'),
+        )
+
+        ok_results = {}
+        for console_sock, result in results.items():
+            if isinstance(result, helpers.CartridgeException):
+                if not result.is_instance_not_running_error():
+                    raise result
+                set_instance_needs_restart(checked_instances[console_sock], True)
+            else:
+                ok_results[console_sock] = result
+        return ok_results
+
+    for instance in params['instances']:
+        instance_params = dict(params, **instance)
+        instance_info = instance_params['instance_info']
+
+        # check if instance was not started yet
+        if not os.path.exists(instance_info['console_sock']):
+            set_instance_needs_restart(instance_params, True)
+            continue
+
+        state = None
+        if params['check_by_hashes']:
+            state = instance_state.read_instance_state(instance_info)
+
+        if state is not None:
+            instance_needs_restart, err = check_needs_restart_by_state(instance_params, state, dist_hashes)
+            if err is not None:
+                return helpers.ModuleRes(failed=True, msg=err)
+            if instance_needs_restart:
+                set_instance_needs_restart(instance_params, True)
+                continue
+
+            # code and config are the same as on start, instance isn't connected
+            if not check_dynamic_params_changed_by_state(instance_params, state):
+                set_instance_needs_restart(instance_params, False)
+                continue
+
+            # dynamic params are checked below
+            states[instance_info['console_sock']] = state
+            checked_instances[instance_info['console_sock']] = instance_params
+            continue
+
+        if params['check_package_updated']:
+            instance_needs_restart, err = check_needs_restart_to_update_package(instance_params)
+            if err is not None:
+                return helpers.ModuleRes(failed=True, msg=err)
+            if instance_needs_restart:
+                set_instance_needs_restart(instance_params, True)
+                continue
+
+        if params['check_config_updated']:
+            err = check_config_params(instance_params)
+            if err is not None:
+                return helpers.ModuleRes(failed=True, msg=err)
+
+            if not os.path.exists(instance_info['conf_file']):
+                set_instance_needs_restart(instance_params, True)
+                continue
+
+        checked_instances[instance_info['console_sock']] = instance_params
+
+    if not params['check_config_updated']:
+        # instance that isn't available needs restart
+        gather(list(checked_instances), 'return true', lambda p: [])
+        for instance_params in list(checked_instances.values()):
+            set_instance_needs_restart(instance_params, False)
+
+        return helpers.ModuleRes(changed=any(needs_restart.values()), fact=needs_restart)
+
+    # check if instances configs were changed (except dynamic params)
+    console_socks = [console_sock for console_sock in checked_instances if console_sock not in states]
+    results = gather(console_socks, helpers.READ_YAML_FILE_FUNC, lambda p: [p['instance_info']['conf_file']])
+    for console_sock, (sections, err) in results.items():
+        instance_params = checked_instances[console_sock]
+        instance_info = instance_params['instance_info']
+
+        current_instance_conf, err = get_yaml_file_section(
+            sections, err, instance_info['conf_file'], instance_info['instance_id'],
+        )
+        if err is not None:
+            return helpers.ModuleRes(
+                failed=True,
+                msg="Failed to read current instance config of '%s': %s" % (instance_info['instance_id'], err),
+            )
+
+        if check_conf_updated(instance_params['config'], current_instance_conf, helpers.DYNAMIC_BOX_CFG_PARAMS):
+            set_instance_needs_restart(instance_params, True)
+
+    # check if default configs were changed (except dynamic params)
+    console_socks = [
+        console_sock for console_sock, instance_params in checked_instances.items()
+        if not instance_params['stateboard'] and console_sock not in states
+    ]
+    for console_sock in console_socks:
+        instance_params = checked_instances[console_sock]
+        if not os.path.exists(instance_params['instance_info']['app_conf_file']):
+            set_instance_needs_restart(instance_params, True)
+
+    console_socks = [console_sock for console_sock in console_socks if console_sock in checked_instances]
+    results = gather(console_socks, helpers.READ_YAML_FILE_FUNC, lambda p: [p['instance_info']['app_conf_file']])
+    for console_sock, (sections, err) in results.items():
+        instance_params = checked_instances[console_sock]
+        instance_info = instance_params['instance_info']
+
+        current_default_conf, err = get_yaml_file_section(
+            sections, err, instance_info['app_conf_file'], instance_params['app_name'],
+        )
+        if err is not None:
+            return helpers.ModuleRes(
+                failed=True,
+                msg="Failed to read current default config of '%s': %s" % (instance_info['instance_id'], err),
+            )
+
+        new_default_conf = get_new_default_conf(instance_params)
+        if check_conf_updated(new_default_conf, current_default_conf, helpers.DYNAMIC_BOX_CFG_PARAMS):
+            set_instance_needs_restart(instance_params, True)
+
+    # check dynamic params, box.cfg is null if it wasn't called
+    results = gather(list(checked_instances), helpers.GET_BOX_CFG_FUNC, lambda p: [])
+    for console_sock, (current_cfg, _) in results.items():
+        instance_params = checked_instances[console_sock]
+        instance_needs_restart = current_cfg is None or check_dynamic_params_changed(
+            instance_params['config'],
+            get_new_default_conf(instance_params),
+            current_cfg,
+            instance_params['stateboard'],
+        )
+        if console_sock in states and not instance_needs_restart:
+            save_dynamic_config_hash(instance_params, states[console_sock])
+        set_instance_needs_restart(instance_params, instance_needs_restart)
+
+    return helpers.ModuleRes(changed=any(needs_restart.values()), fact=needs_restart)
+
+
 def set_needs_restart(params):
+    if params.get('instances') is not None:
+        return set_machine_needs_restart(params)
+
+    if params.get('instance_info') is None:
+        return helpers.ModuleRes(failed=True, msg="Either 'instance_info' or 'instances' should be specified")
+
     instance_info = params['instance_info']
     console_sock = instance_info['console_sock']
 
@@ -150,6 +414,21 @@ def set_needs_restart(params):
     if not os.path.exists(console_sock):
         return helpers.ModuleRes(changed=True, fact=True)
 
+    state = None
+    if params['check_by_hashes']:
+        state = instance_state.read_instance_state(instance_info)
+
+    if state is not None:
+        needs_restart, err = check_needs_restart_by_state(params, state)
+        if err is not None:
+            return helpers.ModuleRes(failed=True, msg=err)
+        if needs_restart:
+            return helpers.ModuleRes(changed=True, fact=True)
+
+        # code and config are the same as on start, instance isn't connected
+        if not check_dynamic_params_changed_by_state(params, state):
+            return helpers.ModuleRes(changed=False, fact=False)
+
     try:
         control_console = helpers.get_control_console(console_sock)
     except helpers.CartridgeException as e:
@@ -163,6 +442,14 @@ def set_needs_restart(params):
 
         raise e
 
+    if state is not None:
+        # code and static config are the same as on start,
+        # dynamic params could be changed in runtime
+        needs_restart = check_needs_restart_to_update_dynamic_params(params, control_console)
+        if not needs_restart:
+            save_dynamic_config_hash(params, state)
+        return helpers.ModuleRes(changed=needs_restart, fact=needs_restart)
+
     if params['check_package_updated']:
         needs_restart, err = check_needs_restart_to_update_package(params)
         if err is not None:
@@ -1,7 +1,11 @@
 #!/usr/bin/env python
 
+import hashlib
+import io
+import json
 import os
 import re
+import struct
 import subprocess
 import tarfile
 
@@ -10,8 +14,52 @@ from ansible.module_utils.helpers import Helpers as helpers
 argument_spec = {
     'app_name': {'required': True, 'type': 'str'},
     'package_path': {'required': True, 'type': 'str'},
+    'cache_dir': {'required': False, 'type': 'str'},
 }
 
+# Package headers are read without `rpm` and `dpkg` utilities,
+# payload (application files) isn't read at all.
+
+# See https://rpm-software-management.github.io/rpm/manual/format.html
+RPM_LEAD_SIZE = 96
+RPM_LEAD_MAGIC = b'\xed\xab\xee\xdb'
+RPM_HEADER_MAGIC = b'\x8e\xad\xe8\x01'
+RPM_HEADER_INTRO_SIZE = 16
+RPM_HEADER_INDEX_ENTRY_SIZE = 16
+
+RPM_STRING_TYPE = 6
+RPM_STRING_ARRAY_TYPE = 8
+RPM_INT32_TYPE = 4
+
+RPM_NAME_TAG = 1000
+RPM_REQUIRE_FLAGS_TAG = 1048
+RPM_REQUIRE_NAME_TAG = 1049
+RPM_REQUIRE_VERSION_TAG = 1050
+
+RPM_SENSE_LESS = 1 << 1
+RPM_SENSE_GREATER = 1 << 2
+RPM_SENSE_EQUAL = 1 << 3
+
+# See deb(5) and ar(5)
+AR_MAGIC = b'!<arch>\n'
+AR_HEADER_SIZE = 60
+DEB_CONTROL_ARCHIVE_NAME = 'control.tar'
+DEB_CONTROL_ARCHIVE_MODES = {
+    '': 'r:',
+    '.gz': 'r:gz',
+    '.xz': 'r:xz',
+    '.bz2': 'r:bz2',
+}
+DEB_CONTROL_FILE_NAMES = ['./control', 'control']
+
+# TGZ package info is cached on the remote machine if `cache_dir` is set.
+# Should be increased on changing cached info format
+TGZ_INFO_CACHE_VERSION = 1
+TGZ_INFO_CACHE_FILE_EXT = '.json'
+TGZ_INFO_CACHE_BLOCK_SIZE = 64 * 1024
+# Least recently used entries are removed
+TGZ_INFO_CACHE_MAX_ENTRIES = 16
+
 
 def run_command_and_get_output(cmd):
     process = subprocess.Popen(
@@ -37,27 +85,102 @@ def get_package_type(package_path):
     raise Exception('Package of unsupported type is specified: %s' % package_path)
 
 
+def read_exactly(f, size, what):
+    data = f.read(size)
+    if len(data) != size:
+        raise Exception("Failed to read %s: unexpected end of file" % what)
+    return data
+
+
+def read_rpm_header(f, what):
+    # Returns {tag: (type, offset, count)} and the header data store
+    intro = read_exactly(f, RPM_HEADER_INTRO_SIZE, what)
+    if intro[:4] != RPM_HEADER_MAGIC:
+        raise Exception("Failed to read %s: bad magic" % what)
+
+    index_count, data_size = struct.unpack('>II', intro[8:16])
+    index_data = read_exactly(f, index_count * RPM_HEADER_INDEX_ENTRY_SIZE, what)
+    data = read_exactly(f, data_size, what)
+
+    index = {}
+    for i in range(index_count):
+        tag, tag_type, offset, count = struct.unpack_from('>IIII', index_data, i * RPM_HEADER_INDEX_ENTRY_SIZE)
+        index[tag] = (tag_type, offset, count)
+
+    return index, data
+
+
+def get_rpm_tag_value(index, data, tag):
+    if tag not in index:
+        return None
+
+    tag_type, offset, count = index[tag]
+
+    if tag_type == RPM_INT32_TYPE:
+        return list(struct.unpack_from('>%dI' % count, data, offset))
+
+    if tag_type in (RPM_STRING_TYPE, RPM_STRING_ARRAY_TYPE):
+        values = []
+        for _ in range(count):
+            end = data.index(b'\0', offset)
+            values.append(data[offset:end].decode('utf-8'))
+            offset = end + 1
+        return values[0] if tag_type == RPM_STRING_TYPE else values
+
+    raise Exception("Unexpected type %d of RPM header tag %d" % (tag_type, tag))
+
+
+def get_rpm_sense_operator(flags):
+    operator = ''
+    if flags & RPM_SENSE_LESS:
+        operator += '<'
+    if flags & RPM_SENSE_GREATER:
+        operator += '>'
+    if flags & RPM_SENSE_EQUAL:
+        operator += '='
+    return operator
+
+
+def get_rpm_deplist(index, data):
+    # Returns deplist in `rpm -qpR` output format
+    names = get_rpm_tag_value(index, data, RPM_REQUIRE_NAME_TAG) or []
+    flags = get_rpm_tag_value(index, data, RPM_REQUIRE_FLAGS_TAG) or [0] * len(names)
+    versions = get_rpm_tag_value(index, data, RPM_REQUIRE_VERSION_TAG) or [''] * len(names)
+
+    deplist = []
+    for name, name_flags, version in zip(names, flags, versions):
+        if version:
+            deplist.append('%s %s %s' % (name, get_rpm_sense_operator(name_flags), version))
+        else:
+            deplist.append(name)
+
+    return '\n'.join(deplist)
+
+
 def get_rpm_info(package_path):
-    # package name
-    cmd = ['rpm', '-qip', package_path]
-    rc, output = run_command_and_get_output(cmd)
-    if rc != 0:
-        raise Exception("failed to get RPM package info: %s" % output)
+    # Lead, signature header and main header are read, payload is skipped
+    with open(package_path, 'rb') as f:
+        lead = read_exactly(f, RPM_LEAD_SIZE, 'RPM lead')
+        if lead[:4] != RPM_LEAD_MAGIC:
+            raise Exception("Failed to get RPM package info: %s isn't an RPM package" % package_path)
 
-    m = re.search(r'Name\s*:\s*([^\n]+)\n', output)
-    if m is None:
-        raise Exception("Failed to find package name in package info: %s" % output)
+        sig_index, sig_data = read_rpm_header(f, 'RPM signature')
+
+        # signature is aligned to 8 bytes
+        sig_size = len(sig_index) * RPM_HEADER_INDEX_ENTRY_SIZE + len(sig_data)
+        read_exactly(f, (8 - sig_size % 8) % 8, 'RPM signature')
+
+        index, data = read_rpm_header(f, 'RPM header')
+
+    # package name
+    package_name = get_rpm_tag_value(index, data, RPM_NAME_TAG)
+    if package_name is None:
+        raise Exception("Failed to find package name in RPM header of %s" % package_path)
 
-    package_name = m.groups()[0]
     # Tarantool dependency
     tnt_version = None
 
-    cmd = ['rpm', '-qpR', package_path]
-    rc, output = run_command_and_get_output(cmd)
-    if rc != 0:
-        raise Exception("Failed to get RPM deplist: %s" % output)
-
-    m = re.search(r'tarantool >= ([0-9]+.[0-9]+)', output)
+    m = re.search(r'tarantool >= ([0-9]+.[0-9]+)', get_rpm_deplist(index, data))
     if m is not None:
         tnt_version = m.groups()[0]
 
@@ -67,7 +190,89 @@ def get_rpm_info(package_path):
     }
 
 
+def read_deb_control_archive(package_path):
+    # Returns name and content of control archive member,
+    # it's placed right after `debian-binary` member
+    with open(package_path, 'rb') as f:
+        if f.read(len(AR_MAGIC)) != AR_MAGIC:
+            raise Exception("Failed to get DEB package info: %s isn't a DEB package" % package_path)
+
+        while True:
+            member_header = f.read(AR_HEADER_SIZE)
+            if len(member_header) < AR_HEADER_SIZE:
+                raise Exception("Failed to find control archive in DEB package %s" % package_path)
+
+            name = member_header[:16].decode('utf-8').strip().rstrip('/')
+            size = int(member_header[48:58].decode('utf-8').strip())
+
+            if name.startswith(DEB_CONTROL_ARCHIVE_NAME):
+                return name, read_exactly(f, size, 'DEB control archive')
+
+            # members are aligned to 2 bytes
+            f.seek(size + size % 2, os.SEEK_CUR)
+
+
+def parse_deb_control_file(content):
+    fields = {}
+    field_name = None
+
+    for line in content.splitlines():
+        if line.startswith((' ', '\t')):
+            # continuation line
+            if field_name is not None:
+                fields[field_name] += '\n' + line.strip()
+            continue
+
+        if ':' in line:
+            field_name, value = line.split(':', 1)
+            fields[field_name] = value.strip()
+
+    return fields
+
+
 def get_deb_info(package_path):
+    # Only control archive is read, package data archive is skipped
+    name, control_archive = read_deb_control_archive(package_path)
+
+    mode = DEB_CONTROL_ARCHIVE_MODES.get(name[len(DEB_CONTROL_ARCHIVE_NAME):])
+    if mode is None:
+        # e.g. zstd compression isn't supported by tarfile
+        return get_deb_info_by_dpkg_cmd(package_path)
+
+    try:
+        with tarfile.open(fileobj=io.BytesIO(control_archive), mode=mode) as tar:
+            control_members = [m for m in tar.getmembers() if m.name in DEB_CONTROL_FILE_NAMES]
+            if not control_members:
+                raise Exception("Failed to find control file in DEB package %s" % package_path)
+
+            control = tar.extractfile(control_members[0]).read().decode('utf-8')
+    except tarfile.CompressionError:
+        # xz isn't supported on Python 2
+        return get_deb_info_by_dpkg_cmd(package_path)
+
+    fields = parse_deb_control_file(control)
+
+    # package name
+    package_name = fields.get('Package')
+    if package_name is None:
+        raise Exception("Failed to find package name in control file of %s" % package_path)
+
+    # Tarantool dependency
+    tnt_version = None
+
+    deplist = fields.get('Depends')
+    if deplist is not None:
+        m = re.search(r'tarantool\s+\(\s*>=\s*([0-9]+.[0-9]+)', deplist)
+        if m is not None:
+            tnt_version = m.groups()[0]
+
+    return {
+        'name': package_name,
+        'tnt_version': tnt_version,
+    }
+
+
+def get_deb_info_by_dpkg_cmd(package_path):
     cmd = ['dpkg', '-I', package_path]
     rc, output = run_command_and_get_output(cmd)
     if rc != 0:
@@ -96,45 +301,145 @@ def get_deb_info(package_path):
     }
 
 
-def get_tgz_info(package_path):
-    tnt_version = None
-
-    with tarfile.open(package_path) as tar:
-        names = tar.getnames()
-        names = list(filter(lambda path: path not in ['.', '..'], names))
+def get_tgz_package_dir(member_name):
+    # Returns the top directory of archive member ('./' prefix is kept)
+    parts = member_name.split('/')
+    if parts[0] == '.' and len(parts) > 1:
+        return '/'.join(parts[:2])
+    return parts[0]
 
-        package_name = os.path.commonprefix(names)
-        if package_name == '':
-            raise Exception(
-                "Package should contain one directory with application files. "
-                "Please, use package created by Cartridge CLI"
-            )
 
-        tarantool_binary_path = os.path.join(package_name, 'tarantool')
-        tnt_is_enterprise = tarantool_binary_path in names
+def read_tgz_tnt_version(version_file):
+    for line in version_file.readlines():
+        m = re.search(r'TARANTOOL=(\d+\.\d+)\.', line.decode())
+        if m is not None:
+            return m.groups()[0]
+    return None
 
-        if not tnt_is_enterprise:
-            version_file_path = os.path.join(package_name, 'VERSION')
-            try:
-                member = tar.getmember(version_file_path)
-            except KeyError:
-                raise Exception("Package should contain %s file" % version_file_path)
 
-            version_file = tar.extractfile(member)
-            version_file_lines = version_file.readlines()
+def get_tgz_info(package_path):
+    # Members are read as a stream in one pass (random access to members
+    # of the compressed archive leads to decompressing it again).
+    # Scan is stopped once `tarantool` binary is found,
+    # otherwise the whole archive is read to make sure it's absent
+    package_dir = None
+    tnt_is_enterprise = False
+    version_file_found = False
+    tnt_version = None
 
-            for line in version_file_lines:
-                m = re.search(r'TARANTOOL=(\d+\.\d+)\.', line.decode())
-                if m is not None:
-                    tnt_version = m.groups()[0]
-                    break
+    with tarfile.open(package_path, mode='r|gz') as tar:
+        for member in tar:
+            if member.name in ['.', '..', './']:
+                continue
+
+            member_dir = get_tgz_package_dir(member.name.rstrip('/'))
+            if package_dir is None:
+                package_dir = member_dir
+            elif member_dir != package_dir:
+                package_dir = None
+                break
+
+            rel_path = member.name[len(package_dir):].strip('/')
+            if rel_path == 'tarantool':
+                tnt_is_enterprise = True
+                break
+
+            if rel_path == 'VERSION' and member.isfile():
+                version_file_found = True
+                tnt_version = read_tgz_tnt_version(tar.extractfile(member))
+
+    if package_dir is None:
+        raise Exception(
+            "Package should contain one directory with application files. "
+            "Please, use package created by Cartridge CLI"
+        )
+
+    if tnt_is_enterprise:
+        tnt_version = None
+    elif not version_file_found:
+        raise Exception("Package should contain %s file" % os.path.join(package_dir, 'VERSION'))
 
     return {
-        'name': package_name,
+        'name': package_dir,
         'tnt_version': tnt_version,
     }
 
 
+def get_tgz_info_cache_key(package_path):
+    # Package isn't hashed entirely: size, modification time
+    # and the first and the last blocks are enough to detect another package
+    package_stat = os.stat(package_path)
+
+    h = hashlib.sha256()
+    h.update(('%d\0%d\0%d\0' % (TGZ_INFO_CACHE_VERSION, package_stat.st_size, package_stat.st_mtime)).encode('utf-8'))
+
+    with open(package_path, 'rb') as f:
+        h.update(f.read(TGZ_INFO_CACHE_BLOCK_SIZE))
+        if package_stat.st_size > TGZ_INFO_CACHE_BLOCK_SIZE:
+            f.seek(max(package_stat.st_size - TGZ_INFO_CACHE_BLOCK_SIZE, TGZ_INFO_CACHE_BLOCK_SIZE))
+            h.update(f.read(TGZ_INFO_CACHE_BLOCK_SIZE))
+
+    return h.hexdigest()
+
+
+def read_tgz_info_cache(cache_dir, key):
+    cache_path = os.path.join(cache_dir, key + TGZ_INFO_CACHE_FILE_EXT)
+    if not os.path.exists(cache_path):
+        return None
+
+    try:
+        with open(cache_path, 'r') as f:
+            package_info = json.load(f)
+    except (IOError, ValueError):
+        return None
+
+    os.utime(cache_path, None)
+    return package_info
+
+
+def evict_tgz_info_cache(cache_dir):
+    cache_paths = [
+        os.path.join(cache_dir, name)
+        for name in os.listdir(cache_dir)
+        if name.endswith(TGZ_INFO_CACHE_FILE_EXT)
+    ]
+    cache_paths.sort(key=os.path.getmtime, reverse=True)
+
+    for cache_path in cache_paths[TGZ_INFO_CACHE_MAX_ENTRIES:]:
+        os.remove(cache_path)
+
+
+def write_tgz_info_cache(cache_dir, key, package_info):
+    if not os.path.exists(cache_dir):
+        os.makedirs(cache_dir)
+
+    cache_path = os.path.join(cache_dir, key + TGZ_INFO_CACHE_FILE_EXT)
+    tmp_cache_path = '%s.%d.tmp' % (cache_path, os.getpid())
+
+    with open(tmp_cache_path, 'w') as f:
+        json.dump(package_info, f)
+    os.rename(tmp_cache_path, cache_path)
+
+    evict_tgz_info_cache(cache_dir)
+
+
+def get_tgz_info_with_cache(package_path, cache_dir):
+    if not cache_dir:
+        return get_tgz_info(package_path)
+
+    cache_dir = os.path.expanduser(cache_dir)
+    key = get_tgz_info_cache_key(package_path)
+
+    package_info = read_tgz_info_cache(cache_dir, key)
+    if package_info is not None:
+        return package_info
+
+    package_info = get_tgz_info(package_path)
+    write_tgz_info_cache(cache_dir, key, package_info)
+
+    return package_info
+
+
 def get_package_info(params):
     package_path = params['package_path']
     app_name = params['app_name']
@@ -146,7 +451,7 @@ def get_package_info(params):
     elif package_type == 'deb':
         package_info = get_deb_info(package_path)
     elif package_type == 'tgz':
-        package_info = get_tgz_info(package_path)
+        package_info = get_tgz_info_with_cache(package_path, params.get('cache_dir'))
     else:
         return helpers.ModuleRes(failed=True, msg='Unknown package type: %s' % package_type)
 
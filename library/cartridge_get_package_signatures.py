@@ -0,0 +1,35 @@
+#!/usr/bin/env python
+
+from ansible.module_utils.helpers import Helpers as helpers
+from ansible.module_utils import package_delta
+
+argument_spec = {
+    'packages_dir': {'required': True, 'type': 'str'},
+    'package_path': {'required': True, 'type': 'str'},
+    'block_size': {'required': False, 'type': 'int', 'default': package_delta.DEFAULT_BLOCK_SIZE},
+}
+
+
+def get_basis_path(packages_dir, package_path):
+    # The latest delivered package of the same type is used as a basis
+    # (others are removed by `cartridge_remove_old_packages` after delivery)
+    packages_paths = package_delta.get_delivered_packages(packages_dir, package_path)
+    if not packages_paths:
+        return None
+
+    return packages_paths[0]
+
+
+def get_package_signatures(params):
+    basis_path = get_basis_path(params['packages_dir'], params['package_path'])
+    if basis_path is None:
+        return helpers.ModuleRes(changed=False, fact={'basis_path': None})
+
+    signatures = package_delta.get_signatures(basis_path, params['block_size'])
+    signatures['basis_path'] = basis_path
+
+    return helpers.ModuleRes(changed=False, fact=signatures)
+
+
+if __name__ == '__main__':
+    helpers.execute_module(argument_spec, get_package_signatures)
@@ -0,0 +1,94 @@
+#!/usr/bin/env python
+
+import fcntl
+import hashlib
+import json
+import os
+import tempfile
+import time
+
+from ansible.module_utils.helpers import Helpers as helpers
+from ansible.module_utils import package_delta
+
+argument_spec = {
+    'package_path': {'required': True, 'type': 'str'},
+    'signatures': {'required': True, 'type': 'dict'},
+    'deltas_dir': {'required': False, 'type': 'str'},
+}
+
+DELTA_FILE_EXT = '.delta'
+# Marks that delta for the key isn't efficient, the package should be copied
+NO_DELTA_FILE_EXT = '.nodelta'
+LOCK_FILE_EXT = '.lock'
+DELTA_FILES_EXTS = [DELTA_FILE_EXT, NO_DELTA_FILE_EXT, LOCK_FILE_EXT]
+DELTA_FILE_TTL = 24 * 60 * 60
+
+
+def get_delta_key(package_path, signatures):
+    # Machines with the same basis get the same delta
+    package_stat = os.stat(package_path)
+    key_data = {
+        'package_path': os.path.abspath(package_path),
+        'package_size': package_stat.st_size,
+        'package_mtime': package_stat.st_mtime,
+        'basis_hash': signatures['basis_hash'],
+        'block_size': signatures['block_size'],
+    }
+    return hashlib.sha256(json.dumps(key_data, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def remove_old_deltas(deltas_dir):
+    now = time.time()
+    for name in os.listdir(deltas_dir):
+        path = os.path.join(deltas_dir, name)
+        if os.path.splitext(name)[1] in DELTA_FILES_EXTS and now - os.path.getmtime(path) > DELTA_FILE_TTL:
+            os.remove(path)
+
+
+def make_package_delta(params):
+    # Runs on the controller
+    package_path = os.path.expanduser(params['package_path'])
+    signatures = params['signatures']
+
+    deltas_dir = params.get('deltas_dir')
+    if deltas_dir is None:
+        deltas_dir = os.path.join(tempfile.gettempdir(), 'cartridge-package-deltas')
+    if not os.path.exists(deltas_dir):
+        os.makedirs(deltas_dir)
+
+    remove_old_deltas(deltas_dir)
+
+    key_path = os.path.join(deltas_dir, get_delta_key(package_path, signatures))
+    delta_path = key_path + DELTA_FILE_EXT
+    no_delta_path = key_path + NO_DELTA_FILE_EXT
+
+    # Machines with the same basis are processed concurrently,
+    # delta is made by the first one and others wait for it
+    with open(key_path + LOCK_FILE_EXT, 'w') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+
+        if os.path.exists(delta_path):
+            os.utime(delta_path, None)
+        elif os.path.exists(no_delta_path):
+            os.utime(no_delta_path, None)
+        elif package_delta.write_delta(package_path, signatures, delta_path) is None:
+            open(no_delta_path, 'w').close()
+
+    package_size = os.path.getsize(package_path)
+
+    if not os.path.exists(delta_path):
+        return helpers.ModuleRes(changed=False, fact={
+            'delta_path': None,
+            'delta_size': None,
+            'package_size': package_size,
+        })
+
+    return helpers.ModuleRes(changed=False, fact={
+        'delta_path': delta_path,
+        'delta_size': os.path.getsize(delta_path),
+        'package_size': package_size,
+    })
+
+
+if __name__ == '__main__':
+    helpers.execute_module(argument_spec, make_package_delta)
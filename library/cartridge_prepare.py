@@ -0,0 +1,168 @@
+#!/usr/bin/env python
+
+import hashlib
+import json
+import os
+import pickle
+import time
+
+from ansible.module_utils.helpers import Helpers as helpers
+from ansible.module_utils.validate_config import validate_config
+from ansible.module_utils.disabled_instances import count_disabled_instances
+from ansible.module_utils.facts_for_machines import get_facts_for_machines
+
+argument_spec = {
+    'play_hosts': {'required': True, 'type': 'list'},
+    'module_hostvars': {'required': True, 'type': 'dict'},
+    'ignore_split_brain': {'required': False, 'type': 'bool', 'default': False},
+    'validate_config_all_errors': {'required': False, 'type': 'bool', 'default': False},
+    'cache_dir': {'required': False, 'type': 'str'},
+    'cache_ttl': {'required': False, 'type': 'int', 'default': 3600},
+    'cache_max_entries': {'required': False, 'type': 'int', 'default': 16},
+}
+
+# Should be increased on changing facts format or checks
+PREPARE_CACHE_VERSION = 2
+PREPARE_CACHE_FILE_EXT = '.json'
+# The highest protocol supported by Python 2
+PICKLE_PROTOCOL = 2
+PREPARE_CACHE_KEY_PARAMS = [
+    'play_hosts',
+    'module_hostvars',
+    'ignore_split_brain',
+    'validate_config_all_errors',
+]
+
+
+def get_inventory_fingerprint(params):
+    # Facts depend only on module params: hostvars contain both
+    # instances variables and remote instances state (`instance_info`).
+    # Params are pickled instead of JSON-encoding with sorted keys, it's several
+    # times faster (otherwise hashing costs more than computing the facts).
+    # Equal pickles mean equal params, another order of keys only leads to a cache miss
+    fingerprint_data = [PREPARE_CACHE_VERSION] + [params[name] for name in PREPARE_CACHE_KEY_PARAMS]
+
+    return hashlib.sha256(pickle.dumps(fingerprint_data, PICKLE_PROTOCOL)).hexdigest()
+
+
+def read_prepare_cache(cache_dir, fingerprint, ttl):
+    cache_path = os.path.join(cache_dir, fingerprint + PREPARE_CACHE_FILE_EXT)
+    if not os.path.exists(cache_path):
+        return None
+
+    try:
+        with open(cache_path, 'r') as f:
+            cached = json.load(f)
+    except (IOError, ValueError):
+        return None
+
+    if time.time() - cached.get('created', 0) > ttl:
+        os.remove(cache_path)
+        return None
+
+    # Recently used entries are evicted last
+    os.utime(cache_path, None)
+
+    return cached['facts']
+
+
+def evict_prepare_cache(cache_dir, max_entries):
+    cache_paths = [
+        os.path.join(cache_dir, name)
+        for name in os.listdir(cache_dir)
+        if name.endswith(PREPARE_CACHE_FILE_EXT)
+    ]
+    cache_paths.sort(key=os.path.getmtime, reverse=True)
+
+    for cache_path in cache_paths[max_entries:]:
+        os.remove(cache_path)
+
+
+def write_prepare_cache(cache_dir, fingerprint, facts, max_entries):
+    if not os.path.exists(cache_dir):
+        os.makedirs(cache_dir)
+
+    cache_path = os.path.join(cache_dir, fingerprint + PREPARE_CACHE_FILE_EXT)
+    tmp_cache_path = '%s.%d.tmp' % (cache_path, os.getpid())
+
+    with open(tmp_cache_path, 'w') as f:
+        json.dump({'created': time.time(), 'facts': facts}, f)
+    os.rename(tmp_cache_path, cache_path)
+
+    evict_prepare_cache(cache_dir, max_entries)
+
+
+def get_prepare_facts(params):
+    # Validates config and collects facts required by all steps
+    # in one module run instead of running a module for each of them.
+    # Hostvars are passed once as the union of facts needed by all checks,
+    # each check reads only its own facts, so they aren't split by checks
+    play_hosts = params['play_hosts']
+
+    res = validate_config({
+        'play_hosts': play_hosts,
+        'module_hostvars': params['module_hostvars'],
+        'all_errors': params['validate_config_all_errors'],
+    })
+    if res.failed:
+        return res
+
+    warnings = res.warnings
+
+    res = count_disabled_instances({
+        'play_hosts': play_hosts,
+        'module_hostvars': params['module_hostvars'],
+        'ignore_split_brain': params['ignore_split_brain'],
+    })
+    if res.failed:
+        res.warnings = warnings
+        return res
+
+    cluster_disabled_instances = res.kwargs['cluster']
+    inventory_disabled_instances = res.kwargs['inventory']
+
+    res = get_facts_for_machines({
+        'play_hosts': play_hosts,
+        'module_hostvars': params['module_hostvars'],
+        'cluster_disabled_instances': cluster_disabled_instances,
+    })
+
+    return helpers.ModuleRes(
+        changed=False,
+        warnings=warnings,
+        cluster_disabled_instances=cluster_disabled_instances,
+        inventory_disabled_instances=inventory_disabled_instances,
+        single_instances_for_each_machine=res.kwargs['single_instances_for_each_machine'],
+        instances_from_same_machine=res.kwargs['instances_from_same_machine'],
+    )
+
+
+def prepare(params):
+    cache_dir = params.get('cache_dir')
+    if not cache_dir:
+        return get_prepare_facts(params)
+
+    cache_dir = os.path.expanduser(cache_dir)
+    fingerprint = get_inventory_fingerprint(params)
+
+    facts = read_prepare_cache(cache_dir, fingerprint, params['cache_ttl'])
+    if facts is not None:
+        warnings = facts.pop('warnings')
+        return helpers.ModuleRes(changed=False, warnings=warnings, cached=True, **facts)
+
+    res = get_prepare_facts(params)
+    if res.failed:
+        # Failed result isn't cached to report errors on each run
+        return res
+
+    # Warnings passed via `helpers.warn` are collected on getting exit JSON
+    warnings = res.get_exit_json()['warnings']
+
+    facts = dict(res.kwargs, warnings=warnings)
+    write_prepare_cache(cache_dir, fingerprint, facts, params['cache_max_entries'])
+
+    return helpers.ModuleRes(changed=False, warnings=warnings, cached=False, **res.kwargs)
+
+
+if __name__ == '__main__':
+    helpers.execute_module(argument_spec, prepare)
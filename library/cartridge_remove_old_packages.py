@@ -0,0 +1,29 @@
+#!/usr/bin/env python
+
+import os
+
+from ansible.module_utils.helpers import Helpers as helpers
+from ansible.module_utils import package_delta
+
+argument_spec = {
+    'packages_dir': {'required': True, 'type': 'str'},
+    'package_path': {'required': True, 'type': 'str'},
+}
+
+
+def remove_old_packages(params):
+    # Should be called after the package is delivered, so previously
+    # delivered packages are kept as a basis until delivery succeeds
+    package_name = os.path.basename(params['package_path'])
+
+    removed_count = 0
+    for path in package_delta.get_delivered_packages(params['packages_dir'], params['package_path']):
+        if os.path.basename(path) != package_name:
+            os.remove(path)
+            removed_count += 1
+
+    return helpers.ModuleRes(changed=removed_count > 0, removed_count=removed_count)
+
+
+if __name__ == '__main__':
+    helpers.execute_module(argument_spec, remove_old_packages)
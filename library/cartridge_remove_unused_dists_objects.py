@@ -0,0 +1,18 @@
+#!/usr/bin/env python
+
+from ansible.module_utils.helpers import Helpers as helpers
+from ansible.module_utils import dists_store
+
+argument_spec = {
+    'store_dir': {'required': True, 'type': 'str'},
+}
+
+
+def remove_unused_dists_objects(params):
+    # Should be called after removing distributions directories
+    removed_count = dists_store.remove_unused_objects(params['store_dir'])
+    return helpers.ModuleRes(changed=removed_count > 0, removed_count=removed_count)
+
+
+if __name__ == '__main__':
+    helpers.execute_module(argument_spec, remove_unused_dists_objects)
@@ -4,9 +4,11 @@ import os
 import pwd
 import re
 import shutil
-import tarfile
 
 from ansible.module_utils.helpers import Helpers as helpers
+from ansible.module_utils import backup_archive
+from ansible.module_utils import backup_manifest
+from ansible.module_utils import hardlink_backup
 
 argument_spec = {
     'instance_info': {'required': True, 'type': 'dict'},
@@ -53,6 +55,7 @@ def md5_buffer(fd):
 def is_path_of_instance(path, instance_id):
     # Expected one of variant:
     # /opt/backups/myapp.i-1.tar.gz
+    # /opt/backups/myapp.i-1.tar
     # /opt/backups/myapp.i-1.2020-01-01.tar.gz
     # /opt/backups/myapp.i-1.2020-01-01-010101.tar.gz
     # /opt/backups/myapp.i-1.1627650508.tar.gz
@@ -61,7 +64,7 @@ def is_path_of_instance(path, instance_id):
     # ...
     instance_id = instance_id.replace(".", r"\.")
     path = path.strip(os.path.sep)
-    m = re.search(r'%s(\W(\d{4}\W\d{2}\W\d{2}(\W\d{6})?|\d{6,}))?(.tar.gz|/|$)' % instance_id, path, re.I | re.U)
+    m = re.search(r'%s(\W(\d{4}\W\d{2}\W\d{2}(\W\d{6})?|\d{6,}))?(.tar(.gz)?|/|$)' % instance_id, path, re.I | re.U)
     return m is not None
 
 
@@ -88,7 +91,7 @@ def get_tgz_conflicting_files(backup_path, ignore_func, instance_id):
     conflicting_files = []
     is_backup_of_correct_instance = False
 
-    with tarfile.open(backup_path, 'r:gz') as tar:
+    with backup_archive.open_archive(backup_path) as tar:
         for src_member in tar.getmembers():
             full_dst = os.path.join('/', src_member.name)
 
@@ -127,6 +130,14 @@ def get_dir_conflicting_files(backup_path, ignore_func, instance_id):
             if ignore_func(full_dst):
                 continue
 
+            # Files hardlinked to the backup aren't read
+            if os.path.samefile(full_src, full_dst):
+                continue
+
+            if os.path.getsize(full_src) != os.path.getsize(full_dst):
+                conflicting_files.append(full_dst)
+                continue
+
             src_md5 = md5_buffer(open(full_src, "rb"))
             dst_md5 = md5_buffer(open(full_dst, "rb"))
             if src_md5 != dst_md5:
@@ -135,13 +146,48 @@ def get_dir_conflicting_files(backup_path, ignore_func, instance_id):
     return conflicting_files, is_backup_of_correct_instance
 
 
+def get_chain_archive_path(backup_path, archive_name):
+    # Archives of backups chain are placed in the same directory
+    archive_path = os.path.join(os.path.dirname(backup_path), archive_name)
+    if not os.path.exists(archive_path):
+        raise Exception("Backup '%s' from the chain of backup '%s' not found" % (archive_path, backup_path))
+    return archive_path
+
+
+def get_chain_conflicting_files(backup_path, ignore_func, instance_id):
+    # Files are compared with hashes from the manifest,
+    # archives aren't read
+    manifest = backup_manifest.read_manifest(backup_path)
+    conflicting_files = []
+
+    for archive_name in backup_manifest.get_files_by_archives(manifest):
+        get_chain_archive_path(backup_path, archive_name)
+
+    is_backup_of_correct_instance = manifest['instance_id'] == instance_id
+
+    for full_dst, entry in sorted(manifest['files'].items()):
+        if is_path_of_instance(full_dst, instance_id):
+            is_backup_of_correct_instance = True
+
+        if not os.path.exists(full_dst):
+            continue
+
+        if ignore_func(full_dst):
+            continue
+
+        if os.path.getsize(full_dst) != entry['size'] or backup_manifest.get_file_hash(full_dst) != entry['hash']:
+            conflicting_files.append(full_dst)
+
+    return conflicting_files, is_backup_of_correct_instance
+
+
 ####################
 # Unpack functions #
 ####################
 
 
 def unpack_tgz(backup_path, uid, gid):
-    with tarfile.open(backup_path, 'r:gz') as tar:
+    with backup_archive.open_archive(backup_path) as tar:
         for src_member in tar.getmembers():
             dir_path = os.path.dirname(os.path.join('/', src_member.name))
             make_dirs(dir_path, uid, gid)
@@ -151,6 +197,29 @@ def unpack_tgz(backup_path, uid, gid):
     return True, None
 
 
+def unpack_chain(backup_path, uid, gid):
+    # Each file is extracted from the archive that contains its latest version
+    manifest = backup_manifest.read_manifest(backup_path)
+
+    for archive_name, paths in backup_manifest.get_files_by_archives(manifest).items():
+        archive_path = get_chain_archive_path(backup_path, archive_name)
+        member_names = set(path.lstrip('/') for path in paths)
+
+        with backup_archive.open_archive(archive_path, stream=True) as tar:
+            for src_member in tar:
+                if src_member.name not in member_names:
+                    continue
+
+                make_dirs(os.path.dirname(os.path.join('/', src_member.name)), uid, gid)
+                tar.extract(src_member, '/')
+                member_names.remove(src_member.name)
+
+        if member_names:
+            raise Exception("Files %s not found in backup '%s'" % (', '.join(sorted(member_names)), archive_path))
+
+    return True, None
+
+
 def move_files(backup_path, uid, gid):
     for root, dirs, files in os.walk(backup_path):
         for src in dirs:
@@ -167,13 +236,25 @@ def move_files(backup_path, uid, gid):
             full_src = os.path.join(root, src)
             full_dst = os.path.join('/', os.path.relpath(full_src, backup_path))
 
-            if os.path.exists(full_dst):
+            if os.path.lexists(full_dst):
+                if not os.path.islink(full_src) and not os.path.islink(full_dst) \
+                        and os.path.samefile(full_src, full_dst):
+                    continue
                 os.remove(full_dst)
 
             if os.path.islink(full_src):
                 os.symlink(os.readlink(full_src), full_dst)
             else:
-                shutil.copy(full_src, full_dst)
+                # Immutable files are hardlinked back from the backup only if they
+                # are already owned by the instance user: hardlink shares the inode
+                # with the backup, so chown would change the backup file owner
+                src_stat = os.stat(full_src)
+                hardlink_allowed = hardlink_backup.is_immutable_file(full_src) and \
+                    (src_stat.st_uid, src_stat.st_gid) == (uid, gid)
+
+                link_type = hardlink_backup.link_file(full_src, full_dst, hardlink_allowed)
+                if link_type == hardlink_backup.LINK_HARDLINK:
+                    continue
 
             os.chown(full_dst, uid, gid)
 
@@ -205,7 +286,7 @@ def get_backup_path(restore_backup_path, remote_backups_dir, instance_id):
     for path in sorted(os.listdir(remote_backups_dir), reverse=True):
         full_path = os.path.join(remote_backups_dir, path)
 
-        if not os.path.isfile(full_path):
+        if not os.path.isfile(full_path) and not os.path.isdir(full_path):
             continue
 
         if is_path_of_instance(full_path, instance_id):
@@ -222,10 +303,13 @@ def get_backup_path(restore_backup_path, remote_backups_dir, instance_id):
 def get_specific_format_funcs(backup_path):
     if os.path.isdir(backup_path):
         return get_dir_conflicting_files, move_files, None
-    elif backup_path.endswith('.tar.gz'):
+    elif backup_path.endswith('.tar.gz') or backup_path.endswith('.tar'):
+        # Compression is detected by archive content
+        if backup_manifest.read_manifest(backup_path) is not None:
+            return get_chain_conflicting_files, unpack_chain, None
         return get_tgz_conflicting_files, unpack_tgz, None
 
-    return None, None, 'Unknown format of backup, supported formats: TGZ, directory.'
+    return None, None, 'Unknown format of backup, supported formats: TGZ, TAR, directory.'
 
 
 def cleanup_files(paths_to_remove, paths_to_keep):
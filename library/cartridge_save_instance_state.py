@@ -0,0 +1,35 @@
+#!/usr/bin/env python
+
+import os
+
+from ansible.module_utils.helpers import Helpers as helpers
+from ansible.module_utils import instance_state
+
+argument_spec = {
+    'instance_info': {'required': True, 'type': 'dict'},
+    'config': {'required': True, 'type': 'dict'},
+    'cartridge_defaults': {'required': True, 'type': 'dict'},
+    'cluster_cookie': {'required': False, 'type': 'str'},
+    'cartridge_not_save_cookie_in_app_config': {'required': True, 'type': 'bool'},
+    'stateboard': {'required': True, 'type': 'bool'},
+}
+
+
+def save_instance_state(params):
+    # Should be called before the instance is started,
+    # state is used by `cartridge_get_needs_restart` with `check_by_hashes` flag
+    state_file = params['instance_info']['state_file']
+
+    # Run dir is created by systemd tmpfiles with the application user as owner,
+    # instance restart need is checked as usual if the state isn't saved
+    if not os.path.exists(os.path.dirname(state_file)):
+        return helpers.ModuleRes(changed=False)
+
+    state = instance_state.get_instance_state(params)
+    instance_state.write_instance_state(state_file, state)
+
+    return helpers.ModuleRes(changed=True)
+
+
+if __name__ == '__main__':
+    helpers.execute_module(argument_spec, save_instance_state)
@@ -0,0 +1,109 @@
+#!/usr/bin/env python
+
+import grp
+import os
+import pwd
+import tarfile
+
+from ansible.module_utils.helpers import Helpers as helpers
+from ansible.module_utils import dists_store
+
+argument_spec = {
+    'package_path': {'required': True, 'type': 'str'},
+    'dist_dir': {'required': True, 'type': 'str'},
+    'store_dir': {'required': True, 'type': 'str'},
+    'app_user': {'required': True, 'type': 'str'},
+    'app_group': {'required': True, 'type': 'str'},
+}
+
+
+def get_member_rel_path(member_name):
+    # Package directory is stripped (as `--strip-components=1` does)
+    parts = [part for part in member_name.split('/') if part not in ['', '.']]
+    if '..' in parts:
+        raise Exception("Package contains path outside of application directory: %s" % member_name)
+    return '/'.join(parts[1:])
+
+
+def make_dirs(path, uid, gid):
+    if os.path.isdir(path) and not os.path.islink(path):
+        return
+
+    if os.path.lexists(path):
+        os.remove(path)
+
+    make_dirs(os.path.dirname(path), uid, gid)
+    os.mkdir(path)
+    os.chown(path, uid, gid)
+
+
+def unpack_tgz_to_store(params):
+    # Files contents are stored in the store once,
+    # distribution files are hardlinks to store objects
+    package_path = params['package_path']
+    dist_dir = params['dist_dir']
+    store_dir = params['store_dir']
+
+    uid = pwd.getpwnam(params['app_user']).pw_uid
+    gid = grp.getgrnam(params['app_group']).gr_gid
+
+    make_dirs(store_dir, uid, gid)
+    make_dirs(dist_dir, uid, gid)
+
+    dirs_modes = {}
+    written_objects_count = 0
+    linked_files_count = 0
+
+    with tarfile.open(package_path, mode='r|gz') as tar:
+        for member in tar:
+            rel_path = get_member_rel_path(member.name)
+            if not rel_path:
+                continue
+
+            path = os.path.join(dist_dir, rel_path)
+
+            if member.isdir():
+                make_dirs(path, uid, gid)
+                dirs_modes[path] = member.mode
+                continue
+
+            make_dirs(os.path.dirname(path), uid, gid)
+
+            if member.isfile():
+                object_path, written = dists_store.put_object(
+                    store_dir, tar.extractfile(member), member.mode, uid, gid,
+                )
+                written_objects_count += int(written)
+                linked_files_count += int(dists_store.link_object(object_path, path))
+
+            elif member.islnk():
+                # Hardlink to file that is already unpacked
+                target_path = os.path.join(dist_dir, get_member_rel_path(member.linkname))
+                linked_files_count += int(dists_store.link_object(target_path, path))
+
+            elif member.issym():
+                if os.path.islink(path) and os.readlink(path) == member.linkname:
+                    continue
+                if os.path.lexists(path):
+                    os.remove(path)
+                os.symlink(member.linkname, path)
+                os.lchown(path, uid, gid)
+                linked_files_count += 1
+
+    # Directories modes are set after unpacking to allow
+    # creating files in read-only directories
+    for path, mode in dirs_modes.items():
+        os.chmod(path, mode)
+
+    # Objects of files replaced in distribution aren't used anymore
+    dists_store.remove_unused_objects(store_dir)
+
+    return helpers.ModuleRes(
+        changed=linked_files_count > 0,
+        written_objects_count=written_objects_count,
+        linked_files_count=linked_files_count,
+    )
+
+
+if __name__ == '__main__':
+    helpers.execute_module(argument_spec, unpack_tgz_to_store)
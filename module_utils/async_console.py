@@ -0,0 +1,138 @@
+import asyncio
+import time
+
+from ansible.module_utils.helpers import Helpers as helpers
+
+# This module requires Python 3.5+,
+# modules should fall back to `helpers.gather_evals` if it can't be imported
+
+DEFAULT_GATHER_CONCURRENCY = 16
+
+
+class AsyncConsole:
+    # Same as helpers.Console, but based on asyncio unix socket streams,
+    # so evals on different instances can be performed concurrently
+    def __init__(self, socket_path, transport=None, read_size=None):
+        self.socket_path = socket_path
+        self.transport = transport or helpers.DEFAULT_CONSOLE_TRANSPORT
+        self.read_size = read_size or helpers.DEFAULT_CONSOLE_READ_SIZE
+        self.reader = None
+        self.writer = None
+        self.request_bytes = 0
+        self.response_bytes = 0
+
+    async def connect(self):
+        helpers.check_console_params(self.socket_path, self.transport)
+
+        try:
+            self.reader, self.writer = await asyncio.open_unix_connection(self.socket_path)
+        except OSError as socket_err:
+            raise helpers.get_console_connect_exception(self.socket_path, socket_err)
+
+        await self.reader.read(1024)
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            # StreamWriter.wait_closed was added in Python 3.7
+            if hasattr(self.writer, 'wait_closed'):
+                try:
+                    await self.writer.wait_closed()
+                except OSError:
+                    pass
+            self.writer = None
+
+    async def recvall(self):
+        # See helpers.Console.recvall
+        data = bytearray()
+        while True:
+            chunk = await self.reader.read(self.read_size)
+            if not chunk:
+                raise helpers.get_console_broken_pipe_exception()
+            data += chunk
+            if data.endswith(helpers.CONSOLE_RESPONSE_TERMINATOR):
+                break
+        return data.decode('utf-8')
+
+    async def request(self, cmd):
+        self.writer.write((cmd + '\n').encode())
+        await self.writer.drain()
+        return await self.recvall()
+
+    async def send_cmd(self, result_code):
+        cmd = helpers.get_console_cmd(result_code, self.transport)
+        raw_output = await self.request(cmd)
+
+        if helpers.PERF_TRACE['enabled']:
+            # See helpers.Console.send_cmd
+            self.request_bytes += len(cmd.encode('utf-8')) + 1
+            self.response_bytes += len(raw_output.encode('utf-8'))
+
+        return helpers.decode_console_output(raw_output, self.transport)
+
+    async def eval_calls(self, calls):
+        time_start = time.time()
+        request_bytes, response_bytes = self.request_bytes, self.response_bytes
+
+        try:
+            try:
+                data = await self.send_cmd(helpers.get_eval_calls_code(calls, with_bodies=False))
+            except helpers.CartridgeException as e:
+                if not helpers.is_functions_not_registered_error(e):
+                    raise e
+                data = await self.send_cmd(helpers.get_eval_calls_code(calls, with_bodies=True))
+        finally:
+            # time includes waiting for other instances in the same loop
+            helpers.add_perf_trace_eval(
+                calls,
+                time.time() - time_start,
+                self.request_bytes - request_bytes,
+                self.response_bytes - response_bytes,
+            )
+
+        helpers.check_eval_calls_data(data, calls)
+        return data
+
+    async def eval(self, func_body, *args):
+        data = await self.eval_calls([(func_body, args)])
+        return data[0]
+
+    async def eval_res_err(self, func_body, *args):
+        data = await self.eval(func_body, *args)
+        return helpers.res_err_from_eval_data(data)
+
+
+async def eval_res_err_on_instance(socket_path, func_body, args, semaphore):
+    async with semaphore:
+        console = AsyncConsole(socket_path)
+        try:
+            await console.connect()
+            return await console.eval_res_err(func_body, *args)
+        except helpers.CartridgeException as e:
+            return e
+        finally:
+            await console.close()
+
+
+async def gather_evals_async(socket_paths, func_body, args=None, concurrency=None):
+    # Semaphore should be created inside the running loop
+    semaphore = asyncio.Semaphore(concurrency or DEFAULT_GATHER_CONCURRENCY)
+
+    results = await asyncio.gather(*[
+        eval_res_err_on_instance(
+            socket_path, func_body, helpers.get_gather_eval_args(args, socket_path), semaphore,
+        )
+        for socket_path in socket_paths
+    ])
+
+    return dict(zip(socket_paths, results))
+
+
+def gather_evals(socket_paths, func_body, args=None, concurrency=None):
+    # See helpers.gather_evals, evals are performed concurrently,
+    # at most `concurrency` instances are connected at the same time
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(gather_evals_async(socket_paths, func_body, args, concurrency))
+    finally:
+        loop.close()
@@ -0,0 +1,142 @@
+import contextlib
+import gzip
+import multiprocessing
+import tarfile
+import zlib
+from multiprocessing.pool import ThreadPool
+
+# Backup archive is a TAR archive that can be compressed:
+# * `none` - archive isn't compressed (`.tar`);
+# * `gzip` - archive is compressed by one thread (`.tar.gz`);
+# * `parallel_gzip` - archive is split into blocks that are compressed
+#   independently by threads pool (zlib releases GIL) and written as
+#   gzip members one by one, so the result is a usual `.tar.gz` file.
+# Format of archive to read is detected by its content, not by the name.
+# Archive can start with a head (TAR members written without compression,
+# as gzip stored blocks for `.tar.gz`), its size depends only on the data
+# size, so the head can be rewritten in place when the archive is written.
+
+COMPRESSION_NONE = 'none'
+COMPRESSION_GZIP = 'gzip'
+COMPRESSION_PARALLEL_GZIP = 'parallel_gzip'
+COMPRESSIONS = [COMPRESSION_NONE, COMPRESSION_GZIP, COMPRESSION_PARALLEL_GZIP]
+
+DEFAULT_COMPRESSION_LEVEL = 9
+PARALLEL_GZIP_BLOCK_SIZE = 1024 * 1024
+
+GZIP_MAGIC = b'\x1f\x8b'
+
+
+def get_archive_ext(compression):
+    if compression == COMPRESSION_NONE:
+        return '.tar'
+    return '.tar.gz'
+
+
+def compress_gzip_block(block, compression_level):
+    compressor = zlib.compressobj(compression_level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    return compressor.compress(block) + compressor.flush()
+
+
+class ParallelGzipWriter(object):
+    def __init__(self, fileobj, compression_level, threads_num=None):
+        self.fileobj = fileobj
+        self.compression_level = compression_level
+        self.threads_num = threads_num or multiprocessing.cpu_count()
+        self.pool = ThreadPool(self.threads_num)
+
+        self.buffer = []
+        self.buffer_size = 0
+        # Compressed blocks are written in order of submission
+        self.pending = []
+
+    def write(self, data):
+        self.buffer.append(data)
+        self.buffer_size += len(data)
+
+        if self.buffer_size >= PARALLEL_GZIP_BLOCK_SIZE:
+            self.submit_block()
+
+    def submit_block(self):
+        block = b''.join(self.buffer)
+        self.buffer = []
+        self.buffer_size = 0
+
+        self.pending.append(self.pool.apply_async(compress_gzip_block, (block, self.compression_level)))
+
+        # Number of blocks in memory is limited
+        while len(self.pending) > 2 * self.threads_num:
+            self.fileobj.write(self.pending.pop(0).get())
+
+    def close(self):
+        try:
+            if self.buffer_size > 0:
+                self.submit_block()
+
+            while self.pending:
+                self.fileobj.write(self.pending.pop(0).get())
+        finally:
+            self.pool.terminate()
+            self.pool.join()
+
+
+def check_compression(compression):
+    if compression not in COMPRESSIONS:
+        raise Exception("Unknown backup compression '%s', supported: %s" % (compression, ', '.join(COMPRESSIONS)))
+
+
+def encode_head(head, compression):
+    if compression == COMPRESSION_NONE:
+        return head
+    return compress_gzip_block(head, 0)
+
+
+@contextlib.contextmanager
+def open_archive_for_writing(archive_path, compression, compression_level=DEFAULT_COMPRESSION_LEVEL, head=None):
+    check_compression(compression)
+
+    with open(archive_path, 'wb') as f:
+        if head is not None:
+            f.write(encode_head(head, compression))
+
+        if compression == COMPRESSION_NONE:
+            with tarfile.open(fileobj=f, mode='w') as tar:
+                yield tar
+
+        elif compression == COMPRESSION_GZIP:
+            with tarfile.open(fileobj=f, mode='w:gz', compresslevel=compression_level) as tar:
+                yield tar
+
+        elif compression == COMPRESSION_PARALLEL_GZIP:
+            writer = ParallelGzipWriter(f, compression_level)
+            try:
+                with tarfile.open(fileobj=writer, mode='w|') as tar:
+                    yield tar
+            finally:
+                writer.close()
+
+
+def rewrite_archive_head(archive_path, compression, head):
+    # New head should have the same size as the written one
+    data = encode_head(head, compression)
+    with open(archive_path, 'r+b') as f:
+        f.write(data)
+
+
+def is_gzip_archive(archive_path):
+    with open(archive_path, 'rb') as f:
+        return f.read(len(GZIP_MAGIC)) == GZIP_MAGIC
+
+
+@contextlib.contextmanager
+def open_archive(archive_path, stream=False):
+    # Stream mode of tarfile doesn't support gzip files with many members,
+    # so gzip file is always decompressed by GzipFile
+    if not is_gzip_archive(archive_path):
+        with tarfile.open(archive_path, 'r|' if stream else 'r:') as tar:
+            yield tar
+        return
+
+    with gzip.GzipFile(archive_path, 'rb') as f:
+        with tarfile.open(fileobj=f, mode='r|' if stream else 'r:') as tar:
+            yield tar
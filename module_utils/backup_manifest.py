@@ -0,0 +1,133 @@
+import hashlib
+import json
+import os
+import tarfile
+
+from ansible.module_utils import backup_archive
+
+# Backup manifest lists all instance files of the backup with their size,
+# modification time, SHA256 hash and name of the archive that contains file content.
+# Manifest is the first member of the archive, so it's read without
+# decompressing the whole archive.
+# Incremental backup contains only new and changed files, other files
+# are contained in the parent backups (archives are placed in the same directory).
+# Files are hashed while they are written to the archive, the manifest is written
+# with hash placeholders of the same length and then rewritten in place.
+
+MANIFEST_VERSION = 1
+MANIFEST_MEMBER_NAME = '.cartridge-backup-manifest.json'
+HASH_READ_SIZE = 1024 * 1024
+HASH_PLACEHOLDER = '0' * hashlib.sha256().digest_size * 2
+
+
+def get_file_hash(path):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(HASH_READ_SIZE)
+            if not chunk:
+                break
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class HashingReader(object):
+    def __init__(self, fileobj):
+        self.fileobj = fileobj
+        self.hash = hashlib.sha256()
+
+    def read(self, size=-1):
+        data = self.fileobj.read(size)
+        self.hash.update(data)
+        return data
+
+
+def get_file_entry(path, archive_name, parent_entry=None):
+    # New or changed (by size or modification time) file is hashed on adding to the archive
+    path_stat = os.stat(path)
+    if parent_entry is not None \
+            and parent_entry['size'] == path_stat.st_size \
+            and parent_entry['mtime'] == path_stat.st_mtime:
+        return parent_entry
+
+    return {
+        'size': path_stat.st_size,
+        'mtime': path_stat.st_mtime,
+        'hash': HASH_PLACEHOLDER,
+        'archive': archive_name,
+    }
+
+
+def get_backup_files_paths(backup_files):
+    # Directories are replaced with their files
+    paths = []
+    for path in backup_files:
+        if os.path.isdir(path):
+            for root, _, file_names in os.walk(path):
+                paths.extend(os.path.join(root, name) for name in sorted(file_names))
+        elif os.path.isfile(path):
+            paths.append(path)
+    return paths
+
+
+def make_manifest(instance_id, archive_name, backup_files, parent_manifest=None):
+    parent_files = parent_manifest['files'] if parent_manifest is not None else {}
+
+    files = {}
+    for path in get_backup_files_paths(backup_files):
+        if os.path.isfile(path):
+            files[path] = get_file_entry(path, archive_name, parent_files.get(path))
+
+    return {
+        'version': MANIFEST_VERSION,
+        'instance_id': instance_id,
+        'archive': archive_name,
+        'parent': parent_manifest['archive'] if parent_manifest is not None else None,
+        'files': files,
+    }
+
+
+def get_manifest_member(manifest):
+    # Returns TAR header and padded data of the manifest member
+    data = json.dumps(manifest, sort_keys=True).encode('utf-8')
+    info = tarfile.TarInfo(MANIFEST_MEMBER_NAME)
+    info.size = len(data)
+
+    padding = b'\0' * ((tarfile.BLOCKSIZE - len(data) % tarfile.BLOCKSIZE) % tarfile.BLOCKSIZE)
+    return info.tobuf() + data + padding
+
+
+def add_file(tar, path, entry):
+    # File is read once: its hash is computed while the content is written
+    info = tar.gettarinfo(path)
+    if info.size != entry['size']:
+        raise Exception("File %s was changed during backup" % path)
+
+    with open(path, 'rb') as f:
+        reader = HashingReader(f)
+        tar.addfile(info, reader)
+
+    entry['hash'] = reader.hash.hexdigest()
+
+
+def read_manifest(archive_path):
+    # Returns None for archives created without manifest
+    with backup_archive.open_archive(archive_path, stream=True) as tar:
+        for member in tar:
+            if member.name != MANIFEST_MEMBER_NAME:
+                return None
+
+            manifest = json.loads(tar.extractfile(member).read().decode('utf-8'))
+            if manifest.get('version') != MANIFEST_VERSION:
+                raise Exception("Unsupported version of backup manifest in %s" % archive_path)
+            return manifest
+
+    return None
+
+
+def get_files_by_archives(manifest):
+    # Returns {archive_name: [path, ...]}
+    files_by_archives = {}
+    for path, entry in manifest['files'].items():
+        files_by_archives.setdefault(entry['archive'], []).append(path)
+    return files_by_archives
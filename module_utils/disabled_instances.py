@@ -0,0 +1,105 @@
+from ansible.module_utils.helpers import Helpers as helpers
+
+
+def get_disabled_instances_from_instance_config(instance_vars):
+    return instance_vars['instance_info']['disabled_instances']
+
+
+def get_topology_checksum_from_instance_config(instance_vars):
+    return instance_vars['instance_info']['topology_checksum']
+
+
+def config_mismatched(checksum, disabled_instances, checksums, hosts_count_by_checksum):
+    # Instance config is mismatched if some of not disabled instances
+    # has another topology checksum
+    other_hosts_count = len(checksums) - hosts_count_by_checksum[checksum]
+
+    disabled_other_hosts_count = len([
+        name for name in set(disabled_instances)
+        if name in checksums and checksums[name] != checksum
+    ])
+
+    return other_hosts_count > disabled_other_hosts_count
+
+
+def count_cluster_disabled_instances(module_hostvars, play_hosts, ignore_split_brain=False):
+    config_mismatch_count = 0
+    healthy_count = 0
+    votes_to_disable = {}
+
+    play_hosts = list(filter(
+        # Disabled instances is None on stateboard and not started instances
+        lambda name: all([
+            get_disabled_instances_from_instance_config(module_hostvars[name]) is not None,
+            get_topology_checksum_from_instance_config(module_hostvars[name]) is not None,
+            not helpers.is_expelled(module_hostvars[name]),
+        ]),
+        play_hosts,
+    ))
+
+    checksums = {}
+    hosts_count_by_checksum = {}
+    for instance_name in play_hosts:
+        checksum = get_topology_checksum_from_instance_config(module_hostvars[instance_name])
+        checksums[instance_name] = checksum
+        hosts_count_by_checksum[checksum] = hosts_count_by_checksum.get(checksum, 0) + 1
+
+    # Instances with the same topology checksum and the same
+    # disabled instances vote the same way, so each group is checked once
+    groups_sizes = {}
+    for instance_name in play_hosts:
+        disabled_instances = get_disabled_instances_from_instance_config(module_hostvars[instance_name])
+        group_key = (checksums[instance_name], tuple(sorted(disabled_instances)))
+        groups_sizes[group_key] = groups_sizes.get(group_key, 0) + 1
+
+    for (checksum, disabled_instances), group_size in groups_sizes.items():
+        if config_mismatched(checksum, disabled_instances, checksums, hosts_count_by_checksum):
+            config_mismatch_count += group_size
+            continue
+
+        healthy_count += group_size
+        for disabled_instance in disabled_instances:
+            votes_to_disable[disabled_instance] = votes_to_disable.get(disabled_instance, 0) + group_size
+
+    if healthy_count == 0 and config_mismatch_count > 0:
+        return None, 'All instances in cluster has different topology configs'
+
+    final_disabled_instances = []
+    split_brain_detected = False
+
+    for name, score in votes_to_disable.items():
+        if score >= float(healthy_count) / 2:
+            final_disabled_instances.append(name)
+        if score != healthy_count:
+            split_brain_detected = True
+
+    if split_brain_detected:
+        msg = "It seems that you have split brain in your cluster."
+        if ignore_split_brain:
+            helpers.warn(msg)
+        else:
+            msg += " Set 'cartridge_ignore_split_brain' flag to ignore this error."
+            return None, msg
+
+    return sorted(final_disabled_instances), None
+
+
+def count_inventory_disabled_instances(module_hostvars, play_hosts):
+    return sorted(filter(
+        lambda name: helpers.is_disabled(module_hostvars[name]),
+        play_hosts,
+    ))
+
+
+def count_disabled_instances(params):
+    module_hostvars = params['module_hostvars']
+    play_hosts = params['play_hosts']
+    ignore_split_brain = params['ignore_split_brain']
+
+    inventory_disabled_instances = count_inventory_disabled_instances(module_hostvars, play_hosts)
+
+    cluster_disabled_instances, err = count_cluster_disabled_instances(module_hostvars, play_hosts, ignore_split_brain)
+    if err:
+        return helpers.ModuleRes(failed=True, msg=err)
+
+    return helpers.ModuleRes(changed=False, inventory=inventory_disabled_instances, cluster=cluster_disabled_instances)
@@ -0,0 +1,116 @@
+import errno
+import hashlib
+import os
+import shutil
+import stat
+
+# Distributions store keeps application files contents once by content hash,
+# distributions files are hardlinks to store objects.
+# Object is named by content hash and file mode, since mode is shared by all links.
+# Object that has only one link (the object itself) isn't used by any distribution.
+# All distributions files with the same content share one inode, so in-place edit
+# of a file changes it in every distribution. Objects are made read-only to prevent it
+# (files should be replaced, e.g. by unpacking a new distribution).
+
+OBJECT_READ_SIZE = 1024 * 1024
+OBJECT_MAX_MEMORY_SIZE = 64 * 1024 * 1024
+OBJECT_TMP_EXT = '.tmp'
+OBJECT_WRITE_BITS = stat.S_IWUSR | stat.S_IWGRP | stat.S_IWOTH
+
+
+def get_object_path(store_dir, content_hash, mode):
+    return os.path.join(store_dir, content_hash[:2], '%s-%04o' % (content_hash[2:], mode))
+
+
+def put_object(store_dir, fileobj, mode, uid=-1, gid=-1):
+    # Returns path of object with `fileobj` content and flag if it was written.
+    # Content is kept in memory while it's hashed, so existing objects
+    # aren't written at all (large files are written to a temporary file)
+    tmp_path = os.path.join(store_dir, '%d%s' % (os.getpid(), OBJECT_TMP_EXT))
+    tmp_file = None
+
+    h = hashlib.sha256()
+    chunks = []
+    chunks_size = 0
+
+    try:
+        while True:
+            chunk = fileobj.read(OBJECT_READ_SIZE)
+            if not chunk:
+                break
+            h.update(chunk)
+
+            if tmp_file is not None:
+                tmp_file.write(chunk)
+                continue
+
+            chunks.append(chunk)
+            chunks_size += len(chunk)
+
+            if chunks_size > OBJECT_MAX_MEMORY_SIZE:
+                tmp_file = open(tmp_path, 'wb')
+                tmp_file.write(b''.join(chunks))
+                chunks = []
+    finally:
+        if tmp_file is not None:
+            tmp_file.close()
+
+    object_path = get_object_path(store_dir, h.hexdigest(), mode)
+    if os.path.exists(object_path):
+        if tmp_file is not None:
+            os.remove(tmp_path)
+        return object_path, False
+
+    if tmp_file is None:
+        with open(tmp_path, 'wb') as f:
+            f.write(b''.join(chunks))
+
+    object_dir = os.path.dirname(object_path)
+    if not os.path.exists(object_dir):
+        os.makedirs(object_dir)
+
+    os.chown(tmp_path, uid, gid)
+    os.chmod(tmp_path, mode & ~OBJECT_WRITE_BITS)
+    os.rename(tmp_path, object_path)
+
+    return object_path, True
+
+
+def link_object(object_path, path):
+    # Returns False if `path` is already a link to the object
+    if os.path.lexists(path):
+        if not os.path.islink(path) and os.path.samefile(object_path, path):
+            return False
+
+        if os.path.isdir(path) and not os.path.islink(path):
+            shutil.rmtree(path)
+        else:
+            os.remove(path)
+
+    try:
+        os.link(object_path, path)
+    except OSError as e:
+        if e.errno == errno.EXDEV:
+            raise Exception(
+                "Distributions store and application install dir "
+                "should be placed on the same filesystem: %s" % e
+            )
+        raise
+
+    return True
+
+
+def remove_unused_objects(store_dir):
+    # Returns number of removed objects
+    if not os.path.isdir(store_dir):
+        return 0
+
+    removed_count = 0
+    for root, _, file_names in os.walk(store_dir):
+        for name in file_names:
+            path = os.path.join(root, name)
+            if name.endswith(OBJECT_TMP_EXT) or os.lstat(path).st_nlink == 1:
+                os.remove(path)
+                removed_count += 1
+
+    return removed_count
@@ -0,0 +1,110 @@
+import errno
+import fcntl
+import os
+import shutil
+
+# Hardlink backup is a directory with instance files (paths are relative to `/`).
+# Snapshot and vinyl run files are never changed after they are written,
+# so they are hardlinked (backup takes no space and no data is copied).
+# Other files (xlogs, vylogs, configs) can be changed in place, so they are
+# reflinked (copy-on-write clone, supported by Btrfs, XFS and others) or copied.
+
+IMMUTABLE_FILES_EXTS = ['.snap', '.run', '.index']
+
+# ioctl request to clone file (Linux)
+FICLONE = 0x40049409
+
+LINK_HARDLINK = 'hardlink'
+LINK_REFLINK = 'reflink'
+LINK_COPY = 'copy'
+
+HARDLINK_FALLBACK_ERRNOS = [errno.EXDEV, errno.EPERM, errno.EMLINK, errno.EOPNOTSUPP]
+
+
+def is_immutable_file(path):
+    return os.path.splitext(path)[1] in IMMUTABLE_FILES_EXTS
+
+
+def reflink_file(src, dst):
+    with open(src, 'rb') as src_f, open(dst, 'wb') as dst_f:
+        fcntl.ioctl(dst_f.fileno(), FICLONE, src_f.fileno())
+
+
+def link_file(src, dst, hardlink_allowed):
+    # Returns the way file was linked
+    if hardlink_allowed:
+        try:
+            os.link(src, dst)
+            return LINK_HARDLINK
+        except OSError as e:
+            if e.errno not in HARDLINK_FALLBACK_ERRNOS:
+                raise
+
+    try:
+        reflink_file(src, dst)
+        link_type = LINK_REFLINK
+    except (IOError, OSError):
+        shutil.copyfile(src, dst)
+        link_type = LINK_COPY
+
+    shutil.copystat(src, dst)
+    return link_type
+
+
+def make_parent_dirs(backup_dir, path):
+    # Directories are created with the same mode as original ones
+    parent_path = os.path.dirname(path)
+    backup_parent_path = os.path.join(backup_dir, parent_path.lstrip('/'))
+    if os.path.exists(backup_parent_path):
+        return
+
+    make_parent_dirs(backup_dir, parent_path)
+    os.mkdir(backup_parent_path)
+    shutil.copymode(parent_path, backup_parent_path)
+
+
+def get_files_paths(backup_files):
+    # Directories are replaced with their files and symlinks
+    paths = []
+    for path in backup_files:
+        if os.path.isdir(path) and not os.path.islink(path):
+            for root, dir_names, file_names in os.walk(path):
+                paths.extend(os.path.join(root, name) for name in sorted(file_names))
+                paths.extend(
+                    os.path.join(root, name) for name in sorted(dir_names)
+                    if os.path.islink(os.path.join(root, name))
+                )
+        elif os.path.lexists(path):
+            paths.append(path)
+    return paths
+
+
+def make_backup_dir(backup_dir, backup_files):
+    # Backup is created in a temporary directory and then renamed,
+    # returns counts of linked files by link types
+    tmp_backup_dir = '%s.%d.tmp' % (backup_dir, os.getpid())
+    os.mkdir(tmp_backup_dir)
+
+    links_count = {LINK_HARDLINK: 0, LINK_REFLINK: 0, LINK_COPY: 0}
+
+    try:
+        for path in get_files_paths(backup_files):
+            path = os.path.abspath(path)
+            dst = os.path.join(tmp_backup_dir, path.lstrip('/'))
+            if os.path.lexists(dst):
+                continue
+
+            make_parent_dirs(tmp_backup_dir, path)
+
+            if os.path.islink(path):
+                os.symlink(os.readlink(path), dst)
+                continue
+
+            links_count[link_file(path, dst, is_immutable_file(path))] += 1
+    except Exception:
+        shutil.rmtree(tmp_backup_dir)
+        raise
+
+    os.rename(tmp_backup_dir, backup_dir)
+
+    return links_count
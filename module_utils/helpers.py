@@ -1,12 +1,25 @@
 #!/usr/bin/env python
+import base64
+import datetime
+import decimal
 import fnmatch
+import hashlib
 import json
 import os
 import random
 import re
 import socket
+import struct
+import time
+import uuid
 
 from ansible.module_utils.basic import AnsibleModule
+from ansible.module_utils.six import string_types
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
 
 DEFAULT_RUN_DIR = '/var/run/tarantool'
 TWOPHASE_OPTION_NAMES = ['netbox_call_timeout', 'upload_config_timeout', 'apply_config_timeout']
@@ -68,6 +81,22 @@ SYSTEM_CONFIG_SECTIONS = {
     'vshard_groups.yml',
 }
 
+
+class LuaFunction:
+    # Function that is registered on instance once and then is called by hash,
+    # name is used as a label in evals perf trace
+    def __init__(self, body, name=None):
+        self.body = body
+        self.name = name
+        self.hash = hashlib.sha1(body.encode('utf-8')).hexdigest()
+
+    def get_ref(self, with_body=False):
+        ref = {'hash': self.hash}
+        if with_body:
+            ref['body'] = self.body
+        return ref
+
+
 FORMAT_REPLICASET_FUNC = '''
 local cartridge_roles = require('cartridge.roles')
 local function format_replicaset(r)
@@ -185,6 +214,10 @@ end
 return ret
 ''' % FORMAT_SERVER_WITH_REPLICASET_INFO_FUNC
 
+GET_ACTIVE_LEADERS_FUNC_BODY = '''
+return require('cartridge.failover').get_active_leaders()
+'''
+
 SET_TWOPHASE_OPTIONS_FUNC_BODY = '''
 local vars = require('cartridge.vars').new('cartridge.twophase')
 if vars.options ~= nil then
@@ -224,10 +257,112 @@ READ_YAML_FILE_FUNC_BODY = '''
     return result
 '''
 
+CONSOLE_TRANSPORT_TEXT = 'text'
+CONSOLE_TRANSPORT_MSGPACK = 'msgpack'
+CONSOLE_TRANSPORTS = [CONSOLE_TRANSPORT_TEXT, CONSOLE_TRANSPORT_MSGPACK]
+DEFAULT_CONSOLE_TRANSPORT = CONSOLE_TRANSPORT_MSGPACK
+
+DEFAULT_CONSOLE_READ_SIZE = 64 * 1024
+CONSOLE_RESPONSE_TERMINATOR = b'\n...\n'
+
+FUNCTIONS_REGISTRY_NAME = '__ansible_cartridge_functions'
+FUNCTIONS_NOT_REGISTERED_ERR = 'Functions are not registered in instance'
+
+# Console broker (see cartridge_console_broker module) listens
+# on a socket placed in the run directory next to instances sockets
+CONSOLE_BROKER_SOCK_NAME = 'cartridge-console-broker.sock'
+CONSOLE_BROKER_PID_FILE_NAME = 'cartridge-console-broker.pid'
+# Broker is used only if CARTRIDGE_CONSOLE_BROKER environment variable is set
+# (role sets it by `cartridge_console_broker` flag), so broker left from
+# another run doesn't change the way modules connect to instances
+CONSOLE_BROKER_ENV = 'CARTRIDGE_CONSOLE_BROKER'
+
+# Each call is a pair of function and arguments, function is a body
+# or a reference to a registered function: {{hash = ..., body = ...}}.
+# Registered functions are compiled once and stored in a global table by hash,
+# body is sent only if function isn't registered yet.
+# All functions are checked before the first call, so on a miss
+# nothing is called and the request can be repeated with bodies.
+# Each call result is packed to the separate table:
+# {{ {{res_1, err_1}}, {{res_2, err_2}}, ... }}
+EVAL_CALLS_RESULT_FMT = """
+    local net_box = require('net.box')
+    local calls = require('json').decode({calls_encoded})
+    local registry = rawget(_G, '{registry_name}')
+    if registry == nil then
+        registry = {{}}
+        rawset(_G, '{registry_name}', registry)
+    end
+    local missed = {{}}
+    for _, call in ipairs(calls) do
+        local func = call[1]
+        if type(func) == 'table' then
+            if func.body ~= nil then
+                registry[func.hash] = assert(loadstring(func.body, '=eval'))
+            elseif registry[func.hash] == nil then
+                table.insert(missed, func.hash)
+            end
+        end
+    end
+    if #missed > 0 then
+        error('{not_registered_err}: ' .. table.concat(missed, ', '), 0)
+    end
+    local result = {{}}
+    for i, call in ipairs(calls) do
+        local func, args = call[1], call[2]
+        if type(func) == 'table' then
+            result[i] = {{ registry[func.hash](unpack(args, 1, table.maxn(args))) }}
+        else
+            result[i] = {{ net_box.self:eval(func, args) }}
+        end
+    end
+"""
+
+# Result is JSON-encoded and hex-encoded to pass through the YAML console as a plain scalar
+TEXT_ENCODE_RESULT_CMD = """
+    return string.hex(require('json').encode(result))
+"""
+
+# Result is msgpack-encoded and base64-encoded (without line wraps) and framed as
+# "<format>:<length>:<payload>". If msgpack payload can't be built,
+# instance falls back to hex-encoded JSON in the same frame.
+MSGPACK_ENCODE_RESULT_CMD = """
+    local ok, payload = pcall(function()
+        return require('digest').base64_encode(require('msgpack').encode(result), {nowrap = true})
+    end)
+    local format = 'msgpack'
+    if not ok then
+        format = 'json'
+        payload = string.hex(require('json').encode(result))
+    end
+    return string.format('%s:%d:%s', format, #payload, payload)
+"""
+
+GET_REPLICASETS_FUNC = LuaFunction(GET_REPLICASETS_FUNC_BODY, name='get_replicasets')
+GET_INSTANCES_FUNC = LuaFunction(GET_INSTANCES_FUNC_BODY, name='get_instances')
+GET_INSTANCES_WITH_REPLICASETS_INFO_FUNC = LuaFunction(
+    GET_INSTANCES_WITH_REPLICASETS_INFO_FUNC_BODY, name='get_instances_with_replicasets_info',
+)
+GET_ACTIVE_LEADERS_FUNC = LuaFunction(GET_ACTIVE_LEADERS_FUNC_BODY, name='get_active_leaders')
+SET_TWOPHASE_OPTIONS_FUNC = LuaFunction(SET_TWOPHASE_OPTIONS_FUNC_BODY, name='set_twophase_options')
+READ_YAML_FILE_FUNC = LuaFunction(READ_YAML_FILE_FUNC_BODY, name='read_yaml_file')
+GET_BOX_CFG_FUNC = LuaFunction(name='get_box_cfg', body='''
+    return type(box.cfg) ~= 'function' and box.cfg or box.NULL
+''')
+
 RANDOM_PREFIX = random.randint(1, 1000)
 DEBUG_MESSAGES = []
 WARNINGS = []
 
+# Evals perf trace is collected if CARTRIDGE_PERF_TRACE environment
+# variable is set and is returned in `perf` key of module result
+PERF_TRACE_ENV = 'CARTRIDGE_PERF_TRACE'
+PERF_TRACE_LABEL_MAX_LEN = 60
+PERF_TRACE = {
+    'enabled': False,
+    'evals': [],
+}
+
 
 class ModuleRes:
     def __init__(self, failed=False, changed=True, msg=None, exception=None, warnings=None, fact=None, **kwargs):
@@ -269,6 +404,9 @@ class ModuleRes:
         for key, value in self.kwargs.items():
             res[key] = value
 
+        if PERF_TRACE['enabled']:
+            res['perf'] = get_perf_report()
+
         return res
 
     def exit(self, module):
@@ -278,6 +416,54 @@ class ModuleRes:
             module.fail_json(**self.get_exit_json())
 
 
+def enable_perf_trace(enabled=True):
+    PERF_TRACE['enabled'] = enabled
+    del PERF_TRACE['evals'][:]
+
+
+def is_perf_trace_enabled_by_env():
+    return os.environ.get(PERF_TRACE_ENV, '').lower() in ['1', 'true', 'yes']
+
+
+def get_eval_label(func):
+    if isinstance(func, LuaFunction):
+        if func.name is not None:
+            return func.name
+        func = func.body
+
+    # first line of code is used as a label of anonymous function
+    for line in func.split('\n'):
+        line = line.strip()
+        if line and not line.startswith('--'):
+            return line[:PERF_TRACE_LABEL_MAX_LEN]
+
+    return ''
+
+
+def add_perf_trace_eval(calls, time_spent, request_bytes, response_bytes):
+    if not PERF_TRACE['enabled']:
+        return
+
+    PERF_TRACE['evals'].append({
+        'label': ', '.join(get_eval_label(func) for func, _ in calls),
+        'calls': len(calls),
+        'time': round(time_spent, 6),
+        'request_bytes': request_bytes,
+        'response_bytes': response_bytes,
+    })
+
+
+def get_perf_report():
+    evals = list(PERF_TRACE['evals'])
+    return {
+        'evals': evals,
+        'evals_count': len(evals),
+        'evals_time': round(sum(e['time'] for e in evals), 6),
+        'request_bytes': sum(e['request_bytes'] for e in evals),
+        'response_bytes': sum(e['response_bytes'] for e in evals),
+    }
+
+
 class CartridgeErrorCodes:
     SOCKET_NOT_FOUND = 'SOCKET_NOT_FOUND'
     FAILED_TO_CONNECT_TO_SOCKET = 'FAILED_TO_CONNECT_TO_SOCKET'
@@ -286,6 +472,8 @@ class CartridgeErrorCodes:
     FUNCTION_ERROR = 'FUNCTION_ERROR'
     MISSED_SECTION = 'MISSED_SECTION'
     BAD_VALUE_TYPE = 'BAD_VALUE_TYPE'
+    CONSOLE_BROKER_ERROR = 'CONSOLE_BROKER_ERROR'
+    UNKNOWN_CONSOLE_TRANSPORT = 'UNKNOWN_CONSOLE_TRANSPORT'
 
 
 class CartridgeException(Exception):
@@ -301,25 +489,411 @@ class CartridgeException(Exception):
         ]
 
 
+def lua_quote(value):
+    # Returns single-quoted Lua string literal
+    value = value.replace('\\', '\\\\').replace("'", "\\'").replace('\n', '\\n').replace('\r', '\\r')
+    return "'%s'" % value
+
+
+def res_err_from_eval_data(data):
+    assert len(data) <= 2
+
+    if len(data) == 0:
+        # return nil
+        data.append(None)
+
+    if len(data) == 1:
+        # return res
+        data.append(None)
+
+    # return res, err
+
+    # err can be tarantool/errors instance
+    if isinstance(data[1], dict) and data[1].get('err') is not None:
+        data[1] = data[1].get('err')
+
+    return data
+
+
+def parse_console_output(raw_output):
+    output = re.sub(r"^---\n-\s+?", '', raw_output)
+    output = re.sub(r"'?\n...\n$", '', output)
+    output = re.sub(r"\n\s*", '', output)
+
+    if output.startswith("error:"):
+        err = re.sub(r"error:\s+", '', output)
+        raise CartridgeException(CartridgeErrorCodes.FUNCTION_ERROR, err)
+
+    return output.lstrip("'")
+
+
+def decode_hex_json(hex_output):
+    output = bytearray.fromhex(hex_output).decode('utf-8')
+    return json.loads(output)
+
+
+MSGPACK_STRUCTS = {
+    0xca: struct.Struct('>f'),
+    0xcb: struct.Struct('>d'),
+    0xcc: struct.Struct('>B'),
+    0xcd: struct.Struct('>H'),
+    0xce: struct.Struct('>I'),
+    0xcf: struct.Struct('>Q'),
+    0xd0: struct.Struct('>b'),
+    0xd1: struct.Struct('>h'),
+    0xd2: struct.Struct('>i'),
+    0xd3: struct.Struct('>q'),
+}
+
+MSGPACK_STR_LEN_STRUCTS = {
+    0xd9: MSGPACK_STRUCTS[0xcc],
+    0xda: MSGPACK_STRUCTS[0xcd],
+    0xdb: MSGPACK_STRUCTS[0xce],
+}
+
+MSGPACK_BIN_LEN_STRUCTS = {
+    0xc4: MSGPACK_STRUCTS[0xcc],
+    0xc5: MSGPACK_STRUCTS[0xcd],
+    0xc6: MSGPACK_STRUCTS[0xce],
+}
+
+MSGPACK_ARRAY_LEN_STRUCTS = {
+    0xdc: MSGPACK_STRUCTS[0xcd],
+    0xdd: MSGPACK_STRUCTS[0xce],
+}
+
+MSGPACK_MAP_LEN_STRUCTS = {
+    0xde: MSGPACK_STRUCTS[0xcd],
+    0xdf: MSGPACK_STRUCTS[0xce],
+}
+
+MSGPACK_FIXEXT_SIZES = {
+    0xd4: 1,
+    0xd5: 2,
+    0xd6: 4,
+    0xd7: 8,
+    0xd8: 16,
+}
+
+MSGPACK_EXT_LEN_STRUCTS = {
+    0xc7: MSGPACK_STRUCTS[0xcc],
+    0xc8: MSGPACK_STRUCTS[0xcd],
+    0xc9: MSGPACK_STRUCTS[0xce],
+}
+
+# Tarantool extension types
+MSGPACK_EXT_DECIMAL = 1
+MSGPACK_EXT_UUID = 2
+MSGPACK_EXT_ERROR = 3
+MSGPACK_EXT_DATETIME = 4
+
+MSGPACK_ERROR_STACK = 0x00
+MSGPACK_ERROR_MESSAGE = 0x03
+
+# Datetime is packed as seconds (int64) and optionally
+# nanoseconds (int32), timezone offset in minutes (int16) and timezone index (int16)
+MSGPACK_DATETIME_SECONDS_STRUCT = struct.Struct('<q')
+MSGPACK_DATETIME_EXTRA_STRUCT = struct.Struct('<ihh')
+
+DECIMAL_NEGATIVE_NIBBLES = (0x0b, 0x0d)
+UNIX_EPOCH = datetime.datetime(1970, 1, 1)
+
+
+def msgpack_unpack(data, pos=0):
+    # Used when `msgpack` package isn't installed.
+    # Minimal msgpack decoder for values that can be returned by Lua code:
+    # nil, booleans, numbers, strings, arrays, maps and Tarantool extension types.
+    # `data` is a bytearray, so indexing returns int on both Python 2 and 3.
+    # Returns decoded value and position of the next value.
+    b = data[pos]
+    pos += 1
+
+    if b <= 0x7f:
+        return b, pos
+    if b >= 0xe0:
+        return b - 0x100, pos
+    if 0xa0 <= b <= 0xbf:
+        end = pos + (b & 0x1f)
+        return data[pos:end].decode('utf-8'), end
+    if 0x90 <= b <= 0x9f:
+        return msgpack_unpack_array(data, pos, b & 0x0f)
+    if 0x80 <= b <= 0x8f:
+        return msgpack_unpack_map(data, pos, b & 0x0f)
+
+    if b == 0xc0:
+        return None, pos
+    if b == 0xc2:
+        return False, pos
+    if b == 0xc3:
+        return True, pos
+
+    if b in MSGPACK_STRUCTS:
+        fmt = MSGPACK_STRUCTS[b]
+        return fmt.unpack_from(data, pos)[0], pos + fmt.size
+    if b in MSGPACK_STR_LEN_STRUCTS:
+        fmt = MSGPACK_STR_LEN_STRUCTS[b]
+        size = fmt.unpack_from(data, pos)[0]
+        pos += fmt.size
+        return data[pos:pos + size].decode('utf-8'), pos + size
+    if b in MSGPACK_BIN_LEN_STRUCTS:
+        fmt = MSGPACK_BIN_LEN_STRUCTS[b]
+        size = fmt.unpack_from(data, pos)[0]
+        pos += fmt.size
+        return bytes(data[pos:pos + size]), pos + size
+    if b in MSGPACK_ARRAY_LEN_STRUCTS:
+        fmt = MSGPACK_ARRAY_LEN_STRUCTS[b]
+        return msgpack_unpack_array(data, pos + fmt.size, fmt.unpack_from(data, pos)[0])
+    if b in MSGPACK_MAP_LEN_STRUCTS:
+        fmt = MSGPACK_MAP_LEN_STRUCTS[b]
+        return msgpack_unpack_map(data, pos + fmt.size, fmt.unpack_from(data, pos)[0])
+    if b in MSGPACK_FIXEXT_SIZES:
+        return msgpack_unpack_ext(data, pos, MSGPACK_FIXEXT_SIZES[b])
+    if b in MSGPACK_EXT_LEN_STRUCTS:
+        fmt = MSGPACK_EXT_LEN_STRUCTS[b]
+        return msgpack_unpack_ext(data, pos + fmt.size, fmt.unpack_from(data, pos)[0])
+
+    raise CartridgeException(
+        CartridgeErrorCodes.BAD_VALUE_TYPE,
+        'Unsupported msgpack type 0x%02x in eval result' % b,
+    )
+
+
+def msgpack_unpack_array(data, pos, size):
+    res = []
+    for _ in range(size):
+        value, pos = msgpack_unpack(data, pos)
+        res.append(value)
+    return res, pos
+
+
+def msgpack_unpack_map(data, pos, size):
+    res = {}
+    for _ in range(size):
+        key, pos = msgpack_unpack(data, pos)
+        value, pos = msgpack_unpack(data, pos)
+        res[key] = value
+    return res, pos
+
+
+def msgpack_unpack_ext(data, pos, size):
+    code = struct.unpack_from('>b', data, pos)[0]
+    pos += 1
+    return msgpack_ext_hook(code, bytes(data[pos:pos + size])), pos + size
+
+
+def msgpack_ext_hook(code, data):
+    # Tarantool extension types are decoded to the same values
+    # JSON encoder renders them to (see TEXT_ENCODE_RESULT_CMD)
+    if code == MSGPACK_EXT_DECIMAL:
+        return decode_msgpack_decimal(data)
+    if code == MSGPACK_EXT_UUID:
+        return str(uuid.UUID(bytes=data))
+    if code == MSGPACK_EXT_ERROR:
+        return decode_msgpack_error(data)
+    if code == MSGPACK_EXT_DATETIME:
+        return decode_msgpack_datetime(data)
+
+    raise CartridgeException(
+        CartridgeErrorCodes.BAD_VALUE_TYPE,
+        'Unsupported msgpack extension type %d in eval result' % code,
+    )
+
+
+def decode_msgpack_decimal(data):
+    # Scale (msgpack integer) followed by packed BCD digits, the last nibble is a sign
+    data = bytearray(data)
+    scale, pos = msgpack_unpack(data)
+
+    nibbles = []
+    for b in data[pos:]:
+        nibbles.extend((b >> 4, b & 0x0f))
+
+    sign = 1 if nibbles[-1] in DECIMAL_NEGATIVE_NIBBLES else 0
+    digits = tuple(nibbles[:-1]) or (0,)
+
+    # Decimal is rendered as a string by JSON encoder,
+    # both use the same scientific string conversion
+    return str(decimal.Decimal((sign, digits, -scale)))
+
+
+def decode_msgpack_error(data):
+    # JSON encoder renders an error as its message (the top of the errors stack)
+    error = msgpack_loads(data)
+    errors_stack = error.get(MSGPACK_ERROR_STACK) or [{}]
+    return errors_stack[0].get(MSGPACK_ERROR_MESSAGE)
+
+
+def decode_msgpack_datetime(data):
+    seconds = MSGPACK_DATETIME_SECONDS_STRUCT.unpack_from(data)[0]
+    nsec, tzoffset = 0, 0
+    if len(data) > MSGPACK_DATETIME_SECONDS_STRUCT.size:
+        nsec, tzoffset, _ = MSGPACK_DATETIME_EXTRA_STRUCT.unpack_from(data, MSGPACK_DATETIME_SECONDS_STRUCT.size)
+
+    value = UNIX_EPOCH + datetime.timedelta(seconds=seconds + tzoffset * 60)
+    res = '%04d-%02d-%02dT%02d:%02d:%02d' % (
+        value.year, value.month, value.day, value.hour, value.minute, value.second,
+    )
+
+    # Fraction is rendered with 3, 6 or 9 digits, as few as possible
+    if nsec != 0:
+        if nsec % 1000000 == 0:
+            res += '.%03d' % (nsec // 1000000)
+        elif nsec % 1000 == 0:
+            res += '.%06d' % (nsec // 1000)
+        else:
+            res += '.%09d' % nsec
+
+    # Timezone is rendered by its offset (names of timezones set by index aren't known here)
+    if tzoffset == 0:
+        return res + 'Z'
+
+    tzsign = '+' if tzoffset > 0 else '-'
+    return res + '%s%02d%02d' % (tzsign, abs(tzoffset) // 60, abs(tzoffset) % 60)
+
+
+def msgpack_loads(raw):
+    if msgpack is not None:
+        try:
+            return msgpack.unpackb(raw, raw=False, strict_map_key=False, ext_hook=msgpack_ext_hook)
+        except TypeError:
+            # msgpack < 1.0 doesn't support `strict_map_key` option
+            return msgpack.unpackb(raw, raw=False, ext_hook=msgpack_ext_hook)
+
+    data = bytearray(raw)
+    value, pos = msgpack_unpack(data)
+    if pos != len(data):
+        raise CartridgeException(
+            CartridgeErrorCodes.BAD_VALUE_TYPE,
+            'Extra %d bytes after msgpack value in eval result' % (len(data) - pos),
+        )
+    return value
+
+
+def normalize_map_keys(value):
+    # JSON encoder converts keys of maps to strings (e.g. keys of sparse arrays),
+    # msgpack keeps them as is, so keys are converted to get the same result
+    if isinstance(value, dict):
+        return dict(
+            (key if isinstance(key, string_types) else json_map_key(key), normalize_map_keys(item))
+            for key, item in value.items()
+        )
+    if isinstance(value, list):
+        return [normalize_map_keys(item) for item in value]
+    return value
+
+
+def json_map_key(key):
+    if isinstance(key, bool):
+        return 'true' if key else 'false'
+    if isinstance(key, float) and key.is_integer():
+        return str(int(key))
+    return str(key)
+
+
+def decode_framed_output(output):
+    parts = output.split(':', 2)
+    if len(parts) != 3 or not parts[1].isdigit() or len(parts[2]) != int(parts[1]):
+        raise CartridgeException(
+            CartridgeErrorCodes.BAD_VALUE_TYPE,
+            'Failed to parse eval result frame: %s' % output[:64],
+        )
+
+    payload_format, _, payload = parts
+    if payload_format == 'json':
+        return decode_hex_json(payload)
+
+    return normalize_map_keys(msgpack_loads(base64.b64decode(payload)))
+
+
+def get_eval_calls_code(calls, with_bodies):
+    encoded = []
+    for func, args in calls:
+        if isinstance(func, LuaFunction):
+            func = func.get_ref(with_bodies)
+        encoded.append([func, list(args or [])])
+
+    return EVAL_CALLS_RESULT_FMT.format(
+        calls_encoded=lua_quote(json.dumps(encoded)),
+        registry_name=FUNCTIONS_REGISTRY_NAME,
+        not_registered_err=FUNCTIONS_NOT_REGISTERED_ERR,
+    )
+
+
+def get_console_cmd(result_code, transport):
+    if transport == CONSOLE_TRANSPORT_MSGPACK:
+        encode_code = MSGPACK_ENCODE_RESULT_CMD
+    else:
+        encode_code = TEXT_ENCODE_RESULT_CMD
+
+    return ' '.join(result_code.split('\n') + encode_code.split('\n')).strip()
+
+
+def decode_console_output(raw_output, transport):
+    output = parse_console_output(raw_output)
+
+    if transport == CONSOLE_TRANSPORT_MSGPACK:
+        return decode_framed_output(output)
+
+    return decode_hex_json(output)
+
+
+def is_functions_not_registered_error(e):
+    return e.code == CartridgeErrorCodes.FUNCTION_ERROR and FUNCTIONS_NOT_REGISTERED_ERR in str(e)
+
+
+def check_eval_calls_data(data, calls):
+    if len(data) != len(calls):
+        raise CartridgeException(
+            CartridgeErrorCodes.BAD_VALUE_TYPE,
+            'Eval returned %d results for %d calls' % (len(data), len(calls)),
+        )
+
+
+def check_console_params(socket_path, transport):
+    if transport not in CONSOLE_TRANSPORTS:
+        raise CartridgeException(
+            CartridgeErrorCodes.UNKNOWN_CONSOLE_TRANSPORT,
+            'Unknown console transport: %s' % transport,
+        )
+
+    if not os.path.exists(socket_path):
+        errmsg = 'Instance socket not found: "{}". '.format(socket_path) + \
+                 'Make sure the instance was started correctly'
+        raise CartridgeException(CartridgeErrorCodes.SOCKET_NOT_FOUND, errmsg)
+
+
+def get_console_connect_exception(socket_path, socket_err):
+    if socket_err.errno == 111:
+        errmsg = 'Failed to connect to socket "{}": Instance is not started yet'.format(socket_path)
+        return CartridgeException(CartridgeErrorCodes.INSTANCE_IS_NOT_STARTED_YET, errmsg)
+    errmsg = 'Failed to connect to socket "{}": {}'.format(socket_path, socket_err)
+    return CartridgeException(CartridgeErrorCodes.FAILED_TO_CONNECT_TO_SOCKET, errmsg)
+
+
+def get_console_broken_pipe_exception():
+    errmsg = 'Error: broken pipe. ' + \
+             'Probably, the instance was not bootstrapped yet to perform this operation'
+    return CartridgeException(CartridgeErrorCodes.BROKEN_PIPE, errmsg)
+
+
 class Console:
-    def __init__(self, socket_path):
+    def __init__(self, socket_path, transport=None, read_size=None):
         self.sock = None
+        self.transport = transport or DEFAULT_CONSOLE_TRANSPORT
+        self.read_size = read_size or DEFAULT_CONSOLE_READ_SIZE
+        self.request_bytes = 0
+        self.response_bytes = 0
 
-        if not os.path.exists(socket_path):
-            errmsg = 'Instance socket not found: "{}". '.format(socket_path) + \
-                     'Make sure the instance was started correctly'
-            raise CartridgeException(CartridgeErrorCodes.SOCKET_NOT_FOUND, errmsg)
+        check_console_params(socket_path, self.transport)
+        self.connect(socket_path)
 
+    def connect(self, socket_path):
         self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
 
         try:
             self.sock.connect(socket_path)
         except socket.error as socket_err:
-            if socket_err.errno == 111:
-                errmsg = 'Failed to connect to socket "{}": Instance is not started yet'.format(socket_path)
-                raise CartridgeException(CartridgeErrorCodes.INSTANCE_IS_NOT_STARTED_YET, errmsg)
-            errmsg = 'Failed to connect to socket "{}": {}'.format(socket_path, socket_err)
-            raise CartridgeException(CartridgeErrorCodes.FAILED_TO_CONNECT_TO_SOCKET, errmsg)
+            raise get_console_connect_exception(socket_path, socket_err)
 
         self.sock.recv(1024)
 
@@ -327,80 +901,158 @@ class Console:
         if self.sock is not None:
             self.sock.close()
 
-    def eval(self, func_body, *args):
-        def sendall(msg):
-            return self.sock.sendall(msg.encode())
-
-        def recvall():
-            data = ''
-            while True:
-                chunk = self.sock.recv(1024).decode()
-                # It is correct because of cmd structure: it always returns a value
-                if chunk == '':
-                    errmsg = 'Error: broken pipe. ' + \
-                             'Probably, the instance was not bootstrapped yet to perform this operation'
-                    raise CartridgeException(CartridgeErrorCodes.BROKEN_PIPE, errmsg)
-                data = data + chunk
-                if data.endswith('\n...\n'):
-                    break
-            return data
-
-        if not args:
-            args = []
-        args_encoded = json.dumps(args)
-
-        func_body = func_body.replace("\n", "\\n").replace("'", "\\'")
-
-        cmd_fmt = """
-            local json = require('json')
-            local net_box = require('net.box')
-            local args = require('json').decode('{args_encoded}')
-            local result = {{ net_box.self:eval('{func_body}', args) }}
-            return string.hex(json.encode(result))
-        """.replace('\n', ' ').strip()
-
-        cmd = cmd_fmt.format(func_body=func_body, args_encoded=args_encoded)
-
-        sendall(cmd + '\n')
-
-        raw_output = recvall()
-
-        hex_output = re.sub(r"^---\n-\s+?", '', raw_output)
-        hex_output = re.sub(r"'?\n...\n$", '', hex_output)
-        hex_output = re.sub(r"\n\s*", '', hex_output)
-
-        if hex_output.startswith("error:"):
-            err = re.sub(r"error:\s+", '', hex_output)
-            raise CartridgeException(CartridgeErrorCodes.FUNCTION_ERROR, err)
-
-        output = bytearray.fromhex(hex_output).decode('utf-8')
-
-        data = json.loads(output)
+    def recvall(self):
+        # Data is accumulated in a bytearray (amortized O(1) append),
+        # only the tail is checked for the terminator,
+        # and the response is decoded once, so multi-byte UTF-8 characters
+        # split between chunks are decoded correctly.
+        data = bytearray()
+        while True:
+            chunk = self.sock.recv(self.read_size)
+            # It is correct because of cmd structure: it always returns a value
+            if not chunk:
+                raise get_console_broken_pipe_exception()
+            data += chunk
+            if data.endswith(CONSOLE_RESPONSE_TERMINATOR):
+                break
+        return data.decode('utf-8')
+
+    def request(self, cmd):
+        # Sends one-line command and returns raw console output
+        self.sock.sendall((cmd + '\n').encode())
+        return self.recvall()
+
+    def send_cmd(self, result_code):
+        cmd = get_console_cmd(result_code, self.transport)
+        raw_output = self.request(cmd)
+
+        if PERF_TRACE['enabled']:
+            # Sizes are measured in encoded bytes, not in characters
+            self.request_bytes += len(cmd.encode('utf-8')) + 1
+            self.response_bytes += len(raw_output.encode('utf-8'))
+
+        return decode_console_output(raw_output, self.transport)
+
+    def eval_calls(self, calls):
+        # `calls` is a list of (func, args) pairs,
+        # `func` is a function body or LuaFunction object
+        time_start = time.time()
+        request_bytes, response_bytes = self.request_bytes, self.response_bytes
+
+        try:
+            try:
+                data = self.send_cmd(get_eval_calls_code(calls, with_bodies=False))
+            except CartridgeException as e:
+                if not is_functions_not_registered_error(e):
+                    raise e
+                # Instance was restarted or functions weren't registered yet
+                data = self.send_cmd(get_eval_calls_code(calls, with_bodies=True))
+        finally:
+            add_perf_trace_eval(
+                calls,
+                time.time() - time_start,
+                self.request_bytes - request_bytes,
+                self.response_bytes - response_bytes,
+            )
+
+        check_eval_calls_data(data, calls)
         return data
 
+    def eval(self, func_body, *args):
+        return self.eval_calls([(func_body, args)])[0]
+
+    def eval_batch(self, calls):
+        # Performs several evals in one request to the instance.
+        # `calls` is a list of (func_body, args) pairs,
+        # returns a list of (res, err) pairs (see `eval_res_err`).
+        if not calls:
+            return []
+
+        return [res_err_from_eval_data(call_data) for call_data in self.eval_calls(calls)]
+
     def eval_res_err(self, func_body, *args):
         data = self.eval(func_body, *args)
+        return res_err_from_eval_data(data)
+
+    def __del__(self):
+        self.close()
 
-        assert len(data) <= 2
 
-        if len(data) == 0:
-            # return nil
-            data.append(None)
+class SocketReader:
+    # Reads terminated messages from socket,
+    # bytes received after the terminator are kept for the next message
+    def __init__(self, sock, read_size=None):
+        self.sock = sock
+        self.read_size = read_size or DEFAULT_CONSOLE_READ_SIZE
+        self.buf = bytearray()
+
+    def read_until(self, terminator):
+        # Returns message including terminator or None if connection was closed
+        start = 0
+        while True:
+            pos = self.buf.find(terminator, start)
+            if pos != -1:
+                end = pos + len(terminator)
+                data = bytes(self.buf[:end])
+                del self.buf[:end]
+                return data
+
+            start = max(0, len(self.buf) - len(terminator) + 1)
+            chunk = self.sock.recv(self.read_size)
+            if not chunk:
+                return None
+            self.buf += chunk
+
+
+def is_console_broker_enabled_by_env():
+    return os.environ.get(CONSOLE_BROKER_ENV, '').lower() in ['1', 'true', 'yes']
+
+
+def get_console_broker_sock(console_sock):
+    return os.path.join(os.path.dirname(console_sock), CONSOLE_BROKER_SOCK_NAME)
+
+
+class BrokerConsole(Console):
+    # Console that sends commands through console broker process
+    # that keeps warm connections to all instances on the machine.
+    # Request is a JSON line {"id", "console_sock", "cmd"},
+    # response is a JSON line {"id", "output"} or {"id", "error", "code"}.
+    # Request with null "cmd" only checks connection to the instance.
+    def __init__(self, socket_path, broker_sock, transport=None, read_size=None):
+        self.broker_sock = broker_sock
+        self.reader = None
+        self.request_id = 0
+        Console.__init__(self, socket_path, transport, read_size)
+
+    def connect(self, socket_path):
+        self.socket_path = socket_path
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(self.broker_sock)
+        self.reader = SocketReader(self.sock, self.read_size)
+        self.request(None)
 
-        if len(data) == 1:
-            # return res
-            data.append(None)
+    def request(self, cmd):
+        self.request_id += 1
+        request = {'id': self.request_id, 'console_sock': self.socket_path, 'cmd': cmd}
+        self.sock.sendall((json.dumps(request) + '\n').encode())
 
-        # return res, err
+        line = self.reader.read_until(b'\n')
+        if line is None:
+            errmsg = 'Error: broken pipe. Console broker closed the connection'
+            raise CartridgeException(CartridgeErrorCodes.BROKEN_PIPE, errmsg)
 
-        # err can be tarantool/errors instance
-        if isinstance(data[1], dict) and data[1].get('err') is not None:
-            data[1] = data[1].get('err')
+        response = json.loads(line.decode('utf-8'))
+        if response.get('id') != self.request_id:
+            errmsg = 'Console broker response id %s mismatches request id %s' % (
+                response.get('id'), self.request_id,
+            )
+            raise CartridgeException(CartridgeErrorCodes.CONSOLE_BROKER_ERROR, errmsg)
 
-        return data
+        if response.get('error') is not None:
+            code = response.get('code') or CartridgeErrorCodes.CONSOLE_BROKER_ERROR
+            raise CartridgeException(code, response['error'])
 
-    def __del__(self):
-        self.close()
+        return response.get('output')
 
 
 def debug(value, key=None):
@@ -451,6 +1103,8 @@ def warn(*messages):
 
 def execute_module(argument_spec, function):
     module = AnsibleModule(argument_spec=argument_spec)
+    # Trace is reset on each module run
+    enable_perf_trace(is_perf_trace_enabled_by_env())
     try:
         res = function(module.params)
     except Exception as e:
@@ -458,8 +1112,44 @@ def execute_module(argument_spec, function):
     res.exit(module)
 
 
-def get_control_console(socket_path):
-    return Console(socket_path)
+def get_control_console(socket_path, transport=None, read_size=None):
+    broker_sock = get_console_broker_sock(socket_path)
+    if is_console_broker_enabled_by_env() and os.path.exists(broker_sock):
+        try:
+            return BrokerConsole(socket_path, broker_sock, transport, read_size)
+        except socket.error:
+            # Broker isn't running (stale socket), connect directly
+            pass
+        except CartridgeException as e:
+            if e.code not in [CartridgeErrorCodes.CONSOLE_BROKER_ERROR, CartridgeErrorCodes.BROKEN_PIPE]:
+                raise
+
+    return Console(socket_path, transport, read_size)
+
+
+def get_gather_eval_args(args, socket_path):
+    # `args` is a list of arguments for all instances
+    # or a dict with arguments lists by instances socket paths
+    if isinstance(args, dict):
+        return args.get(socket_path) or []
+    return args or []
+
+
+def gather_evals(socket_paths, func_body, args=None, concurrency=None):
+    # Performs eval on each instance and returns a dict with results by socket paths,
+    # result is a (res, err) pair or CartridgeException if eval wasn't performed.
+    # Evals are performed one by one, on Python 3 use `async_console.gather_evals`
+    # that performs them concurrently.
+    results = {}
+    for socket_path in socket_paths:
+        try:
+            control_console = get_control_console(socket_path)
+            args_list = get_gather_eval_args(args, socket_path)
+            results[socket_path] = control_console.eval_res_err(func_body, *args_list)
+        except CartridgeException as e:
+            results[socket_path] = e
+
+    return results
 
 
 def get_control_console_if_started(console_sock, strict_mode=False):
@@ -521,6 +1211,12 @@ def get_instance_pid_file(run_dir, app_name, instance_name=None, stateboard=Fals
     return os.path.join(run_dir, '%s.pid' % instance_id)
 
 
+def get_instance_state_file(run_dir, app_name, instance_name=None, stateboard=False):
+    run_dir = run_dir if run_dir is not None else DEFAULT_RUN_DIR
+    instance_id = get_instance_id(app_name, instance_name, stateboard)
+    return os.path.join(run_dir, '%s.state' % instance_id)
+
+
 def get_instance_dir(data_dir, app_name, instance_name=None, stateboard=False):
     instance_id = get_instance_id(app_name, instance_name, stateboard)
     return os.path.join(data_dir, instance_id)
@@ -544,9 +1240,7 @@ def box_cfg_was_called(control_console):
 
 
 def get_box_cfg(control_console):
-    cfg, _ = control_console.eval_res_err('''
-        return type(box.cfg) ~= 'function' and box.cfg or box.NULL
-    ''')
+    cfg, _ = control_console.eval_res_err(GET_BOX_CFG_FUNC)
     return cfg
 
 
@@ -557,7 +1251,7 @@ def filter_none_values(d):
 
 
 def get_cluster_instances(control_console):
-    instances, _ = control_console.eval_res_err(GET_INSTANCES_FUNC_BODY)
+    instances, _ = control_console.eval_res_err(GET_INSTANCES_FUNC)
 
     if not instances:
         instances = dict()
@@ -566,7 +1260,7 @@ def get_cluster_instances(control_console):
 
 
 def get_cluster_instances_with_replicasets_info(control_console):
-    instances, _ = control_console.eval_res_err(GET_INSTANCES_WITH_REPLICASETS_INFO_FUNC_BODY)
+    instances, _ = control_console.eval_res_err(GET_INSTANCES_WITH_REPLICASETS_INFO_FUNC)
 
     if not instances:
         instances = dict()
@@ -575,7 +1269,7 @@ def get_cluster_instances_with_replicasets_info(control_console):
 
 
 def get_cluster_replicasets(control_console):
-    cluster_replicasets, _ = control_console.eval_res_err(GET_REPLICASETS_FUNC_BODY)
+    cluster_replicasets, _ = control_console.eval_res_err(GET_REPLICASETS_FUNC)
 
     if not cluster_replicasets:
         cluster_replicasets = dict()
@@ -583,21 +1277,51 @@ def get_cluster_replicasets(control_console):
     return cluster_replicasets
 
 
-def set_twophase_options(control_console, options):
-    control_console.eval_res_err(SET_TWOPHASE_OPTIONS_FUNC_BODY, options)
+def get_cluster_topology(control_console, with_leaders=True):
+    # Collects cluster instances, replicasets and active leaders in one request
+    calls = [
+        (GET_INSTANCES_FUNC, []),
+        (GET_REPLICASETS_FUNC, []),
+    ]
+    if with_leaders:
+        calls.append((GET_ACTIVE_LEADERS_FUNC, []))
 
+    results = control_console.eval_batch(calls)
 
-def set_twophase_options_from_params(control_console, params):
+    instances, _ = results[0]
+    replicasets, _ = results[1]
+
+    instances = instances or dict()
+    replicasets = replicasets or dict()
+
+    if with_leaders:
+        leaders, err = results[2]
+        if err is not None:
+            return None, None, err
+        set_replicasets_leaders(replicasets, leaders)
+
+    return instances, replicasets, None
+
+
+def get_twophase_options_from_params(params):
     twophase_options = {}
     for name in TWOPHASE_OPTION_NAMES:
         if params.get(name) is not None:
             twophase_options[name] = params[name]
 
-    set_twophase_options(control_console, twophase_options)
+    return twophase_options
+
+
+def set_twophase_options(control_console, options):
+    control_console.eval_res_err(SET_TWOPHASE_OPTIONS_FUNC, options)
+
+
+def set_twophase_options_from_params(control_console, params):
+    set_twophase_options(control_console, get_twophase_options_from_params(params))
 
 
 def read_yaml_file(control_console, file_path):
-    return control_console.eval_res_err(READ_YAML_FILE_FUNC_BODY, file_path)
+    return control_console.eval_res_err(READ_YAML_FILE_FUNC, file_path)
 
 
 def get_clusterwide_config(control_console, filter_system=True):
@@ -648,25 +1372,26 @@ def patch_clusterwide_config(control_console, new_sections):
 
 
 def get_active_leaders(control_console):
-    leaders, err = control_console.eval_res_err('''
-        return require('cartridge.failover').get_active_leaders()
-    ''')
+    leaders, err = control_console.eval_res_err(GET_ACTIVE_LEADERS_FUNC)
     if err is None and not leaders:
         leaders = {}
     return leaders, err
 
 
-def enrich_replicasets_with_leaders(control_console, replicasets):
-    leaders, err = get_active_leaders(control_console)
-    if err:
-        return err
-
+def set_replicasets_leaders(replicasets, leaders):
     if not leaders:
-        return None
+        return
 
     for replicaset_name, replicaset_params in replicasets.items():
         replicaset_params['leader_uuid'] = leaders.get(replicaset_params['uuid'])
 
+
+def enrich_replicasets_with_leaders(control_console, replicasets):
+    leaders, err = get_active_leaders(control_console)
+    if err:
+        return err
+
+    set_replicasets_leaders(replicasets, leaders)
     return None
 
 
@@ -733,16 +1458,49 @@ class Helpers:
     MEMORY_SIZE_BOX_CFG_PARAMS = MEMORY_SIZE_BOX_CFG_PARAMS
     FORMAT_SERVER_FUNC = FORMAT_SERVER_FUNC
     FORMAT_REPLICASET_FUNC = FORMAT_REPLICASET_FUNC
+    GET_ACTIVE_LEADERS_FUNC = GET_ACTIVE_LEADERS_FUNC
+    SET_TWOPHASE_OPTIONS_FUNC = SET_TWOPHASE_OPTIONS_FUNC
+    READ_YAML_FILE_FUNC = READ_YAML_FILE_FUNC
+    GET_BOX_CFG_FUNC = GET_BOX_CFG_FUNC
 
     ModuleRes = ModuleRes
     CartridgeErrorCodes = CartridgeErrorCodes
     CartridgeException = CartridgeException
     Console = Console
+    BrokerConsole = BrokerConsole
+    SocketReader = SocketReader
+    LuaFunction = LuaFunction
+    CONSOLE_BROKER_SOCK_NAME = CONSOLE_BROKER_SOCK_NAME
+    CONSOLE_BROKER_PID_FILE_NAME = CONSOLE_BROKER_PID_FILE_NAME
+    CONSOLE_BROKER_ENV = CONSOLE_BROKER_ENV
+    CONSOLE_TRANSPORT_TEXT = CONSOLE_TRANSPORT_TEXT
+    CONSOLE_TRANSPORT_MSGPACK = CONSOLE_TRANSPORT_MSGPACK
+    DEFAULT_CONSOLE_TRANSPORT = DEFAULT_CONSOLE_TRANSPORT
+    DEFAULT_CONSOLE_READ_SIZE = DEFAULT_CONSOLE_READ_SIZE
+    CONSOLE_RESPONSE_TERMINATOR = CONSOLE_RESPONSE_TERMINATOR
+    PERF_TRACE_ENV = PERF_TRACE_ENV
+    PERF_TRACE = PERF_TRACE
 
     debug = staticmethod(debug)
     warn = staticmethod(warn)
     execute_module = staticmethod(execute_module)
+    enable_perf_trace = staticmethod(enable_perf_trace)
+    add_perf_trace_eval = staticmethod(add_perf_trace_eval)
+    get_perf_report = staticmethod(get_perf_report)
     get_control_console = staticmethod(get_control_console)
+    check_console_params = staticmethod(check_console_params)
+    get_console_connect_exception = staticmethod(get_console_connect_exception)
+    get_console_broken_pipe_exception = staticmethod(get_console_broken_pipe_exception)
+    get_console_cmd = staticmethod(get_console_cmd)
+    get_eval_calls_code = staticmethod(get_eval_calls_code)
+    decode_console_output = staticmethod(decode_console_output)
+    is_functions_not_registered_error = staticmethod(is_functions_not_registered_error)
+    check_eval_calls_data = staticmethod(check_eval_calls_data)
+    res_err_from_eval_data = staticmethod(res_err_from_eval_data)
+    get_gather_eval_args = staticmethod(get_gather_eval_args)
+    gather_evals = staticmethod(gather_evals)
+    get_console_broker_sock = staticmethod(get_console_broker_sock)
+    is_console_broker_enabled_by_env = staticmethod(is_console_broker_enabled_by_env)
     get_control_console_if_started = staticmethod(get_control_console_if_started)
     is_instance_running = staticmethod(is_instance_running)
     is_expelled = staticmethod(is_expelled)
@@ -752,21 +1510,26 @@ class Helpers:
     get_instance_id = staticmethod(get_instance_id)
     get_instance_console_sock = staticmethod(get_instance_console_sock)
     get_instance_pid_file = staticmethod(get_instance_pid_file)
+    get_instance_state_file = staticmethod(get_instance_state_file)
     get_instance_dir = staticmethod(get_instance_dir)
     get_instance_file = staticmethod(get_instance_file)
     get_multiversion_instance_code_dir = staticmethod(get_multiversion_instance_code_dir)
     box_cfg_was_called = staticmethod(box_cfg_was_called)
     get_box_cfg = staticmethod(get_box_cfg)
     filter_none_values = staticmethod(filter_none_values)
+    msgpack_loads = staticmethod(msgpack_loads)
     get_cluster_instances = staticmethod(get_cluster_instances)
     get_cluster_instances_with_replicasets_info = staticmethod(get_cluster_instances_with_replicasets_info)
     get_cluster_replicasets = staticmethod(get_cluster_replicasets)
+    get_cluster_topology = staticmethod(get_cluster_topology)
+    get_twophase_options_from_params = staticmethod(get_twophase_options_from_params)
     set_twophase_options = staticmethod(set_twophase_options)
     set_twophase_options_from_params = staticmethod(set_twophase_options_from_params)
     read_yaml_file = staticmethod(read_yaml_file)
     get_clusterwide_config = staticmethod(get_clusterwide_config)
     patch_clusterwide_config = staticmethod(patch_clusterwide_config)
     get_active_leaders = staticmethod(get_active_leaders)
+    set_replicasets_leaders = staticmethod(set_replicasets_leaders)
     enrich_replicasets_with_leaders = staticmethod(enrich_replicasets_with_leaders)
     get_disabled_instances = staticmethod(get_disabled_instances)
     get_topology_checksum = staticmethod(get_topology_checksum)
@@ -0,0 +1,248 @@
+import errno
+import hashlib
+import json
+import os
+import stat
+
+from ansible.module_utils.helpers import Helpers as helpers
+
+# Instance state file is saved next to the PID file before the instance is started.
+# It contains hashes of the application code and the instance config,
+# so restart need can be checked without connecting to the instance console.
+# Code is hashed by files content only if the cheap stat hash of the code dir
+# (paths, modes, sizes, modification times and inodes) differs from the saved one.
+# Content hashes of code dirs are cached in the file in the run dir,
+# so the code shared by instances of the machine is read once.
+
+# Should be increased on changing state format or hashed data
+INSTANCE_STATE_VERSION = 3
+DIST_HASH_READ_SIZE = 1024 * 1024
+DIST_HASHES_FILE_NAME = '.cartridge-dist-hashes.json'
+
+
+def get_new_default_conf(params):
+    new_default_conf = params['cartridge_defaults']
+    if not params['cartridge_not_save_cookie_in_app_config']:
+        new_default_conf = dict(new_default_conf, cluster_cookie=params.get('cluster_cookie'))
+    return new_default_conf
+
+
+def update_file_hash(h, path):
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(DIST_HASH_READ_SIZE)
+            if not chunk:
+                break
+            h.update(chunk)
+
+
+def iter_dist_files(dist_dir):
+    # Yields relative paths, paths and stats of the code dir entries in stable order
+    for root, dir_names, file_names in os.walk(dist_dir):
+        dir_names.sort()
+
+        for name in sorted(dir_names + file_names):
+            path = os.path.join(root, name)
+            yield os.path.relpath(path, dist_dir), path, os.lstat(path)
+
+
+def get_dist_hash(dist_dir):
+    # Hash of relative paths, files content and modes and symlinks targets.
+    # Modification times aren't used, so identical code unpacked again
+    # (or unpacked to another dir in multiversion mode) has the same hash
+    dist_dir = os.path.realpath(dist_dir)
+    if not os.path.isdir(dist_dir):
+        return None
+
+    h = hashlib.sha256()
+    for rel_path, path, path_stat in iter_dist_files(dist_dir):
+        if stat.S_ISLNK(path_stat.st_mode):
+            h.update(('L\0%s\0%s\0' % (rel_path, os.readlink(path))).encode('utf-8'))
+        elif stat.S_ISDIR(path_stat.st_mode):
+            h.update(('D\0%s\0' % rel_path).encode('utf-8'))
+        elif stat.S_ISREG(path_stat.st_mode):
+            h.update(('F\0%s\0%o\0' % (rel_path, stat.S_IMODE(path_stat.st_mode))).encode('utf-8'))
+            update_file_hash(h, path)
+
+    return h.hexdigest()
+
+
+def get_dist_stat_hash(dist_dir):
+    # Hash of relative paths, modes, sizes, modification times and inodes,
+    # files aren't read. Status change times aren't used: they are changed
+    # by adding hardlinks to files (e.g. from distributions store)
+    dist_dir = os.path.realpath(dist_dir)
+    if not os.path.isdir(dist_dir):
+        return None
+
+    h = hashlib.sha256()
+    for rel_path, _, path_stat in iter_dist_files(dist_dir):
+        h.update(('%s\0%o\0%d\0%r\0%d\0' % (
+            rel_path, path_stat.st_mode, path_stat.st_size, path_stat.st_mtime, path_stat.st_ino,
+        )).encode('utf-8'))
+
+    return h.hexdigest()
+
+
+def get_dist_hashes_file(instance_info):
+    return os.path.join(os.path.dirname(instance_info['state_file']), DIST_HASHES_FILE_NAME)
+
+
+def read_dist_hashes(dist_hashes_file):
+    try:
+        with open(dist_hashes_file, 'r') as f:
+            dist_hashes = json.load(f)
+    except (IOError, OSError, ValueError):
+        return {}
+
+    if not isinstance(dist_hashes, dict) or dist_hashes.get('version') != INSTANCE_STATE_VERSION:
+        return {}
+
+    return dist_hashes.get('dists', {})
+
+
+def write_dist_hashes(dist_hashes_file, dist_hashes):
+    # Cache is written by concurrent module runs, the last one wins
+    tmp_dist_hashes_file = '%s.%d.tmp' % (dist_hashes_file, os.getpid())
+    try:
+        with open(tmp_dist_hashes_file, 'w') as f:
+            json.dump({'version': INSTANCE_STATE_VERSION, 'dists': dist_hashes}, f, sort_keys=True)
+        os.rename(tmp_dist_hashes_file, dist_hashes_file)
+    except (IOError, OSError):
+        pass
+
+
+def get_cached_dist_hash(dist_dir, dist_stat_hash, dist_hashes_file):
+    # Returns content hash of the code dir, code is read only
+    # if its stat hash isn't cached (code dir is new or was changed)
+    dist_dir = os.path.realpath(dist_dir)
+    if dist_stat_hash is None:
+        return None
+
+    dist_hashes = read_dist_hashes(dist_hashes_file)
+    cached = dist_hashes.get(dist_dir)
+    if cached is not None and cached.get('stat') == dist_stat_hash:
+        return cached['content']
+
+    dist_hash = get_dist_hash(dist_dir)
+
+    # Removed code dirs are dropped
+    dist_hashes = {path: hashes for path, hashes in dist_hashes.items() if os.path.isdir(path)}
+    dist_hashes[dist_dir] = {'stat': dist_stat_hash, 'content': dist_hash}
+    write_dist_hashes(dist_hashes_file, dist_hashes)
+
+    return dist_hash
+
+
+def get_config_hash(instance_conf, default_conf, stateboard):
+    # Dynamic params are ignored, they are compared with the current
+    # instance box.cfg (they can be changed in runtime)
+    def get_static_params(conf):
+        return {k: v for k, v in conf.items() if k not in helpers.DYNAMIC_BOX_CFG_PARAMS}
+
+    config = {'instance': get_static_params(instance_conf)}
+    if not stateboard:
+        config['default'] = get_static_params(default_conf)
+
+    return hashlib.sha256(json.dumps(config, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def get_dynamic_config_hash(instance_conf, default_conf, stateboard):
+    # Hash of dynamic params values the instance box.cfg should have.
+    # If it differs from the saved one, params could be changed in runtime,
+    # so they are compared with the instance box.cfg
+    dynamic_config = {}
+    for param_name in helpers.DYNAMIC_BOX_CFG_PARAMS:
+        new_value = None
+        if param_name in instance_conf:
+            new_value = instance_conf[param_name]
+        elif not stateboard and param_name in default_conf:
+            new_value = default_conf[param_name]
+
+        if new_value is not None:
+            dynamic_config[param_name] = new_value
+
+    return hashlib.sha256(json.dumps(dynamic_config, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def get_instance_state(params):
+    instance_info = params['instance_info']
+    new_instance_conf = params['config']
+    new_default_conf = get_new_default_conf(params)
+    stateboard = params['stateboard']
+
+    dist_stat_hash = get_dist_stat_hash(instance_info['instance_dist_dir'])
+    dist_hash = get_cached_dist_hash(
+        instance_info['instance_dist_dir'], dist_stat_hash, get_dist_hashes_file(instance_info),
+    )
+
+    return {
+        'version': INSTANCE_STATE_VERSION,
+        'dist_hash': dist_hash,
+        'dist_stat_hash': dist_stat_hash,
+        'config_hash': get_config_hash(new_instance_conf, new_default_conf, stateboard),
+        'dynamic_config_hash': get_dynamic_config_hash(new_instance_conf, new_default_conf, stateboard),
+    }
+
+
+def write_instance_state(state_file, state):
+    tmp_state_file = '%s.%d.tmp' % (state_file, os.getpid())
+    with open(tmp_state_file, 'w') as f:
+        json.dump(state, f, sort_keys=True)
+    os.rename(tmp_state_file, state_file)
+
+
+def update_instance_state(state_file, state):
+    # Modification time is kept, it's compared with the instance start time
+    state_stat = os.stat(state_file)
+    write_instance_state(state_file, state)
+    os.utime(state_file, (state_stat.st_atime, state_stat.st_mtime))
+
+
+def is_instance_process_alive(instance_info):
+    # Checks the process from the instance PID file without connecting to the console
+    pid_file = instance_info.get('pid_file')
+    if pid_file is None:
+        return False
+
+    try:
+        with open(pid_file, 'r') as f:
+            pid = int(f.read().strip())
+    except (IOError, OSError, ValueError):
+        return False
+
+    try:
+        os.kill(pid, 0)
+    except OSError as e:
+        # process exists, but is owned by another user
+        return e.errno == errno.EPERM
+
+    return True
+
+
+def read_instance_state(instance_info):
+    # Returns state only if it was saved before the instance was started:
+    # console socket is created on start after the state file is written.
+    # Otherwise the instance could be started with another code or config.
+    # State isn't trusted if the instance process isn't running
+    # (instance availability is checked via the console then)
+    state_file = instance_info.get('state_file')
+    if state_file is None or not os.path.exists(state_file):
+        return None
+
+    if os.stat(state_file).st_mtime > os.stat(instance_info['console_sock']).st_mtime:
+        return None
+
+    if not is_instance_process_alive(instance_info):
+        return None
+
+    try:
+        with open(state_file, 'r') as f:
+            state = json.load(f)
+    except (IOError, ValueError):
+        return None
+
+    if not isinstance(state, dict) or state.get('version') != INSTANCE_STATE_VERSION:
+        return None
+
+    return state
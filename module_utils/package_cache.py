@@ -0,0 +1,116 @@
+import errno
+import hashlib
+import os
+import shutil
+
+# Delivered packages are kept on the machine in `<cache_dir>/<sha256>/<package_name>`,
+# so the package with the same checksum isn't delivered again.
+# Least recently used packages are removed if cache size exceeds the limit.
+# Package use time is the modification time of the marker file next to the package
+# (package itself isn't touched, its modification time is used to detect package changes).
+
+HASH_READ_SIZE = 1024 * 1024
+LAST_USED_MARKER_NAME = '.last_used'
+
+
+def get_file_hash(path):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(HASH_READ_SIZE)
+            if not chunk:
+                break
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def get_cached_package_path(cache_dir, package_name, checksum):
+    return os.path.join(cache_dir, checksum, package_name)
+
+
+def get_last_used_marker_path(path):
+    return os.path.join(os.path.dirname(path), LAST_USED_MARKER_NAME)
+
+
+def mark_package_used(path):
+    with open(get_last_used_marker_path(path), 'a'):
+        pass
+    os.utime(get_last_used_marker_path(path), None)
+
+
+def get_package_last_used_time(path, path_stat):
+    marker_path = get_last_used_marker_path(path)
+    if os.path.exists(marker_path):
+        return os.path.getmtime(marker_path)
+    return path_stat.st_mtime
+
+
+def find_package(cache_dir, package_name, checksum, size):
+    # Package is found by checksum, size is checked before hashing it.
+    # Corrupted package is removed from the cache to be delivered again
+    path = get_cached_package_path(cache_dir, package_name, checksum)
+    if not os.path.isfile(path) or os.path.getsize(path) != size:
+        return None
+
+    if get_file_hash(path) != checksum:
+        shutil.rmtree(os.path.dirname(path))
+        return None
+
+    mark_package_used(path)
+    return path
+
+
+def put_package(cache_dir, package_path, package_name, checksum):
+    # Package is linked to the cache if it's possible, otherwise it's copied
+    if get_file_hash(package_path) != checksum:
+        raise Exception("Checksum of delivered package %s doesn't match the expected one" % package_path)
+
+    path = get_cached_package_path(cache_dir, package_name, checksum)
+    if not os.path.exists(os.path.dirname(path)):
+        os.makedirs(os.path.dirname(path))
+
+    tmp_path = '%s.%d.tmp' % (path, os.getpid())
+    try:
+        os.link(package_path, tmp_path)
+    except OSError as e:
+        if e.errno not in (errno.EXDEV, errno.EPERM):
+            raise
+        shutil.copyfile(package_path, tmp_path)
+
+    os.rename(tmp_path, path)
+    mark_package_used(path)
+
+    return path
+
+
+def get_cached_packages(cache_dir):
+    packages = []
+    for checksum in os.listdir(cache_dir):
+        entry_dir = os.path.join(cache_dir, checksum)
+        if not os.path.isdir(entry_dir):
+            continue
+
+        for name in os.listdir(entry_dir):
+            path = os.path.join(entry_dir, name)
+            if not name.endswith('.tmp') and name != LAST_USED_MARKER_NAME and os.path.isfile(path):
+                packages.append((path, os.stat(path)))
+
+    return packages
+
+
+def evict_packages(cache_dir, max_size, keep_path=None):
+    # Returns paths of removed packages
+    packages = get_cached_packages(cache_dir)
+    packages.sort(key=lambda package: get_package_last_used_time(*package), reverse=True)
+
+    removed_paths = []
+    total_size = 0
+    for path, path_stat in packages:
+        total_size += path_stat.st_size
+        if total_size <= max_size or path == keep_path:
+            continue
+
+        shutil.rmtree(os.path.dirname(path))
+        removed_paths.append(path)
+
+    return removed_paths
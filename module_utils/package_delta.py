@@ -0,0 +1,292 @@
+import hashlib
+import io
+import json
+import os
+import struct
+import zlib
+
+# Package delta is computed as rsync does:
+# * the machine sends signatures of blocks of the package it already has (basis);
+# * the controller finds these blocks in the new package using rolling checksum
+#   and writes delta that consists of basis blocks references and literal data;
+# * the machine rebuilds the new package from the basis and the delta.
+#
+# Weak checksum is Adler-32 (it's computed by zlib for the block and
+# is rolled byte by byte in Python), strong checksum is MD5.
+# Delta file format:
+#   DELTA_MAGIC, JSON header line, then operations:
+#   DELTA_COPY_OP, block index and blocks count (uint32)
+#   DELTA_DATA_OP, data length (uint32) and data
+
+DEFAULT_BLOCK_SIZE = 16 * 1024
+HASH_READ_SIZE = 1024 * 1024
+ADLER_MOD = 65521
+
+DELTA_MAGIC = b'CARTRIDGE-DELTA-1\n'
+DELTA_COPY_OP = b'C'
+DELTA_DATA_OP = b'D'
+DELTA_MAX_DATA_SIZE = 1024 * 1024
+
+# Delta isn't made if less than this fraction of the package is found in the basis
+# (e.g. compressed package was changed at the beginning), the package should be
+# copied instead. The fraction is checked each DELTA_CHECK_SIZE bytes, so unrelated
+# data isn't scanned to the end (the rolling checksum costs about 0.3s per MB)
+DELTA_MIN_MATCHED_FRACTION = 0.5
+DELTA_CHECK_SIZE = 1024 * 1024
+
+PACKAGE_EXTS = ['.rpm', '.deb', '.tar.gz']
+
+
+class DeltaIsNotEfficient(Exception):
+    pass
+
+
+def get_package_ext(package_path):
+    for ext in PACKAGE_EXTS:
+        if package_path.endswith(ext):
+            return ext
+    return None
+
+
+def get_delivered_packages(packages_dir, package_path):
+    # Returns paths of delivered packages of the same type, the latest first
+    if not os.path.isdir(packages_dir):
+        return []
+
+    package_ext = get_package_ext(package_path)
+    if package_ext is None:
+        return []
+
+    paths = [
+        os.path.join(packages_dir, name)
+        for name in os.listdir(packages_dir)
+        if name.endswith(package_ext)
+    ]
+    paths.sort(key=os.path.getmtime, reverse=True)
+
+    return paths
+
+
+def get_file_hash(path):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(HASH_READ_SIZE)
+            if not chunk:
+                break
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def get_weak_checksum(block):
+    return zlib.adler32(block) & 0xffffffff
+
+
+def get_strong_checksum(block):
+    return hashlib.md5(block).hexdigest()
+
+
+def get_signatures(basis_path, block_size=DEFAULT_BLOCK_SIZE):
+    # Returns signatures of full blocks of basis
+    signatures = []
+    with open(basis_path, 'rb') as f:
+        while True:
+            block = f.read(block_size)
+            if len(block) < block_size:
+                break
+            signatures.append([get_weak_checksum(block), get_strong_checksum(block)])
+
+    return {
+        'basis_hash': get_file_hash(basis_path),
+        'block_size': block_size,
+        'signatures': signatures,
+    }
+
+
+def read_file_data(path):
+    size = os.path.getsize(path)
+    data = bytearray(size)
+    with io.open(path, 'rb') as f:
+        if f.readinto(data) != size:
+            raise Exception("Failed to read %s: file was changed during reading" % path)
+    return data
+
+
+def check_matched_fraction(scanned_size, literal_size):
+    if scanned_size - literal_size < DELTA_MIN_MATCHED_FRACTION * scanned_size:
+        raise DeltaIsNotEfficient(
+            "Only %d of %d bytes are found in the basis" % (scanned_size - literal_size, scanned_size)
+        )
+
+
+def get_delta_ops(data, signatures, block_size):
+    # Yields ('copy', block_index, blocks_count) and ('data', start, end).
+    # Raises DeltaIsNotEfficient if the matched fraction of data is too low
+    blocks_by_weak = {}
+    for block_index, (weak, strong) in enumerate(signatures):
+        blocks_by_weak.setdefault(weak, {}).setdefault(strong, block_index)
+
+    data_len = len(data)
+    if not blocks_by_weak:
+        if data_len > 0:
+            check_matched_fraction(data_len, data_len)
+        return
+
+    view = memoryview(data)
+    pos = 0
+    data_start = 0
+    copy_op = None
+    weak = None
+    a = b = 0
+    literal_size = 0
+    next_check_pos = DELTA_CHECK_SIZE
+
+    while pos + block_size <= data_len:
+        if pos >= next_check_pos:
+            check_matched_fraction(pos, literal_size + pos - data_start)
+            next_check_pos = pos + DELTA_CHECK_SIZE
+
+        if weak is None:
+            weak = get_weak_checksum(view[pos:pos + block_size])
+            a, b = weak & 0xffff, weak >> 16
+
+        blocks_by_strong = blocks_by_weak.get(weak)
+        if blocks_by_strong is not None:
+            block_index = blocks_by_strong.get(get_strong_checksum(view[pos:pos + block_size]))
+            if block_index is not None:
+                if data_start < pos:
+                    if copy_op is not None:
+                        yield copy_op
+                        copy_op = None
+                    literal_size += pos - data_start
+                    yield ('data', data_start, pos)
+
+                if copy_op is not None and copy_op[1] + copy_op[2] == block_index:
+                    copy_op = ('copy', copy_op[1], copy_op[2] + 1)
+                else:
+                    if copy_op is not None:
+                        yield copy_op
+                    copy_op = ('copy', block_index, 1)
+
+                pos += block_size
+                data_start = pos
+                weak = None
+                continue
+
+        if pos + block_size >= data_len:
+            break
+
+        # Roll the checksum by one byte
+        out_byte = data[pos]
+        a = (a - out_byte + data[pos + block_size]) % ADLER_MOD
+        b = (b - block_size * out_byte + a - 1) % ADLER_MOD
+        weak = (b << 16) | a
+        pos += 1
+
+    check_matched_fraction(data_len, literal_size + data_len - data_start)
+
+    if copy_op is not None:
+        yield copy_op
+    if data_start < data_len:
+        yield ('data', data_start, data_len)
+
+
+def write_delta(package_path, signatures, delta_path):
+    # Returns delta header or None if delta isn't efficient
+    data = read_file_data(package_path)
+    block_size = signatures['block_size']
+
+    header = {
+        'basis_hash': signatures['basis_hash'],
+        'block_size': block_size,
+        'package_hash': hashlib.sha256(data).hexdigest(),
+        'package_size': len(data),
+    }
+
+    tmp_delta_path = '%s.%d.tmp' % (delta_path, os.getpid())
+    try:
+        with open(tmp_delta_path, 'wb') as f:
+            f.write(DELTA_MAGIC)
+            f.write(json.dumps(header, sort_keys=True).encode('utf-8') + b'\n')
+
+            for op in get_delta_ops(data, signatures['signatures'], block_size):
+                if op[0] == 'copy':
+                    f.write(DELTA_COPY_OP + struct.pack('>II', op[1], op[2]))
+                    continue
+
+                for start in range(op[1], op[2], DELTA_MAX_DATA_SIZE):
+                    chunk = data[start:min(start + DELTA_MAX_DATA_SIZE, op[2])]
+                    f.write(DELTA_DATA_OP + struct.pack('>I', len(chunk)) + bytes(chunk))
+    except DeltaIsNotEfficient:
+        os.remove(tmp_delta_path)
+        return None
+    except Exception:
+        os.remove(tmp_delta_path)
+        raise
+
+    os.rename(tmp_delta_path, delta_path)
+
+    return header
+
+
+def read_exactly(f, size):
+    data = f.read(size)
+    if len(data) != size:
+        raise Exception("Failed to read package delta: unexpected end of file")
+    return data
+
+
+def apply_delta(basis_path, delta_path, package_path):
+    # New package is written to a temporary file and is checked by hash
+    tmp_package_path = '%s.%d.tmp' % (package_path, os.getpid())
+    h = hashlib.sha256()
+
+    try:
+        with open(delta_path, 'rb') as delta, open(basis_path, 'rb') as basis, \
+                open(tmp_package_path, 'wb') as package:
+            if delta.read(len(DELTA_MAGIC)) != DELTA_MAGIC:
+                raise Exception("Failed to read package delta: bad magic")
+
+            header = json.loads(delta.readline().decode('utf-8'))
+            block_size = header['block_size']
+
+            while True:
+                op = delta.read(1)
+                if not op:
+                    break
+
+                if op == DELTA_COPY_OP:
+                    block_index, blocks_count = struct.unpack('>II', read_exactly(delta, 8))
+                    basis.seek(block_index * block_size)
+                    size_left = blocks_count * block_size
+
+                    while size_left > 0:
+                        chunk = basis.read(min(size_left, HASH_READ_SIZE))
+                        if not chunk:
+                            raise Exception("Failed to apply package delta: basis is too short")
+                        size_left -= len(chunk)
+                        h.update(chunk)
+                        package.write(chunk)
+
+                elif op == DELTA_DATA_OP:
+                    size, = struct.unpack('>I', read_exactly(delta, 4))
+                    chunk = read_exactly(delta, size)
+                    h.update(chunk)
+                    package.write(chunk)
+
+                else:
+                    raise Exception("Failed to read package delta: unknown operation %r" % op)
+
+        if h.hexdigest() != header['package_hash']:
+            raise Exception(
+                "Failed to apply package delta: hash of the result doesn't match "
+                "(probably, basis package %s was changed)" % basis_path
+            )
+    except Exception:
+        if os.path.exists(tmp_package_path):
+            os.remove(tmp_package_path)
+        raise
+
+    os.rename(tmp_package_path, package_path)
+
+    return header
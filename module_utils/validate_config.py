@@ -0,0 +1,840 @@
+import os
+import re
+
+from ansible.module_utils.helpers import Helpers as helpers
+
+INSTANCE_REQUIRED_PARAMS = ['cartridge_app_name', 'config']
+PARAMS_THE_SAME_FOR_ALL_HOSTS = [
+    'cartridge_app_name',
+    'cartridge_cluster_cookie',
+    'cartridge_not_save_cookie_in_app_config',
+    'cartridge_auth',
+    'cartridge_bootstrap_vshard',
+    'bootstrap_vshard_retries',
+    'bootstrap_vshard_delay',
+    'connect_to_membership_retries',
+    'connect_to_membership_delay',
+    'cartridge_failover',
+    'cartridge_failover_params',
+    'cartridge_app_config',
+    'cartridge_scenario',
+    'cartridge_custom_steps_dir',
+    'cartridge_custom_steps',
+    'cartridge_failover_promote_params',
+    'twophase_netbox_call_timeout',
+    'twophase_upload_config_timeout',
+    'twophase_apply_config_timeout',
+    'edit_topology_timeout',
+    'edit_topology_healthy_timeout',
+    'edit_topology_allow_missed_instances',
+    'cartridge_app_config_path',
+    'cartridge_app_config_upload_http_timeout',
+    'cartridge_app_config_upload_mode',
+    'cartridge_app_config_upload_url',
+    'cartridge_create_user_group_for_tgz',
+    'cartridge_force_advertise_uris_change',
+    'cartridge_force_leader_control_instance',
+    'cartridge_ignore_extra_cluster_instances',
+    'cartridge_ignore_extra_cluster_replicasets',
+    'cartridge_ignore_renamed_replicasets',
+    'cartridge_tdg_token',
+]
+
+CONFIG_REQUIRED_PARAMS = ['advertise_uri']
+CONFIG_FORBIDDEN_PARAMS = ['alias', 'console_sock', 'pid_file', 'workdir', 'cluster_cookie']
+
+REPLICASET_PARAMS = [
+    'replicaset_alias',
+    'failover_priority',
+    'roles',
+    'all_rw',
+    'weight',
+    'vshard_group',
+]
+REPLICASET_REQUIRED_PARAMS = ['roles']
+
+CLUSTER_COOKIE_MAX_LEN = 256
+CLUSTER_COOKIE_FORBIDDEN_SYMBOLS_RGX = r'[^a-zA-Z0-9_.~-]+'
+
+FALOVER_MODES = [
+    'stateful',
+    'eventual',
+    'disabled',
+]
+
+BACKUP_MODES = [
+    'archive',
+    'hardlinks',
+]
+
+BACKUP_COMPRESSIONS = [
+    'none',
+    'gzip',
+    'parallel_gzip',
+]
+
+STATEFUL_FAILOVER_PARAMS = [
+    'state_provider',
+    'stateboard_params',
+    'etcd2_params',
+]
+
+STATEFUL_FAILOVER_REQUIRED_PARAMS = [
+    'state_provider',
+]
+
+STATEFUL_FAILOVER_STATE_PROVIDERS = [
+    'stateboard',
+    'etcd2',
+]
+
+STATEBOARD_PROVIDER_REQUIRED_PARAMS = [
+    'uri',
+    'password',
+]
+
+ETCD2_PROVIDER_REQUIRED_PARAMS = [
+    'prefix',
+]
+
+STATEBOARD_CONFIG_REQUIRED_PARAMS = [
+    'listen',
+    'password',
+]
+
+ALLOWED_FAILOVER_PROMOTE_PARAMS = [
+    'replicaset_leaders',
+    'force_inconsistency',
+]
+
+SCHEMA = {
+    'cartridge_package_path': str,
+    'cartridge_delta_delivery_dir': str,
+    'cartridge_package_cache_dir': str,
+    'cartridge_package_cache_max_size': int,
+    'cartridge_app_name': str,
+    'cartridge_cluster_cookie': str,
+    'cartridge_not_save_cookie_in_app_config': bool,
+    'cartridge_runtime_params': dict,
+    'cartridge_defaults': dict,
+    'cartridge_bootstrap_vshard': bool,
+    'bootstrap_vshard_retries': int,
+    'bootstrap_vshard_delay': int,
+    'connect_to_membership_retries': int,
+    'connect_to_membership_delay': int,
+    'cartridge_wait_buckets_discovery': bool,
+    'cartridge_failover': bool,
+    'cartridge_app_config': dict,
+    'cartridge_scenario': list,
+    'cartridge_custom_steps_dir': str,
+    'cartridge_custom_steps': list,
+    'cartridge_scenario_name': str,
+    'cartridge_custom_scenarios': dict,
+    'restarted': bool,
+    'expelled': bool,
+    'disabled': bool,
+    'stateboard': bool,
+    'cartridge_multiversion': bool,
+    'instance_start_timeout': int,
+    'instance_start_retries': int,
+    'instance_start_delay': int,
+    'instance_discover_buckets_timeout': int,
+    'instance_discover_buckets_retries': int,
+    'instance_discover_buckets_delay': int,
+    'twophase_netbox_call_timeout': int,
+    'twophase_upload_config_timeout': int,
+    'twophase_apply_config_timeout': int,
+    'edit_topology_timeout': int,
+    'edit_topology_healthy_timeout': int,
+    'edit_topology_allow_missed_instances': bool,
+    'replicaset_alias': str,
+    'failover_priority': [str],
+    'roles': [str],
+    'all_rw': bool,
+    'weight': int,
+    'vshard_group': str,
+    'cartridge_enable_tarantool_repo': bool,
+    'cartridge_conf_dir': str,
+    'cartridge_run_dir': str,
+    'cartridge_data_dir': str,
+    'cartridge_app_user': str,
+    'cartridge_app_group': str,
+    'cartridge_app_install_dir': str,
+    'cartridge_app_instances_dir': str,
+    'cartridge_delivered_package_path': str,
+    'cartridge_control_instance': dict,
+    'cartridge_memtx_dir_parent': str,
+    'cartridge_vinyl_dir_parent': str,
+    'cartridge_wal_dir_parent': str,
+    'cartridge_log_dir_parent': str,
+    'cartridge_configure_systemd_unit_files': bool,
+    'cartridge_systemd_dir': str,
+    'cartridge_configure_tmpfiles': bool,
+    'cartridge_tmpfiles_dir': str,
+    'cartridge_install_tarantool_for_tgz': bool,
+    'cartridge_keep_num_latest_dists': int,
+    'cartridge_dists_store_dir': str,
+    'cartridge_package_info_cache_dir': str,
+    'cartridge_remove_temporary_files': bool,
+    'cartridge_console_broker': bool,
+    'cartridge_console_broker_idle_timeout': int,
+    'cartridge_validate_config_all_errors': bool,
+    'cartridge_needs_restart_by_hashes': bool,
+    'cartridge_check_instances_by_machine': bool,
+    'cartridge_prepare_cache_dir': str,
+    'cartridge_prepare_cache_ttl': int,
+    'cartridge_prepare_cache_max_entries': int,
+    'cartridge_ignore_split_brain': bool,
+    'cartridge_paths_to_keep_on_cleanup': list,
+    'cartridge_paths_to_keep_before_restore': list,
+    'zone': str,
+    'cartridge_extra_env': dict,
+    'cartridge_eval_body': str,
+    'cartridge_eval_file': str,
+    'cartridge_eval_args': list,
+    'cartridge_eval_with_retries': bool,
+    'cartridge_eval_retries': int,
+    'cartridge_eval_delay': int,
+    'cartridge_remote_backups_dir': str,
+    'cartridge_fetch_backups': bool,
+    'cartridge_fetch_backups_dir': str,
+    'cartridge_incremental_backups': bool,
+    'cartridge_backup_compression': str,
+    'cartridge_backup_compression_level': int,
+    'cartridge_backup_mode': str,
+    'cartridge_restore_backup_path': str,
+    'cartridge_restore_backup_path_local': str,
+    'cartridge_force_restore': bool,
+    'cartridge_allow_alien_backup': bool,
+    'cartridge_skip_cleanup_on_restore': bool,
+    'config': {
+        'advertise_uri': str,
+        'memtx_memory': int,
+    },
+    'cartridge_auth': {
+        'enabled': bool,
+        'cookie_max_age': int,
+        'cookie_renew_age': int,
+        'users': [
+            {
+                'username': str,
+                'password': str,
+                'fullname': str,
+                'email': str,
+                'deleted': bool,
+            }
+        ]
+    },
+    'cartridge_failover_params': {
+        'enabled': bool,
+        'mode': str,
+        'state_provider': str,
+        'stateboard_params': {
+            'uri': str,
+            'password': str
+        },
+        'etcd2_params': {
+            'prefix': str,
+            'lock_delay': int,
+            'endpoints': [str],
+            'username': str,
+            'password': str,
+        },
+        'failover_timeout': int,
+        'fencing_enabled': bool,
+        'fencing_timeout': int,
+        'fencing_pause': int,
+    },
+    'cartridge_failover_promote_params': {
+        'replicaset_leaders': dict,
+        'force_inconsistency': bool,
+    },
+    'allowed_members_states': [str],
+    'wait_members_alive_retries': int,
+    'wait_members_alive_delay': int,
+    'allow_warning_issues': bool,
+    'show_issues': bool,
+    'wait_cluster_has_no_issues_retries': int,
+    'wait_cluster_has_no_issues_delay': int,
+    'cartridge_app_config_path': str,
+    'cartridge_app_config_upload_http_timeout': int,
+    'cartridge_app_config_upload_mode': str,
+    'cartridge_app_config_upload_url': str,
+    'cartridge_create_user_group_for_tgz': bool,
+    'cartridge_force_advertise_uris_change': bool,
+    'cartridge_force_leader_control_instance': bool,
+    'cartridge_ignore_extra_cluster_instances': bool,
+    'cartridge_ignore_extra_cluster_replicasets': bool,
+    'cartridge_ignore_renamed_replicasets': bool,
+    'cartridge_tdg_token': str,
+}
+
+
+def is_valid_advertise_uri(uri):
+    rgx = re.compile(r'^\S+:\d+$')
+    return re.match(rgx, uri) is not None
+
+
+def get_type_errmsg(path, expected_type):
+    return '{} must be {}'.format(path, expected_type)
+
+
+def is_same_value(value, other):
+    # Equality that takes types into account: `1 == True` and `1 == 1.0`,
+    # but such values are valid for different schema types
+    if type(value) is not type(other):
+        return False
+    if isinstance(value, dict):
+        return value.keys() == other.keys() and all(is_same_value(v, other[k]) for k, v in value.items())
+    if isinstance(value, list):
+        return len(value) == len(other) and all(is_same_value(v, o) for v, o in zip(value, other))
+    return value == other
+
+
+def compile_schema(schema, all_errors=False):
+    # Turns schema into the validator function, that appends errors to the list.
+    # Paths are formatted only for invalid values.
+    # Validator stops on the first error if `all_errors` isn't set.
+    # Dict validator skips nested values the same as the ones from `checked_values`
+    if isinstance(schema, dict):
+        type_fields = []
+        nested_fields = []
+        for k, field_schema in schema.items():
+            if isinstance(field_schema, type):
+                type_fields.append((k, field_schema))
+            else:
+                nested_fields.append((k, compile_schema(field_schema, all_errors)))
+
+        def validate_dict(conf, path, errors, checked_values=None):
+            if not isinstance(conf, dict):
+                errors.append(get_type_errmsg(path, dict))
+                return
+
+            for k, field_type in type_fields:
+                value = conf.get(k)
+                if value is not None and not isinstance(value, field_type):
+                    errors.append(get_type_errmsg('{}.{}'.format(path, k), field_type))
+                    if not all_errors:
+                        return
+
+            for k, validate_field in nested_fields:
+                value = conf.get(k)
+                if value is None:
+                    continue
+                if checked_values is not None and is_same_value(value, checked_values.get(k)):
+                    continue
+
+                errors_count = len(errors)
+                validate_field(value, '{}.{}'.format(path, k), errors)
+                if len(errors) > errors_count and not all_errors:
+                    return
+
+        return validate_dict
+
+    if isinstance(schema, list):
+        validate_item = compile_schema(schema[0], all_errors)
+
+        def validate_list(conf, path, errors):
+            if not isinstance(conf, list):
+                errors.append(get_type_errmsg(path, list))
+                return
+
+            for i, item in enumerate(conf):
+                if item is not None:
+                    errors_count = len(errors)
+                    validate_item(item, '{}[{}]'.format(path, i), errors)
+                    if len(errors) > errors_count and not all_errors:
+                        return
+
+        return validate_list
+
+    if isinstance(schema, type):
+        def validate_type(conf, path, errors):
+            if not isinstance(conf, schema):
+                errors.append(get_type_errmsg(path, schema))
+
+        return validate_type
+
+    def validate_wrong_schema(conf, path, errors):
+        errors.append('Wrong type')
+
+    return validate_wrong_schema
+
+
+# Compiled SCHEMA validators by `all_errors` flag
+SCHEMA_VALIDATORS = {}
+
+
+def get_schema_validator(all_errors=False):
+    if all_errors not in SCHEMA_VALIDATORS:
+        SCHEMA_VALIDATORS[all_errors] = compile_schema(SCHEMA, all_errors)
+    return SCHEMA_VALIDATORS[all_errors]
+
+
+def check_schema(schema, conf, path=''):
+    if conf is None:
+        return None
+
+    errors = []
+    compile_schema(schema)(conf, path, errors)
+    return errors[0] if errors else None
+
+
+def validate_types(all_vars, all_errors=False, checked_values=None):
+    # Returns the list of errors
+    errors = []
+    if all_vars is not None:
+        get_schema_validator(all_errors)(all_vars, '', errors, checked_values)
+    return errors
+
+
+def check_cluster_cookie_symbols(cluster_cookie):
+    if cluster_cookie is None:
+        return None
+
+    if len(cluster_cookie) > CLUSTER_COOKIE_MAX_LEN:
+        errmsg = "Cluster cookie cannot be longer than {}".format(CLUSTER_COOKIE_MAX_LEN)
+        return errmsg
+
+    m = re.search(CLUSTER_COOKIE_FORBIDDEN_SYMBOLS_RGX, cluster_cookie)
+    if m is not None:
+        errmsg = "Cluster cookie cannot contain symbols other than [a-zA-Z0-9_.~-] " + \
+                 "('{}' found)".format(m.group())
+        return errmsg
+
+    return None
+
+
+def check_required_params(instance_vars, host):
+    for p in INSTANCE_REQUIRED_PARAMS:
+        if instance_vars.get(p) is None:
+            errmsg = "'{}' must be specified (missed for '{}')".format(p, host)
+            return errmsg
+
+    return None
+
+
+def check_instance_config(config, host):
+    # Check if all required params are specified
+    for p in CONFIG_REQUIRED_PARAMS:
+        if config.get(p) is None:
+            errmsg = "Missed required parameter '{}' in '{}' config".format(p, host)
+            return errmsg
+
+    # Check if no forbidden params specified
+    for p in CONFIG_FORBIDDEN_PARAMS:
+        if config.get(p) is not None:
+            errmsg = "Specified forbidden parameter '{}' in '{}' config".format(p, host)
+            return errmsg
+
+    if 'advertise_uri' in config:
+        if not is_valid_advertise_uri(config['advertise_uri']):
+            errmsg = "Instance advertise_uri must be specified as '<host>:<port>' ('{}')".format(host)
+            return errmsg
+
+    return None
+
+
+def check_params_the_same_for_all_hosts(instance_vars, found_common_params):
+    for p in PARAMS_THE_SAME_FOR_ALL_HOSTS:
+        if found_common_params.get(p) is not None:
+            if instance_vars.get(p) != found_common_params.get(p):
+                errmsg = "'{}' must be the same for all hosts".format(p)
+                return errmsg
+        elif instance_vars.get(p) is not None:
+            found_common_params[p] = instance_vars.get(p)
+
+    return None
+
+
+def check_replicaset(instance_vars, found_replicasets):
+    if 'replicaset_alias' not in instance_vars:
+        return None
+
+    replicaset_alias = instance_vars['replicaset_alias']
+
+    replicaset = {p: instance_vars.get(p) for p in REPLICASET_PARAMS}
+
+    if replicaset_alias not in found_replicasets:
+        for p in REPLICASET_REQUIRED_PARAMS:
+            if p not in instance_vars:
+                errmsg = "Parameter '{}' is required for all replicasets (missed for '{}')".format(
+                    p, replicaset_alias
+                )
+                return errmsg
+        # Save replicaset info
+        found_replicasets[replicaset_alias] = replicaset
+    else:
+        if replicaset != found_replicasets[replicaset_alias]:
+            errmsg = "Replicaset parameters must be the same for all instances" + \
+                     " within one replicaset ('{}')".format(replicaset_alias)
+            return errmsg
+
+    return None
+
+
+def check_app_config(found_common_params):
+    app_config = found_common_params.get('cartridge_app_config')
+    if app_config is None:
+        return None
+
+    for section_name, section in app_config.items():
+        if not isinstance(section, dict):
+            errmsg = "'cartridge_app_config.{}' must be dict, found {}".format(
+                section_name, type(section)
+            )
+            return errmsg
+
+        if not section:
+            errmsg = "'cartridge_app_config.{}' must have 'body' or 'deleted' subsection".format(section_name)
+            return errmsg
+
+        allowed_keys = ['body', 'deleted']
+        for key in section:
+            if key not in allowed_keys:
+                errmsg = "'cartridge_app_config.{}' can contain only 'body' or 'deleted' subsections".format(
+                    section_name
+                )
+                return errmsg
+
+        if 'deleted' in section:
+            if not isinstance(section['deleted'], bool):
+                errmsg = "'cartridge_app_config.{}.deleted' must be bool, found {}".format(
+                    section_name, type(section['deleted'])
+                )
+                return errmsg
+
+            if section['deleted'] is False:
+                if 'body' not in section:
+                    errmsg = "'cartridge_app_config.{}.body' is required".format(section_name)
+                    return errmsg
+
+    return None
+
+
+def check_auth(found_common_params):
+    cartridge_auth = found_common_params.get('cartridge_auth')
+    if cartridge_auth is None:
+        return None
+
+    if cartridge_auth is not None:
+        if 'users' in cartridge_auth:
+            for user in cartridge_auth['users']:
+                if 'username' not in user:
+                    errmsg = "Field 'username' is required for 'cartridge_auth.users'"
+                    return errmsg
+
+    return None
+
+
+def check_stateboard(stateboard_vars):
+    for flag_name in ['expelled', 'disabled']:
+        if stateboard_vars.get(flag_name) is True:
+            return "'%s' flag can't be used for stateboard instance" % flag_name
+
+    for p in REPLICASET_PARAMS:
+        if stateboard_vars.get(p) is not None:
+            return "'{}' flag can't be used for stateboard instance".format(p)
+
+    if stateboard_vars.get('config') is None:
+        return "'config' parameter is required for stateboard instance"
+
+    if stateboard_vars.get('cartridge_app_name') is None:
+        return "'cartridge_app_name' parameter is required for stateboard instance"
+
+    # Check if all required params are specified
+    stateboard_config = stateboard_vars['config']
+    for p in STATEBOARD_CONFIG_REQUIRED_PARAMS:
+        if stateboard_config.get(p) is None:
+            return "Missed required parameter '{}' in stateboard config".format(p)
+
+    # Check if no forbidden params specified
+    for p in CONFIG_FORBIDDEN_PARAMS:
+        if stateboard_config.get(p) is not None:
+            return "Specified forbidden parameter '{}' in stateboard config".format(p)
+
+    # Check stateboard URI
+    stateboard_uri = stateboard_config['listen']
+    if not is_valid_advertise_uri(stateboard_uri):
+        return "Stateboard listen URI must be specified as '<host>:<port>'"
+
+    # Check stateboard password
+    stateboard_password = stateboard_config['password']
+    m = re.search(CLUSTER_COOKIE_FORBIDDEN_SYMBOLS_RGX, stateboard_password)
+    if m is not None:
+        errmsg = "Stateboard password cannot contain symbols other than [a-zA-Z0-9_.~-] " + \
+                 "('{}' found)".format(m.group())
+        return errmsg
+
+    return None
+
+
+def check_failover(found_common_params):
+    cartridge_failover = found_common_params.get('cartridge_failover')
+    cartridge_failover_params = found_common_params.get('cartridge_failover_params')
+
+    if cartridge_failover is not None and cartridge_failover_params is not None:
+        return "Only one of 'cartridge_failover' and 'cartridge_failover_params' can be specified"
+
+    if cartridge_failover_params is not None:
+        if cartridge_failover_params.get('mode') is None:
+            return "'mode' is required in 'cartridge_failover_params'"
+
+        mode = cartridge_failover_params['mode']
+        if mode not in FALOVER_MODES:
+            return "Failover Failover mode should be one of {}".format(FALOVER_MODES)
+
+        if mode == 'disabled':  # don't check other parameters
+            return None
+
+        if mode == 'eventual':
+            for p in STATEFUL_FAILOVER_PARAMS:
+                if p in cartridge_failover_params:
+                    return "'{}' failover parameter is allowed only for 'stateful' mode".format(p)
+
+        if mode == 'stateful':
+            for p in STATEFUL_FAILOVER_REQUIRED_PARAMS:
+                if p not in cartridge_failover_params:
+                    return "'{}' failover parameter is required for 'stateful' mode".format(p)
+
+            if cartridge_failover_params['state_provider'] not in STATEFUL_FAILOVER_STATE_PROVIDERS:
+                return "Stateful failover state provider should be one of {}".format(
+                    STATEFUL_FAILOVER_STATE_PROVIDERS
+                )
+
+            if cartridge_failover_params['state_provider'] == 'stateboard':
+                if cartridge_failover_params.get('stateboard_params') is None:
+                    return "'stateboard_params' is required for 'stateboard' state provider"
+
+                for p in STATEBOARD_PROVIDER_REQUIRED_PARAMS:
+                    if p not in cartridge_failover_params['stateboard_params']:
+                        return "'stateboard_params.{}' is required for 'stateboard' provider".format(p)
+
+                state_provider_uri = cartridge_failover_params['stateboard_params']['uri']
+                if not is_valid_advertise_uri(state_provider_uri):
+                    return "Stateboard URI must be specified as '<host>:<port>'"
+
+                state_provider_password = cartridge_failover_params['stateboard_params']['password']
+
+                m = re.search(CLUSTER_COOKIE_FORBIDDEN_SYMBOLS_RGX, state_provider_password)
+                if m is not None:
+                    errmsg = "Stateboard password cannot contain symbols other than [a-zA-Z0-9_.~-] " + \
+                             "('{}' found)".format(m.group())
+                    return errmsg
+
+            elif cartridge_failover_params['state_provider'] == 'etcd2':
+                etcd2_params = cartridge_failover_params.get('etcd2_params')
+                if etcd2_params is not None and etcd2_params.get('endpoints') is not None:
+                    for endpoint in etcd2_params['endpoints']:
+                        if not is_valid_advertise_uri(endpoint):
+                            return "etcd2 endpoints must be specified as '<host>:<port>'"
+
+    return None
+
+
+def check_scenario(found_common_params):
+    scenario = found_common_params.get('cartridge_scenario')
+    if scenario is not None:
+        for task in scenario:
+            if type(task) != str:
+                return "Incorrect type of task name '%s'. String expected, got: %s" % (task, type(task))
+
+    dir_path = found_common_params.get('cartridge_custom_steps_dir')
+    if dir_path is not None:
+        if not os.path.exists(dir_path):
+            return "Directory '%s' from 'cartridge_custom_steps_dir' doesn't exists" % dir_path
+
+    custom_steps = found_common_params.get('cartridge_custom_steps')
+    if custom_steps is not None:
+        for task in custom_steps:
+            if type(task) != dict:
+                return "Incorrect type of custom task '%s'. Dictionary expected, got: %s" % (task, type(task))
+
+            if task.get('name') is not None and type(task.get('name')) != str:
+                return "Incorrect type of name from task '%s'. String expected, got: %s" % (task, type(task['name']))
+
+            if not task.get('file'):
+                return "No path to task file in custom task '%s'" % task
+            if type(task['file']) != str:
+                return "Incorrect type of file path from task '%s'. String expected, got: %s" % (
+                    task, type(task['file'])
+                )
+            if not os.path.exists(task['file']):
+                return "File '%s' from custom task '%s' doesn't exists" % (task['file'], task)
+
+
+def check_failover_promote_params(found_common_params):
+    failover_promote_params = found_common_params.get('cartridge_failover_promote_params')
+    if failover_promote_params is None:
+        return None
+
+    for p in failover_promote_params:
+        if p not in ALLOWED_FAILOVER_PROMOTE_PARAMS:
+            return "Passed unknown failover promote parameter: '%s'" % p
+
+    replicaset_leaders = failover_promote_params.get('replicaset_leaders')
+    if replicaset_leaders is not None:
+        if not all([isinstance(k, str) and isinstance(v, str) for k, v in replicaset_leaders.items()]):
+            return "Variable 'replicaset_leaders' should be of type map(string -> string)"
+
+
+def check_backup_params(instance_vars):
+    backup_mode = instance_vars.get('cartridge_backup_mode')
+    if backup_mode is not None:
+        if backup_mode not in BACKUP_MODES:
+            return "Backup mode should be one of {}".format(BACKUP_MODES)
+        if backup_mode == 'hardlinks' and instance_vars.get('cartridge_fetch_backups') is True:
+            return "Backups can't be fetched in 'hardlinks' backup mode"
+
+    compression = instance_vars.get('cartridge_backup_compression')
+    if compression is not None and compression not in BACKUP_COMPRESSIONS:
+        return "Backup compression should be one of {}".format(BACKUP_COMPRESSIONS)
+
+    compression_level = instance_vars.get('cartridge_backup_compression_level')
+    if compression_level is not None and not 1 <= compression_level <= 9:
+        return "'cartridge_backup_compression_level' should be from 1 to 9"
+
+    return None
+
+
+def check_instance(instance_vars, host, found_common_params, found_replicasets, warnings):
+    # Backups params are checked for stateboard too
+    errmsg = check_backup_params(instance_vars)
+    if errmsg is not None:
+        return errmsg
+
+    if instance_vars.get('stateboard') is True:
+        return check_stateboard(instance_vars)
+
+    # All required params should be specified
+    errmsg = check_required_params(instance_vars, host)
+    if errmsg is not None:
+        return errmsg
+
+    errmsg = check_cluster_cookie_symbols(instance_vars.get('cartridge_cluster_cookie'))
+    if errmsg is not None:
+        return errmsg
+
+    # Instance config
+    errmsg = check_instance_config(instance_vars['config'], host)
+    if errmsg is not None:
+        return errmsg
+
+    # Params common for all instances
+    errmsg = check_params_the_same_for_all_hosts(instance_vars, found_common_params)
+    if errmsg is not None:
+        return errmsg
+
+    # Cartridge defaults
+    if 'cartridge_defaults' in instance_vars:
+        if 'cluster_cookie' in instance_vars['cartridge_defaults']:
+            return "Cluster cookie must be specified in 'cartridge_cluster_cookie', not in 'cartridge_defaults'"
+
+    # Instance state
+    if instance_vars.get('expelled') is True and instance_vars.get('restarted') is True:
+        return "Flags 'expelled' and 'restarted' cannot be set at the same time"
+
+    # Replicasets
+    errmsg = check_replicaset(instance_vars, found_replicasets)
+    if errmsg is not None:
+        return errmsg
+
+    # Dist retention
+    if 'cartridge_keep_num_latest_dists' in instance_vars:
+        keep_num_latest_dists = instance_vars['cartridge_keep_num_latest_dists']
+        if keep_num_latest_dists <= 0:
+            return "'cartridge_keep_num_latest_dists' should be greater than 0"
+        if keep_num_latest_dists == 1:
+            warnings.append(
+                "Using 'cartridge_keep_num_latest_dists' equals to 1 can be dangerous. "
+                "Make sure that there are no instances that use old versions"
+            )
+
+    return None
+
+
+COMMON_PARAMS_CHECKS = [
+    # Authorization params
+    check_auth,
+    # Clusterwide config
+    check_app_config,
+    # Failover
+    check_failover,
+    # Scenario
+    check_scenario,
+    # Failover promote params
+    check_failover_promote_params,
+]
+
+
+def get_errors_res(errors, warnings):
+    return helpers.ModuleRes(failed=True, msg='; '.join(errors), warnings=warnings, errors=errors)
+
+
+def validate_config(params):
+    # If `all_errors` is set, all hosts are checked and all found errors are reported,
+    # otherwise validation stops on the first error
+    all_errors = params.get('all_errors', False)
+
+    found_replicasets = {}
+    found_common_params = {}
+
+    errors = []
+    warnings = []
+
+    for host in params['play_hosts']:
+        instance_vars = params['module_hostvars'][host]
+
+        if instance_vars.get('edit_topology_timeout') is not None:
+            warnings.append(
+                "Variable 'edit_topology_timeout' is deprecated since 1.9.0 and will be removed in 2.0.0. "
+                "Use 'edit_topology_healthy_timeout' instead."
+            )
+        if instance_vars.get('instance_start_timeout') is not None:
+            warnings.append(
+                "Variable 'instance_start_timeout' is deprecated since 1.10.0 and will be removed in 2.0.0. "
+                "Use 'instance_start_retries' and 'instance_start_delay' instead."
+            )
+        if instance_vars.get('instance_discover_buckets_timeout') is not None:
+            warnings.append(
+                "Variable 'instance_discover_buckets_timeout' is deprecated since 1.10.0 and will be removed in 2.0.0. "
+                "Use 'instance_discover_buckets_retries' and 'instance_discover_buckets_delay' instead."
+            )
+
+        # Validate types, other checks expect valid types.
+        # Params common for all instances are already checked if they are
+        # the same as the found ones (it's checked for each instance later)
+        type_errors = validate_types(instance_vars, all_errors, found_common_params)
+        if type_errors:
+            errors.extend(type_errors)
+            if not all_errors:
+                return get_errors_res(errors, warnings)
+            continue
+
+        errmsg = check_instance(instance_vars, host, found_common_params, found_replicasets, warnings)
+        if errmsg is not None:
+            errors.append(errmsg)
+            if not all_errors:
+                return get_errors_res(errors, warnings)
+
+    for check_common_params in COMMON_PARAMS_CHECKS:
+        errmsg = check_common_params(found_common_params)
+        if errmsg is not None:
+            errors.append(errmsg)
+            if not all_errors:
+                return get_errors_res(errors, warnings)
+
+    if errors:
+        return get_errors_res(errors, warnings)
+
+    if found_common_params.get('cartridge_failover') is not None:
+        warnings.append(
+            "Variable 'cartridge_failover' is deprecated since 1.3.0 and will be removed in 2.0.0. "
+            "Use 'cartridge_failover_params' instead."
+        )
+
+    warnings.append(
+        "Since 2.0.0 all variables without prefix will be prefixed with 'tc_', "
+        "prefix 'cartridge_' will be replaced by 'tc_'."
+    )
+    return helpers.ModuleRes(changed=False, warnings=warnings)
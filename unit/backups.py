@@ -0,0 +1,55 @@
+import grp
+import os
+import pwd
+import sys
+
+import module_utils.helpers as helpers
+import module_utils.backup_archive as backup_archive
+
+# Backup modules are imported with modules they depend on
+sys.modules['ansible.module_utils.helpers'] = helpers
+sys.modules['ansible.module_utils.backup_archive'] = backup_archive
+import module_utils.backup_manifest as backup_manifest  # noqa: E402
+import module_utils.hardlink_backup as hardlink_backup  # noqa: E402
+
+sys.modules['ansible.module_utils.backup_manifest'] = backup_manifest
+sys.modules['ansible.module_utils.hardlink_backup'] = hardlink_backup
+import library.cartridge_backup_instance as backup_instance  # noqa: E402
+from library.cartridge_restore_instance import restore_archive  # noqa: E402
+
+__all__ = [
+    'backup_archive',
+    'backup_manifest',
+    'hardlink_backup',
+    'backup_instance',
+    'INSTANCE_ID',
+    'write_file',
+    'read_file',
+    'call_restore_archive',
+]
+
+INSTANCE_ID = 'myapp.instance-1'
+
+
+def write_file(path, data):
+    with open(path, 'wb') as f:
+        f.write(data)
+
+
+def read_file(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def call_restore_archive(backup_path, paths_to_remove, force_restore=False):
+    return restore_archive(
+        backup_path,
+        INSTANCE_ID,
+        paths_to_remove,
+        paths_to_keep=[],
+        force_restore=force_restore,
+        allow_alien_backups=False,
+        skip_cleanup_on_restore=False,
+        app_user=pwd.getpwuid(os.getuid()).pw_name,
+        app_group=grp.getgrgid(os.getgid()).gr_name,
+    )
@@ -241,6 +241,11 @@ class Instance:
             require('cartridge').internal.set_box_cfg_function(...)
         ''', value)
 
+    def set_is_healthy(self, value):
+        self.eval_res_err('''
+            require('cartridge').internal.set_is_healthy(...)
+        ''', value)
+
     def set_cartridge_version(self, version):
         self.eval_res_err('''
             require('cartridge').VERSION = ...
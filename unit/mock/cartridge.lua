@@ -51,6 +51,7 @@ local vars = {
     cartridge_confapplier_state = '',
     unknown_buckets = {},
     roles_map = {},
+    is_healthy = true,
 
     -- see below
     -- clusterwide_config = clusterwide_config.new(),
@@ -283,7 +284,12 @@ end
 cartridge.version = '2.1.2'
 
 function cartridge.is_healthy()
-    return true
+    return vars.is_healthy
+end
+
+function cartridge.internal.set_is_healthy(value)
+    assert(type(value) == 'boolean')
+    vars.is_healthy = value
 end
 
 function cartridge.cfg(opts)
@@ -0,0 +1,101 @@
+import io
+import os
+import struct
+import tarfile
+import time
+
+# Minimal RPM, DEB and TGZ packages writers,
+# `rpm` and `dpkg` utilities aren't required
+
+RPM_SENSE_GREATER = 1 << 2
+RPM_SENSE_EQUAL = 1 << 3
+
+
+def get_rpm_header(entries):
+    # entries is a list of (tag, type, value)
+    index = b''
+    data = b''
+
+    for tag, tag_type, value in entries:
+        if tag_type == 4:  # INT32
+            # INT32 values are aligned to 4 bytes
+            data += b'\0' * ((4 - len(data) % 4) % 4)
+            offset, count = len(data), len(value)
+            data += struct.pack('>%dI' % count, *value)
+        elif tag_type == 6:  # STRING
+            offset, count = len(data), 1
+            data += value.encode('utf-8') + b'\0'
+        elif tag_type == 8:  # STRING_ARRAY
+            offset, count = len(data), len(value)
+            data += b''.join(v.encode('utf-8') + b'\0' for v in value)
+        elif tag_type == 7:  # BIN
+            offset, count = len(data), len(value)
+            data += value
+        else:
+            raise Exception('Unsupported type: %s' % tag_type)
+
+        index += struct.pack('>IIII', tag, tag_type, offset, count)
+
+    intro = b'\x8e\xad\xe8\x01' + b'\0' * 4 + struct.pack('>II', len(entries), len(data))
+    return intro + index + data
+
+
+def write_rpm(path, name, requires=None, payload_size=0):
+    # requires is a list of (name, flags, version)
+    requires = requires or []
+
+    lead = b'\xed\xab\xee\xdb' + b'\x03\x00' + b'\x00\x00' + b'\x00\x01'
+    lead += name.encode('utf-8')[:65].ljust(66, b'\0')
+    lead += b'\x00\x01' + b'\x00\x05' + b'\0' * 16
+
+    signature = get_rpm_header([(1000, 7, b'\0' * 16)])
+    signature += b'\0' * ((8 - (len(signature) - 16) % 8) % 8)
+
+    header = get_rpm_header([
+        (1000, 6, name),
+        (1001, 6, '1.0.0'),
+        (1048, 4, [flags for _, flags, _ in requires]),
+        (1049, 8, [req_name for req_name, _, _ in requires]),
+        (1050, 8, [version for _, _, version in requires]),
+    ])
+
+    with open(path, 'wb') as f:
+        f.write(lead + signature + header)
+        f.write(os.urandom(payload_size))
+
+
+def get_tar_gz(files, compression='gz'):
+    tar_data = io.BytesIO()
+    with tarfile.open(fileobj=tar_data, mode='w:%s' % compression) as tar:
+        for file_name, content in files.items():
+            info = tarfile.TarInfo(file_name)
+            info.size = len(content)
+            info.mtime = time.time()
+            tar.addfile(info, io.BytesIO(content))
+    return tar_data.getvalue()
+
+
+def write_tgz(path, files):
+    with open(path, 'wb') as f:
+        f.write(get_tar_gz(files))
+
+
+def get_ar_member(name, data):
+    header = '%-16s%-12d%-6d%-6d%-8s%-10d`\n' % (name, 0, 0, 0, '100644', len(data))
+    return header.encode('utf-8') + data + b'\n' * (len(data) % 2)
+
+
+def write_deb(path, name, depends=None, payload_size=0, compression='gz'):
+    control = 'Package: %s\nVersion: 1.0.0\nArchitecture: all\n' % name
+    if depends is not None:
+        control += 'Depends: %s\n' % depends
+    control += 'Description: Test package\n .\n More details\n'
+
+    control_archive = get_tar_gz({'./control': control.encode('utf-8')}, compression)
+    data_archive = get_tar_gz({'./usr/share/tarantool/%s/data' % name: os.urandom(payload_size)})
+
+    with open(path, 'wb') as f:
+        f.write(b'!<arch>\n')
+        f.write(get_ar_member('debian-binary', b'2.0\n'))
+        f.write(get_ar_member('control.tar.%s' % compression, control_archive))
+        f.write(get_ar_member('data.tar.gz', data_archive))
@@ -0,0 +1,122 @@
+import gzip
+import os
+import shutil
+import tempfile
+import unittest
+
+from unit.backups import (
+    INSTANCE_ID,
+    backup_archive,
+    backup_instance,
+    backup_manifest,
+    read_file,
+    write_file,
+)
+from library.cartridge_restore_instance import unpack_tgz, unpack_chain, get_specific_format_funcs
+from module_utils.validate_config import BACKUP_COMPRESSIONS
+
+
+class TestBackupArchive(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.backups_dir = os.path.join(self.tmp_dir, 'backups')
+        self.memtx_dir = os.path.join(self.tmp_dir, 'memtx', INSTANCE_ID)
+        os.makedirs(self.backups_dir)
+        os.makedirs(self.memtx_dir)
+
+        self.files = {
+            os.path.join(self.memtx_dir, '00000000000000000001.snap'): os.urandom(100 * 1024) * 3,
+            os.path.join(self.memtx_dir, '00000000000000000001.xlog'): b'xlog' * 1000,
+            os.path.join(self.memtx_dir, 'empty.xlog'): b'',
+        }
+        for path, data in self.files.items():
+            write_file(path, data)
+
+        # Many gzip members are written for small files
+        self.block_size = backup_archive.PARALLEL_GZIP_BLOCK_SIZE
+        backup_archive.PARALLEL_GZIP_BLOCK_SIZE = 64 * 1024
+
+    def check_restore(self, archive_path, unpack_func):
+        shutil.rmtree(self.memtx_dir)
+
+        _, func, err = get_specific_format_funcs(archive_path)
+        self.assertIsNone(err)
+        self.assertEqual(func, unpack_func)
+
+        func(archive_path, os.getuid(), os.getgid())
+        for path, data in self.files.items():
+            self.assertEqual(read_file(path), data)
+
+    def test_validated_compressions(self):
+        # config validation doesn't import archive module, lists should be the same
+        self.assertEqual(BACKUP_COMPRESSIONS, backup_archive.COMPRESSIONS)
+
+    def test_compressions(self):
+        for compression, ext, level in [
+            (backup_archive.COMPRESSION_NONE, '.tar', 9),
+            (backup_archive.COMPRESSION_GZIP, '.tar.gz', 1),
+            (backup_archive.COMPRESSION_PARALLEL_GZIP, '.tar.gz', 6),
+        ]:
+            archive_path = backup_instance.backup_pack(
+                INSTANCE_ID, self.backups_dir, [self.memtx_dir], compression, level,
+            )
+            self.assertTrue(archive_path.endswith(ext), msg=archive_path)
+            self.assertEqual(
+                backup_archive.is_gzip_archive(archive_path),
+                compression != backup_archive.COMPRESSION_NONE,
+            )
+
+            self.check_restore(archive_path, unpack_tgz)
+            os.remove(archive_path)
+
+    def test_parallel_gzip_is_usual_gzip(self):
+        archive_path = os.path.join(self.tmp_dir, 'archive.tar.gz')
+        with backup_archive.open_archive_for_writing(archive_path, backup_archive.COMPRESSION_PARALLEL_GZIP, 6) as tar:
+            tar.add(self.memtx_dir)
+
+        # Archive consists of many gzip members
+        data = read_file(archive_path)
+        self.assertGreater(data.count(backup_archive.GZIP_MAGIC + b'\x08'), 4)
+
+        with gzip.GzipFile(archive_path, 'rb') as f:
+            tar_data = f.read()
+        self.assertEqual(len(tar_data) % 512, 0)
+
+        for stream in [False, True]:
+            with backup_archive.open_archive(archive_path, stream=stream) as tar:
+                names = [member.name for member in tar]
+            self.assertEqual(sorted(names), sorted(
+                [self.memtx_dir.lstrip('/')] + [path.lstrip('/') for path in self.files]
+            ))
+
+    def test_incremental_chain_with_different_compressions(self):
+        get_archive_name = backup_instance.get_archive_name
+        names = iter(['%s.2021-01-01-00000%d' % (INSTANCE_ID, i) for i in range(2)])
+        backup_instance.get_archive_name = lambda _, compression: next(names) + backup_archive.get_archive_ext(
+            compression
+        )
+
+        try:
+            full_path = backup_instance.backup_pack_incremental(
+                INSTANCE_ID, self.backups_dir, [self.memtx_dir], backup_archive.COMPRESSION_NONE,
+            )
+
+            new_xlog_path = os.path.join(self.memtx_dir, '00000000000000000002.xlog')
+            self.files[new_xlog_path] = b'new xlog'
+            write_file(new_xlog_path, b'new xlog')
+
+            incremental_path = backup_instance.backup_pack_incremental(
+                INSTANCE_ID, self.backups_dir, [self.memtx_dir], backup_archive.COMPRESSION_PARALLEL_GZIP,
+            )
+        finally:
+            backup_instance.get_archive_name = get_archive_name
+
+        self.assertTrue(full_path.endswith('.tar'))
+        self.assertTrue(incremental_path.endswith('.tar.gz'))
+        self.assertEqual(backup_manifest.read_manifest(incremental_path)['parent'], os.path.basename(full_path))
+
+        self.check_restore(incremental_path, unpack_chain)
+
+    def tearDown(self):
+        backup_archive.PARALLEL_GZIP_BLOCK_SIZE = self.block_size
+        shutil.rmtree(self.tmp_dir)
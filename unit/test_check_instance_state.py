@@ -5,6 +5,11 @@ import module_utils.helpers as helpers
 from unit.instance import Instance
 
 sys.modules['ansible.module_utils.helpers'] = helpers
+try:
+    import module_utils.async_console as async_console
+    sys.modules['ansible.module_utils.async_console'] = async_console
+except (ImportError, SyntaxError):
+    pass
 from library.cartridge_check_instance_state import check_state
 
 
@@ -17,6 +22,16 @@ def call_check_instance_state(console_sock, stateboard=False, check_buckets_are_
     })
 
 
+def call_check_machine_instances_state(console_socks, check_buckets_are_discovered=False):
+    return check_state({
+        'instances': [
+            {'instance_info': {'console_sock': console_sock}, 'stateboard': False} for console_sock in console_socks
+        ],
+        'expected_states': ['Unconfigured', 'RolesConfigured'],
+        'check_buckets_are_discovered': check_buckets_are_discovered,
+    })
+
+
 def set_confapplier_state(instance, state):
     instance.set_variable('cartridge_confapplier_state', state)
 
@@ -169,6 +184,34 @@ class TestInstanceStarted(unittest.TestCase):
         res = call_check_instance_state(self.console_sock, check_buckets_are_discovered=True)
         self.assertFalse(res.failed)
 
+    def test_machine_instances(self):
+        set_confapplier_state(self.instance, 'RolesConfigured')
+        set_vshard_groups(self.instance, {
+            'hot': {'bucket_count': 2000, 'bootstrapped': True},
+        })
+        set_vshard_router_unknown_buckets(self.instance, {'hot': 0})
+
+        res = call_check_machine_instances_state([self.console_sock], check_buckets_are_discovered=True)
+        self.assertFalse(res.failed, res.msg)
+
+        missed_console_sock = 'missed-socket-path'
+        res = call_check_machine_instances_state([self.console_sock, missed_console_sock])
+        self.assertTrue(res.failed)
+        self.assertEqual(list(res.kwargs['errors'].keys()), [missed_console_sock])
+        self.assertIn('Instance socket not found', res.kwargs['errors'][missed_console_sock])
+
+        set_vshard_router_unknown_buckets(self.instance, {'hot': 1000})
+        res = call_check_machine_instances_state([self.console_sock], check_buckets_are_discovered=True)
+        self.assertTrue(res.failed)
+        self.assertEqual(res.kwargs['errors'], {
+            self.console_sock: "1000 out of 2000 buckets are not discovered in group 'hot'",
+        })
+
+        set_confapplier_state(self.instance, 'OperationError')
+        res = call_check_machine_instances_state([self.console_sock], check_buckets_are_discovered=True)
+        self.assertTrue(res.failed)
+        self.assertIn("it's in 'OperationError' state", res.kwargs['errors'][self.console_sock])
+
     def tearDown(self):
         self.instance.stop()
         del self.instance
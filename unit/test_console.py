@@ -0,0 +1,333 @@
+import base64
+import struct
+import sys
+import tempfile
+import unittest
+
+from parameterized import parameterized
+
+import module_utils.helpers as helpers
+from unit.instance import Instance
+
+sys.modules['ansible.module_utils.helpers'] = helpers
+try:
+    import module_utils.async_console as async_console
+except (ImportError, SyntaxError):
+    # Python 2
+    async_console = None
+
+
+class ConsoleWithCmdsLog(helpers.Console):
+    def __init__(self, *args, **kwargs):
+        helpers.Console.__init__(self, *args, **kwargs)
+        self.cmds = []
+
+    def send_cmd(self, result_code):
+        self.cmds.append(result_code)
+        return helpers.Console.send_cmd(self, result_code)
+
+
+class TestConsole(unittest.TestCase):
+    def setUp(self):
+        self.instance = Instance()
+        self.console_sock = self.instance.console_sock
+
+        self.instance.start()
+
+    @parameterized.expand([
+        ['return nil', []],
+        ['return 1, 2', [1, 2]],
+        ['return nil, "some error"', [None, 'some error']],
+        ['return ...', ['arg-1', {'key': 'value'}, [1, 2, 3]], 'arg-1', {'key': 'value'}, [1, 2, 3]],
+        ['return -1, 2^40, -2^40, 0.5', [-1, 2 ** 40, -2 ** 40, 0.5]],
+        ['return true, false, box.NULL', [True, False, None]],
+        ["return '\\208\\159'", [u'\u041f']],
+        ["return {a = {b = {c = {}}}, [''] = 'empty'}", [{'a': {'b': {'c': []}}, '': 'empty'}]],
+        ["return string.rep('x', 100000)", ['x' * 100000]],
+    ])
+    def test_eval(self, func_body, exp_res, *args):
+        for transport in helpers.CONSOLE_TRANSPORTS:
+            control_console = helpers.get_control_console(self.console_sock, transport)
+            self.assertEqual(control_console.eval(func_body, *args), exp_res, transport)
+
+    def test_eval_transports_are_equal(self):
+        for i in range(30):
+            self.instance.add_replicaset(
+                alias='r%d' % i,
+                instances=['r%d-i%d' % (i, j) for j in range(3)],
+            )
+
+        results = [
+            helpers.get_control_console(self.console_sock, transport).eval(helpers.GET_INSTANCES_FUNC_BODY)
+            for transport in helpers.CONSOLE_TRANSPORTS
+        ]
+        self.assertEqual(len(results[0][0]), 90)
+        for res in results[1:]:
+            self.assertEqual(res, results[0])
+
+    def test_eval_escaping(self):
+        args = ['quote \' double quote " backslash \\ newline \n', u'\u041f']
+        for transport in helpers.CONSOLE_TRANSPORTS:
+            control_console = helpers.get_control_console(self.console_sock, transport)
+            self.assertEqual(control_console.eval("return ... -- ' \\ \"", *args), args)
+
+    def test_eval_batch(self):
+        for transport in helpers.CONSOLE_TRANSPORTS:
+            control_console = helpers.get_control_console(self.console_sock, transport)
+
+            self.assertEqual(control_console.eval_batch([]), [])
+
+            res = control_console.eval_batch([
+                ('return nil', []),
+                ('return ...', ['res']),
+                ('return nil, ...', ['err']),
+                ('return nil, {err = ...}', ['tarantool/errors']),
+                ("rawset(_G, 'some_var', ...)", [1]),
+                ("return rawget(_G, 'some_var') + 1", None),
+            ])
+            self.assertEqual(res, [
+                [None, None],
+                ['res', None],
+                [None, 'err'],
+                [None, 'tarantool/errors'],
+                [None, None],
+                [2, None],
+            ])
+
+            with self.assertRaises(helpers.CartridgeException) as ctx:
+                control_console.eval_batch([
+                    ('return 1', []),
+                    ('error("some error")', []),
+                ])
+            self.assertEqual(ctx.exception.code, helpers.CartridgeErrorCodes.FUNCTION_ERROR)
+
+    def test_get_cluster_topology(self):
+        self.instance.add_replicaset(alias='r1', instances=['r1-leader', 'r1-replica'])
+        self.instance.set_variable('active_leaders', {'r1-uuid': 'r1-replica-uuid'})
+
+        control_console = helpers.get_control_console(self.console_sock)
+        instances, replicasets, err = helpers.get_cluster_topology(control_console)
+        self.assertIsNone(err)
+        self.assertEqual(instances, helpers.get_cluster_instances(control_console))
+        self.assertEqual(sorted(instances.keys()), ['r1-leader', 'r1-replica'])
+        self.assertEqual(list(replicasets.keys()), ['r1'])
+        self.assertEqual(replicasets['r1']['leader_uuid'], 'r1-replica-uuid')
+
+    def test_registered_function(self):
+        func = helpers.LuaFunction('''
+            local counter = rawget(_G, 'some_counter') or 0
+            rawset(_G, 'some_counter', counter + 1)
+            return ...
+        ''')
+
+        for transport in helpers.CONSOLE_TRANSPORTS:
+            control_console = ConsoleWithCmdsLog(self.console_sock, transport)
+            self.instance.eval("rawset(_G, 'some_counter', 0)")
+            self.instance.eval("rawset(_G, '%s', nil)" % helpers.FUNCTIONS_REGISTRY_NAME)
+
+            # function isn't registered - it's uploaded on the second request
+            self.assertEqual(control_console.eval_res_err(func, 'res', 'err'), ['res', 'err'])
+            self.assertEqual(len(control_console.cmds), 2)
+            self.assertNotIn('"body": ', control_console.cmds[0])
+            self.assertIn('"body": ', control_console.cmds[1])
+
+            # function is registered - it's called by hash
+            self.assertEqual(control_console.eval_res_err(func, 'res'), ['res', None])
+            self.assertEqual(len(control_console.cmds), 3)
+            self.assertNotIn('"body": ', control_console.cmds[2])
+            self.assertIn(func.hash, control_console.cmds[2])
+
+            # function is called by hash from another console
+            another_console = ConsoleWithCmdsLog(self.console_sock, transport)
+            self.assertEqual(another_console.eval_res_err(func, 'res'), ['res', None])
+            self.assertEqual(len(another_console.cmds), 1)
+
+            # nothing is called on a miss
+            self.instance.eval("rawset(_G, '%s', nil)" % helpers.FUNCTIONS_REGISTRY_NAME)
+            res = control_console.eval_batch([
+                ("return rawget(_G, 'some_counter')", []),
+                (func, ['res']),
+                (helpers.GET_ACTIVE_LEADERS_FUNC, []),
+            ])
+            self.assertEqual(res, [[3, None], ['res', None], [[], None]])
+            self.assertEqual(len(control_console.cmds), 5)
+            self.assertEqual(self.instance.eval("return rawget(_G, 'some_counter')"), [4])
+
+    def test_registered_function_fails(self):
+        func = helpers.LuaFunction('error("some error")')
+        for transport in helpers.CONSOLE_TRANSPORTS:
+            control_console = helpers.get_control_console(self.console_sock, transport)
+            for _ in range(2):
+                with self.assertRaises(helpers.CartridgeException) as ctx:
+                    control_console.eval(func)
+                self.assertEqual(ctx.exception.code, helpers.CartridgeErrorCodes.FUNCTION_ERROR)
+                self.assertIn('some error', str(ctx.exception))
+
+    def test_small_read_size(self):
+        # multi-byte characters in error message are split between chunks
+        for transport in helpers.CONSOLE_TRANSPORTS:
+            control_console = helpers.get_control_console(self.console_sock, transport, read_size=1)
+            self.assertEqual(control_console.eval("return string.rep('x', 1000)"), ['x' * 1000])
+
+            with self.assertRaises(helpers.CartridgeException) as ctx:
+                control_console.eval("error('\\208\\159\\208\\159')")
+            self.assertIn(u'\u041f\u041f', ctx.exception.args[0])
+
+    def test_eval_fails(self):
+        for transport in helpers.CONSOLE_TRANSPORTS:
+            control_console = helpers.get_control_console(self.console_sock, transport)
+            with self.assertRaises(helpers.CartridgeException) as ctx:
+                control_console.eval('error("some error")')
+            self.assertEqual(ctx.exception.code, helpers.CartridgeErrorCodes.FUNCTION_ERROR)
+            self.assertIn('some error', str(ctx.exception))
+
+    def test_gather_evals(self):
+        gather_funcs = [helpers.gather_evals]
+        if async_console is not None:
+            gather_funcs.append(async_console.gather_evals)
+
+        missed_console_sock = 'missed-socket-path'
+        for gather_evals in gather_funcs:
+            results = gather_evals([self.console_sock, missed_console_sock], 'return ...', ['arg'])
+            self.assertEqual(results[self.console_sock], ['arg', None])
+            self.assertEqual(results[missed_console_sock].code, helpers.CartridgeErrorCodes.SOCKET_NOT_FOUND)
+
+            results = gather_evals(
+                [self.console_sock], 'return nil, ...', {self.console_sock: ['some error']}, concurrency=1,
+            )
+            self.assertEqual(results, {self.console_sock: [None, 'some error']})
+
+    def test_perf_trace(self):
+        control_console = helpers.get_control_console(self.console_sock)
+
+        helpers.enable_perf_trace()
+        try:
+            control_console.eval('return 1')
+            control_console.eval_batch([
+                (helpers.GET_INSTANCES_FUNC, []),
+                ('\n-- comment\nreturn ...', ['x' * 1000]),
+            ])
+            with self.assertRaises(helpers.CartridgeException):
+                control_console.eval('error("some error")')
+
+            res = helpers.ModuleRes(changed=False).get_exit_json()
+            # trace isn't reset when module result is formed
+            self.assertEqual(helpers.ModuleRes(changed=False).get_exit_json()['perf'], res['perf'])
+        finally:
+            helpers.enable_perf_trace(False)
+
+        perf = res['perf']
+        self.assertEqual([e['label'] for e in perf['evals']], [
+            'return 1',
+            'get_instances, return ...',
+            'error("some error")',
+        ])
+        self.assertEqual([e['calls'] for e in perf['evals']], [1, 2, 1])
+        self.assertEqual(perf['evals_count'], 3)
+        self.assertGreater(perf['evals'][1]['request_bytes'], 1000)
+        self.assertEqual(perf['request_bytes'], sum(e['request_bytes'] for e in perf['evals']))
+        self.assertEqual(perf['response_bytes'], sum(e['response_bytes'] for e in perf['evals']))
+
+        self.assertNotIn('perf', helpers.ModuleRes(changed=False).get_exit_json())
+
+    def test_unknown_transport(self):
+        with self.assertRaises(helpers.CartridgeException) as ctx:
+            helpers.get_control_console(self.console_sock, 'unknown')
+        self.assertEqual(ctx.exception.code, helpers.CartridgeErrorCodes.UNKNOWN_CONSOLE_TRANSPORT)
+        self.assertIn('Unknown console transport: unknown', str(ctx.exception))
+
+    def tearDown(self):
+        self.instance.stop()
+        del self.instance
+
+
+class TestConsoleOutputDecoding(unittest.TestCase):
+    def test_map_keys_are_strings(self):
+        # JSON transport returns string keys, msgpack transport should return the same.
+        # {[1] = {[2] = 'a', b = {{[3] = box.NULL}}}, c = {1, 2}}
+        raw = b'\x82\x01\x82\x02\xa1a\xa1b\x91\x81\x03\xc0\xa1c\x92\x01\x02'
+        payload = base64.b64encode(raw).decode('ascii')
+        output = 'msgpack:%d:%s' % (len(payload), payload)
+        exp_value = {'1': {'2': 'a', 'b': [{'3': None}]}, 'c': [1, 2]}
+
+        self.assertEqual(helpers.decode_framed_output(output), exp_value)
+
+        # builtin decoder is used if msgpack package isn't installed
+        msgpack_module = helpers.msgpack
+        helpers.msgpack = None
+        try:
+            self.assertEqual(helpers.decode_framed_output(output), exp_value)
+        finally:
+            helpers.msgpack = msgpack_module
+
+    def test_extension_types(self):
+        # Values of Tarantool extension types are decoded to the same strings
+        # as JSON transport returns for them
+        uuid_raw = b'\xd8\x02' + bytes(bytearray(range(16)))
+        # decimal -12.34: scale 2, BCD digits 1234 and negative sign nibble
+        decimal_raw = b'\xd6\x01\x02\x01\x23\x4d'
+        # 2022-01-01T00:00:00Z
+        datetime_raw = b'\xd7\x04' + struct.pack('<q', 1640995200)
+        # 2022-01-01T00:00:00Z + 123 ms in the timezone with +03:00 offset
+        datetime_tz_raw = b'\xc7\x10\x04' + struct.pack('<qihh', 1640995200, 123000000, 180, 0)
+        # box.error.new({reason = 'some error'})
+        error_raw = b'\xc7\x10\x03\x81\x00\x91\x81\x03\xaasome error'
+
+        raw = b'\x95' + uuid_raw + decimal_raw + datetime_raw + datetime_tz_raw + error_raw
+        payload = base64.b64encode(raw).decode('ascii')
+        output = 'msgpack:%d:%s' % (len(payload), payload)
+        exp_value = [
+            '00010203-0405-0607-0809-0a0b0c0d0e0f',
+            '-12.34',
+            '2022-01-01T00:00:00Z',
+            '2022-01-01T03:00:00.123+0300',
+            'some error',
+        ]
+
+        self.assertEqual(helpers.decode_framed_output(output), exp_value)
+
+        msgpack_module = helpers.msgpack
+        helpers.msgpack = None
+        try:
+            self.assertEqual(helpers.decode_framed_output(output), exp_value)
+        finally:
+            helpers.msgpack = msgpack_module
+
+    def test_unknown_extension_type(self):
+        payload = base64.b64encode(b'\xd4\x7f\x00').decode('ascii')
+        output = 'msgpack:%d:%s' % (len(payload), payload)
+
+        with self.assertRaises(helpers.CartridgeException) as ctx:
+            helpers.decode_framed_output(output)
+        self.assertEqual(ctx.exception.code, helpers.CartridgeErrorCodes.BAD_VALUE_TYPE)
+        self.assertIn('Unsupported msgpack extension type 127', str(ctx.exception))
+
+    def test_perf_trace_bytes(self):
+        payload = base64.b64encode(b'\xa1a').decode('ascii')
+        output = "---\n- 'msgpack:%d:%s'\n...\n" % (len(payload), payload)
+
+        class FakeConsole(helpers.Console):
+            def connect(self, socket_path):
+                pass
+
+            def request(self, cmd):
+                self.cmd = cmd
+                return output
+
+        with tempfile.NamedTemporaryFile() as socket_file:
+            console = FakeConsole(socket_file.name, helpers.CONSOLE_TRANSPORT_MSGPACK)
+
+        helpers.enable_perf_trace()
+        try:
+            self.assertEqual(console.send_cmd(u'return "\u043f\u0440\u0438\u0432\u0435\u0442"'), 'a')
+        finally:
+            helpers.enable_perf_trace(False)
+
+        # non-ASCII characters are counted by their UTF-8 bytes
+        self.assertEqual(console.request_bytes, len(console.cmd) + 6 + 1)
+        self.assertEqual(console.response_bytes, len(output))
+
+    def test_unknown_transport(self):
+        with self.assertRaises(helpers.CartridgeException) as ctx:
+            helpers.check_console_params('some-socket', 'unknown')
+        self.assertEqual(ctx.exception.code, helpers.CartridgeErrorCodes.UNKNOWN_CONSOLE_TRANSPORT)
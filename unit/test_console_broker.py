@@ -0,0 +1,242 @@
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import unittest
+
+import module_utils.helpers as helpers
+
+sys.modules['ansible.module_utils.helpers'] = helpers
+from library.cartridge_console_broker import (  # noqa: E402
+    Broker,
+    get_broker_pid,
+    get_process_start_time,
+    request_broker_shutdown,
+    stop_broker,
+)
+
+
+class FakeInstanceConsole:
+    # Minimal console server: sends greeting and replies
+    # to each command with YAML document containing the command
+    def __init__(self, console_sock):
+        self.console_sock = console_sock
+        self.connections_count = 0
+        self.server = None
+
+    def start(self):
+        self.server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.server.bind(self.console_sock)
+        self.server.listen(16)
+
+        thread = threading.Thread(target=self.serve)
+        thread.daemon = True
+        thread.start()
+
+    def stop(self):
+        self.server.close()
+        os.remove(self.console_sock)
+
+    def serve(self):
+        while True:
+            try:
+                conn, _ = self.server.accept()
+            except socket.error:
+                return
+            self.connections_count += 1
+
+            thread = threading.Thread(target=self.handle, args=(conn,))
+            thread.daemon = True
+            thread.start()
+
+    def handle(self, conn):
+        conn.sendall(b'Tarantool 2.8.0 (Lua console)\n')
+        reader = helpers.SocketReader(conn)
+        while True:
+            cmd = reader.read_until(b'\n')
+            if cmd is None:
+                break
+            conn.sendall(b'---\n- ' + cmd.strip() + b'\n...\n')
+        conn.close()
+
+
+class TestConsoleBroker(unittest.TestCase):
+    def setUp(self):
+        self.run_dir = tempfile.mkdtemp()
+        self.console_sock = os.path.join(self.run_dir, 'myapp.instance-1.control')
+        self.broker_sock = os.path.join(self.run_dir, helpers.CONSOLE_BROKER_SOCK_NAME)
+
+        self.instance = FakeInstanceConsole(self.console_sock)
+        self.instance.start()
+
+        self.broker = Broker(self.broker_sock, idle_timeout=60)
+        thread = threading.Thread(target=self.broker.serve)
+        thread.daemon = True
+        thread.start()
+
+        for _ in range(50):
+            if os.path.exists(self.broker_sock):
+                break
+            time.sleep(0.1)
+
+        os.environ[helpers.CONSOLE_BROKER_ENV] = 'True'
+
+    def test_connection_is_reused(self):
+        for i in range(3):
+            console = helpers.get_control_console(self.console_sock)
+            self.assertIsInstance(console, helpers.BrokerConsole)
+            self.assertEqual(console.request('cmd-%d' % i), '---\n- cmd-%d\n...\n' % i)
+            console.close()
+
+        self.assertEqual(self.instance.connections_count, 1)
+
+    def test_broker_is_disabled(self):
+        # broker is running, but isn't enabled for this run
+        for value in ['False', '']:
+            os.environ[helpers.CONSOLE_BROKER_ENV] = value
+
+            console = helpers.get_control_console(self.console_sock)
+            self.assertNotIsInstance(console, helpers.BrokerConsole)
+            self.assertEqual(console.request('direct'), '---\n- direct\n...\n')
+            console.close()
+
+        self.assertEqual(self.instance.connections_count, 2)
+
+    def test_concurrent_clients(self):
+        consoles = [helpers.get_control_console(self.console_sock) for _ in range(5)]
+        errors = []
+
+        def do_requests(console, n):
+            try:
+                for i in range(20):
+                    cmd = 'client-%d-%d' % (n, i)
+                    self.assertEqual(console.request(cmd), '---\n- %s\n...\n' % cmd)
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=do_requests, args=(c, n)) for n, c in enumerate(consoles)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(self.instance.connections_count, 1)
+
+    def test_instance_restarted(self):
+        console = helpers.get_control_console(self.console_sock)
+        self.assertEqual(console.request('before'), '---\n- before\n...\n')
+
+        self.instance.stop()
+        self.instance = FakeInstanceConsole(self.console_sock)
+        self.instance.start()
+
+        self.assertEqual(console.request('after'), '---\n- after\n...\n')
+        self.assertEqual(self.instance.connections_count, 1)
+
+    def test_instance_errors(self):
+        # instance socket doesn't exist
+        self.instance.stop()
+        with self.assertRaises(helpers.CartridgeException) as ctx:
+            helpers.get_control_console(self.console_sock)
+        self.assertEqual(ctx.exception.code, helpers.CartridgeErrorCodes.SOCKET_NOT_FOUND)
+
+        # instance socket exists, but nobody listens
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        server.bind(self.console_sock)
+        server.close()
+
+        with self.assertRaises(helpers.CartridgeException) as ctx:
+            helpers.get_control_console(self.console_sock)
+        self.assertEqual(ctx.exception.code, helpers.CartridgeErrorCodes.INSTANCE_IS_NOT_STARTED_YET)
+
+    def test_fallback_to_direct_connection(self):
+        other_dir = tempfile.mkdtemp()
+        try:
+            # stale broker socket
+            stale_broker_sock = os.path.join(other_dir, helpers.CONSOLE_BROKER_SOCK_NAME)
+            server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            server.bind(stale_broker_sock)
+            server.close()
+
+            console_sock = os.path.join(other_dir, 'myapp.instance-2.control')
+            instance = FakeInstanceConsole(console_sock)
+            instance.start()
+
+            console = helpers.get_control_console(console_sock)
+            self.assertNotIsInstance(console, helpers.BrokerConsole)
+            self.assertEqual(console.request('direct'), '---\n- direct\n...\n')
+            self.assertEqual(instance.connections_count, 1)
+        finally:
+            shutil.rmtree(other_dir)
+
+    def tearDown(self):
+        del os.environ[helpers.CONSOLE_BROKER_ENV]
+        shutil.rmtree(self.run_dir)
+
+
+class TestStopConsoleBroker(unittest.TestCase):
+    def setUp(self):
+        self.run_dir = tempfile.mkdtemp()
+        self.broker_sock = os.path.join(self.run_dir, helpers.CONSOLE_BROKER_SOCK_NAME)
+        self.pid_file = os.path.join(self.run_dir, helpers.CONSOLE_BROKER_PID_FILE_NAME)
+
+    def write_pid_file(self, pid, start_time):
+        with open(self.pid_file, 'w') as f:
+            f.write('%d %s' % (pid, start_time))
+
+    @unittest.skipIf(not os.path.exists('/proc/self/stat'), '/proc is required')
+    def test_get_broker_pid(self):
+        pid = os.getpid()
+
+        self.write_pid_file(pid, get_process_start_time(pid))
+        self.assertEqual(get_broker_pid(self.pid_file), pid)
+
+        # PID is reused by another process
+        self.write_pid_file(pid, 'some-other-start-time')
+        self.assertIsNone(get_broker_pid(self.pid_file))
+
+        # PID file of the old format
+        with open(self.pid_file, 'w') as f:
+            f.write(str(pid))
+        self.assertIsNone(get_broker_pid(self.pid_file))
+
+    def test_shutdown_by_request(self):
+        broker = Broker(self.broker_sock, idle_timeout=60)
+        thread = threading.Thread(target=broker.serve)
+        thread.daemon = True
+        thread.start()
+
+        for _ in range(50):
+            if os.path.exists(self.broker_sock):
+                break
+            time.sleep(0.1)
+
+        self.assertTrue(request_broker_shutdown(self.broker_sock))
+        thread.join(5)
+        self.assertFalse(thread.is_alive())
+
+        self.assertFalse(request_broker_shutdown(self.broker_sock))
+
+    def test_alien_process_isnt_killed(self):
+        # broker died, its PID is taken by another process
+        process = subprocess.Popen(['sleep', '60'])
+        try:
+            self.write_pid_file(process.pid, 'broker-start-time')
+
+            res = stop_broker(self.run_dir)
+            self.assertFalse(res.failed, msg=res.msg)
+            self.assertFalse(res.changed)
+
+            self.assertIsNone(process.poll())
+            self.assertFalse(os.path.exists(self.pid_file))
+        finally:
+            process.kill()
+            process.wait()
+
+    def tearDown(self):
+        shutil.rmtree(self.run_dir)
@@ -125,6 +125,32 @@ class TestEditTopology(unittest.TestCase):
             }],
         })
 
+    def test_cluster_is_not_healthy(self):
+        self.instance.add_replicaset(
+            alias='r1',
+            instances=['r1-leader', 'r1-replica'],
+            all_rw=False,
+        )
+
+        rpl_vars = {
+            'replicaset_alias': 'r1',
+            'all_rw': True
+        }
+
+        hostvars = {
+            'r1-leader': rpl_vars,
+            'r1-replica': rpl_vars,
+        }
+
+        self.instance.set_is_healthy(False)
+        self.instance.clear_calls('edit_topology')
+
+        res = call_edit_topology(self.console_sock, hostvars, timeout=1)
+        self.assertTrue(res.failed)
+        self.assertIn("Cluster isn't healthy in", res.msg)
+        self.assertEqual(len(self.instance.get_calls('edit_topology')), 1)
+        self.assertEqual(res.fact['commits'], 1)
+
     @parameterized.expand([
         [True],  # allow_missed_instances
         [False],
@@ -504,7 +530,8 @@ class TestEditTopology(unittest.TestCase):
         self.assertEqual(replicasets_opts, exp_replicasets_opts)
 
         # join new instance and add it to the top of failover priority
-        # expected two calls: join_servers and failover_priority
+        # expected one call with join_servers and failover_priority,
+        # UUID of joined instance is generated by module
         rpl1_vars = {
             'replicaset_alias': 'r1',
             'failover_priority': ['r1-replica', 'r1-replica-3', 'r1-replica-2', 'r1-leader'],
@@ -527,45 +554,38 @@ class TestEditTopology(unittest.TestCase):
         self.assertTrue(res.changed)
         calls = self.instance.get_calls('edit_topology')
 
-        self.assertEqual(len(calls), 2, msg=calls)
+        self.assertEqual(len(calls), 1, msg=calls)
 
-        join_call = calls[0]
+        call = calls[0]
         self.assertNotIn('servers', call)
         self.assertIn('replicasets', call)
 
-        replicasets_opts = join_call['replicasets']
+        replicasets_opts = call['replicasets']
         self.assertEqual(len(replicasets_opts), 1)
 
-        exp_replicasets_opts = [
-            {
-                'uuid': 'r1-uuid',
-                'join_servers': [
-                    {'uri': uri}
-                    for uri in ['r1-replica-3-uri']
-                ]
-            },
-        ]
-
-        self.assertEqual(replicasets_opts, exp_replicasets_opts)
-
-        failover_priority_call = calls[1]
-        self.assertNotIn('servers', call)
-        self.assertIn('replicasets', call)
-
-        replicasets_opts = failover_priority_call['replicasets']
-        self.assertEqual(len(replicasets_opts), 1)
+        join_servers = replicasets_opts[0]['join_servers']
+        self.assertEqual(len(join_servers), 1)
+        self.assertEqual(join_servers[0]['uri'], 'r1-replica-3-uri')
+        r1_replica_3_uuid = join_servers[0]['uuid']
 
         exp_replicasets_opts = [
             {
                 'uuid': 'r1-uuid',
+                'join_servers': [
+                    {'uri': 'r1-replica-3-uri', 'uuid': r1_replica_3_uuid},
+                ],
                 'failover_priority': [
-                    'r1-replica-uuid', 'r1-replica-3-uuid', 'r1-replica-2-uuid', 'r1-leader-uuid'
+                    'r1-replica-uuid', r1_replica_3_uuid, 'r1-replica-2-uuid', 'r1-leader-uuid'
                 ]
             },
         ]
 
         self.assertEqual(replicasets_opts, exp_replicasets_opts)
 
+        self.assertEqual(res.fact['commits'], 1)
+        self.assertEqual(res.fact['plan'], calls)
+        self.assertEqual(len(res.fact['healthy_wait_times']), 1)
+
     @parameterized.expand([
         [True],  # allow_missed_instances
         [False],
@@ -771,30 +791,46 @@ class TestEditTopology(unittest.TestCase):
         calls = self.instance.get_calls('edit_topology')
         self.assertEqual(len(calls), 2)
 
-        # first call - join new instance and set r1-replica zone
-        self.assertEqual(calls[0], {
-            'replicasets': [{
-                'uuid': 'r1-uuid',
-                'join_servers': [{'uri': 'r1-replica-2-uri'}],
-            }],
-            'servers': [{
+        # join new instance and set zones in one call
+        call = calls[0]
+        r1_replica_2_uuid = call['replicasets'][0]['join_servers'][0]['uuid']
+
+        self.assertEqual(call['replicasets'], [{
+            'uuid': 'r1-uuid',
+            'join_servers': [{'uri': 'r1-replica-2-uri', 'uuid': r1_replica_2_uuid}],
+        }])
+
+        self.assertEqual(sorted(call['servers'], key=lambda s: s['zone']), [
+            {
                 'uuid': 'r1-replica-uuid',
                 'zone': 'Hogwarts'
-            }]
-        })
+            },
+            {
+                'uuid': r1_replica_2_uuid,
+                'zone': 'Mordor'
+            },
+        ])
 
-        # first call - set failover_priority and r1-replica-2 zone
-        self.assertEqual(calls[1], {
+        # joined instance becomes a leader on the next call
+        call = calls[1]
+        self.assertEqual(call, {
             'replicasets': [{
                 'uuid': 'r1-uuid',
-                'failover_priority': ['r1-replica-2-uuid'],
+                'failover_priority': [r1_replica_2_uuid],
             }],
-            'servers': [{
-                'uuid': 'r1-replica-2-uuid',
-                'zone': 'Mordor'
-            }]
         })
 
+        # call with the same configuration
+        self.instance.clear_calls('edit_topology')
+        res = call_edit_topology(
+            self.console_sock,
+            hostvars
+        )
+        self.assertFalse(res.failed, msg=res.msg)
+        self.assertFalse(res.changed)
+        self.assertEqual(res.fact, {'commits': 0, 'plan': [], 'healthy_wait_times': []})
+        self.assertEqual(len(self.instance.get_calls('edit_topology')), 0)
+
     def tearDown(self):
         self.instance.stop()
         del self.instance
@@ -9,6 +9,10 @@ from library.cartridge_edit_topology import get_new_replicasets
 from library.cartridge_edit_topology import get_new_instances
 from library.cartridge_edit_topology import get_replicaset_params
 from library.cartridge_edit_topology import get_server_params
+from library.cartridge_edit_topology import get_topology_params
+from library.cartridge_edit_topology import get_topology_index
+from library.cartridge_edit_topology import check_new_replicasets_for_dangerous_changes
+from library.cartridge_edit_topology import edit_topology
 
 
 def call_get_configured_replicasets(hostvars, play_hosts=None):
@@ -624,3 +628,265 @@ class TestGetServerParams(unittest.TestCase):
             'uuid': 'joined-uuid',
             'zone': 'other-zone',
         })
+
+        # server is joined on the same call, UUID is generated
+        join_servers = {'not-joined': {'uri': 'not-joined-uri'}}
+        instance_params = {
+            'zone': 'some-zone',
+        }
+        params, err = get_server_params(
+            'not-joined', instance_params, cluster_instances, allow_missed_instances, join_servers
+        )
+        self.assertIsNone(err)
+        self.assertEqual(params, {
+            'uuid': join_servers['not-joined']['uuid'],
+            'zone': 'some-zone',
+        })
+
+        # server is joined on the same call, but isn't configured
+        join_servers = {'not-joined': {'uri': 'not-joined-uri'}}
+        params, err = get_server_params('not-joined', {}, cluster_instances, allow_missed_instances, join_servers)
+        self.assertIsNone(err)
+        self.assertIsNone(params)
+        self.assertNotIn('uuid', join_servers['not-joined'])
+
+
+class TestGetTopologyParams(unittest.TestCase):
+    def setUp(self):
+        self.cluster_instances = {
+            alias: {'uri': '%s-uri' % alias, 'alias': alias, 'uuid': '%s-uuid' % alias}
+            for alias in ['r1-leader', 'r1-replica']
+        }
+        self.cluster_instances['r1-new'] = {'uri': 'r1-new-uri', 'alias': 'r1-new', 'uuid': ''}
+
+        self.cluster_replicasets = {
+            'r1': {
+                'uuid': 'r1-uuid',
+                'alias': 'r1',
+                'instances': ['r1-leader', 'r1-replica'],
+                'leader_uuid': 'r1-leader-uuid',
+            },
+        }
+
+    def test_merge_join_with_failover_priority_and_servers(self):
+        new_replicasets = {
+            'r1': {
+                'alias': 'r1',
+                'instances': ['r1-leader', 'r1-replica', 'r1-new'],
+                'failover_priority': ['r1-leader', 'r1-new'],
+            },
+        }
+        new_instances = {
+            'r1-new': {'zone': 'new-zone', 'uri': 'r1-new-uri'},
+            'r1-replica': {'disabled': True, 'uri': 'r1-replica-uri'},
+        }
+
+        params, err = get_topology_params(
+            new_instances, self.cluster_instances,
+            new_replicasets, self.cluster_replicasets,
+            allow_missed_instances=False,
+        )
+        self.assertIsNone(err)
+
+        r1_new_uuid = params['replicasets'][0]['join_servers'][0]['uuid']
+        self.assertEqual(params['replicasets'], [{
+            'uuid': 'r1-uuid',
+            'join_servers': [{'uri': 'r1-new-uri', 'uuid': r1_new_uuid}],
+            'failover_priority': ['r1-leader-uuid', r1_new_uuid],
+        }])
+        self.assertEqual(sorted(params['servers'], key=lambda s: s['uuid']), sorted([
+            {'uuid': r1_new_uuid, 'zone': 'new-zone'},
+            {'uuid': 'r1-replica-uuid', 'disabled': True},
+        ], key=lambda s: s['uuid']))
+
+    def test_joined_leader(self):
+        new_replicasets = {
+            'r1': {
+                'alias': 'r1',
+                'instances': ['r1-leader', 'r1-replica', 'r1-new'],
+                'failover_priority': ['r1-new', 'r1-leader'],
+            },
+        }
+
+        params, err = get_topology_params(
+            {}, self.cluster_instances,
+            new_replicasets, self.cluster_replicasets,
+            allow_missed_instances=False,
+        )
+        self.assertIsNone(err)
+
+        # joined instance becomes a leader on the next call
+        self.assertEqual(params, {
+            'replicasets': [{
+                'uuid': 'r1-uuid',
+                'join_servers': [{'uri': 'r1-new-uri'}],
+            }],
+        })
+
+        self.cluster_instances['r1-new']['uuid'] = 'r1-new-uuid'
+        self.cluster_replicasets['r1']['instances'].append('r1-new')
+
+        params, err = get_topology_params(
+            {}, self.cluster_instances,
+            new_replicasets, self.cluster_replicasets,
+            allow_missed_instances=False,
+        )
+        self.assertIsNone(err)
+        self.assertEqual(params, {
+            'replicasets': [{
+                'uuid': 'r1-uuid',
+                'failover_priority': ['r1-new-uuid', 'r1-leader-uuid'],
+            }],
+        })
+
+    def test_join_to_the_end_of_failover_priority(self):
+        new_replicasets = {
+            'r1': {
+                'alias': 'r1',
+                'instances': ['r1-leader', 'r1-replica', 'r1-new'],
+                'failover_priority': ['r1-leader', 'r1-replica', 'r1-new'],
+            },
+        }
+
+        params, err = get_topology_params(
+            {}, self.cluster_instances,
+            new_replicasets, self.cluster_replicasets,
+            allow_missed_instances=False,
+        )
+        self.assertIsNone(err)
+
+        # UUID isn't required
+        self.assertEqual(params, {
+            'replicasets': [{
+                'uuid': 'r1-uuid',
+                'join_servers': [{'uri': 'r1-new-uri'}],
+            }],
+        })
+
+    def test_leader_not_first(self):
+        self.cluster_replicasets['r1']['leader_uuid'] = 'r1-replica-uuid'
+
+        new_replicasets = {
+            'r1': {
+                'alias': 'r1',
+                'instances': ['r1-leader', 'r1-replica', 'r1-new'],
+                'failover_priority': ['r1-new', 'r1-leader'],
+            },
+        }
+        new_instances = {
+            'r1-new': {'zone': 'new-zone', 'uri': 'r1-new-uri'},
+        }
+
+        params, err = get_topology_params(
+            new_instances, self.cluster_instances,
+            new_replicasets, self.cluster_replicasets,
+            allow_missed_instances=False,
+        )
+        self.assertIsNone(err)
+
+        # only temporary failover priority is set,
+        # instance is joined and configured on the next call
+        self.assertEqual(params, {
+            'replicasets': [{
+                'uuid': 'r1-uuid',
+                'failover_priority': ['r1-replica-uuid', 'r1-leader-uuid'],
+            }],
+        })
+
+    def test_join_new_replicaset_in_failover_priority_order(self):
+        for alias in ['r2-first', 'r2-second']:
+            self.cluster_instances[alias] = {'uri': '%s-uri' % alias, 'alias': alias, 'uuid': ''}
+
+        def get_join_uris(failover_priority):
+            new_replicasets = {
+                'r2': {
+                    'alias': 'r2',
+                    'instances': ['r2-first', 'r2-second'],
+                    'roles': ['vshard-storage'],
+                    'failover_priority': failover_priority,
+                },
+            }
+            params, err = get_topology_params(
+                {}, self.cluster_instances,
+                new_replicasets, self.cluster_replicasets,
+                allow_missed_instances=False,
+            )
+            self.assertIsNone(err)
+            return [s['uri'] for s in params['replicasets'][0]['join_servers']]
+
+        # instance that isn't in failover priority is joined after listed ones,
+        # even if failover priority is longer than the list of instances to join
+        self.assertEqual(get_join_uris(['r1-leader', 'r1-replica', 'r2-second']), [
+            'r2-second-uri', 'r2-first-uri',
+        ])
+
+    def test_topology_index(self):
+        self.cluster_replicasets['r1']['leader_uuid'] = 'r1-replica-uuid'
+        new_replicasets = {
+            'r1': {'alias': 'r1', 'instances': ['r1-leader', 'r1-replica'], 'failover_priority': ['r1-replica']},
+            'r2': {'alias': 'r2', 'instances': ['r1-new']},
+        }
+
+        index = get_topology_index(self.cluster_instances, self.cluster_replicasets, new_replicasets)
+        self.assertEqual(index, {
+            'names_by_uris': {
+                'r1-leader-uri': 'r1-leader',
+                'r1-replica-uri': 'r1-replica',
+                'r1-new-uri': 'r1-new',
+            },
+            'replicasets_by_names': {'r1-leader': 'r1-uuid', 'r1-replica': 'r1-uuid'},
+            'failover_orders': {'r1-uuid': ['r1-leader-uuid', 'r1-replica-uuid']},
+            'failover_priority_indexes': {'r1': {'r1-replica': 0}},
+        })
+
+        # the first occurrence of the duplicated instance is used
+        new_replicasets['r1']['failover_priority'] = ['r1-replica', 'r1-leader', 'r1-replica']
+        index = get_topology_index(self.cluster_instances, self.cluster_replicasets, new_replicasets)
+        self.assertEqual(index['failover_priority_indexes'], {'r1': {'r1-replica': 0, 'r1-leader': 1}})
+
+
+class TestEditTopologyPlan(unittest.TestCase):
+    def test_nothing_to_change(self):
+        res = edit_topology({
+            'console_sock': None,
+            'module_hostvars': {
+                'instance-1': {'replicaset_alias': 'r1'},
+            },
+            'play_hosts': [],
+            'healthy_timeout': 60,
+            'allow_missed_instances': False,
+        })
+        self.assertFalse(res.failed, msg=res.msg)
+        self.assertFalse(res.changed)
+        self.assertEqual(res.fact, {'commits': 0, 'plan': [], 'healthy_wait_times': []})
+
+
+class TestCheckNewReplicasets(unittest.TestCase):
+    def test_renamed_and_extra_replicasets(self):
+        old_replicasets = {
+            'r1': {'alias': 'r1', 'instances': ['i1', 'i2']},
+            'r2-old': {'alias': 'r2-old', 'instances': ['i3', 'i4']},
+            'r3-old': {'alias': 'r3-old', 'instances': ['i5']},
+            'r4': {'alias': 'r4', 'instances': ['i6']},
+        }
+
+        all_new_replicasets = {
+            'r1': {'alias': 'r1', 'instances': ['i2', 'i1']},
+            'r2': {'alias': 'r2', 'instances': ['i4', 'i3']},
+            'r3': {'alias': 'r3', 'instances': ['i5']},
+        }
+
+        # r3 isn't in play hosts
+        new_replicasets = {
+            'r1': all_new_replicasets['r1'],
+            'r2': all_new_replicasets['r2'],
+        }
+
+        errors = check_new_replicasets_for_dangerous_changes(
+            all_new_replicasets, new_replicasets, old_replicasets, {},
+        )
+        self.assertEqual(errors, [
+            'looks like that some replicasets has been renamed in UI, '
+            'you should rename them in inventory: r2 -> r2-old',
+            'some replicasets from cluster are missing in inventory, you should add them: r4',
+        ])
@@ -7,8 +7,8 @@ import yaml
 import module_utils.helpers as helpers
 
 sys.modules['ansible.module_utils.helpers'] = helpers
-from filter_plugins.filters import get_cached_facts
-from library.cartridge_validate_config import SCHEMA
+from filter_plugins.filters import get_cached_facts, merge_fact_targets
+from module_utils.validate_config import SCHEMA
 
 
 class TestGetCachedFacts(unittest.TestCase):
@@ -157,3 +157,38 @@ class TestGetCachedFacts(unittest.TestCase):
 
     def test_validate_config_cached_facts(self):
         self.assertEqual(sorted(SCHEMA.keys()), sorted(self.cached_fact_names_by_target['validate_config']))
+
+    def test_merge_fact_targets(self):
+        fact_names_by_target = {
+            'validate_config': ['config', 'disabled'],
+            'count_disabled_instances': ['instance_info', 'disabled'],
+            'edit_topology': ['config'],
+        }
+        self.assertEqual(merge_fact_targets(
+            fact_names_by_target, ['validate_config', 'count_disabled_instances'], 'prepare',
+        ), {
+            'edit_topology': ['config'],
+            'prepare': ['config', 'disabled', 'instance_info'],
+        })
+
+        merged_fact_names_by_target = merge_fact_targets(
+            self.cached_fact_names_by_target,
+            ['validate_config', 'count_disabled_instances', 'facts_for_machines'],
+            'prepare',
+        )
+        res = get_cached_facts({
+            'instance_1': {
+                'config': {'advertise_uri': '10.0.0.1:3001'},
+                'ansible_host': 'some_host',
+                'instance_info': {'disabled_instances': []},
+                'random_arg': {'test': 'value'},
+            },
+        }, merged_fact_names_by_target)
+        self.assertNotIn('validate_config', res)
+        self.assertEqual(res['prepare'], {
+            'instance_1': {
+                'config': {'advertise_uri': '10.0.0.1:3001'},
+                'ansible_host': 'some_host',
+                'instance_info': {'disabled_instances': []},
+            },
+        })
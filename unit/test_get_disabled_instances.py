@@ -4,7 +4,7 @@ import unittest
 import module_utils.helpers as helpers
 
 sys.modules['ansible.module_utils.helpers'] = helpers
-from library.cartridge_get_disabled_instances import count_disabled_instances
+from module_utils.disabled_instances import count_disabled_instances
 
 
 def call_count_disabled_instances(
@@ -4,7 +4,7 @@ import unittest
 import module_utils.helpers as helpers
 
 sys.modules['ansible.module_utils.helpers'] = helpers
-from library.cartridge_get_facts_for_machines import get_facts_for_machines
+from module_utils.facts_for_machines import get_facts_for_machines
 
 
 def call_get_facts_for_machine(module_hostvars, play_hosts=None, cluster_disabled_instances=None):
@@ -32,6 +32,13 @@ class TestGetInstanceInfo(unittest.TestCase):
         pid_file = helpers.get_instance_pid_file('some/run/dir', 'myapp', 'instance-1', stateboard=True)
         self.assertEqual(pid_file, 'some/run/dir/myapp-stateboard.pid')
 
+    def test_state_file(self):
+        state_file = helpers.get_instance_state_file('some/run/dir', 'myapp', 'instance-1')
+        self.assertEqual(state_file, 'some/run/dir/myapp.instance-1.state')
+
+        state_file = helpers.get_instance_state_file('some/run/dir', 'myapp', 'instance-1', stateboard=True)
+        self.assertEqual(state_file, 'some/run/dir/myapp-stateboard.state')
+
     def test_console_sock(self):
         console_sock = helpers.get_instance_console_sock('some/run/dir', 'myapp', 'instance-1')
         self.assertEqual(console_sock, 'some/run/dir/myapp.instance-1.control')
@@ -115,6 +122,7 @@ class TestGetInstanceInfo(unittest.TestCase):
             'instance_id': 'myapp.instance-1',
             'console_sock': 'some/run/dir/myapp.instance-1.control',
             'pid_file': 'some/run/dir/myapp.instance-1.pid',
+            'state_file': 'some/run/dir/myapp.instance-1.state',
             'work_dir': 'some/data/dir/myapp.instance-1',
             'memtx_dir': 'some/memtx/dir/myapp.instance-1',
             'vinyl_dir': 'some/vinyl/dir/myapp.instance-1',
@@ -133,6 +141,7 @@ class TestGetInstanceInfo(unittest.TestCase):
                 'some/memtx/dir/myapp.instance-1',
                 'some/run/dir/myapp.instance-1.control',
                 'some/run/dir/myapp.instance-1.pid',
+                'some/run/dir/myapp.instance-1.state',
                 'some/vinyl/dir/myapp.instance-1',
                 'some/wal/dir/myapp.instance-1',
             ],
@@ -190,6 +199,7 @@ class TestGetInstanceInfo(unittest.TestCase):
             'instance_id': 'myapp.instance-1',
             'console_sock': 'some/run/dir/myapp.instance-1.control',
             'pid_file': 'some/run/dir/myapp.instance-1.pid',
+            'state_file': 'some/run/dir/myapp.instance-1.state',
             'work_dir': 'some/data/dir/myapp.instance-1',
             'memtx_dir': None,
             'vinyl_dir': None,
@@ -206,6 +216,7 @@ class TestGetInstanceInfo(unittest.TestCase):
                 'some/data/dir/myapp.instance-1',
                 'some/run/dir/myapp.instance-1.control',
                 'some/run/dir/myapp.instance-1.pid',
+                'some/run/dir/myapp.instance-1.state',
             ],
             'paths_to_backup_files': [
                 '/some/tmpfiles/dir/myapp.conf',
@@ -251,6 +262,7 @@ class TestGetInstanceInfo(unittest.TestCase):
             'instance_id': 'myapp.instance-1',
             'console_sock': 'some/run/dir/myapp.instance-1.control',
             'pid_file': 'some/run/dir/myapp.instance-1.pid',
+            'state_file': 'some/run/dir/myapp.instance-1.state',
             'work_dir': 'some/data/dir/myapp.instance-1',
             'memtx_dir': None,
             'vinyl_dir': None,
@@ -267,6 +279,7 @@ class TestGetInstanceInfo(unittest.TestCase):
                 'some/data/dir/myapp.instance-1',
                 'some/run/dir/myapp.instance-1.control',
                 'some/run/dir/myapp.instance-1.pid',
+                'some/run/dir/myapp.instance-1.state',
             ],
             'paths_to_backup_files': [
                 '/some/tmpfiles/dir/myapp.conf',
@@ -315,6 +328,7 @@ class TestGetInstanceInfo(unittest.TestCase):
             'instance_id': 'myapp-stateboard',
             'console_sock': 'some/run/dir/myapp-stateboard.control',
             'pid_file': 'some/run/dir/myapp-stateboard.pid',
+            'state_file': 'some/run/dir/myapp-stateboard.state',
             'work_dir': 'some/data/dir/myapp-stateboard',
             'memtx_dir': None,
             'vinyl_dir': None,
@@ -331,6 +345,7 @@ class TestGetInstanceInfo(unittest.TestCase):
                 'some/data/dir/myapp-stateboard',
                 'some/run/dir/myapp-stateboard.control',
                 'some/run/dir/myapp-stateboard.pid',
+                'some/run/dir/myapp-stateboard.state',
             ],
             'paths_to_backup_files': [
                 '/some/tmpfiles/dir/myapp.conf',
@@ -379,6 +394,7 @@ class TestGetInstanceInfo(unittest.TestCase):
             'instance_id': 'myapp-stateboard',
             'console_sock': 'some/run/dir/myapp-stateboard.control',
             'pid_file': 'some/run/dir/myapp-stateboard.pid',
+            'state_file': 'some/run/dir/myapp-stateboard.state',
             'work_dir': 'some/data/dir/myapp-stateboard',
             'memtx_dir': 'some/memtx/dir/myapp-stateboard',
             'vinyl_dir': 'some/vinyl/dir/myapp-stateboard',
@@ -397,6 +413,7 @@ class TestGetInstanceInfo(unittest.TestCase):
                 'some/memtx/dir/myapp-stateboard',
                 'some/run/dir/myapp-stateboard.control',
                 'some/run/dir/myapp-stateboard.pid',
+                'some/run/dir/myapp-stateboard.state',
                 'some/vinyl/dir/myapp-stateboard',
                 'some/wal/dir/myapp-stateboard',
             ],
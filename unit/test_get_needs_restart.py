@@ -1,5 +1,9 @@
 import itertools
+import os
+import shutil
+import subprocess
 import sys
+import tempfile
 import unittest
 
 from parameterized import parameterized
@@ -8,7 +12,16 @@ import module_utils.helpers as helpers
 from unit.instance import Instance
 
 sys.modules['ansible.module_utils.helpers'] = helpers
+try:
+    import module_utils.async_console as async_console
+    sys.modules['ansible.module_utils.async_console'] = async_console
+except (ImportError, SyntaxError):
+    pass
+import module_utils.instance_state as instance_state
+sys.modules['ansible.module_utils.instance_state'] = instance_state
+import library.cartridge_get_needs_restart as get_needs_restart
 from library.cartridge_get_needs_restart import set_needs_restart
+from library.cartridge_save_instance_state import save_instance_state
 
 
 def call_needs_restart(
@@ -26,6 +39,7 @@ def call_needs_restart(
     check_package_updated=False,
     check_config_updated=False,
     keys_to_remove=None,
+    machine_mode=False,
 ):
     instance_info = {
         'console_sock': console_sock,
@@ -51,6 +65,17 @@ def call_needs_restart(
         for key in keys_to_remove:
             del params[key]
 
+    if machine_mode:
+        # check one instance in machine-level mode
+        params['instances'] = [{
+            key: params.pop(key) for key in ['instance_info', 'config', 'stateboard'] if key in params
+        }]
+
+        res = set_needs_restart(params)
+        if not res.failed:
+            res.fact = res.fact[instance_id]
+        return res
+
     return set_needs_restart(params)
 
 
@@ -138,12 +163,14 @@ class TestGetNeedsRestart(unittest.TestCase):
         self.assertFalse(res.failed, res.msg)
         self.assertTrue(res.fact)
 
-    def test_instance_not_running(self):
+    @parameterized.expand([[False], [True]])
+    def test_instance_not_running(self, machine_mode):
         # console sock doesn't exists
         self.instance.remove_file(self.console_sock)
 
         res = call_needs_restart(
-            console_sock=self.console_sock
+            console_sock=self.console_sock,
+            machine_mode=machine_mode,
         )
 
         self.assertFalse(res.failed, msg=res.msg)
@@ -155,7 +182,8 @@ class TestGetNeedsRestart(unittest.TestCase):
         self.instance.write_file(bad_socket_path)
 
         res = call_needs_restart(
-            console_sock=bad_socket_path
+            console_sock=bad_socket_path,
+            machine_mode=machine_mode,
         )
 
         self.assertFalse(res.failed, msg=res.msg)
@@ -209,12 +237,17 @@ class TestGetNeedsRestart(unittest.TestCase):
         self.assertTrue(res.changed)
         self.assertTrue(res.fact)
 
-    def test_code_was_updated(self):
+    @parameterized.expand([[False], [True]])
+    def test_code_was_updated(self, machine_mode):
         # code was updated yesterday, socket today - restart isn't needed
         self.instance.set_path_m_time(self.instance.APP_CODE_PATH, self.instance.DATE_YESTERDAY)
         self.instance.set_path_m_time(self.console_sock, self.instance.DATE_TODAY)
 
-        res = call_needs_restart(console_sock=self.console_sock, check_package_updated=True)
+        res = call_needs_restart(
+            console_sock=self.console_sock,
+            machine_mode=machine_mode,
+            check_package_updated=True,
+        )
         self.assertFalse(res.failed, msg=res.msg)
         self.assertFalse(res.changed)
         self.assertFalse(res.fact)
@@ -224,11 +257,15 @@ class TestGetNeedsRestart(unittest.TestCase):
         self.instance.set_path_m_time(self.console_sock, self.instance.DATE_YESTERDAY)
 
         # no check
-        res = call_needs_restart(console_sock=self.console_sock)
+        res = call_needs_restart(console_sock=self.console_sock, machine_mode=machine_mode)
         self.assertFalse(res.failed, msg=res.msg)
         self.assertFalse(res.changed)
 
-        res = call_needs_restart(console_sock=self.console_sock, check_package_updated=True)
+        res = call_needs_restart(
+            console_sock=self.console_sock,
+            machine_mode=machine_mode,
+            check_package_updated=True,
+        )
         self.assertFalse(res.failed, msg=res.msg)
         self.assertTrue(res.changed)
         self.assertTrue(res.fact)
@@ -237,9 +274,10 @@ class TestGetNeedsRestart(unittest.TestCase):
         itertools.product(
             ["instance", "stateboard"],
             ["memtx_memory", "vinyl_memory"],
+            [False, True],
         )
     )
-    def test_config_changed(self, instance_type, memory_param_name):
+    def test_config_changed(self, instance_type, memory_param_name, machine_mode):
         param_name = 'param'
         param_current_value = 'current-value'
         param_new_value = 'new-value'
@@ -264,6 +302,7 @@ class TestGetNeedsRestart(unittest.TestCase):
             },
             stateboard=stateboard,
             check_config_updated=True,
+            machine_mode=machine_mode,
         )
         self.assertFalse(res.failed, msg=res.msg)
         self.assertFalse(res.changed)
@@ -278,6 +317,7 @@ class TestGetNeedsRestart(unittest.TestCase):
             },
             stateboard=stateboard,
             check_config_updated=True,
+            machine_mode=machine_mode,
         )
         self.assertFalse(res.failed, msg=res.msg)
         self.assertTrue(res.changed)
@@ -295,6 +335,7 @@ class TestGetNeedsRestart(unittest.TestCase):
             },
             stateboard=stateboard,
             check_config_updated=True,
+            machine_mode=machine_mode,
         )
         self.assertFalse(res.failed, msg=res.msg)
         self.assertTrue(res.changed)
@@ -312,6 +353,7 @@ class TestGetNeedsRestart(unittest.TestCase):
             },
             stateboard=stateboard,
             check_config_updated=True,
+            machine_mode=machine_mode,
         )
         self.assertFalse(res.failed, msg=res.msg)
         self.assertFalse(res.changed)
@@ -329,6 +371,7 @@ class TestGetNeedsRestart(unittest.TestCase):
             },
             stateboard=stateboard,
             check_config_updated=True,
+            machine_mode=machine_mode,
         )
         self.assertFalse(res.failed, msg=res.msg)
         self.assertTrue(res.changed)
@@ -338,9 +381,10 @@ class TestGetNeedsRestart(unittest.TestCase):
         itertools.product(
             ["instance", "stateboard"],
             ["memtx_memory", "vinyl_memory"],
+            [False, True],
         )
     )
-    def test_app_config_changed(self, instance_type, memory_param_name):
+    def test_app_config_changed(self, instance_type, memory_param_name, machine_mode):
         param_name = 'param'
         param_current_value = 'current-value'
         param_new_value = 'new-value'
@@ -365,6 +409,7 @@ class TestGetNeedsRestart(unittest.TestCase):
             },
             stateboard=stateboard,
             check_config_updated=True,
+            machine_mode=machine_mode,
         )
         self.assertFalse(res.failed, msg=res.msg)
         self.assertFalse(res.changed)
@@ -379,6 +424,7 @@ class TestGetNeedsRestart(unittest.TestCase):
             },
             stateboard=stateboard,
             check_config_updated=True,
+            machine_mode=machine_mode,
         )
         self.assertFalse(res.failed, msg=res.msg)
         if not stateboard:
@@ -400,6 +446,7 @@ class TestGetNeedsRestart(unittest.TestCase):
             },
             stateboard=stateboard,
             check_config_updated=True,
+            machine_mode=machine_mode,
         )
         self.assertFalse(res.failed, msg=res.msg)
         if not stateboard:
@@ -421,6 +468,7 @@ class TestGetNeedsRestart(unittest.TestCase):
             },
             stateboard=stateboard,
             check_config_updated=True,
+            machine_mode=machine_mode,
         )
         self.assertFalse(res.failed, msg=res.msg)
         self.assertFalse(res.changed)
@@ -438,6 +486,7 @@ class TestGetNeedsRestart(unittest.TestCase):
             },
             stateboard=stateboard,
             check_config_updated=True,
+            machine_mode=machine_mode,
         )
         self.assertFalse(res.failed, msg=res.msg)
         if not stateboard:
@@ -546,3 +595,286 @@ class TestGetNeedsRestart(unittest.TestCase):
     def tearDown(self):
         self.instance.stop()
         del self.instance
+
+
+class FakeInstanceConsole:
+    # Console of the running instance that returns `box_cfg`
+    # (None if box.cfg wasn't called) on any eval
+    def __init__(self, box_cfg):
+        self.box_cfg = box_cfg
+        self.running = True
+        self.evals_count = 0
+        self.connections_count = 0
+
+    def get_control_console(self, console_sock):
+        self.connections_count += 1
+        if not self.running:
+            raise helpers.CartridgeException(
+                helpers.CartridgeErrorCodes.FAILED_TO_CONNECT_TO_SOCKET, 'Failed to connect to %s' % console_sock,
+            )
+        return self
+
+    def eval(self, func_body, *args):
+        self.evals_count += 1
+        return [self.box_cfg is not None]
+
+    def eval_res_err(self, func_body, *args):
+        self.evals_count += 1
+        return self.box_cfg, None
+
+    def gather_evals(self, console_socks, func_body, args=None, concurrency=None):
+        results = {}
+        for console_sock in console_socks:
+            try:
+                results[console_sock] = self.get_control_console(console_sock).eval_res_err(func_body)
+            except helpers.CartridgeException as e:
+                results[console_sock] = e
+        return results
+
+
+class TestGetNeedsRestartByHashes(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.dist_dir = os.path.join(self.tmp_dir, 'dist')
+        self.run_dir = os.path.join(self.tmp_dir, 'run')
+        os.makedirs(os.path.join(self.dist_dir, 'app'))
+        os.makedirs(self.run_dir)
+
+        self.instance_info = {
+            'console_sock': os.path.join(self.run_dir, 'myapp.instance-1.control'),
+            'state_file': os.path.join(self.run_dir, 'myapp.instance-1.state'),
+            'pid_file': os.path.join(self.run_dir, 'myapp.instance-1.pid'),
+            'app_conf_file': os.path.join(self.tmp_dir, 'myapp.yml'),
+            'conf_file': os.path.join(self.tmp_dir, 'myapp.instance-1.yml'),
+            'instance_id': 'myapp.instance-1',
+            'instance_dist_dir': self.dist_dir,
+        }
+        self.params = {
+            'app_name': 'myapp',
+            'config': {'advertise_uri': 'localhost:3301', 'memtx_memory': 1024},
+            'cartridge_defaults': {'log_level': 5},
+            'cluster_cookie': 'secret',
+            'cartridge_not_save_cookie_in_app_config': False,
+            'stateboard': False,
+            'instance_info': self.instance_info,
+            'check_package_updated': True,
+            'check_config_updated': True,
+            'check_by_hashes': True,
+        }
+
+        self.write_dist_file('init.lua', 'return true')
+        self.write_dist_file('app/roles.lua', 'return {}')
+
+        self.console = FakeInstanceConsole(box_cfg={'memtx_memory': 1024, 'log_level': 5})
+        self.get_control_console = helpers.Helpers.get_control_console
+        self.gather_evals = get_needs_restart.gather_evals
+        helpers.Helpers.get_control_console = staticmethod(self.console.get_control_console)
+        get_needs_restart.gather_evals = self.console.gather_evals
+
+        self.start_instance()
+
+    def write_dist_file(self, path, content):
+        with open(os.path.join(self.dist_dir, path), 'w') as f:
+            f.write(content)
+
+    def start_instance(self, instance_info=None):
+        instance_info = instance_info or self.instance_info
+        res = save_instance_state(dict(self.params, instance_info=instance_info))
+        self.assertFalse(res.failed, msg=res.msg)
+
+        # console socket and PID file are created after the state is saved
+        with open(instance_info['console_sock'], 'w'):
+            pass
+        state_mtime = os.stat(instance_info['state_file']).st_mtime
+        os.utime(instance_info['console_sock'], (state_mtime + 1, state_mtime + 1))
+        self.write_pid_file(instance_info, os.getpid())
+
+    def write_pid_file(self, instance_info, pid):
+        with open(instance_info['pid_file'], 'w') as f:
+            f.write('%d\n' % pid)
+
+    def stop_instance_process(self):
+        process = subprocess.Popen([sys.executable, '-c', ''])
+        process.wait()
+        self.write_pid_file(self.instance_info, process.pid)
+
+    def call_needs_restart(self, machine_mode=False, **kwargs):
+        params = dict(self.params, **kwargs)
+
+        if machine_mode:
+            params['instances'] = [{
+                key: params.pop(key) for key in ['instance_info', 'config', 'stateboard']
+            }]
+
+            res = set_needs_restart(params)
+            self.assertFalse(res.failed, msg=res.msg)
+            return res.fact[self.instance_info['instance_id']]
+
+        res = set_needs_restart(params)
+        self.assertFalse(res.failed, msg=res.msg)
+        return res.fact
+
+    @parameterized.expand([[False], [True]])
+    def test_nothing_changed(self, machine_mode):
+        self.assertFalse(self.call_needs_restart(machine_mode))
+        self.assertFalse(self.call_needs_restart(machine_mode, check_config_updated=False))
+        # only the state file is read
+        self.assertEqual(self.console.connections_count, 0)
+
+        # the same code is unpacked again, it's hashed by content once
+        get_dist_hash = instance_state.get_dist_hash
+        dist_hashes_count = [0]
+
+        def counting_get_dist_hash(dist_dir):
+            dist_hashes_count[0] += 1
+            return get_dist_hash(dist_dir)
+
+        self.write_dist_file('init.lua', 'return true')
+        os.utime(self.dist_dir, None)
+
+        instance_state.get_dist_hash = counting_get_dist_hash
+        try:
+            self.assertFalse(self.call_needs_restart(machine_mode))
+            self.assertFalse(self.call_needs_restart(machine_mode))
+        finally:
+            instance_state.get_dist_hash = get_dist_hash
+        self.assertEqual(dist_hashes_count[0], 1)
+
+    @parameterized.expand([[False], [True]])
+    def test_instance_not_running(self, machine_mode):
+        # code and config are the same, but the instance process isn't running,
+        # so the state isn't trusted and the instance is checked via the console
+        self.stop_instance_process()
+        self.console.running = False
+        self.assertTrue(self.call_needs_restart(machine_mode))
+        self.assertTrue(self.call_needs_restart(machine_mode, check_config_updated=False))
+
+        # box.cfg wasn't called
+        self.console.running = True
+        self.console.box_cfg = None
+        self.assertTrue(self.call_needs_restart(machine_mode))
+
+        # PID file is missed
+        os.remove(self.instance_info['pid_file'])
+        self.assertTrue(self.call_needs_restart(machine_mode))
+
+    @parameterized.expand([[False], [True]])
+    def test_code_changed(self, machine_mode):
+        self.write_dist_file('app/roles.lua', 'return {"new-role"}')
+        self.assertTrue(self.call_needs_restart(machine_mode))
+        self.assertFalse(self.call_needs_restart(machine_mode, check_package_updated=False))
+
+        self.start_instance()
+        self.assertFalse(self.call_needs_restart(machine_mode))
+
+        os.symlink('roles.lua', os.path.join(self.dist_dir, 'app', 'roles-link.lua'))
+        self.assertTrue(self.call_needs_restart(machine_mode))
+
+    @parameterized.expand([[False], [True]])
+    def test_config_changed(self, machine_mode):
+        self.assertTrue(self.call_needs_restart(
+            machine_mode, config={'advertise_uri': 'localhost:3302', 'memtx_memory': 1024},
+        ))
+        self.assertTrue(self.call_needs_restart(machine_mode, cartridge_defaults={'log_level': 5, 'custom': 1}))
+        self.assertTrue(self.call_needs_restart(machine_mode, cluster_cookie='new-secret'))
+        self.assertFalse(self.call_needs_restart(
+            machine_mode, cluster_cookie='new-secret', check_config_updated=False,
+        ))
+        # static config is checked by the state only
+        self.assertEqual(self.console.connections_count, 0)
+
+        # changed dynamic param is checked on the instance
+        self.assertTrue(self.call_needs_restart(
+            machine_mode, config={'advertise_uri': 'localhost:3301', 'memtx_memory': 2048},
+        ))
+        self.assertEqual(self.console.connections_count, 1)
+
+        # it's changed in runtime, the instance isn't connected after it's checked
+        self.console.box_cfg = {'memtx_memory': 2048, 'log_level': 5}
+        self.assertFalse(self.call_needs_restart(
+            machine_mode, config={'advertise_uri': 'localhost:3301', 'memtx_memory': 2048},
+        ))
+        self.assertFalse(self.call_needs_restart(
+            machine_mode, config={'advertise_uri': 'localhost:3301', 'memtx_memory': 2048},
+        ))
+        self.assertEqual(self.console.connections_count, 2)
+
+    @parameterized.expand([[False], [True]])
+    def test_state_saved_after_start(self, machine_mode):
+        self.assertFalse(self.call_needs_restart(machine_mode))
+
+        # state doesn't describe the running instance
+        save_instance_state(self.params)
+        os.utime(self.instance_info['console_sock'], (0, 0))
+        self.assertTrue(self.call_needs_restart(machine_mode))
+
+        os.remove(self.instance_info['state_file'])
+        self.assertTrue(self.call_needs_restart(machine_mode))
+
+    def test_dist_hashed_once(self):
+        other_instance_info = dict(
+            self.instance_info,
+            console_sock=os.path.join(self.run_dir, 'myapp.instance-2.control'),
+            state_file=os.path.join(self.run_dir, 'myapp.instance-2.state'),
+            pid_file=os.path.join(self.run_dir, 'myapp.instance-2.pid'),
+            instance_id='myapp.instance-2',
+        )
+
+        get_dist_hash = instance_state.get_dist_hash
+        dist_hashes_count = [0]
+
+        def counting_get_dist_hash(dist_dir):
+            dist_hashes_count[0] += 1
+            return get_dist_hash(dist_dir)
+
+        instance_state.get_dist_hash = counting_get_dist_hash
+        try:
+            # the code is hashed on the first instance start only
+            self.start_instance(other_instance_info)
+            self.assertEqual(dist_hashes_count[0], 0)
+
+            # the same code is unpacked again, it's hashed once for both instances
+            self.write_dist_file('init.lua', 'return true')
+            os.utime(self.dist_dir, None)
+            for instance_info in [self.instance_info, other_instance_info]:
+                self.assertFalse(self.call_needs_restart(instance_info=instance_info))
+        finally:
+            instance_state.get_dist_hash = get_dist_hash
+        self.assertEqual(dist_hashes_count[0], 1)
+
+    def test_dist_stat_hash(self):
+        dist_stat_hash = instance_state.get_dist_stat_hash(self.dist_dir)
+
+        # status change time is changed by linking the file
+        os.link(os.path.join(self.dist_dir, 'init.lua'), os.path.join(self.tmp_dir, 'init.lua'))
+        self.assertEqual(instance_state.get_dist_stat_hash(self.dist_dir), dist_stat_hash)
+
+        init_lua_stat = os.stat(os.path.join(self.dist_dir, 'init.lua'))
+        os.utime(os.path.join(self.dist_dir, 'init.lua'), (init_lua_stat.st_atime, init_lua_stat.st_mtime + 1))
+        self.assertNotEqual(instance_state.get_dist_stat_hash(self.dist_dir), dist_stat_hash)
+
+    def test_dist_hash(self):
+        dist_hash = instance_state.get_dist_hash(self.dist_dir)
+        self.assertIsNotNone(dist_hash)
+
+        # code is the same in another dir (multiversion)
+        other_dist_dir = os.path.join(self.tmp_dir, 'other-dist')
+        shutil.copytree(self.dist_dir, other_dist_dir)
+        self.assertEqual(instance_state.get_dist_hash(other_dist_dir), dist_hash)
+
+        instance_dist_dir = os.path.join(self.tmp_dir, 'instance-dist')
+        os.symlink(other_dist_dir, instance_dist_dir)
+        self.assertEqual(instance_state.get_dist_hash(instance_dist_dir), dist_hash)
+
+        os.chmod(os.path.join(other_dist_dir, 'init.lua'), 0o755)
+        self.assertNotEqual(instance_state.get_dist_hash(other_dist_dir), dist_hash)
+
+        os.makedirs(os.path.join(self.dist_dir, 'empty'))
+        self.assertNotEqual(instance_state.get_dist_hash(self.dist_dir), dist_hash)
+
+        self.assertIsNone(instance_state.get_dist_hash(os.path.join(self.tmp_dir, 'missing')))
+
+    def tearDown(self):
+        helpers.Helpers.get_control_console = self.get_control_console
+        get_needs_restart.gather_evals = self.gather_evals
+        shutil.rmtree(self.tmp_dir)
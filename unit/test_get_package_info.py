@@ -0,0 +1,239 @@
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+import module_utils.helpers as helpers
+from unit.packages import write_rpm, write_deb, write_tgz, RPM_SENSE_GREATER, RPM_SENSE_EQUAL
+
+sys.modules['ansible.module_utils.helpers'] = helpers
+import library.cartridge_get_package_info as get_package_info_module
+from library.cartridge_get_package_info import get_package_info
+
+
+def call_get_package_info(package_path, app_name='myapp', cache_dir=None):
+    return get_package_info({
+        'app_name': app_name,
+        'package_path': package_path,
+        'cache_dir': cache_dir,
+    })
+
+
+class TestGetPackageInfo(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def test_rpm(self):
+        package_path = os.path.join(self.tmp_dir, 'myapp-1.0.0-0.rpm')
+
+        write_rpm(package_path, 'myapp', requires=[
+            ('rpmlib(PayloadFilesHavePrefix)', RPM_SENSE_EQUAL, '4.0-1'),
+            ('tarantool', RPM_SENSE_GREATER | RPM_SENSE_EQUAL, '2.10.4'),
+            ('tarantool', 0, ''),
+        ], payload_size=1024)
+
+        res = call_get_package_info(package_path)
+        self.assertFalse(res.failed, msg=res.msg)
+        self.assertEqual(res.fact, {'name': 'myapp', 'tnt_version': '2.10', 'type': 'rpm'})
+
+        # without tarantool dependency
+        write_rpm(package_path, 'myapp', requires=[('tarantool', RPM_SENSE_EQUAL, '2.10.4')])
+
+        res = call_get_package_info(package_path)
+        self.assertFalse(res.failed, msg=res.msg)
+        self.assertEqual(res.fact, {'name': 'myapp', 'tnt_version': None, 'type': 'rpm'})
+
+        write_rpm(package_path, 'myapp')
+
+        res = call_get_package_info(package_path)
+        self.assertFalse(res.failed, msg=res.msg)
+        self.assertEqual(res.fact, {'name': 'myapp', 'tnt_version': None, 'type': 'rpm'})
+
+        # another name
+        res = call_get_package_info(package_path, app_name='other-app')
+        self.assertTrue(res.failed)
+        self.assertIn("package name: 'myapp'", res.msg)
+
+    def test_bad_rpm(self):
+        package_path = os.path.join(self.tmp_dir, 'myapp-1.0.0-0.rpm')
+
+        with open(package_path, 'wb') as f:
+            f.write(b'not an rpm package' * 10)
+
+        with self.assertRaises(Exception) as ctx:
+            call_get_package_info(package_path)
+        self.assertIn("isn't an RPM package", str(ctx.exception))
+
+        write_rpm(package_path, 'myapp')
+        with open(package_path, 'rb') as f:
+            data = f.read()
+        with open(package_path, 'wb') as f:
+            f.write(data[:-10])
+
+        with self.assertRaises(Exception) as ctx:
+            call_get_package_info(package_path)
+        self.assertIn("Failed to read RPM header: unexpected end of file", str(ctx.exception))
+
+    def test_deb(self):
+        package_path = os.path.join(self.tmp_dir, 'myapp-1.0.0-0.deb')
+
+        write_deb(package_path, 'myapp', depends='tarantool (>= 2.10.4), libc6', payload_size=1024)
+
+        res = call_get_package_info(package_path)
+        self.assertFalse(res.failed, msg=res.msg)
+        self.assertEqual(res.fact, {'name': 'myapp', 'tnt_version': '2.10', 'type': 'deb'})
+
+        # multiline field
+        write_deb(package_path, 'myapp', depends='libc6,\n tarantool (>= 2.8.1)')
+
+        res = call_get_package_info(package_path)
+        self.assertFalse(res.failed, msg=res.msg)
+        self.assertEqual(res.fact, {'name': 'myapp', 'tnt_version': '2.8', 'type': 'deb'})
+
+        # without tarantool dependency
+        write_deb(package_path, 'myapp', depends='tarantool (= 2.10.4)')
+
+        res = call_get_package_info(package_path)
+        self.assertFalse(res.failed, msg=res.msg)
+        self.assertEqual(res.fact, {'name': 'myapp', 'tnt_version': None, 'type': 'deb'})
+
+        write_deb(package_path, 'myapp')
+
+        res = call_get_package_info(package_path)
+        self.assertFalse(res.failed, msg=res.msg)
+        self.assertEqual(res.fact, {'name': 'myapp', 'tnt_version': None, 'type': 'deb'})
+
+        # another name
+        res = call_get_package_info(package_path, app_name='other-app')
+        self.assertTrue(res.failed)
+        self.assertIn("package name: 'myapp'", res.msg)
+
+    @unittest.skipIf(sys.version_info[0] < 3, 'xz compression is supported by tarfile on Python 3')
+    def test_deb_xz(self):
+        package_path = os.path.join(self.tmp_dir, 'myapp-1.0.0-0.deb')
+
+        write_deb(package_path, 'myapp', depends='tarantool (>= 2.10.4)', compression='xz')
+
+        res = call_get_package_info(package_path)
+        self.assertFalse(res.failed, msg=res.msg)
+        self.assertEqual(res.fact, {'name': 'myapp', 'tnt_version': '2.10', 'type': 'deb'})
+
+    def test_bad_deb(self):
+        package_path = os.path.join(self.tmp_dir, 'myapp-1.0.0-0.deb')
+
+        with open(package_path, 'wb') as f:
+            f.write(b'not a deb package' * 10)
+
+        with self.assertRaises(Exception) as ctx:
+            call_get_package_info(package_path)
+        self.assertIn("isn't a DEB package", str(ctx.exception))
+
+        with open(package_path, 'wb') as f:
+            f.write(b'!<arch>\n')
+
+        with self.assertRaises(Exception) as ctx:
+            call_get_package_info(package_path)
+        self.assertIn("Failed to find control archive in DEB package", str(ctx.exception))
+
+    def test_tgz(self):
+        package_path = os.path.join(self.tmp_dir, 'myapp-1.0.0-0.tar.gz')
+
+        # Tarantool Enterprise
+        write_tgz(package_path, {
+            'myapp/init.lua': b'',
+            'myapp/tarantool': b'',
+            'myapp/VERSION': b'TARANTOOL=2.10.4-0-g123\n',
+        })
+
+        res = call_get_package_info(package_path)
+        self.assertFalse(res.failed, msg=res.msg)
+        self.assertEqual(res.fact, {'name': 'myapp', 'tnt_version': None, 'type': 'tgz'})
+
+        # Tarantool CE
+        write_tgz(package_path, {
+            './myapp/init.lua': b'',
+            './myapp/VERSION': b'APP=1.0.0\nTARANTOOL=2.10.4-0-g123\n',
+            './myapp/.rocks/tarantool': b'',
+        })
+
+        res = call_get_package_info(package_path)
+        self.assertFalse(res.failed, msg=res.msg)
+        self.assertEqual(res.fact, {'name': './myapp', 'tnt_version': '2.10', 'type': 'tgz'})
+
+        # app name isn't checked
+        res = call_get_package_info(package_path, app_name='other-app')
+        self.assertFalse(res.failed, msg=res.msg)
+
+    def test_bad_tgz(self):
+        package_path = os.path.join(self.tmp_dir, 'myapp-1.0.0-0.tar.gz')
+
+        write_tgz(package_path, {
+            'myapp/init.lua': b'',
+            'other-app/VERSION': b'TARANTOOL=2.10.4-0-g123\n',
+        })
+
+        with self.assertRaises(Exception) as ctx:
+            call_get_package_info(package_path)
+        self.assertIn("Package should contain one directory with application files", str(ctx.exception))
+
+        write_tgz(package_path, {
+            'myapp/init.lua': b'',
+        })
+
+        with self.assertRaises(Exception) as ctx:
+            call_get_package_info(package_path)
+        self.assertIn("Package should contain myapp/VERSION file", str(ctx.exception))
+
+    def test_tgz_cache(self):
+        package_path = os.path.join(self.tmp_dir, 'myapp-1.0.0-0.tar.gz')
+        cache_dir = os.path.join(self.tmp_dir, 'cache')
+
+        write_tgz(package_path, {
+            'myapp/init.lua': b'',
+            'myapp/VERSION': b'TARANTOOL=2.10.4-0-g123\n',
+        })
+
+        res = call_get_package_info(package_path, cache_dir=cache_dir)
+        self.assertFalse(res.failed, msg=res.msg)
+        self.assertEqual(res.fact, {'name': 'myapp', 'tnt_version': '2.10', 'type': 'tgz'})
+        self.assertEqual(len(os.listdir(cache_dir)), 1)
+
+        # cached info is used
+        cache_path = os.path.join(cache_dir, os.listdir(cache_dir)[0])
+        with open(cache_path, 'w') as f:
+            json.dump({'name': 'myapp', 'tnt_version': '2.8'}, f)
+
+        res = call_get_package_info(package_path, cache_dir=cache_dir)
+        self.assertFalse(res.failed, msg=res.msg)
+        self.assertEqual(res.fact, {'name': 'myapp', 'tnt_version': '2.8', 'type': 'tgz'})
+
+        # another package
+        write_tgz(package_path, {
+            'myapp/init.lua': b'',
+            'myapp/tarantool': b'',
+        })
+        os.utime(package_path, (0, 0))
+
+        res = call_get_package_info(package_path, cache_dir=cache_dir)
+        self.assertFalse(res.failed, msg=res.msg)
+        self.assertEqual(res.fact, {'name': 'myapp', 'tnt_version': None, 'type': 'tgz'})
+        self.assertEqual(len(os.listdir(cache_dir)), 2)
+
+        # least recently used entries are removed
+        max_entries = get_package_info_module.TGZ_INFO_CACHE_MAX_ENTRIES
+        get_package_info_module.TGZ_INFO_CACHE_MAX_ENTRIES = 2
+        try:
+            os.utime(cache_path, (0, 0))
+            os.utime(package_path, (1, 1))
+            res = call_get_package_info(package_path, cache_dir=cache_dir)
+            self.assertFalse(res.failed, msg=res.msg)
+        finally:
+            get_package_info_module.TGZ_INFO_CACHE_MAX_ENTRIES = max_entries
+
+        self.assertEqual(len(os.listdir(cache_dir)), 2)
+        self.assertNotIn(os.path.basename(cache_path), os.listdir(cache_dir))
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
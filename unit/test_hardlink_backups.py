@@ -0,0 +1,136 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from unit.backups import (
+    INSTANCE_ID,
+    backup_instance,
+    call_restore_archive,
+    hardlink_backup,
+    read_file,
+    write_file,
+)
+from library.cartridge_restore_instance import get_backup_path, move_files
+
+
+class TestHardlinkBackups(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.backups_dir = os.path.join(self.tmp_dir, 'backups')
+        self.memtx_dir = os.path.join(self.tmp_dir, 'memtx', INSTANCE_ID)
+        self.vinyl_dir = os.path.join(self.tmp_dir, 'vinyl', INSTANCE_ID)
+        os.makedirs(self.backups_dir)
+        os.makedirs(self.memtx_dir)
+        os.makedirs(os.path.join(self.vinyl_dir, '512', '0'))
+
+        self.snap = os.path.join(self.memtx_dir, '00000000000000000010.snap')
+        self.run = os.path.join(self.vinyl_dir, '512', '0', '00000000000000000001.run')
+        self.vylog = os.path.join(self.vinyl_dir, '00000000000000000010.vylog')
+        self.conf = os.path.join(self.tmp_dir, 'myapp.yml')
+
+        self.files = {
+            self.snap: b'snap',
+            self.run: b'run',
+            self.vylog: b'vylog',
+            self.conf: b'conf',
+        }
+        for path, data in self.files.items():
+            write_file(path, data)
+
+    def backup(self):
+        return backup_instance.pack({
+            'instance_id': INSTANCE_ID,
+            'backups_dir': self.backups_dir,
+            'backup_mode': 'hardlinks',
+        }, [self.snap, self.run, self.vylog, self.conf])
+
+    def test_backup(self):
+        backup_dir = self.backup()
+        self.assertEqual(os.path.dirname(backup_dir), self.backups_dir)
+        self.assertTrue(os.path.isdir(backup_dir))
+        self.assertEqual(os.listdir(self.backups_dir), [os.path.basename(backup_dir)])
+
+        for path, data in self.files.items():
+            backup_path = os.path.join(backup_dir, path.lstrip('/'))
+            self.assertEqual(read_file(backup_path), data)
+
+            # only immutable files are hardlinked
+            self.assertEqual(os.path.samefile(path, backup_path), path in [self.snap, self.run])
+
+        # mutable file is changed in place
+        with open(self.vylog, 'ab') as f:
+            f.write(b' appended')
+        self.assertEqual(read_file(os.path.join(backup_dir, self.vylog.lstrip('/'))), b'vylog')
+
+        with self.assertRaises(Exception) as ctx:
+            self.backup()
+        self.assertIn("Backup directory %s already exists" % backup_dir, str(ctx.exception))
+
+    def test_restore(self):
+        backup_dir = self.backup()
+
+        # the latest backup directory of the instance is found
+        backup_path, err = get_backup_path(None, self.backups_dir, INSTANCE_ID)
+        self.assertIsNone(err)
+        self.assertEqual(backup_path, backup_dir)
+
+        # hardlinked files aren't conflicting
+        write_file(self.conf, b'changed conf')
+        changed, err = call_restore_archive(backup_dir, [self.memtx_dir, self.vinyl_dir])
+        self.assertIn("have a different md5 sum than in the backup: %s" % self.conf, err)
+
+        write_file(self.conf, b'conf')
+        changed, err = call_restore_archive(backup_dir, [self.memtx_dir, self.vinyl_dir])
+        self.assertIsNone(err)
+        self.assertTrue(changed)
+
+        for path, data in self.files.items():
+            self.assertEqual(read_file(path), data)
+
+        # immutable files are hardlinked back
+        self.assertTrue(os.path.samefile(self.snap, os.path.join(backup_dir, self.snap.lstrip('/'))))
+        self.assertFalse(os.path.samefile(self.vylog, os.path.join(backup_dir, self.vylog.lstrip('/'))))
+
+    @unittest.skipIf(os.getuid() != 0, 'files owner can be changed only by root')
+    def test_restore_to_another_owner(self):
+        backup_dir = self.backup()
+        backup_snap = os.path.join(backup_dir, self.snap.lstrip('/'))
+        backup_snap_stat = os.stat(backup_snap)
+        os.remove(self.snap)
+
+        uid, gid = backup_snap_stat.st_uid + 1, backup_snap_stat.st_gid + 1
+        changed, err = move_files(backup_dir, uid, gid)
+        self.assertIsNone(err)
+
+        # immutable file is copied, the backup file owner isn't changed
+        self.assertEqual(read_file(self.snap), b'snap')
+        self.assertFalse(os.path.samefile(self.snap, backup_snap))
+        self.assertEqual((os.stat(self.snap).st_uid, os.stat(self.snap).st_gid), (uid, gid))
+        self.assertEqual(
+            (os.stat(backup_snap).st_uid, os.stat(backup_snap).st_gid),
+            (backup_snap_stat.st_uid, backup_snap_stat.st_gid),
+        )
+
+    def test_link_file_fallback(self):
+        src = os.path.join(self.tmp_dir, 'src.snap')
+        write_file(src, b'data')
+        os.chmod(src, 0o640)
+
+        link = os.link
+        try:
+            def failing_link(src, dst):
+                raise OSError(hardlink_backup.errno.EXDEV, 'Invalid cross-device link')
+            hardlink_backup.os.link = failing_link
+
+            dst = os.path.join(self.tmp_dir, 'dst.snap')
+            link_type = hardlink_backup.link_file(src, dst, hardlink_allowed=True)
+        finally:
+            hardlink_backup.os.link = link
+
+        self.assertIn(link_type, [hardlink_backup.LINK_REFLINK, hardlink_backup.LINK_COPY])
+        self.assertEqual(read_file(dst), b'data')
+        self.assertEqual(os.stat(dst).st_mode & 0o777, 0o640)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
@@ -0,0 +1,130 @@
+import hashlib
+import os
+import shutil
+import tarfile
+import tempfile
+import unittest
+
+from unit.backups import (
+    INSTANCE_ID,
+    backup_archive,
+    backup_instance,
+    backup_manifest,
+    call_restore_archive,
+    read_file,
+    write_file,
+)
+from library.cartridge_get_backup_chain import get_backup_chain
+
+
+class TestIncrementalBackups(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.backups_dir = os.path.join(self.tmp_dir, 'backups')
+        self.memtx_dir = os.path.join(self.tmp_dir, 'memtx', INSTANCE_ID)
+        os.makedirs(self.backups_dir)
+        os.makedirs(self.memtx_dir)
+
+        # Archives are named by time, so names are generated for backups made in one second
+        self.backups_count = 0
+        self.get_archive_name = backup_instance.get_archive_name
+        backup_instance.get_archive_name = self.get_next_archive_name
+
+    def get_next_archive_name(self, instance_id, compression=backup_archive.COMPRESSION_GZIP):
+        self.backups_count += 1
+        return '%s.2021-01-01-%06d%s' % (instance_id, self.backups_count, backup_archive.get_archive_ext(compression))
+
+    def backup(self, files):
+        return backup_instance.backup_pack_incremental(INSTANCE_ID, self.backups_dir, files)
+
+    def test_incremental_backups(self):
+        snap_1 = os.path.join(self.memtx_dir, '00000000000000000001.snap')
+        xlog_1 = os.path.join(self.memtx_dir, '00000000000000000001.xlog')
+        conf = os.path.join(self.memtx_dir, 'config.yml')
+
+        write_file(snap_1, b'snap 1')
+        write_file(xlog_1, b'xlog 1')
+        write_file(conf, b'conf 1')
+
+        full_path = self.backup([snap_1, xlog_1, conf])
+        manifest = backup_manifest.read_manifest(full_path)
+        self.assertIsNone(manifest['parent'])
+        self.assertEqual(set(manifest['files']), {snap_1, xlog_1, conf})
+
+        # new xlog and changed config
+        xlog_2 = os.path.join(self.memtx_dir, '00000000000000000002.xlog')
+        write_file(xlog_2, b'xlog 2')
+        write_file(conf, b'conf 2 (changed)')
+
+        incremental_path = self.backup([snap_1, xlog_1, xlog_2, conf])
+        manifest = backup_manifest.read_manifest(incremental_path)
+        self.assertEqual(manifest['parent'], os.path.basename(full_path))
+
+        files_by_archives = dict(
+            (archive_name, sorted(paths))
+            for archive_name, paths in backup_manifest.get_files_by_archives(manifest).items()
+        )
+        self.assertEqual(files_by_archives, {
+            os.path.basename(full_path): sorted([snap_1, xlog_1]),
+            os.path.basename(incremental_path): sorted([xlog_2, conf]),
+        })
+
+        # hashes of archived files are computed while they are written
+        self.assertEqual(manifest['files'][conf]['hash'], hashlib.sha256(b'conf 2 (changed)').hexdigest())
+        self.assertEqual(manifest['files'][snap_1]['hash'], hashlib.sha256(b'snap 1').hexdigest())
+
+        # only new and changed files are archived
+        with tarfile.open(incremental_path) as tar:
+            self.assertEqual(tar.getnames(), [
+                backup_manifest.MANIFEST_MEMBER_NAME,
+            ] + sorted(path.lstrip('/') for path in [xlog_2, conf]))
+
+        # restore from the chain
+        shutil.rmtree(self.memtx_dir)
+
+        changed, err = call_restore_archive(incremental_path, [self.memtx_dir])
+        self.assertIsNone(err)
+        self.assertTrue(changed)
+
+        self.assertEqual(read_file(snap_1), b'snap 1')
+        self.assertEqual(read_file(xlog_1), b'xlog 1')
+        self.assertEqual(read_file(xlog_2), b'xlog 2')
+        self.assertEqual(read_file(conf), b'conf 2 (changed)')
+
+        # conflicting files are found by hashes from the manifest
+        write_file(conf, b'conf 3')
+
+        changed, err = call_restore_archive(incremental_path, [])
+        self.assertIn("have a different md5 sum than in the backup: %s" % conf, err)
+
+        # all archives of the chain are uploaded to restore from local backup
+        res = get_backup_chain({'backup_path': incremental_path})
+        self.assertFalse(res.failed)
+        self.assertEqual(res.fact, [incremental_path, full_path])
+
+        # parent backup is required
+        os.remove(full_path)
+
+        res = get_backup_chain({'backup_path': incremental_path})
+        self.assertTrue(res.failed)
+        self.assertIn("from the chain of backup '%s' not found" % incremental_path, res.msg)
+
+        with self.assertRaises(Exception) as ctx:
+            call_restore_archive(incremental_path, [self.memtx_dir])
+        self.assertIn("from the chain of backup '%s' not found" % incremental_path, str(ctx.exception))
+
+    def test_legacy_backup_is_not_parent(self):
+        snap = os.path.join(self.memtx_dir, '00000000000000000001.snap')
+        write_file(snap, b'snap 1')
+
+        backup_instance.backup_pack(INSTANCE_ID, self.backups_dir, [snap])
+        self.assertIsNone(backup_instance.get_parent_manifest(INSTANCE_ID, self.backups_dir))
+
+        backup_path = self.backup([self.memtx_dir])
+        manifest = backup_manifest.read_manifest(backup_path)
+        self.assertIsNone(manifest['parent'])
+        self.assertEqual(list(manifest['files']), [snap])
+
+    def tearDown(self):
+        backup_instance.get_archive_name = self.get_archive_name
+        shutil.rmtree(self.tmp_dir)
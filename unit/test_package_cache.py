@@ -0,0 +1,125 @@
+import hashlib
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+import module_utils.helpers as helpers
+import module_utils.package_cache as package_cache
+
+sys.modules['ansible.module_utils.helpers'] = helpers
+sys.modules['ansible.module_utils.package_cache'] = package_cache
+from library.cartridge_get_cached_package import get_cached_package
+from library.cartridge_cache_package import cache_package
+
+
+def write_package(path, data):
+    with open(path, 'wb') as f:
+        f.write(data)
+    return hashlib.sha256(data).hexdigest()
+
+
+class TestPackageCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.cache_dir = os.path.join(self.tmp_dir, 'cache')
+
+    def get_cached_package(self, package_name, checksum, size):
+        res = get_cached_package({
+            'cache_dir': self.cache_dir,
+            'package_name': package_name,
+            'checksum': checksum,
+            'size': size,
+        })
+        self.assertFalse(res.failed, msg=res.msg)
+        return res.fact
+
+    def cache_package(self, package_path, checksum, max_size=1024):
+        res = cache_package({
+            'cache_dir': self.cache_dir,
+            'package_path': package_path,
+            'package_name': os.path.basename(package_path),
+            'checksum': checksum,
+            'max_size': max_size,
+        })
+        self.assertFalse(res.failed, msg=res.msg)
+        return res
+
+    def test_cache(self):
+        package_path = os.path.join(self.tmp_dir, 'myapp-1.0.0-0.rpm')
+        checksum = write_package(package_path, b'package 1')
+
+        os.makedirs(self.cache_dir)
+        self.assertIsNone(self.get_cached_package('myapp-1.0.0-0.rpm', checksum, 9))
+
+        res = self.cache_package(package_path, checksum)
+        cached_path = res.fact
+        self.assertEqual(cached_path, os.path.join(self.cache_dir, checksum, 'myapp-1.0.0-0.rpm'))
+        self.assertEqual(res.kwargs['removed_paths'], [])
+
+        # delivered package can be removed
+        os.remove(package_path)
+
+        # package isn't touched on use (its info is cached by modification time)
+        os.utime(cached_path, (1, 1))
+        self.assertEqual(self.get_cached_package('myapp-1.0.0-0.rpm', checksum, 9), cached_path)
+        self.assertEqual(os.path.getmtime(cached_path), 1)
+        self.assertIsNone(self.get_cached_package('myapp-1.0.0-0.rpm', checksum, 10))
+        self.assertIsNone(self.get_cached_package('myapp-1.0.0-0.rpm', 'other', 9))
+
+    def test_corrupted_package(self):
+        package_path = os.path.join(self.tmp_dir, 'myapp-1.0.0-0.rpm')
+        checksum = write_package(package_path, b'package 1')
+
+        cached_path = self.cache_package(package_path, checksum).fact
+        os.remove(package_path)
+
+        # size is the same, but the content isn't
+        with open(cached_path, 'r+b') as f:
+            f.write(b'P')
+
+        self.assertIsNone(self.get_cached_package('myapp-1.0.0-0.rpm', checksum, 9))
+        self.assertFalse(os.path.exists(os.path.dirname(cached_path)))
+
+    def test_bad_checksum(self):
+        package_path = os.path.join(self.tmp_dir, 'myapp-1.0.0-0.rpm')
+        write_package(package_path, b'package 1')
+
+        with self.assertRaises(Exception) as ctx:
+            self.cache_package(package_path, 'bad-checksum')
+        self.assertIn("Checksum of delivered package", str(ctx.exception))
+
+    def test_evict(self):
+        checksums = []
+        for i in range(3):
+            package_path = os.path.join(self.tmp_dir, 'myapp-%d.0.0-0.rpm' % i)
+            checksum = write_package(package_path, b'x' * 400 + str(i).encode('utf-8'))
+            self.cache_package(package_path, checksum)
+            os.utime(os.path.join(self.cache_dir, checksum, package_cache.LAST_USED_MARKER_NAME), (i, i))
+            checksums.append(checksum)
+
+        # the first package is removed on exceeding max size
+        self.assertEqual(sorted(os.listdir(self.cache_dir)), sorted(checksums[1:]))
+
+        # recently used package is kept
+        self.assertIsNotNone(self.get_cached_package('myapp-1.0.0-0.rpm', checksums[1], 401))
+
+        package_path = os.path.join(self.tmp_dir, 'myapp-3.0.0-0.rpm')
+        checksum = write_package(package_path, b'x' * 400 + b'3')
+        res = self.cache_package(package_path, checksum)
+
+        self.assertEqual(res.kwargs['removed_paths'], [
+            os.path.join(self.cache_dir, checksums[2], 'myapp-2.0.0-0.rpm'),
+        ])
+        self.assertEqual(sorted(os.listdir(self.cache_dir)), sorted([checksums[1], checksum]))
+
+        # package that is larger than max size is kept
+        package_path = os.path.join(self.tmp_dir, 'myapp-4.0.0-0.rpm')
+        checksum = write_package(package_path, b'x' * 2000)
+        self.cache_package(package_path, checksum)
+
+        self.assertEqual(os.listdir(self.cache_dir), [checksum])
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
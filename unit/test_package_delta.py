@@ -0,0 +1,210 @@
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+import module_utils.helpers as helpers
+import module_utils.package_delta as package_delta
+
+sys.modules['ansible.module_utils.helpers'] = helpers
+sys.modules['ansible.module_utils.package_delta'] = package_delta
+from library.cartridge_get_package_signatures import get_package_signatures
+from library.cartridge_make_package_delta import make_package_delta
+from library.cartridge_apply_package_delta import apply_package_delta
+from library.cartridge_remove_old_packages import remove_old_packages
+
+BLOCK_SIZE = 1024
+
+
+def write_file(path, data):
+    with open(path, 'wb') as f:
+        f.write(data)
+
+
+def read_file(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+class TestPackageDelta(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.packages_dir = os.path.join(self.tmp_dir, 'packages')
+        self.deltas_dir = os.path.join(self.tmp_dir, 'deltas')
+        os.makedirs(self.packages_dir)
+
+    def deliver(self, package_path):
+        res = get_package_signatures({
+            'packages_dir': self.packages_dir,
+            'package_path': package_path,
+            'block_size': BLOCK_SIZE,
+        })
+        self.assertFalse(res.failed, msg=res.msg)
+
+        signatures = res.fact
+        if signatures['basis_path'] is None:
+            return None
+
+        res = make_package_delta({
+            'package_path': package_path,
+            'signatures': signatures,
+            'deltas_dir': self.deltas_dir,
+        })
+        self.assertFalse(res.failed, msg=res.msg)
+        delta = res.fact
+
+        if delta['delta_path'] is None:
+            # delta isn't efficient, the package is copied
+            shutil.copy(package_path, self.packages_dir)
+        else:
+            res = apply_package_delta({
+                'basis_path': signatures['basis_path'],
+                'delta_path': delta['delta_path'],
+                'package_path': os.path.join(self.packages_dir, os.path.basename(package_path)),
+            })
+            self.assertFalse(res.failed, msg=res.msg)
+
+        self.remove_old_packages(package_path)
+        return delta
+
+    def remove_old_packages(self, package_path):
+        res = remove_old_packages({
+            'packages_dir': self.packages_dir,
+            'package_path': package_path,
+        })
+        self.assertFalse(res.failed, msg=res.msg)
+        return res
+
+    def test_delta(self):
+        old_data = os.urandom(100 * BLOCK_SIZE)
+        new_data = old_data[:30 * BLOCK_SIZE] + os.urandom(100) + old_data[30 * BLOCK_SIZE + 10:] + b'tail'
+
+        write_file(os.path.join(self.packages_dir, 'myapp-1.0.0-0.rpm'), old_data)
+        package_path = os.path.join(self.tmp_dir, 'myapp-2.0.0-0.rpm')
+        write_file(package_path, new_data)
+
+        delta = self.deliver(package_path)
+        self.assertEqual(read_file(os.path.join(self.packages_dir, 'myapp-2.0.0-0.rpm')), new_data)
+        self.assertLess(delta['delta_size'], 3 * BLOCK_SIZE)
+        self.assertEqual(delta['package_size'], len(new_data))
+
+        # only the last delivered package is kept as a basis
+        self.assertEqual(os.listdir(self.packages_dir), ['myapp-2.0.0-0.rpm'])
+
+    def test_old_packages_are_removed_after_delivery(self):
+        old_path = os.path.join(self.packages_dir, 'myapp-1.0.0-0.rpm')
+        write_file(old_path, os.urandom(10 * BLOCK_SIZE))
+        other_type_path = os.path.join(self.packages_dir, 'myapp-1.0.0-0.deb')
+        write_file(other_type_path, b'deb')
+
+        package_path = os.path.join(self.tmp_dir, 'myapp-2.0.0-0.rpm')
+        write_file(package_path, read_file(old_path) + b'new')
+
+        # getting signatures doesn't remove anything
+        res = get_package_signatures({
+            'packages_dir': self.packages_dir,
+            'package_path': package_path,
+            'block_size': BLOCK_SIZE,
+        })
+        self.assertFalse(res.changed)
+        self.assertEqual(res.fact['basis_path'], old_path)
+        self.assertTrue(os.path.exists(old_path))
+
+        # after delivery, other packages of the same type are removed
+        res = self.remove_old_packages(package_path)
+        self.assertTrue(res.changed)
+        self.assertFalse(os.path.exists(old_path))
+        self.assertTrue(os.path.exists(other_type_path))
+
+        res = self.remove_old_packages(package_path)
+        self.assertFalse(res.changed)
+
+    def test_no_common_blocks(self):
+        write_file(os.path.join(self.packages_dir, 'myapp-1.0.0-0.tar.gz'), b'small')
+        package_path = os.path.join(self.tmp_dir, 'myapp-2.0.0-0.tar.gz')
+        write_file(package_path, os.urandom(10 * BLOCK_SIZE))
+
+        delta = self.deliver(package_path)
+        self.assertIsNone(delta['delta_path'])
+        self.assertEqual(
+            read_file(os.path.join(self.packages_dir, 'myapp-2.0.0-0.tar.gz')),
+            read_file(package_path),
+        )
+
+    def test_delta_is_not_efficient(self):
+        basis_path = os.path.join(self.packages_dir, 'myapp-1.0.0-0.rpm')
+        write_file(basis_path, os.urandom(100 * BLOCK_SIZE))
+        package_path = os.path.join(self.tmp_dir, 'myapp-2.0.0-0.rpm')
+        # only the tail is the same
+        write_file(package_path, os.urandom(60 * BLOCK_SIZE) + read_file(basis_path)[60 * BLOCK_SIZE:])
+
+        signatures = get_package_signatures({
+            'packages_dir': self.packages_dir,
+            'package_path': package_path,
+            'block_size': BLOCK_SIZE,
+        }).fact
+
+        # scanning is stopped once the matched fraction is checked
+        check_size = package_delta.DELTA_CHECK_SIZE
+        package_delta.DELTA_CHECK_SIZE = 10 * BLOCK_SIZE
+        try:
+            ops = package_delta.get_delta_ops(read_file(package_path), signatures['signatures'], BLOCK_SIZE)
+            with self.assertRaises(package_delta.DeltaIsNotEfficient):
+                list(ops)
+        finally:
+            package_delta.DELTA_CHECK_SIZE = check_size
+
+        # the result is reused by other machines with the same basis
+        for _ in range(2):
+            res = make_package_delta({
+                'package_path': package_path,
+                'signatures': signatures,
+                'deltas_dir': self.deltas_dir,
+            })
+            self.assertFalse(res.failed, msg=res.msg)
+            self.assertIsNone(res.fact['delta_path'])
+
+        self.assertEqual(sorted(os.path.splitext(name)[1] for name in os.listdir(self.deltas_dir)), [
+            '.lock', '.nodelta',
+        ])
+
+    def test_delta_is_reused(self):
+        basis_path = os.path.join(self.packages_dir, 'myapp-1.0.0-0.rpm')
+        write_file(basis_path, os.urandom(10 * BLOCK_SIZE))
+        package_path = os.path.join(self.tmp_dir, 'myapp-2.0.0-0.rpm')
+        write_file(package_path, read_file(basis_path) + b'new')
+
+        signatures = get_package_signatures({
+            'packages_dir': self.packages_dir,
+            'package_path': package_path,
+            'block_size': BLOCK_SIZE,
+        }).fact
+
+        delta_paths = set()
+        for _ in range(2):
+            res = make_package_delta({
+                'package_path': package_path,
+                'signatures': signatures,
+                'deltas_dir': self.deltas_dir,
+            })
+            delta_paths.add(res.fact['delta_path'])
+
+        self.assertEqual(len(delta_paths), 1)
+        self.assertEqual(len([name for name in os.listdir(self.deltas_dir) if name.endswith('.delta')]), 1)
+
+        # basis was changed after signatures were computed
+        write_file(basis_path, os.urandom(10 * BLOCK_SIZE))
+        new_package_path = os.path.join(self.packages_dir, 'myapp-2.0.0-0.rpm')
+
+        with self.assertRaises(Exception) as ctx:
+            apply_package_delta({
+                'basis_path': basis_path,
+                'delta_path': delta_paths.pop(),
+                'package_path': new_package_path,
+            })
+        self.assertIn("hash of the result doesn't match", str(ctx.exception))
+        self.assertEqual(os.listdir(self.packages_dir), ['myapp-1.0.0-0.rpm'])
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
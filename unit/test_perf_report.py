@@ -0,0 +1,73 @@
+import unittest
+
+from callback_plugins.cartridge_perf_report import format_report, get_step_name, merge_perf
+
+
+def get_eval_trace(label, time, request_bytes=100, response_bytes=1000):
+    return {
+        'label': label,
+        'calls': 1,
+        'time': time,
+        'request_bytes': request_bytes,
+        'response_bytes': response_bytes,
+    }
+
+
+class TestPerfReport(unittest.TestCase):
+    def test_get_step_name(self):
+        self.assertEqual(get_step_name('/roles/cartridge/tasks/steps/edit_topology.yml:3'), 'edit_topology')
+        self.assertEqual(get_step_name('/roles/cartridge/tasks/prepare.yml:10'), 'prepare')
+        self.assertEqual(get_step_name(None), 'unknown')
+
+    def test_merge_perf(self):
+        report = {'steps': {}, 'labels': {}}
+
+        merge_perf(report, 'edit_topology', 'instance-1', {'evals': [
+            get_eval_trace('get_instances', 0.5),
+            get_eval_trace('edit_topology', 2),
+        ]})
+        merge_perf(report, 'edit_topology', 'instance-1', {'evals': [
+            get_eval_trace('get_instances', 0.25),
+        ]})
+        merge_perf(report, 'wait_instance_started', 'instance-2', {'evals': [
+            get_eval_trace('get_instance_state', 0.125, request_bytes=10, response_bytes=20),
+        ]})
+
+        self.assertEqual(report['steps'], {
+            'edit_topology': {
+                'instance-1': {
+                    'evals_count': 3,
+                    'evals_time': 2.75,
+                    'request_bytes': 300,
+                    'response_bytes': 3000,
+                    'max_eval_time': 2,
+                    'max_eval_label': 'edit_topology',
+                },
+            },
+            'wait_instance_started': {
+                'instance-2': {
+                    'evals_count': 1,
+                    'evals_time': 0.125,
+                    'request_bytes': 10,
+                    'response_bytes': 20,
+                    'max_eval_time': 0.125,
+                    'max_eval_label': 'get_instance_state',
+                },
+            },
+        })
+        self.assertEqual(report['labels'], {
+            'get_instances': {'count': 2, 'time': 0.75},
+            'edit_topology': {'count': 1, 'time': 2},
+            'get_instance_state': {'count': 1, 'time': 0.125},
+        })
+
+        lines = format_report(report)
+        self.assertIn(
+            '  instance-1: 3 evals, 2.750s, sent 300 B, received 3000 B, slowest 2.000s (edit_topology)', lines,
+        )
+        labels_start = lines.index('Top evals by total time:')
+        self.assertEqual(lines[labels_start + 1:], [
+            '  edit_topology: 1 evals, 2.000s',
+            '  get_instances: 2 evals, 0.750s',
+            '  get_instance_state: 1 evals, 0.125s',
+        ])
@@ -0,0 +1,187 @@
+import os
+import shutil
+import sys
+import tempfile
+import time
+import unittest
+
+import module_utils.helpers as helpers
+
+sys.modules['ansible.module_utils.helpers'] = helpers
+
+import module_utils.validate_config as validate_config  # noqa: E402
+import module_utils.disabled_instances as disabled_instances  # noqa: E402
+import module_utils.facts_for_machines as facts_for_machines  # noqa: E402
+
+sys.modules['ansible.module_utils.validate_config'] = validate_config
+sys.modules['ansible.module_utils.disabled_instances'] = disabled_instances
+sys.modules['ansible.module_utils.facts_for_machines'] = facts_for_machines
+from library.cartridge_prepare import prepare  # noqa: E402
+
+
+def call_prepare(hostvars, play_hosts=None, ignore_split_brain=False, cache_dir=None, cache_max_entries=16):
+    if play_hosts is None:
+        play_hosts = list(hostvars.keys())
+
+    return prepare({
+        'play_hosts': play_hosts,
+        'module_hostvars': {
+            name: {
+                'cartridge_app_name': 'myapp',
+                'config': {'advertise_uri': '%s:3301' % instance_vars['ansible_host']},
+                'disabled': instance_vars.get('disabled', False),
+                'instance_info': {
+                    'disabled_instances': instance_vars['disabled_instances'],
+                    'topology_checksum': instance_vars.get('checksum', 1),
+                },
+                'ansible_host': instance_vars['ansible_host'],
+            }
+            for name, instance_vars in hostvars.items()
+        },
+        'ignore_split_brain': ignore_split_brain,
+        'validate_config_all_errors': False,
+        'cache_dir': cache_dir,
+        'cache_ttl': 3600,
+        'cache_max_entries': cache_max_entries,
+    })
+
+
+class TestPrepare(unittest.TestCase):
+    def setUp(self):
+        self.maxDiff = None
+        helpers.WARNINGS = []
+
+    def test_prepare(self):
+        res = call_prepare({
+            'instance-1': {'ansible_host': 'host-1', 'disabled_instances': ['instance-3']},
+            'instance-2': {'ansible_host': 'host-1', 'disabled_instances': ['instance-3']},
+            'instance-3': {'ansible_host': 'host-2', 'disabled_instances': [], 'checksum': 2, 'disabled': True},
+            'instance-4': {'ansible_host': 'host-2', 'disabled_instances': ['instance-3']},
+        })
+        self.assertFalse(res.failed, msg=res.msg)
+        self.assertFalse(res.changed)
+
+        self.assertEqual(res.kwargs['cluster_disabled_instances'], ['instance-3'])
+        self.assertEqual(res.kwargs['inventory_disabled_instances'], ['instance-3'])
+        self.assertEqual(sorted(res.kwargs['single_instances_for_each_machine']), ['instance-1', 'instance-4'])
+        self.assertEqual(res.kwargs['instances_from_same_machine'], {
+            'instance-1': ['instance-1', 'instance-2'],
+            'instance-2': ['instance-1', 'instance-2'],
+            'instance-3': ['instance-3', 'instance-4'],
+            'instance-4': ['instance-3', 'instance-4'],
+        })
+
+    def test_invalid_config(self):
+        res = call_prepare({
+            'instance-1': {'ansible_host': 'host-1', 'disabled_instances': []},
+            'instance-2': {'ansible_host': 'host-1', 'disabled_instances': [], 'disabled': 'yes'},
+        })
+        self.assertTrue(res.failed)
+        self.assertIn('.disabled must be', res.msg)
+
+    def test_split_brain(self):
+        hostvars = {
+            'instance-1': {'ansible_host': 'host-1', 'disabled_instances': ['instance-3']},
+            'instance-2': {'ansible_host': 'host-1', 'disabled_instances': ['instance-3']},
+            'instance-3': {'ansible_host': 'host-2', 'disabled_instances': []},
+        }
+
+        res = call_prepare(hostvars)
+        self.assertTrue(res.failed)
+        self.assertIn('It seems that you have split brain in your cluster', res.msg)
+
+        res = call_prepare(hostvars, ignore_split_brain=True)
+        self.assertFalse(res.failed, msg=res.msg)
+        self.assertEqual(res.kwargs['cluster_disabled_instances'], ['instance-3'])
+        self.assertIn(
+            'It seems that you have split brain in your cluster.',
+            res.get_exit_json()['warnings'],
+        )
+
+
+class TestPrepareCache(unittest.TestCase):
+    def setUp(self):
+        self.maxDiff = None
+        helpers.WARNINGS = []
+        self.cache_dir = tempfile.mkdtemp()
+        self.hostvars = {
+            'instance-1': {'ansible_host': 'host-1', 'disabled_instances': []},
+            'instance-2': {'ansible_host': 'host-2', 'disabled_instances': []},
+        }
+
+    def get_cache_files(self):
+        return sorted(os.listdir(self.cache_dir))
+
+    def test_cache_hit(self):
+        res = call_prepare(self.hostvars, cache_dir=self.cache_dir)
+        self.assertFalse(res.failed, msg=res.msg)
+        self.assertFalse(res.kwargs['cached'])
+        self.assertEqual(len(self.get_cache_files()), 1)
+
+        cached_res = call_prepare(self.hostvars, cache_dir=self.cache_dir)
+        self.assertFalse(cached_res.failed, msg=cached_res.msg)
+        self.assertTrue(cached_res.kwargs['cached'])
+        self.assertEqual(cached_res.get_exit_json()['warnings'], res.get_exit_json()['warnings'])
+        for name in [
+            'cluster_disabled_instances',
+            'inventory_disabled_instances',
+            'single_instances_for_each_machine',
+            'instances_from_same_machine',
+        ]:
+            self.assertEqual(cached_res.kwargs[name], res.kwargs[name])
+
+        # remote state is changed
+        self.hostvars['instance-1']['disabled_instances'] = ['instance-2']
+        self.hostvars['instance-2']['disabled_instances'] = ['instance-2']
+
+        res = call_prepare(self.hostvars, cache_dir=self.cache_dir)
+        self.assertFalse(res.failed, msg=res.msg)
+        self.assertFalse(res.kwargs['cached'])
+        self.assertEqual(res.kwargs['cluster_disabled_instances'], ['instance-2'])
+        self.assertEqual(len(self.get_cache_files()), 2)
+
+        # inventory is changed
+        self.hostvars['instance-2']['ansible_host'] = 'host-3'
+
+        res = call_prepare(self.hostvars, cache_dir=self.cache_dir)
+        self.assertFalse(res.failed, msg=res.msg)
+        self.assertFalse(res.kwargs['cached'])
+        self.assertEqual(len(self.get_cache_files()), 3)
+
+    def test_split_brain_warning_is_cached(self):
+        self.hostvars['instance-1']['disabled_instances'] = ['instance-2']
+
+        res = call_prepare(self.hostvars, ignore_split_brain=True, cache_dir=self.cache_dir)
+        self.assertFalse(res.failed, msg=res.msg)
+        self.assertFalse(res.kwargs['cached'])
+
+        res = call_prepare(self.hostvars, ignore_split_brain=True, cache_dir=self.cache_dir)
+        self.assertTrue(res.kwargs['cached'])
+        self.assertIn(
+            'It seems that you have split brain in your cluster.',
+            res.get_exit_json()['warnings'],
+        )
+
+    def test_failed_result_isnt_cached(self):
+        self.hostvars['instance-1']['disabled'] = 'yes'
+
+        res = call_prepare(self.hostvars, cache_dir=self.cache_dir)
+        self.assertTrue(res.failed)
+        self.assertEqual(self.get_cache_files(), [])
+
+    def test_cache_eviction(self):
+        for i in range(4):
+            hostvars = {'instance-%d' % i: {'ansible_host': 'host-1', 'disabled_instances': []}}
+            res = call_prepare(hostvars, cache_dir=self.cache_dir, cache_max_entries=2)
+            self.assertFalse(res.failed, msg=res.msg)
+            # mtime resolution can be low
+            time.sleep(0.01)
+
+        self.assertEqual(len(self.get_cache_files()), 2)
+
+        # the latest entries are kept
+        res = call_prepare(hostvars, cache_dir=self.cache_dir, cache_max_entries=2)
+        self.assertTrue(res.kwargs['cached'])
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir)
@@ -2,8 +2,15 @@ import sys
 import unittest
 
 import module_utils.helpers as helpers
+import module_utils.backup_archive as backup_archive
 
 sys.modules['ansible.module_utils.helpers'] = helpers
+sys.modules['ansible.module_utils.backup_archive'] = backup_archive
+import module_utils.backup_manifest as backup_manifest
+import module_utils.hardlink_backup as hardlink_backup
+
+sys.modules['ansible.module_utils.backup_manifest'] = backup_manifest
+sys.modules['ansible.module_utils.hardlink_backup'] = hardlink_backup
 from library.cartridge_restore_instance import is_path_of_instance
 
 
@@ -13,6 +20,7 @@ class TestRestoreInstance(unittest.TestCase):
 
     def test_is_path_of_instance(self):
         self.assertTrue(is_path_of_instance('/backups/myapp.i-1.tar.gz', 'myapp.i-1'))
+        self.assertTrue(is_path_of_instance('/backups/myapp.i-1.2020-01-01-010101.tar', 'myapp.i-1'))
         self.assertTrue(is_path_of_instance('/backups/myapp.i-1.2020-01-01.tar.gz', 'myapp.i-1'))
         self.assertTrue(is_path_of_instance('/backups/myapp.i-1.2020-01-01-010101.tar.gz', 'myapp.i-1'))
         self.assertTrue(is_path_of_instance('/backups/myapp.i-1.1627650508.tar.gz', 'myapp.i-1'))
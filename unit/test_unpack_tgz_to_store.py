@@ -0,0 +1,169 @@
+import grp
+import io
+import os
+import pwd
+import shutil
+import sys
+import tarfile
+import tempfile
+import unittest
+
+import module_utils.helpers as helpers
+import module_utils.dists_store as dists_store
+from unit.packages import write_tgz
+
+sys.modules['ansible.module_utils.helpers'] = helpers
+sys.modules['ansible.module_utils.dists_store'] = dists_store
+from library.cartridge_unpack_tgz_to_store import unpack_tgz_to_store
+from library.cartridge_remove_unused_dists_objects import remove_unused_dists_objects
+
+
+def get_current_user_and_group():
+    return pwd.getpwuid(os.getuid()).pw_name, grp.getgrgid(os.getgid()).gr_name
+
+
+def call_unpack_tgz_to_store(package_path, dist_dir, store_dir):
+    app_user, app_group = get_current_user_and_group()
+    return unpack_tgz_to_store({
+        'package_path': package_path,
+        'dist_dir': dist_dir,
+        'store_dir': store_dir,
+        'app_user': app_user,
+        'app_group': app_group,
+    })
+
+
+def read_file(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+class TestUnpackTgzToStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.install_dir = os.path.join(self.tmp_dir, 'install')
+        self.store_dir = os.path.join(self.tmp_dir, 'store')
+
+    def write_package(self, version, files):
+        package_path = os.path.join(self.tmp_dir, 'myapp-%s.tar.gz' % version)
+        write_tgz(package_path, dict(('myapp/%s' % name, content) for name, content in files.items()))
+        return package_path
+
+    def get_objects(self):
+        objects = []
+        for root, _, file_names in os.walk(self.store_dir):
+            objects.extend(os.path.join(root, name) for name in file_names)
+        return objects
+
+    def test_unpack(self):
+        package_path = self.write_package('1.0.0-0', {
+            'init.lua': b'return 1',
+            'tarantool': b'binary',
+            '.rocks/share/module.lua': b'return 2',
+            '.rocks/share/same.lua': b'return 2',
+        })
+        dist_dir = os.path.join(self.install_dir, 'myapp-1.0.0-0')
+
+        res = call_unpack_tgz_to_store(package_path, dist_dir, self.store_dir)
+        self.assertFalse(res.failed, msg=res.msg)
+        self.assertTrue(res.changed)
+        self.assertEqual(res.kwargs['written_objects_count'], 3)
+        self.assertEqual(res.kwargs['linked_files_count'], 4)
+
+        self.assertEqual(read_file(os.path.join(dist_dir, 'init.lua')), b'return 1')
+        self.assertEqual(read_file(os.path.join(dist_dir, '.rocks/share/same.lua')), b'return 2')
+        self.assertTrue(os.path.samefile(
+            os.path.join(dist_dir, '.rocks/share/module.lua'),
+            os.path.join(dist_dir, '.rocks/share/same.lua'),
+        ))
+        self.assertEqual(len(self.get_objects()), 3)
+
+        # unpack again
+        res = call_unpack_tgz_to_store(package_path, dist_dir, self.store_dir)
+        self.assertFalse(res.failed, msg=res.msg)
+        self.assertFalse(res.changed)
+        self.assertEqual(res.kwargs['written_objects_count'], 0)
+
+        # new version - only changed file is written
+        new_package_path = self.write_package('2.0.0-0', {
+            'init.lua': b'return 3',
+            'tarantool': b'binary',
+            '.rocks/share/module.lua': b'return 2',
+        })
+        new_dist_dir = os.path.join(self.install_dir, 'myapp-2.0.0-0')
+
+        res = call_unpack_tgz_to_store(new_package_path, new_dist_dir, self.store_dir)
+        self.assertFalse(res.failed, msg=res.msg)
+        self.assertTrue(res.changed)
+        self.assertEqual(res.kwargs['written_objects_count'], 1)
+        self.assertEqual(res.kwargs['linked_files_count'], 3)
+
+        self.assertEqual(read_file(os.path.join(new_dist_dir, 'init.lua')), b'return 3')
+        self.assertEqual(read_file(os.path.join(dist_dir, 'init.lua')), b'return 1')
+        self.assertTrue(os.path.samefile(
+            os.path.join(dist_dir, 'tarantool'),
+            os.path.join(new_dist_dir, 'tarantool'),
+        ))
+        self.assertEqual(len(self.get_objects()), 4)
+
+        # rotate dists
+        shutil.rmtree(dist_dir)
+
+        res = remove_unused_dists_objects({'store_dir': self.store_dir})
+        self.assertFalse(res.failed, msg=res.msg)
+        self.assertTrue(res.changed)
+        self.assertEqual(res.kwargs['removed_count'], 1)
+        self.assertEqual(len(self.get_objects()), 3)
+
+        res = remove_unused_dists_objects({'store_dir': self.store_dir})
+        self.assertFalse(res.changed)
+
+    def test_modes_and_links(self):
+        package_path = os.path.join(self.tmp_dir, 'myapp-1.0.0-0.tar.gz')
+
+        with tarfile.open(package_path, 'w:gz') as tar:
+            for name, mode in [('./myapp/run.sh', 0o755), ('./myapp/init.lua', 0o644)]:
+                info = tarfile.TarInfo(name)
+                info.size = len(b'same')
+                info.mode = mode
+                tar.addfile(info, io.BytesIO(b'same'))
+
+            info = tarfile.TarInfo('./myapp/link.lua')
+            info.type = tarfile.SYMTYPE
+            info.linkname = 'init.lua'
+            tar.addfile(info)
+
+            info = tarfile.TarInfo('./myapp/hardlink.sh')
+            info.type = tarfile.LNKTYPE
+            info.linkname = './myapp/run.sh'
+            tar.addfile(info)
+
+        dist_dir = os.path.join(self.install_dir, 'myapp-1.0.0-0')
+
+        res = call_unpack_tgz_to_store(package_path, dist_dir, self.store_dir)
+        self.assertFalse(res.failed, msg=res.msg)
+
+        # files with the same content and different modes are different objects,
+        # files are read-only since they are shared by distributions
+        self.assertEqual(len(self.get_objects()), 2)
+        self.assertEqual(os.stat(os.path.join(dist_dir, 'run.sh')).st_mode & 0o777, 0o555)
+        self.assertEqual(os.stat(os.path.join(dist_dir, 'init.lua')).st_mode & 0o777, 0o444)
+
+        self.assertEqual(os.readlink(os.path.join(dist_dir, 'link.lua')), 'init.lua')
+        self.assertTrue(os.path.samefile(
+            os.path.join(dist_dir, 'hardlink.sh'),
+            os.path.join(dist_dir, 'run.sh'),
+        ))
+
+    def test_path_outside_of_dist(self):
+        package_path = self.write_package('1.0.0-0', {
+            '../init.lua': b'return 1',
+        })
+        dist_dir = os.path.join(self.install_dir, 'myapp-1.0.0-0')
+
+        with self.assertRaises(Exception) as ctx:
+            call_unpack_tgz_to_store(package_path, dist_dir, self.store_dir)
+        self.assertIn("Package contains path outside of application directory", str(ctx.exception))
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
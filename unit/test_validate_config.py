@@ -6,7 +6,7 @@ import unittest
 import module_utils.helpers as helpers
 
 sys.modules['ansible.module_utils.helpers'] = helpers
-from library.cartridge_validate_config import validate_config
+from module_utils.validate_config import validate_config, check_schema  # noqa: E402
 
 PARAMS_BY_TYPES = {
     str: {
@@ -17,6 +17,8 @@ PARAMS_BY_TYPES = {
         'cartridge_app_instances_dir',
         'cartridge_delivered_package_path',
         'cartridge_package_path',
+        'cartridge_delta_delivery_dir',
+        'cartridge_package_cache_dir',
         'cartridge_app_name',
         'cartridge_cluster_cookie',
         'replicaset_alias',
@@ -36,6 +38,9 @@ PARAMS_BY_TYPES = {
         'cartridge_failover_params.etcd2_params.username',
         'cartridge_failover_params.etcd2_params.password',
         'cartridge_custom_steps_dir',
+        'cartridge_prepare_cache_dir',
+        'cartridge_package_info_cache_dir',
+        'cartridge_dists_store_dir',
         'cartridge_conf_dir',
         'cartridge_run_dir',
         'cartridge_data_dir',
@@ -51,6 +56,8 @@ PARAMS_BY_TYPES = {
         'allowed_members_states[0]',
         'cartridge_remote_backups_dir',
         'cartridge_fetch_backups_dir',
+        'cartridge_backup_compression',
+        'cartridge_backup_mode',
         'cartridge_restore_backup_path',
         'cartridge_restore_backup_path_local',
         'cartridge_app_config_path',
@@ -75,6 +82,10 @@ PARAMS_BY_TYPES = {
         'cartridge_configure_tmpfiles',
         'cartridge_install_tarantool_for_tgz',
         'cartridge_remove_temporary_files',
+        'cartridge_console_broker',
+        'cartridge_validate_config_all_errors',
+        'cartridge_needs_restart_by_hashes',
+        'cartridge_check_instances_by_machine',
         'cartridge_ignore_split_brain',
         'cartridge_failover_params.fencing_enabled',
         'edit_topology_allow_missed_instances',
@@ -83,6 +94,7 @@ PARAMS_BY_TYPES = {
         'cartridge_eval_with_retries',
         'cartridge_not_save_cookie_in_app_config',
         'cartridge_fetch_backups',
+        'cartridge_incremental_backups',
         'cartridge_force_restore',
         'cartridge_allow_alien_backup',
         'cartridge_skip_cleanup_on_restore',
@@ -125,6 +137,11 @@ PARAMS_BY_TYPES = {
         'cartridge_failover_params.fencing_timeout',
         'cartridge_failover_params.fencing_pause',
         'cartridge_keep_num_latest_dists',
+        'cartridge_console_broker_idle_timeout',
+        'cartridge_prepare_cache_ttl',
+        'cartridge_prepare_cache_max_entries',
+        'cartridge_package_cache_max_size',
+        'cartridge_backup_compression_level',
         'twophase_netbox_call_timeout',
         'twophase_upload_config_timeout',
         'twophase_apply_config_timeout',
@@ -152,13 +169,14 @@ PARAMS_BY_TYPES = {
 }
 
 
-def call_validate_config(module_hostvars, play_hosts=None):
+def call_validate_config(module_hostvars, play_hosts=None, all_errors=False):
     if play_hosts is None:
         play_hosts = module_hostvars.keys()
 
     return validate_config({
         'play_hosts': play_hosts,
         'module_hostvars': module_hostvars,
+        'all_errors': all_errors,
     })
 
 
@@ -688,6 +706,52 @@ class TestValidateConfig(unittest.TestCase):
             res.msg
         )
 
+    def test_backup_compression(self):
+        for compression, compression_level, errmsg in [
+            ('parallel_gzip', 1, None),
+            ('none', 9, None),
+            ('zstd', 9, "Backup compression should be one of ['none', 'gzip', 'parallel_gzip']"),
+            ('gzip', 0, "'cartridge_backup_compression_level' should be from 1 to 9"),
+        ]:
+            res = call_validate_config({
+                'instance-1': {
+                    'cartridge_app_name': 'app-name',
+                    'cartridge_cluster_cookie': 'cookie',
+                    'config': {'advertise_uri': 'localhost:3301'},
+
+                    'cartridge_backup_compression': compression,
+                    'cartridge_backup_compression_level': compression_level,
+                },
+            })
+            if errmsg is None:
+                self.assertFalse(res.failed, msg=res.msg)
+            else:
+                self.assertTrue(res.failed)
+                self.assertIn(errmsg, res.msg)
+
+    def test_backup_mode(self):
+        for backup_mode, fetch_backups, errmsg in [
+            ('hardlinks', False, None),
+            ('archive', True, None),
+            ('copy', False, "Backup mode should be one of ['archive', 'hardlinks']"),
+            ('hardlinks', True, "Backups can't be fetched in 'hardlinks' backup mode"),
+        ]:
+            res = call_validate_config({
+                'instance-1': {
+                    'cartridge_app_name': 'app-name',
+                    'cartridge_cluster_cookie': 'cookie',
+                    'config': {'advertise_uri': 'localhost:3301'},
+
+                    'cartridge_backup_mode': backup_mode,
+                    'cartridge_fetch_backups': fetch_backups,
+                },
+            })
+            if errmsg is None:
+                self.assertFalse(res.failed, msg=res.msg)
+            else:
+                self.assertTrue(res.failed)
+                self.assertIn(errmsg, res.msg)
+
     def test_failover(self):
         res = call_validate_config({
             'instance-1': {
@@ -1152,6 +1216,111 @@ class TestValidateConfig(unittest.TestCase):
             res.msg
         )
 
+    def test_all_errors(self):
+        module_hostvars = {
+            'instance-1': {
+                'cartridge_app_name': 'app-name',
+                'config': {'advertise_uri': 'localhost:3301', 'memtx_memory': 'big'},
+                'weight': 'heavy',
+            },
+            'instance-2': {
+                'cartridge_app_name': 'app-name',
+                'config': {'advertise_uri': 'localhost'},
+            },
+            'instance-3': {
+                'cartridge_app_name': 'app-name',
+                'config': {'advertise_uri': 'localhost:3303'},
+                'cartridge_failover_params': {'mode': 'unknown'},
+            },
+        }
+        play_hosts = ['instance-1', 'instance-2', 'instance-3']
+
+        res = call_validate_config(module_hostvars, play_hosts)
+        self.assertTrue(res.failed)
+        self.assertEqual(len(res.kwargs['errors']), 1)
+        self.assertIn(res.kwargs['errors'][0], [
+            ".weight must be {}".format(int),
+            ".config.memtx_memory must be {}".format(int),
+        ])
+
+        res = call_validate_config(module_hostvars, play_hosts, all_errors=True)
+        self.assertTrue(res.failed)
+        self.assertEqual(sorted(res.kwargs['errors']), sorted([
+            ".weight must be {}".format(int),
+            ".config.memtx_memory must be {}".format(int),
+            "Instance advertise_uri must be specified as '<host>:<port>' ('instance-2')",
+            "Failover Failover mode should be one of ['stateful', 'eventual', 'disabled']",
+        ]))
+        for errmsg in res.kwargs['errors']:
+            self.assertIn(errmsg, res.msg)
+
+    def test_common_params_types_checked_once(self):
+        instance_vars = {
+            'cartridge_app_name': 'app-name',
+            'cartridge_auth': {'users': [{'username': 'user-1'}]},
+        }
+        module_hostvars = {
+            'instance-1': dict(instance_vars, config={'advertise_uri': 'localhost:3301'}),
+            'instance-2': dict(instance_vars, config={'advertise_uri': 'localhost:3302'}),
+        }
+        play_hosts = ['instance-1', 'instance-2']
+
+        res = call_validate_config(module_hostvars, play_hosts)
+        self.assertFalse(res.failed, msg=res.msg)
+
+        # changed value is checked
+        module_hostvars['instance-2']['cartridge_auth'] = {'users': [{'username': 1}]}
+
+        res = call_validate_config(module_hostvars, play_hosts)
+        self.assertTrue(res.failed)
+        self.assertEqual(res.msg, ".cartridge_auth.users[0].username must be {}".format(str))
+
+    def test_common_params_equal_values_of_other_types(self):
+        # {'enabled': 1} == {'enabled': True}, but only the second one is valid
+        module_hostvars = {
+            'instance-1': {
+                'cartridge_app_name': 'app-name',
+                'cartridge_auth': {'enabled': True},
+                'config': {'advertise_uri': 'localhost:3301'},
+            },
+            'instance-2': {
+                'cartridge_app_name': 'app-name',
+                'cartridge_auth': {'enabled': 1},
+                'config': {'advertise_uri': 'localhost:3302'},
+            },
+        }
+
+        for play_hosts in [['instance-1', 'instance-2'], ['instance-2', 'instance-1']]:
+            res = call_validate_config(module_hostvars, play_hosts)
+            self.assertTrue(res.failed, msg=play_hosts)
+            self.assertEqual(res.msg, ".cartridge_auth.enabled must be {}".format(bool))
+
+
+class TestCheckSchema(unittest.TestCase):
+    def test_check_schema(self):
+        schema = {
+            'name': str,
+            'params': {'count': int},
+            'items': [{'enabled': bool}],
+        }
+
+        self.assertIsNone(check_schema(schema, None))
+        self.assertIsNone(check_schema(schema, {}))
+        self.assertIsNone(check_schema(schema, {
+            'name': 'name',
+            'params': {'count': 1, 'unknown': 'value'},
+            'items': [{'enabled': True}, None, {}],
+        }))
+
+        self.assertEqual(check_schema(schema, []), " must be {}".format(dict))
+        self.assertEqual(check_schema(schema, {'params': {'count': '1'}}), ".params.count must be {}".format(int))
+        self.assertEqual(check_schema(schema, {'items': {}}), ".items must be {}".format(list))
+        self.assertEqual(
+            check_schema(schema, {'items': [{'enabled': True}, {'enabled': 'yes'}]}),
+            ".items[1].enabled must be {}".format(bool),
+        )
+        self.assertEqual(check_schema({'name': 'str'}, {'name': 'name'}), 'Wrong type')
+
 
 if __name__ == '__main__':
     unittest.main()